@@ -0,0 +1,123 @@
+"""
+注释擦除基准测试
+
+在单页上生成大量随机笔画，比较空间索引擦除与逐笔画全量扫描的耗时，
+以及橡皮擦拖动路径的批量查询和命中判断的 NumPy / 纯 Python 实现。
+
+用法:
+    python benchmarks/bench_annotation_erase.py [--strokes 10000] [--queries 500]
+"""
+
+import argparse
+import random
+import sys
+import time
+import uuid
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+from huawei_pdf_reader.stroke_geometry import HAS_NUMPY, strokes_hit_path
+
+
+PAGE_WIDTH = 1200.0
+PAGE_HEIGHT = 1700.0
+
+
+def make_stroke(rng: random.Random, points_per_stroke: int) -> Stroke:
+    """生成一条随机游走的笔画"""
+    x = rng.uniform(0, PAGE_WIDTH)
+    y = rng.uniform(0, PAGE_HEIGHT)
+    points = []
+    for i in range(points_per_stroke):
+        x += rng.uniform(-4, 4)
+        y += rng.uniform(-4, 4)
+        points.append(StrokePoint(x=x, y=y, pressure=0.5, timestamp=float(i)))
+    return Stroke(
+        id=str(uuid.UUID(int=rng.getrandbits(128))),
+        pen_type=PenType.BALLPOINT,
+        color="#000000",
+        width=2.0,
+        points=points,
+    )
+
+
+def full_scan(strokes, x: float, y: float, radius: float, vectorize=None):
+    """不使用索引的逐笔画扫描"""
+    hits = strokes_hit_path(strokes, [(x, y)], radius, vectorize=vectorize)
+    return [s.id for s, hit in zip(strokes, hits) if hit]
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--strokes", type=int, default=10000)
+    parser.add_argument("--points", type=int, default=30, help="每条笔画的点数")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--drag-points", type=int, default=8, help="每次拖动路径的点数")
+    parser.add_argument("--radius", type=float, default=15.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    strokes = [make_stroke(rng, args.points) for _ in range(args.strokes)]
+    queries = [
+        (rng.uniform(0, PAGE_WIDTH), rng.uniform(0, PAGE_HEIGHT))
+        for _ in range(args.queries)
+    ]
+
+    engine = AnnotationEngine()
+    start = time.perf_counter()
+    for stroke in strokes:
+        engine.add_stroke_to_page(1, stroke)
+    build = time.perf_counter() - start
+
+    indexed_hits, indexed = timed(
+        lambda: [engine.hit_test(1, x, y, args.radius) for x, y in queries])
+    scan_hits, scan = timed(
+        lambda: [full_scan(strokes, x, y, args.radius, vectorize=False) for x, y in queries[:20]])
+    assert indexed_hits[:20] == scan_hits, "indexed hit-test differs from full scan"
+    scan = scan / 20 * len(queries)
+
+    print(f"strokes={args.strokes} points/stroke={args.points} queries={args.queries} "
+          f"radius={args.radius} numpy={HAS_NUMPY}")
+    print(f"index build:          {build * 1000:9.1f} ms")
+    print(f"full scan (python):   {scan / args.queries * 1000:9.3f} ms/query")
+    if HAS_NUMPY:
+        _, scan_np = timed(
+            lambda: [full_scan(strokes, x, y, args.radius, vectorize=True) for x, y in queries[:20]])
+        print(f"full scan (numpy):    {scan_np / 20 * 1000:9.3f} ms/query")
+    print(f"indexed hit-test:     {indexed / args.queries * 1000:9.3f} ms/query "
+          f"({scan / indexed:.0f}x)")
+
+    # 拖动路径：一次查询整段路径，而不是逐点查询
+    drags = []
+    for x, y in queries:
+        path = [(x, y)]
+        for _ in range(args.drag_points - 1):
+            x += rng.uniform(-20, 20)
+            y += rng.uniform(-20, 20)
+            path.append((x, y))
+        drags.append(path)
+    _, path_time = timed(
+        lambda: [engine.hit_test_path(1, path, args.radius) for path in drags])
+    print(f"indexed drag path:    {path_time / args.queries * 1000:9.3f} ms/path "
+          f"({args.drag_points} points)")
+
+    erased, erase = timed(
+        lambda: sum(len(engine.erase_along(1, path, args.radius)) for path in drags))
+    print(f"indexed drag erase:   {erase / args.queries * 1000:9.3f} ms/path "
+          f"({erased} strokes erased)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+一笔成型形状识别基准测试
+
+生成带抖动的直线、圆、矩形、三角形和随手涂鸦，比较识别流水线的
+纯 Python / NumPy 实现，以及是否先重采样到固定点数的吞吐量。
+
+用法:
+    python benchmarks/bench_shape_recognition.py [--strokes 2000] [--points 200]
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+from huawei_pdf_reader.shape_recognizer import HAS_NUMPY, ShapeRecognizerPipeline
+
+
+# 各形状识别结果的点数，用于判断是否识别为正确的形状
+EXPECTED_POINTS = {"line": 2, "circle": 37, "rectangle": 5, "triangle": 4, "scribble": None}
+
+def outline(kind: str, rng: random.Random, count: int):
+    """沿形状轮廓均匀取 count 个点（未加抖动）"""
+    size = rng.uniform(60, 300)
+    if kind == "circle":
+        return [
+            (size * math.cos(2 * math.pi * i / (count - 1)),
+             size * math.sin(2 * math.pi * i / (count - 1)))
+            for i in range(count)
+        ]
+    if kind == "line":
+        angle = rng.uniform(0, 2 * math.pi)
+        return [(size * math.cos(angle) * i / count, size * math.sin(angle) * i / count)
+                for i in range(count)]
+    if kind == "scribble":
+        x = y = 0.0
+        coords = []
+        for _ in range(count):
+            x += rng.uniform(-8, 8)
+            y += rng.uniform(-8, 8)
+            coords.append((x, y))
+        return coords
+    if kind == "rectangle":
+        h = size * rng.uniform(0.5, 1.0)
+        corners = [(0, 0), (size, 0), (size, h), (0, h), (0, 0)]
+    else:
+        corners = [(size / 2, 0), (size, 0), (size / 2, size * 0.9), (0, 0), (size / 2, 0)]
+    lengths = [math.dist(a, b) for a, b in zip(corners, corners[1:])]
+    total = sum(lengths)
+    coords = []
+    for i in range(count):
+        distance = total * i / (count - 1)
+        for (x0, y0), (x1, y1), length in zip(corners, corners[1:], lengths):
+            if distance <= length:
+                break
+            distance -= length
+        t = min(1.0, distance / length)
+        coords.append((x0 + (x1 - x0) * t, y0 + (y1 - y0) * t))
+    return coords
+
+
+def make_stroke(kind: str, rng: random.Random, count: int, jitter: float) -> Stroke:
+    points = [
+        StrokePoint(x=x + rng.uniform(-jitter, jitter), y=y + rng.uniform(-jitter, jitter),
+                    pressure=0.5, timestamp=float(i))
+        for i, (x, y) in enumerate(outline(kind, rng, count))
+    ]
+    return Stroke(id=kind, pen_type=PenType.BALLPOINT, color="#000000", width=2.0, points=points)
+
+
+def run(pipeline: ShapeRecognizerPipeline, strokes):
+    start = time.perf_counter()
+    results = [pipeline.recognize(stroke) for stroke in strokes]
+    return results, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--strokes", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=200, help="每条笔画的点数")
+    parser.add_argument("--jitter", type=float, default=2.0, help="坐标抖动幅度")
+    parser.add_argument("--resample", type=int, default=64, help="重采样点数")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    kinds = ["line", "circle", "rectangle", "triangle", "scribble"]
+    strokes = [
+        make_stroke(kinds[i % len(kinds)], rng, args.points, args.jitter)
+        for i in range(args.strokes)
+    ]
+
+    print(f"strokes={args.strokes} points/stroke={args.points} jitter={args.jitter} "
+          f"numpy={HAS_NUMPY}")
+    modes = [("python", False)] + ([("numpy", True)] if HAS_NUMPY else [])
+    baseline = None
+    for label, vectorize in modes:
+        for resample in (None, args.resample):
+            pipeline = ShapeRecognizerPipeline(resample=resample, vectorize=vectorize)
+            results, elapsed = run(pipeline, strokes)
+            shapes = [None if r is None else len(r.points) for r in results]
+            if resample is None:
+                if baseline is None:
+                    baseline = shapes
+                assert shapes == baseline, "vectorized recognition differs from python"
+            hits = Counter(
+                stroke.id for stroke, points in zip(strokes, shapes)
+                if points == EXPECTED_POINTS[stroke.id]
+            )
+            totals = Counter(stroke.id for stroke in strokes)
+            recognized = ", ".join(f"{kind} {hits[kind]}/{totals[kind]}" for kind in kinds)
+            name = f"{label} resample={resample or 'off'}"
+            print(f"{name:<22} {len(strokes) / elapsed:9.0f} strokes/s   {recognized}")
+
+
+if __name__ == "__main__":
+    main()
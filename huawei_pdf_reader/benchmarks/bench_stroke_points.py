@@ -0,0 +1,95 @@
+"""
+笔画点存储基准测试
+
+比较 StrokePoint 对象列表与列式 StrokePoints 的内存占用，
+以及笔画表 JSON 格式与二进制列式格式的序列化耗时。
+
+用法:
+    python benchmarks/bench_stroke_points.py [--strokes 2000] [--points 200]
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint, StrokePoints
+
+
+def sample(i: int, j: int):
+    return 100.0 + j * 0.731, 200.0 + i * 0.113 - j * 0.297, 0.4 + (j % 7) / 20, 1.7e9 + i + j * 0.008
+
+
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--strokes", type=int, default=2000)
+    parser.add_argument("--points", type=int, default=200, help="每条笔画的点数")
+    args = parser.parse_args()
+    total = args.strokes * args.points
+
+    def build_objects():
+        return [
+            [StrokePoint(*sample(i, j)) for j in range(args.points)]
+            for i in range(args.strokes)
+        ]
+
+    def build_columns():
+        result = []
+        for i in range(args.strokes):
+            points = StrokePoints()
+            for j in range(args.points):
+                points.append_sample(*sample(i, j))
+            result.append(points)
+        return result
+
+    _, object_bytes = measure(build_objects)
+    columns, column_bytes = measure(build_columns)
+    print(f"strokes={args.strokes} points/stroke={args.points} total points={total}")
+    print(f"StrokePoint list:  {object_bytes / total:7.1f} bytes/point")
+    print(f"StrokePoints:      {column_bytes / total:7.1f} bytes/point "
+          f"({object_bytes / column_bytes:.1f}x smaller)")
+
+    strokes = [
+        Stroke(id=str(i), pen_type=PenType.BALLPOINT, color="#000000", width=2.0, points=points)
+        for i, points in enumerate(columns)
+    ]
+    json_rows = [json.dumps(s.to_dict()) for s in strokes]
+    packed_rows = [s.to_bytes() for s in strokes]
+
+    encode_json = timed(lambda: [json.dumps(s.to_dict()) for s in strokes])
+    encode_packed = timed(lambda: [s.to_bytes() for s in strokes])
+    decode_json = timed(lambda: [Stroke.from_dict(json.loads(row)) for row in json_rows])
+    decode_packed = timed(lambda: [Stroke.from_bytes(row) for row in packed_rows])
+
+    print(f"JSON encode/decode:   {encode_json * 1000:8.1f} / {decode_json * 1000:8.1f} ms "
+          f"({sum(map(len, json_rows)) / total:.1f} bytes/point)")
+    print(f"packed encode/decode: {encode_packed * 1000:8.1f} / {decode_packed * 1000:8.1f} ms "
+          f"({sum(map(len, packed_rows)) / total:.1f} bytes/point)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,27 @@
 处理手写笔输入和注释管理。
 """
 
-import math
+import bisect
 import time
 import uuid
 from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
 
-from .models import Annotation, PenType, Stroke, StrokePoint
+from .annotation_history import (
+    COMMAND_ADD, COMMAND_CLEAR, COMMAND_ERASE, COMMAND_REPLACE,
+    AnnotationHistory, HistoryChange, HistoryEntry, StrokeRecord,
+)
+from .annotation_journal import RECORD_UPSERT, AnnotationJournal, JournalRecord
+from .ink_latency import STAGE_ENGINE, InkLatencyMonitor
+from .models import Annotation, PenType, Stroke
+from .shape_recognizer import ShapeRecognizerPipeline, SpeculativeShapeRecognizer
+from .spatial_index import StrokeGridIndex
+from .stroke_simplifier import SimplificationStats, StrokeSimplifier
+from .stroke_geometry import Point, strokes_hit_path
 
 
 class IAnnotationEngine(ABC):
@@ -27,6 +40,13 @@ class IAnnotationEngine(ABC):
         """添加笔画点"""
         pass
 
+    @abstractmethod
+    def add_points(self, stroke_id: str, xs: Sequence[float], ys: Sequence[float],
+                   pressures: Sequence[float],
+                   timestamps: Optional[Sequence[float]] = None) -> None:
+        """批量添加笔画点"""
+        pass
+
     @abstractmethod
     def end_stroke(self, stroke_id: str) -> Stroke:
         """结束笔画"""
@@ -65,14 +85,41 @@ class AnnotationEngine(IAnnotationEngine):
     MIN_PRESSURE_MULTIPLIER = 0.5
     MAX_PRESSURE_MULTIPLIER = 1.5
 
-    def __init__(self, database=None):
+    # 延迟加载模式默认参数
+    DEFAULT_PREFETCH_PAGES = 1
+    DEFAULT_MAX_LOADED_PAGES = 16
+
+    def __init__(self, database=None, simplifier: Optional[StrokeSimplifier] = None,
+                 history: Optional[AnnotationHistory] = None,
+                 journal: Optional[AnnotationJournal] = None,
+                 lazy: bool = False,
+                 prefetch_pages: int = DEFAULT_PREFETCH_PAGES,
+                 max_loaded_pages: int = DEFAULT_MAX_LOADED_PAGES):
         """
         初始化注释引擎
         
         Args:
             database: 数据库实例，用于持久化注释
+            simplifier: 笔画简化器，为None时不简化
+            history: 撤销/重做历史，为None时使用默认限制
+            journal: 注释日志，为None时未保存的修改在崩溃时丢失
+            lazy: 延迟加载：打开文档时只读取每页摘要，首次访问页面时才加载笔画
+            prefetch_pages: 延迟加载时在后台预读当前页前后各多少页
+            max_loaded_pages: 延迟加载时最多保留的已加载页数（有未保存修改的页面不卸载）
         """
         self._database = database
+        self._journal = journal
+        # 加载和重放期间不写日志
+        self._journaling = False
+        self._simplifier = simplifier
+        self._history = history if history is not None else AnnotationHistory()
+        # 笔迹延迟统计，为None时不统计
+        self._latency_monitor: Optional[InkLatencyMonitor] = None
+        # 一笔成型识别流水线
+        self._shape_recognizer = ShapeRecognizerPipeline()
+        # 后台（推测）形状识别，总是使用当前的识别流水线
+        self._shape_speculator = SpeculativeShapeRecognizer(self.shape_recognition)
+        self._simplification_stats = SimplificationStats()
         # 当前正在绘制的笔画 {stroke_id: Stroke}
         self._active_strokes: Dict[str, Stroke] = {}
         # 页面注释 {page_num: {annotation_id: Annotation}}
@@ -81,11 +128,131 @@ class AnnotationEngine(IAnnotationEngine):
         self._current_doc_id: Optional[str] = None
         # 压感启用状态
         self._pressure_sensitivity_enabled: bool = True
+        # 页面笔画索引 {stroke_id: Stroke}
+        self._strokes_by_id: Dict[str, Stroke] = {}
+        # 笔画所在页码和排序序号 {stroke_id: page_num} / {stroke_id: seq}
+        self._stroke_pages: Dict[str, int] = {}
+        self._stroke_seq: Dict[str, int] = {}
+        self._next_seq: int = 0
+        # 增量保存跟踪（自上次加载/保存以来的变更）
+        self._added_strokes: Dict[str, int] = {}
+        self._dirty_strokes: Dict[str, int] = {}
+        self._deleted_strokes: Set[str] = set()
+        # 待迁移到笔画表的旧版整页注释ID
+        self._legacy_annotation_ids: List[str] = []
+        # 每页的笔画空间索引 {page_num: StrokeGridIndex}
+        self._page_indexes: Dict[int, StrokeGridIndex] = {}
+        # 延迟加载状态
+        self._lazy = lazy and database is not None
+        self._prefetch_pages = max(0, prefetch_pages)
+        self._max_loaded_pages = max(1, max_loaded_pages)
+        # 数据库中有数据但尚未加载的页码
+        self._unloaded_pages: Set[int] = set()
+        # 已加载页面的访问顺序（LRU）
+        self._loaded_pages: "OrderedDict[int, None]" = OrderedDict()
+        # 有未保存修改的页面（不会被卸载）
+        self._dirty_pages: Set[int] = set()
+        # 后台预读 {page_num: Future[(strokes, legacy_annotations)]}
+        self._prefetch_futures: Dict[int, Future] = {}
+        self._prefetch_executor: Optional[ThreadPoolExecutor] = None
+        # 写线程上的异步保存 {doc_id: Future}
+        self._pending_saves: Dict[str, Future] = {}
+        # 写入失败的异步保存（由写线程追加），下次保存时重新计入变更
+        self._failed_saves: List[tuple] = []
 
     def set_pressure_sensitivity(self, enabled: bool) -> None:
         """设置是否启用压感"""
         self._pressure_sensitivity_enabled = enabled
 
+    def set_simplifier(self, simplifier: Optional[StrokeSimplifier]) -> None:
+        """设置笔画简化器（None表示不简化）"""
+        self._simplifier = simplifier
+
+    def set_latency_monitor(self, monitor: Optional[InkLatencyMonitor]) -> None:
+        """设置笔迹延迟统计器（None表示不统计）"""
+        self._latency_monitor = monitor
+
+    def get_shape_recognizer(self) -> ShapeRecognizerPipeline:
+        """获取一笔成型识别流水线（可注册或移除识别器）"""
+        return self._shape_recognizer
+
+    def set_shape_recognizer(self, recognizer: ShapeRecognizerPipeline) -> None:
+        """替换一笔成型识别流水线"""
+        self._shape_recognizer = recognizer
+
+    def get_simplification_stats(self) -> SimplificationStats:
+        """获取笔画简化统计"""
+        return self._simplification_stats
+
+    def reset_simplification_stats(self) -> None:
+        """清空笔画简化统计"""
+        self._simplification_stats = SimplificationStats()
+
+    def get_history(self) -> AnnotationHistory:
+        """获取撤销/重做历史"""
+        return self._history
+
+    def can_undo(self) -> bool:
+        return self._history.can_undo()
+
+    def can_redo(self) -> bool:
+        return self._history.can_redo()
+
+    def undo(self) -> Optional[HistoryChange]:
+        """
+        撤销最近一次笔画操作
+        
+        Returns:
+            页面变化（供界面增量重绘），没有可撤销的操作时返回None
+        """
+        entry = self._history.pop_undo()
+        if entry is None:
+            return None
+        self._apply_records(removed=entry.added, restored=entry.removed)
+        return HistoryChange(kind=entry.kind, undo=True, added=entry.removed, removed=entry.added)
+
+    def redo(self) -> Optional[HistoryChange]:
+        """
+        重做最近一次被撤销的笔画操作
+        
+        Returns:
+            页面变化（供界面增量重绘），没有可重做的操作时返回None
+        """
+        entry = self._history.pop_redo()
+        if entry is None:
+            return None
+        self._apply_records(removed=entry.removed, restored=entry.added)
+        return HistoryChange(kind=entry.kind, undo=False, added=entry.added, removed=entry.removed)
+
+    def _apply_records(self, removed: List[StrokeRecord], restored: List[StrokeRecord]) -> None:
+        """删除一组笔画并按原绘制序号恢复另一组笔画"""
+        by_page: Dict[int, Set[str]] = {}
+        for record in removed:
+            by_page.setdefault(record.page_num, set()).add(record.stroke.id)
+        for page_num, stroke_ids in by_page.items():
+            self._remove_page_strokes(page_num, stroke_ids)
+        for record in sorted(restored, key=lambda r: r.seq):
+            self._insert_stroke(record.page_num, record.stroke, record.seq)
+
+    def _record(self, kind: str, added: Sequence[Stroke] = (),
+                removed: Sequence[StrokeRecord] = ()) -> None:
+        """记录一次可撤销的操作（added 必须已加入页面）"""
+        self._history.record(HistoryEntry(
+            kind=kind,
+            added=[
+                StrokeRecord(self._stroke_pages[s.id], self._stroke_seq[s.id], s)
+                for s in added
+            ],
+            removed=list(removed),
+        ))
+
+    def _stroke_record(self, stroke_id: str) -> StrokeRecord:
+        """当前页面上笔画的历史记录"""
+        return StrokeRecord(
+            self._stroke_pages[stroke_id], self._stroke_seq[stroke_id],
+            self._strokes_by_id[stroke_id],
+        )
+
     def start_stroke(self, pen_type: PenType, color: str, width: float) -> str:
         """
         开始新笔画
@@ -121,24 +288,84 @@ class AnnotationEngine(IAnnotationEngine):
         """
         if stroke_id not in self._active_strokes:
             raise ValueError(f"Stroke {stroke_id} not found")
+        start = time.perf_counter() if self._latency_monitor is not None else 0.0
         
         # 确保压力值在有效范围内
         pressure = max(0.0, min(1.0, pressure))
         
-        point = StrokePoint(
-            x=x,
-            y=y,
-            pressure=pressure,
-            timestamp=time.time()
-        )
-        self._active_strokes[stroke_id].points.append(point)
+        points = self._active_strokes[stroke_id].points
+        if self._simplifier is not None and points:
+            x, y = self._simplifier.smooth((points.xs[-1], points.ys[-1]), x, y)
+        
+        # 实时采样按紧凑精度写入列式存储
+        points.append_sample(x, y, pressure, time.time())
+        if self._latency_monitor is not None:
+            self._latency_monitor.record_duration(
+                "add_point", (time.perf_counter() - start) * 1000
+            )
 
-    def end_stroke(self, stroke_id: str) -> Stroke:
+    def add_points(
+        self,
+        stroke_id: str,
+        xs: Sequence[float],
+        ys: Sequence[float],
+        pressures: Sequence[float],
+        timestamps: Optional[Sequence[float]] = None,
+    ) -> None:
+        """
+        批量添加笔画点（高采样率手写笔按帧合并的采样）
+
+        与逐点调用 add_point 的结果相同，但只查找一次笔画、整批写入列式存储。
+
+        Args:
+            stroke_id: 笔画ID
+            xs: X坐标
+            ys: Y坐标
+            pressures: 压力值 (0.0 - 1.0)
+            timestamps: 采样时间戳（秒），为None时整批使用当前时间
+        """
+        stroke = self._active_strokes.get(stroke_id)
+        if stroke is None:
+            raise ValueError(f"Stroke {stroke_id} not found")
+        count = len(xs)
+        if len(ys) != count or len(pressures) != count or (
+            timestamps is not None and len(timestamps) != count
+        ):
+            raise ValueError("Sample columns must have the same length")
+        if not count:
+            return
+        start = time.perf_counter() if self._latency_monitor is not None else 0.0
+        if timestamps is None:
+            timestamps = [time.time()] * count
+
+        pressures = [max(0.0, min(1.0, p)) for p in pressures]
+        points = stroke.points
+        if self._simplifier is not None and self._simplifier.smoothing > 0:
+            smooth = self._simplifier.smooth
+            xs, ys = list(xs), list(ys)
+            previous = (points.xs[-1], points.ys[-1]) if points else None
+            # 与 add_point 一致，以写入列后的精度作为下一点的平滑基准
+            stored = array(points.xs.typecode, (0.0, 0.0))
+            for i in range(count):
+                if previous is not None:
+                    xs[i], ys[i] = smooth(previous, xs[i], ys[i])
+                stored[0], stored[1] = xs[i], ys[i]
+                previous = (stored[0], stored[1])
+        points.extend_samples(xs, ys, pressures, timestamps)
+        if self._latency_monitor is not None:
+            self._latency_monitor.record_duration(
+                "add_points", (time.perf_counter() - start) * 1000
+            )
+            self._latency_monitor.record_latency(STAGE_ENGINE, timestamps)
+
+    def end_stroke(self, stroke_id: str, simplify: bool = True) -> Stroke:
         """
         结束笔画
         
         Args:
             stroke_id: 笔画ID
+            simplify: 是否简化笔画点（需要先对原始点做形状识别时传False，
+                之后再调用 simplify_stroke）
             
         Returns:
             完成的笔画对象
@@ -147,6 +374,40 @@ class AnnotationEngine(IAnnotationEngine):
             raise ValueError(f"Stroke {stroke_id} not found")
         
         stroke = self._active_strokes.pop(stroke_id)
+        if simplify:
+            self.simplify_stroke(stroke)
+        return stroke
+
+    def cancel_stroke(self, stroke_id: str) -> bool:
+        """
+        丢弃正在绘制的笔画（如事后判定为手掌触摸），不写入页面和撤销历史
+        
+        Args:
+            stroke_id: 笔画ID
+            
+        Returns:
+            笔画是否仍在绘制中并已丢弃
+        """
+        if self._active_strokes.pop(stroke_id, None) is None:
+            return False
+        self._shape_speculator.cancel(stroke_id)
+        return True
+
+    def simplify_stroke(self, stroke: Stroke) -> Stroke:
+        """
+        按简化器设置删除笔画中的冗余点并记录统计
+        
+        Args:
+            stroke: 笔画（原地修改）
+            
+        Returns:
+            同一笔画对象
+        """
+        if self._simplifier is None:
+            return stroke
+        before = len(stroke.points)
+        stroke.points = self._simplifier.simplify(stroke.points)
+        self._simplification_stats.record(before, len(stroke.points))
         return stroke
 
     def add_stroke_to_page(self, page_num: int, stroke: Stroke) -> str:
@@ -160,6 +421,44 @@ class AnnotationEngine(IAnnotationEngine):
         Returns:
             注释ID
         """
+        annotation_id = self._insert_stroke(page_num, stroke)
+        self._record(COMMAND_ADD, added=[stroke])
+        return annotation_id
+
+    def replace_stroke(self, page_num: int, stroke_id: str, new_stroke: Stroke) -> str:
+        """
+        用新笔画替换页面上的笔画（如形状识别结果），新笔画保持原绘制顺序
+        
+        Args:
+            page_num: 页码
+            stroke_id: 被替换的笔画ID
+            new_stroke: 新笔画
+            
+        Returns:
+            注释ID
+        """
+        self._ensure_page_loaded(page_num)
+        if self._stroke_pages.get(stroke_id) != page_num:
+            raise ValueError(f"Stroke {stroke_id} not found on page {page_num}")
+        old = self._stroke_record(stroke_id)
+        self._remove_page_strokes(page_num, {stroke_id})
+        annotation_id = self._insert_stroke(page_num, new_stroke, old.seq)
+        self._record(COMMAND_REPLACE, added=[new_stroke], removed=[old])
+        return annotation_id
+
+    def _insert_stroke(self, page_num: int, stroke: Stroke, seq: Optional[int] = None) -> str:
+        """
+        将笔画按绘制序号插入页面默认注释
+        
+        Args:
+            page_num: 页码
+            stroke: 笔画对象
+            seq: 绘制序号，为None时排在最后
+            
+        Returns:
+            注释ID
+        """
+        self._ensure_page_loaded(page_num)
         if page_num not in self._annotations:
             self._annotations[page_num] = {}
         
@@ -175,11 +474,30 @@ class AnnotationEngine(IAnnotationEngine):
             )
         
         annotation = self._annotations[page_num][annotation_id]
-        annotation.strokes.append(stroke)
+        strokes = annotation.strokes
+        if seq is None or not strokes or self._stroke_seq[strokes[-1].id] < seq:
+            strokes.append(stroke)
+        else:
+            # 撤销/重做恢复的笔画放回原来的绘制位置
+            position = bisect.bisect(strokes, seq, key=lambda s: self._stroke_seq[s.id])
+            strokes.insert(position, stroke)
         annotation.modified_at = datetime.now()
+        self._track_added(page_num, stroke, seq)
         
         return annotation_id
 
+    def _remove_page_strokes(self, page_num: int, stroke_ids: Set[str]) -> None:
+        """从页面注释中删除一组笔画"""
+        self._ensure_page_loaded(page_num)
+        for annotation in self._annotations.get(page_num, {}).values():
+            remaining = [stroke for stroke in annotation.strokes if stroke.id not in stroke_ids]
+            if len(remaining) != len(annotation.strokes):
+                annotation.strokes[:] = remaining
+                annotation.modified_at = datetime.now()
+        
+        for stroke_id in stroke_ids:
+            self._track_removed(stroke_id)
+
     def erase_at(self, page_num: int, x: float, y: float, radius: float) -> List[str]:
         """
         擦除指定位置的笔画
@@ -193,47 +511,105 @@ class AnnotationEngine(IAnnotationEngine):
         Returns:
             被删除的笔画ID列表
         """
-        erased_stroke_ids = []
+        return self.erase_along(page_num, [(x, y)], radius)
+
+    def erase_along(self, page_num: int, points: Sequence[Point], radius: float) -> List[str]:
+        """
+        擦除橡皮擦沿路径扫过的笔画
         
-        if page_num not in self._annotations:
-            return erased_stroke_ids
+        拖动时传入上一位置到当前位置的路径，快速移动时也不会漏掉中间的笔画。
         
-        for annotation in self._annotations[page_num].values():
-            strokes_to_remove = []
-            
-            for stroke in annotation.strokes:
-                # 检查笔画是否与擦除区域相交
-                if self._stroke_intersects_circle(stroke, x, y, radius):
-                    strokes_to_remove.append(stroke)
-                    erased_stroke_ids.append(stroke.id)
-            
-            # 移除相交的笔画
-            for stroke in strokes_to_remove:
-                annotation.strokes.remove(stroke)
+        Args:
+            page_num: 页码
+            points: 橡皮擦中心经过的点（按时间顺序）
+            radius: 擦除半径
             
-            if strokes_to_remove:
-                annotation.modified_at = datetime.now()
+        Returns:
+            被删除的笔画ID列表，按绘制顺序排列
+        """
+        erased_stroke_ids = self.hit_test_path(page_num, points, radius)
+        if not erased_stroke_ids:
+            return erased_stroke_ids
+        
+        removed = [self._stroke_record(stroke_id) for stroke_id in erased_stroke_ids]
+        self._remove_page_strokes(page_num, set(erased_stroke_ids))
+        self._record(COMMAND_ERASE, removed=removed)
         
         return erased_stroke_ids
 
-    def _stroke_intersects_circle(self, stroke: Stroke, cx: float, cy: float, radius: float) -> bool:
+    def revert_erase(self, page_num: int, stroke_ids: Sequence[str]) -> List[str]:
+        """
+        还原擦除（如橡皮擦触点事后判定为手掌），并从撤销历史中删除这些擦除
+        
+        只还原完全由 stroke_ids 构成的擦除记录；已从历史中淘汰的擦除无法还原。
+        
+        Args:
+            page_num: 页码
+            stroke_ids: 要还原的被擦除笔画ID
+            
+        Returns:
+            恢复到页面上的笔画ID列表，按绘制顺序排列
+        """
+        wanted = set(stroke_ids)
+        if not wanted:
+            return []
+        restored: List[StrokeRecord] = []
+        undo_count = len(self._history)
+        for position, entry in enumerate(self._history.entries()):
+            if entry.kind != COMMAND_ERASE or entry.added or not entry.removed:
+                continue
+            if any(r.page_num != page_num or r.stroke.id not in wanted for r in entry.removed):
+                continue
+            self._history.discard(entry)
+            # 可重做的记录已被撤销，笔画已经在页面上
+            if position < undo_count:
+                restored.extend(entry.removed)
+        restored.sort(key=lambda r: r.seq)
+        for record in restored:
+            self._insert_stroke(record.page_num, record.stroke, record.seq)
+        return [record.stroke.id for record in restored]
+
+    def hit_test(self, page_num: int, x: float, y: float, radius: float) -> List[str]:
+        """
+        查找与圆形区域相交的笔画（不修改注释）
+        
+        Args:
+            page_num: 页码
+            x: X坐标
+            y: Y坐标
+            radius: 半径
+            
+        Returns:
+            相交的笔画ID列表，按绘制顺序排列
+        """
+        return self.hit_test_path(page_num, [(x, y)], radius)
+
+    def hit_test_path(self, page_num: int, points: Sequence[Point], radius: float) -> List[str]:
         """
-        检查笔画是否与圆形区域相交
+        查找被沿路径移动的圆扫到的笔画（不修改注释）
+        
+        先通过页面空间索引取出附近的候选笔画，再按线段距离（含笔画宽度）精确判断。
         
         Args:
-            stroke: 笔画
-            cx: 圆心X坐标
-            cy: 圆心Y坐标
+            page_num: 页码
+            points: 圆心经过的点（按时间顺序）
             radius: 半径
             
         Returns:
-            是否相交
+            命中的笔画ID列表，按绘制顺序排列
         """
-        for point in stroke.points:
-            distance = math.sqrt((point.x - cx) ** 2 + (point.y - cy) ** 2)
-            if distance <= radius:
-                return True
-        return False
+        self._ensure_page_loaded(page_num)
+        index = self._page_indexes.get(page_num)
+        if index is None or not points:
+            return []
+        
+        candidates = sorted(index.query_path(points, radius), key=self._stroke_seq.__getitem__)
+        strokes = [self._strokes_by_id[stroke_id] for stroke_id in candidates]
+        return [
+            stroke_id
+            for stroke_id, hit in zip(candidates, strokes_hit_path(strokes, points, radius))
+            if hit
+        ]
 
     def get_annotations(self, page_num: int) -> List[Annotation]:
         """
@@ -245,17 +621,20 @@ class AnnotationEngine(IAnnotationEngine):
         Returns:
             注释列表
         """
+        self._ensure_page_loaded(page_num)
+        self._prefetch_around(page_num)
         if page_num not in self._annotations:
             return []
         return list(self._annotations[page_num].values())
 
     def get_all_annotations(self) -> Dict[int, List[Annotation]]:
         """
-        获取所有页面的注释
+        获取所有页面的注释（延迟加载模式下会加载全部页面）
         
         Returns:
             {page_num: [Annotation, ...]}
         """
+        self._load_all_pages()
         return {
             page_num: list(annotations.values())
             for page_num, annotations in self._annotations.items()
@@ -269,9 +648,112 @@ class AnnotationEngine(IAnnotationEngine):
             page_num: 页码，如果为None则清除所有页面
         """
         if page_num is None:
-            self._annotations.clear()
-        elif page_num in self._annotations:
-            del self._annotations[page_num]
+            self._load_all_pages()
+            pages = list(self._annotations.keys())
+        else:
+            self._ensure_page_loaded(page_num)
+            pages = [page_num] if page_num in self._annotations else []
+        
+        removed = []
+        for page in pages:
+            for annotation in self._annotations.pop(page).values():
+                for stroke in annotation.strokes:
+                    removed.append(self._stroke_record(stroke.id))
+                    self._track_removed(stroke.id)
+        self._record(COMMAND_CLEAR, removed=removed)
+
+    def mark_stroke_dirty(self, stroke_id: str) -> None:
+        """
+        标记笔画已修改，下次保存时重写该笔画
+        
+        Args:
+            stroke_id: 笔画ID
+        """
+        page_num = self._stroke_pages.get(stroke_id)
+        if page_num is None:
+            return
+        # 笔画坐标可能已改变，重新登记索引并丢弃渲染缓存
+        stroke = self._strokes_by_id[stroke_id]
+        stroke.render_cache = None
+        self._index_stroke(page_num, stroke)
+        self._dirty_pages.add(page_num)
+        if self._journaling:
+            self._journal.append_upsert(page_num, self._stroke_seq[stroke_id], stroke)
+        if stroke_id in self._added_strokes:
+            return
+        self._dirty_strokes[stroke_id] = page_num
+
+    def has_unsaved_changes(self) -> bool:
+        """是否有尚未保存的笔画变更"""
+        return bool(
+            self._added_strokes or self._dirty_strokes
+            or self._deleted_strokes or self._legacy_annotation_ids
+        )
+
+    def get_pending_changes(self) -> Dict[str, int]:
+        """
+        获取待保存的变更数量
+        
+        Returns:
+            {"added": n, "dirty": n, "deleted": n}
+        """
+        return {
+            "added": len(self._added_strokes),
+            "dirty": len(self._dirty_strokes),
+            "deleted": len(self._deleted_strokes),
+        }
+
+    def _track_added(self, page_num: int, stroke: Stroke, seq: Optional[int] = None) -> None:
+        """记录新增笔画（seq 为None时分配新的绘制序号）"""
+        stroke_id = stroke.id
+        self._strokes_by_id[stroke_id] = stroke
+        self._stroke_pages[stroke_id] = page_num
+        self._index_stroke(page_num, stroke)
+        self._dirty_pages.add(page_num)
+        if seq is None:
+            seq = self._next_seq
+            self._next_seq += 1
+        self._stroke_seq[stroke_id] = seq
+        if self._journaling:
+            self._journal.append_upsert(page_num, seq, stroke)
+        if stroke_id in self._deleted_strokes:
+            # 删除后又恢复的笔画，按修改处理
+            self._deleted_strokes.discard(stroke_id)
+            self._dirty_strokes[stroke_id] = page_num
+        else:
+            self._added_strokes[stroke_id] = page_num
+
+    def _track_removed(self, stroke_id: str) -> None:
+        """记录被删除的笔画"""
+        self._strokes_by_id.pop(stroke_id, None)
+        page_num = self._stroke_pages.pop(stroke_id, None)
+        if page_num in self._page_indexes:
+            self._page_indexes[page_num].remove(stroke_id)
+        if page_num is not None:
+            self._dirty_pages.add(page_num)
+        self._stroke_seq.pop(stroke_id, None)
+        self._dirty_strokes.pop(stroke_id, None)
+        if self._added_strokes.pop(stroke_id, None) is None or self._journal is not None:
+            # 已持久化的笔画需要从数据库删除
+            # （使用日志时新增的笔画可能已被后台合并写入数据库）
+            self._deleted_strokes.add(stroke_id)
+        if self._journaling:
+            self._journal.append_delete(stroke_id)
+
+    def _index_stroke(self, page_num: int, stroke: Stroke) -> None:
+        """将笔画登记到页面空间索引"""
+        index = self._page_indexes.get(page_num)
+        if index is None:
+            index = self._page_indexes[page_num] = StrokeGridIndex()
+        index.insert(stroke)
+
+    def _reset_change_tracking(self) -> None:
+        """清空变更跟踪"""
+        self._added_strokes.clear()
+        self._dirty_strokes.clear()
+        self._deleted_strokes.clear()
+        self._legacy_annotation_ids = []
+        self._dirty_pages.clear()
 
 
     def calculate_stroke_width(self, base_width: float, pressure: float) -> float:
@@ -298,45 +780,349 @@ class AnnotationEngine(IAnnotationEngine):
         """
         保存注释到数据库
         
+        只写入自上次加载/保存以来新增、修改和删除的笔画，
+        所有变更在一个事务中提交。
+        
         Args:
             doc_id: 文档ID
         """
-        self._current_doc_id = doc_id
-        
-        if self._database is None:
+        # 先等待写线程上的异步保存，避免旧状态在本次保存之后写入
+        self._wait_pending_saves()
+        self._prepare_save(doc_id)
+        if self._database is None or not self.has_unsaved_changes():
             return
-        
-        # 将所有注释保存到数据库
-        for page_num, annotations in self._annotations.items():
-            for annotation in annotations.values():
-                self._database.save_annotation(doc_id, annotation)
+        if self._journal is not None:
+            # 等待后台合并完成，避免旧状态在本次保存之后写入
+            self._journal.wait_compaction()
+        
+        upserts, deleted_ids, legacy_ids = self._take_changes()
+        self._database.save_stroke_changes(
+            doc_id,
+            upserts,
+            deleted_ids=deleted_ids,
+            deleted_annotation_ids=legacy_ids,
+        )
+        if self._journal is not None:
+            self._journal.checkpoint()
+
+    def save_annotations_async(self, doc_id: str, async_db: Any) -> Optional[Future]:
+        """
+        在异步数据库门面的写线程上保存注释
+
+        变更在调用线程上收集，写入数据库和清空日志在写线程执行。
+        写入完成前注释日志暂停后台合并；再次同步保存或加载同一文档时先等待写入完成。
+        写入失败时变更保留在日志中，并在下次保存时重新写入。
+
+        Args:
+            doc_id: 文档ID
+            async_db: 异步数据库门面（AsyncDatabase）
+
+        Returns:
+            写入完成的 Future；没有需要保存的修改时返回None
+        """
+        self._restore_failed_saves()
+        self._prepare_save(doc_id)
+        if self._database is None or not self.has_unsaved_changes():
+            return None
+
+        changes = self._take_changes()
+        journal = self._journal
+        mark = None
+        if journal is not None:
+            journal.hold_compaction()
+            mark = journal.mark()
+        future = async_db.write(self._commit_changes, doc_id, changes, journal, mark)
+        self._pending_saves[doc_id] = future
+        return future
+
+    def _commit_changes(self, doc_id: str, changes: tuple,
+                        journal: Optional[AnnotationJournal], mark: Any) -> None:
+        """将收集的变更写入数据库（在写线程执行）"""
+        upserts, deleted_ids, legacy_ids = changes
+        try:
+            if journal is not None:
+                journal.wait_compaction()
+            self._database.save_stroke_changes(
+                doc_id,
+                upserts,
+                deleted_ids=deleted_ids,
+                deleted_annotation_ids=legacy_ids,
+            )
+        except BaseException:
+            self._failed_saves.append((doc_id, changes))
+            raise
+        else:
+            if journal is not None:
+                # 收集变更后日志又有追加时保留日志，重放已保存的记录是幂等的
+                journal.checkpoint_if_unchanged(mark)
+        finally:
+            if journal is not None:
+                journal.release_compaction()
+
+    def _prepare_save(self, doc_id: str) -> None:
+        """切换保存目标文档"""
+        if doc_id != self._current_doc_id:
+            # 保存到其他文档时没有可复用的持久化状态，全部按新增处理
+            self._load_all_pages()
+            self._reset_change_tracking()
+            self._added_strokes.update(self._stroke_pages)
+            if self._journal is not None:
+                # 目标文档残留的日志已被本次保存覆盖
+                self._journal.open(doc_id)
+                self._journaling = True
+        self._current_doc_id = doc_id
+
+    def _take_changes(self) -> Tuple[List[Tuple[int, int, Stroke]], List[str], List[str]]:
+        """取出待保存的变更 (upserts, deleted_ids, legacy_ids) 并清空变更跟踪"""
+        upserts = []
+        for changes in (self._added_strokes, self._dirty_strokes):
+            for stroke_id, page_num in changes.items():
+                stroke = self._strokes_by_id[stroke_id]
+                upserts.append((page_num, self._stroke_seq[stroke_id], stroke))
+        deleted_ids = list(self._deleted_strokes)
+        legacy_ids = list(self._legacy_annotation_ids)
+        self._reset_change_tracking()
+        return upserts, deleted_ids, legacy_ids
+
+    def _save_pending(self, doc_id: Optional[str]) -> bool:
+        """文档是否有尚未完成的异步保存"""
+        future = self._pending_saves.get(doc_id)
+        return future is not None and not future.done()
+
+    def _wait_pending_saves(self, doc_id: Optional[str] = None) -> None:
+        """等待异步保存完成（doc_id 为None时等待全部），并重新计入失败的变更"""
+        for pending_id in list(self._pending_saves):
+            if doc_id is None or pending_id == doc_id:
+                future = self._pending_saves.pop(pending_id)
+                # 失败的变更由 _restore_failed_saves 处理
+                future.exception()
+        self._restore_failed_saves()
+
+    def _restore_failed_saves(self) -> None:
+        """将写入失败的当前文档变更重新计入变更跟踪（其他文档的变更保留在日志中）"""
+        while self._failed_saves:
+            doc_id, (upserts, deleted_ids, legacy_ids) = self._failed_saves.pop(0)
+            if doc_id != self._current_doc_id:
+                continue
+            for _, _, stroke in upserts:
+                page_num = self._stroke_pages.get(stroke.id)
+                if page_num is None or stroke.id in self._added_strokes:
+                    continue
+                self._dirty_strokes[stroke.id] = page_num
+                self._dirty_pages.add(page_num)
+            for stroke_id in deleted_ids:
+                if stroke_id not in self._strokes_by_id:
+                    self._deleted_strokes.add(stroke_id)
+            for annotation_id in legacy_ids:
+                if annotation_id not in self._legacy_annotation_ids:
+                    self._legacy_annotation_ids.append(annotation_id)
+
+    def sync_journal(self) -> None:
+        """立即 fsync 注释日志中尚未同步的记录"""
+        if self._journal is not None:
+            self._journal.sync()
+
+    def close(self) -> None:
+        """停止后台预读和形状识别，并关闭注释日志（未保存的修改保留在日志中）"""
+        self._shape_speculator.shutdown()
+        for future in self._prefetch_futures.values():
+            future.cancel()
+        self._prefetch_futures.clear()
+        if self._prefetch_executor is not None:
+            self._prefetch_executor.shutdown(wait=True)
+            self._prefetch_executor = None
+        if self._journal is not None:
+            self._journal.close()
+        self._journaling = False
 
     def load_annotations(self, doc_id: str) -> None:
         """
-        从数据库加载注释
+        从数据库加载注释，并重放注释日志中未保存的修改
         
         Args:
             doc_id: 文档ID
         """
+        # 同一文档的异步保存完成后再读取
+        self._wait_pending_saves(doc_id)
         self._current_doc_id = doc_id
+        self._journaling = False
         self._annotations.clear()
-        
-        if self._database is None:
+        self._strokes_by_id.clear()
+        self._stroke_pages.clear()
+        self._stroke_seq.clear()
+        self._page_indexes.clear()
+        self._history.clear()
+        self._next_seq = 0
+        self._reset_change_tracking()
+        self._unloaded_pages.clear()
+        self._loaded_pages.clear()
+        for future in self._prefetch_futures.values():
+            future.cancel()
+        self._prefetch_futures.clear()
+        
+        if self._lazy:
+            # 只读取每页摘要，笔画在首次访问页面时加载
+            summaries = self._database.get_stroke_page_summaries(doc_id)
+            self._unloaded_pages.update(summaries)
+            self._unloaded_pages.update(self._database.get_annotation_pages(doc_id))
+            self._next_seq = max((max_seq + 1 for _, max_seq in summaries.values()), default=0)
+        elif self._database is not None:
+            self._load_from_database(doc_id)
+        
+        if self._journal is not None:
+            # 重放上次会话未保存的修改（按未保存变更跟踪，下次保存时写入数据库）
+            records = self._journal.open(doc_id)
+            if records:
+                # 删除记录不含页码，崩溃恢复时加载全部页面
+                self._load_all_pages()
+            self._replay_journal(records)
+            self._journaling = True
+
+    def _load_from_database(self, doc_id: str, page_num: Optional[int] = None) -> None:
+        """从笔画表和旧版注释表加载笔画（page_num 为None时加载全部页面）"""
+        rows = self._database.get_strokes(doc_id, page_num)
+        legacy = self._database.get_annotations(doc_id, page_num, include_strokes=False)
+        self._add_loaded_rows(rows, legacy)
+
+    def _add_loaded_rows(self, rows, legacy: List[Annotation]) -> None:
+        """将数据库读出的笔画行和旧版注释放入页面"""
+        # 笔画表中已持久化的笔画
+        for page_num, seq, stroke in rows:
+            self._append_loaded_stroke(page_num, stroke)
+            self._stroke_seq[stroke.id] = seq
+            self._next_seq = max(self._next_seq, seq + 1)
+        
+        # 旧版整页注释：加载后按新增处理，下次保存时迁移到笔画表
+        for annotation in legacy:
+            for stroke in annotation.strokes:
+                if stroke.id in self._stroke_pages:
+                    continue
+                self._append_loaded_stroke(annotation.page_num, stroke)
+                self._track_added(annotation.page_num, stroke)
+            self._legacy_annotation_ids.append(annotation.id)
+
+    # ============== 延迟加载 ==============
+
+    def is_page_loaded(self, page_num: int) -> bool:
+        """页面笔画是否已加载到内存"""
+        return page_num not in self._unloaded_pages
+
+    def get_loaded_pages(self) -> List[int]:
+        """内存中有注释的页码"""
+        return sorted(self._annotations)
+
+    def _ensure_page_loaded(self, page_num: int) -> None:
+        """延迟加载模式下加载页面笔画，并按LRU卸载其他干净页面"""
+        if not self._lazy:
             return
-        
-        # 从数据库加载注释
-        annotations = self._database.load_annotations(doc_id)
-        for annotation in annotations:
-            page_num = annotation.page_num
-            if page_num not in self._annotations:
-                self._annotations[page_num] = {}
-            self._annotations[page_num][annotation.id] = annotation
+        if page_num in self._unloaded_pages:
+            self._unloaded_pages.discard(page_num)
+            future = self._prefetch_futures.pop(page_num, None)
+            if future is not None and not future.cancel():
+                rows, legacy = future.result()
+            else:
+                rows, legacy = self._fetch_page(self._current_doc_id, page_num)
+            self._add_loaded_rows(rows, legacy)
+        self._loaded_pages[page_num] = None
+        self._loaded_pages.move_to_end(page_num)
+        self._evict_pages(keep=page_num)
+
+    def _load_all_pages(self) -> None:
+        """加载全部尚未加载的页面（不卸载）"""
+        if not self._lazy or not self._unloaded_pages:
+            return
+        for future in self._prefetch_futures.values():
+            future.cancel()
+        self._prefetch_futures.clear()
+        pages = self._unloaded_pages
+        self._unloaded_pages = set()
+        rows = [row for row in self._database.get_strokes(self._current_doc_id) if row[0] in pages]
+        legacy = [
+            annotation
+            for annotation in self._database.get_annotations(
+                self._current_doc_id, include_strokes=False
+            )
+            if annotation.page_num in pages
+        ]
+        self._add_loaded_rows(rows, legacy)
+        for page_num in sorted(pages):
+            self._loaded_pages[page_num] = None
+
+    def _fetch_page(self, doc_id: str, page_num: int):
+        """读取一页的笔画行和旧版注释（可在后台线程执行）"""
+        return (
+            self._database.get_strokes(doc_id, page_num),
+            self._database.get_annotations(doc_id, page_num, include_strokes=False),
+        )
+
+    def _prefetch_around(self, page_num: int) -> None:
+        """在后台预读相邻页面"""
+        if not self._lazy or not self._prefetch_pages:
+            return
+        for offset in range(1, self._prefetch_pages + 1):
+            for neighbour in (page_num + offset, page_num - offset):
+                if neighbour not in self._unloaded_pages or neighbour in self._prefetch_futures:
+                    continue
+                if self._prefetch_executor is None:
+                    self._prefetch_executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="annotation-prefetch"
+                    )
+                self._prefetch_futures[neighbour] = self._prefetch_executor.submit(
+                    self._fetch_page, self._current_doc_id, neighbour
+                )
+
+    def _evict_pages(self, keep: int) -> None:
+        """卸载最久未访问的干净页面（keep 页除外），直到已加载页数不超过上限"""
+        excess = len(self._loaded_pages) - self._max_loaded_pages
+        if excess <= 0 or self._save_pending(self._current_doc_id):
+            # 异步保存完成前卸载的页面会从数据库读回旧内容
+            return
+        for page_num in list(self._loaded_pages):
+            if excess <= 0:
+                break
+            if page_num == keep or page_num in self._dirty_pages:
+                continue
+            self._unload_page(page_num)
+            excess -= 1
+
+    def _unload_page(self, page_num: int) -> None:
+        """释放页面笔画（不影响变更跟踪，下次访问时重新加载）"""
+        del self._loaded_pages[page_num]
+        for annotation in self._annotations.pop(page_num, {}).values():
+            for stroke in annotation.strokes:
+                self._strokes_by_id.pop(stroke.id, None)
+                self._stroke_pages.pop(stroke.id, None)
+                self._stroke_seq.pop(stroke.id, None)
+        self._page_indexes.pop(page_num, None)
+        self._unloaded_pages.add(page_num)
+
+    def _replay_journal(self, records: List[JournalRecord]) -> None:
+        """将日志记录应用到已加载的注释"""
+        for record in records:
+            page_num = self._stroke_pages.get(record.stroke_id)
+            if page_num is not None:
+                self._remove_page_strokes(page_num, {record.stroke_id})
+            if record.kind == RECORD_UPSERT:
+                self._insert_stroke(record.page_num, record.stroke, record.seq)
+                self._next_seq = max(self._next_seq, record.seq + 1)
+
+    def _append_loaded_stroke(self, page_num: int, stroke: Stroke) -> None:
+        """将加载的笔画放入页面默认注释"""
+        page = self._annotations.setdefault(page_num, {})
+        annotation_id = f"annotation_{page_num}"
+        if annotation_id not in page:
+            page[annotation_id] = Annotation(id=annotation_id, page_num=page_num, strokes=[])
+        page[annotation_id].strokes.append(stroke)
+        self._strokes_by_id[stroke.id] = stroke
+        self._stroke_pages[stroke.id] = page_num
+        self._index_stroke(page_num, stroke)
 
     def shape_recognition(self, stroke: Stroke) -> Optional[Stroke]:
         """
         一笔成型：识别并转换为标准图形
         
-        支持识别：直线、矩形、圆形、三角形
+        默认支持识别：直线、矩形、圆形、三角形（识别器可通过
+        get_shape_recognizer().register() 扩展）
         
         Args:
             stroke: 原始笔画
@@ -344,306 +1130,54 @@ class AnnotationEngine(IAnnotationEngine):
         Returns:
             转换后的标准图形笔画，如果无法识别则返回None
         """
-        if len(stroke.points) < 3:
-            return None
-        
-        # 获取笔画的边界框
-        points = stroke.points
-        xs = [p.x for p in points]
-        ys = [p.y for p in points]
-        
-        min_x, max_x = min(xs), max(xs)
-        min_y, max_y = min(ys), max(ys)
-        width = max_x - min_x
-        height = max_y - min_y
-        
-        # 检查是否为直线
-        if self._is_line(points):
-            return self._create_line_stroke(stroke, points[0], points[-1])
-        
-        # 检查是否为闭合图形
-        start = points[0]
-        end = points[-1]
-        distance = math.sqrt((end.x - start.x) ** 2 + (end.y - start.y) ** 2)
-        diagonal = math.sqrt(width ** 2 + height ** 2)
-        
-        # 如果起点和终点足够接近，认为是闭合图形
-        if diagonal > 0 and distance / diagonal < 0.15:
-            # 检查是否为圆形
-            if self._is_circle(points, min_x, min_y, width, height):
-                return self._create_circle_stroke(stroke, min_x, min_y, width, height)
-            
-            # 检查是否为矩形
-            if self._is_rectangle(points, min_x, min_y, width, height):
-                return self._create_rectangle_stroke(stroke, min_x, min_y, width, height)
-            
-            # 检查是否为三角形
-            if self._is_triangle(points):
-                return self._create_triangle_stroke(stroke, points)
-        
-        return None
+        return self._shape_recognizer.recognize(stroke)
 
-    def _is_line(self, points: List[StrokePoint]) -> bool:
-        """检查点集是否构成直线"""
-        if len(points) < 2:
-            return False
-        
-        start = points[0]
-        end = points[-1]
-        
-        # 计算直线长度
-        line_length = math.sqrt((end.x - start.x) ** 2 + (end.y - start.y) ** 2)
-        if line_length < 10:  # 太短不算直线
-            return False
-        
-        # 计算所有点到直线的最大距离
-        max_deviation = 0
-        for point in points[1:-1]:
-            deviation = self._point_to_line_distance(point, start, end)
-            max_deviation = max(max_deviation, deviation)
-        
-        # 如果最大偏差小于线长的10%，认为是直线
-        return max_deviation / line_length < 0.1
-
-    def _point_to_line_distance(self, point: StrokePoint, 
-                                 line_start: StrokePoint, 
-                                 line_end: StrokePoint) -> float:
-        """计算点到直线的距离"""
-        # 使用向量叉积计算点到直线距离
-        dx = line_end.x - line_start.x
-        dy = line_end.y - line_start.y
-        
-        line_length = math.sqrt(dx ** 2 + dy ** 2)
-        if line_length == 0:
-            return math.sqrt((point.x - line_start.x) ** 2 + (point.y - line_start.y) ** 2)
-        
-        # 叉积 / 线长 = 点到直线距离
-        cross = abs((point.x - line_start.x) * dy - (point.y - line_start.y) * dx)
-        return cross / line_length
-
-    def _is_circle(self, points: List[StrokePoint], 
-                   min_x: float, min_y: float, 
-                   width: float, height: float) -> bool:
-        """检查点集是否构成圆形"""
-        # 边界条件检查
-        if width <= 0 or height <= 0 or len(points) < 8:
-            return False
-        
-        # 宽高比接近1
-        aspect_ratio = width / height
-        if not (0.7 < aspect_ratio < 1.4):
-            return False
-        
-        # 计算中心和半径
-        center_x = min_x + width / 2
-        center_y = min_y + height / 2
-        radius = (width + height) / 4
-        
-        # 半径太小不算圆
-        if radius < 5:
-            return False
-        
-        # 检查所有点到中心的距离是否接近半径
-        deviations = []
-        for point in points:
-            dist = math.sqrt((point.x - center_x) ** 2 + (point.y - center_y) ** 2)
-            deviations.append(abs(dist - radius))
-        
-        avg_deviation = sum(deviations) / len(deviations)
-        return avg_deviation / radius < 0.2
+    def speculate_shape(self, stroke_id: str) -> Optional[Future]:
+        """
+        在后台对正在绘制的笔画做推测识别（书写停顿时调用）
 
-    def _is_rectangle(self, points: List[StrokePoint],
-                      min_x: float, min_y: float,
-                      width: float, height: float) -> bool:
-        """检查点集是否构成矩形"""
-        if width < 10 or height < 10:
-            return False
-        
-        # 检查点是否主要分布在边界框的边上
-        edge_points = 0
-        threshold = min(width, height) * 0.15
-        
-        for point in points:
-            # 检查是否在四条边附近
-            near_left = abs(point.x - min_x) < threshold
-            near_right = abs(point.x - (min_x + width)) < threshold
-            near_top = abs(point.y - min_y) < threshold
-            near_bottom = abs(point.y - (min_y + height)) < threshold
-            
-            if near_left or near_right or near_top or near_bottom:
-                edge_points += 1
-        
-        return edge_points / len(points) > 0.7
+        Args:
+            stroke_id: 正在绘制的笔画ID
 
-    def _is_triangle(self, points: List[StrokePoint]) -> bool:
-        """检查点集是否构成三角形"""
-        if len(points) < 10:
-            return False
-        
-        # 找到三个角点（方向变化最大的点）
-        corners = self._find_corners(points, 3)
-        
-        if len(corners) != 3:
-            return False
-        
-        # 检查三个角点是否形成有效三角形
-        # 计算三角形面积，如果面积太小则不是有效三角形
-        area = self._triangle_area(corners[0], corners[1], corners[2])
-        
-        # 计算边界框面积
-        xs = [p.x for p in points]
-        ys = [p.y for p in points]
-        bbox_area = (max(xs) - min(xs)) * (max(ys) - min(ys))
-        
-        # 三角形面积应该接近边界框面积的一半
-        if bbox_area > 0:
-            return 0.3 < area / bbox_area < 0.7
-        
-        return False
+        Returns:
+            识别结果的 Future，笔画不存在或点数不足时返回None
+        """
+        stroke = self._active_strokes.get(stroke_id)
+        if stroke is None or len(stroke.points) < 3:
+            return None
+        return self._shape_speculator.speculate(stroke)
 
-    def _find_corners(self, points: List[StrokePoint], num_corners: int) -> List[StrokePoint]:
-        """找到笔画中的角点"""
-        if len(points) < num_corners:
-            return []
-        
-        # 计算每个点的方向变化
-        angles = []
-        for i in range(1, len(points) - 1):
-            prev = points[i - 1]
-            curr = points[i]
-            next_p = points[i + 1]
-            
-            # 计算两个向量的夹角
-            v1 = (curr.x - prev.x, curr.y - prev.y)
-            v2 = (next_p.x - curr.x, next_p.y - curr.y)
-            
-            angle = self._angle_between_vectors(v1, v2)
-            angles.append((i, angle))
-        
-        # 按角度变化排序，取最大的几个
-        angles.sort(key=lambda x: x[1], reverse=True)
-        
-        corner_indices = [a[0] for a in angles[:num_corners]]
-        corner_indices.sort()
-        
-        return [points[i] for i in corner_indices]
+    def recognize_shape_async(self, stroke: Stroke) -> Future:
+        """
+        在后台识别完成的笔画，笔画在推测识别后没有新增点时直接复用推测结果
 
-    def _angle_between_vectors(self, v1: Tuple[float, float], v2: Tuple[float, float]) -> float:
-        """计算两个向量之间的夹角"""
-        len1 = math.sqrt(v1[0] ** 2 + v1[1] ** 2)
-        len2 = math.sqrt(v2[0] ** 2 + v2[1] ** 2)
-        
-        if len1 == 0 or len2 == 0:
-            return 0
-        
-        dot = v1[0] * v2[0] + v1[1] * v2[1]
-        cos_angle = dot / (len1 * len2)
-        cos_angle = max(-1, min(1, cos_angle))  # 防止浮点误差
-        
-        return math.acos(cos_angle)
+        需在 simplify_stroke 之前调用（识别使用调用时原始点的快照）。
 
-    def _triangle_area(self, p1: StrokePoint, p2: StrokePoint, p3: StrokePoint) -> float:
-        """计算三角形面积"""
-        return abs((p2.x - p1.x) * (p3.y - p1.y) - (p3.x - p1.x) * (p2.y - p1.y)) / 2
+        Args:
+            stroke: 完成的笔画
 
-    def _create_line_stroke(self, original: Stroke, 
-                            start: StrokePoint, 
-                            end: StrokePoint) -> Stroke:
-        """创建直线笔画"""
-        avg_pressure = (start.pressure + end.pressure) / 2
-        
-        new_points = [
-            StrokePoint(x=start.x, y=start.y, pressure=avg_pressure, timestamp=time.time()),
-            StrokePoint(x=end.x, y=end.y, pressure=avg_pressure, timestamp=time.time())
-        ]
-        
-        return Stroke(
-            id=str(uuid.uuid4()),
-            pen_type=original.pen_type,
-            color=original.color,
-            width=original.width,
-            points=new_points
-        )
+        Returns:
+            识别结果（标准图形笔画或None）的 Future
+        """
+        return self._shape_speculator.recognize(stroke)
 
-    def _create_circle_stroke(self, original: Stroke,
-                              min_x: float, min_y: float,
-                              width: float, height: float) -> Stroke:
-        """创建圆形笔画"""
-        center_x = min_x + width / 2
-        center_y = min_y + height / 2
-        radius = (width + height) / 4
-        
-        # 生成圆形点
-        num_points = 36
-        new_points = []
-        # 安全计算平均压力值
-        avg_pressure = sum(p.pressure for p in original.points) / len(original.points) if original.points else 0.5
-        
-        for i in range(num_points + 1):
-            angle = 2 * math.pi * i / num_points
-            x = center_x + radius * math.cos(angle)
-            y = center_y + radius * math.sin(angle)
-            new_points.append(StrokePoint(x=x, y=y, pressure=avg_pressure, timestamp=time.time()))
-        
-        return Stroke(
-            id=str(uuid.uuid4()),
-            pen_type=original.pen_type,
-            color=original.color,
-            width=original.width,
-            points=new_points
-        )
+    def apply_recognized_shape(self, page_num: int, stroke: Stroke, shape: Stroke) -> bool:
+        """
+        用识别出的形状替换页面上的手绘笔画（在后台识别完成后于UI线程调用）
 
-    def _create_rectangle_stroke(self, original: Stroke,
-                                  min_x: float, min_y: float,
-                                  width: float, height: float) -> Stroke:
-        """创建矩形笔画"""
-        # 安全计算平均压力值
-        avg_pressure = sum(p.pressure for p in original.points) / len(original.points) if original.points else 0.5
-        
-        # 四个角点
-        corners = [
-            (min_x, min_y),
-            (min_x + width, min_y),
-            (min_x + width, min_y + height),
-            (min_x, min_y + height),
-            (min_x, min_y)  # 闭合
-        ]
-        
-        new_points = [
-            StrokePoint(x=x, y=y, pressure=avg_pressure, timestamp=time.time())
-            for x, y in corners
-        ]
-        
-        return Stroke(
-            id=str(uuid.uuid4()),
-            pen_type=original.pen_type,
-            color=original.color,
-            width=original.width,
-            points=new_points
-        )
+        识别期间笔画已被擦除、撤销或替换时不做修改。
 
-    def _create_triangle_stroke(self, original: Stroke, 
-                                 points: List[StrokePoint]) -> Optional[Stroke]:
-        """创建三角形笔画"""
-        corners = self._find_corners(points, 3)
-        if len(corners) != 3:
-            return None
-        
-        # 安全计算平均压力值
-        avg_pressure = sum(p.pressure for p in original.points) / len(original.points) if original.points else 0.5
-        
-        # 三个角点加闭合点
-        new_points = [
-            StrokePoint(x=corners[0].x, y=corners[0].y, pressure=avg_pressure, timestamp=time.time()),
-            StrokePoint(x=corners[1].x, y=corners[1].y, pressure=avg_pressure, timestamp=time.time()),
-            StrokePoint(x=corners[2].x, y=corners[2].y, pressure=avg_pressure, timestamp=time.time()),
-            StrokePoint(x=corners[0].x, y=corners[0].y, pressure=avg_pressure, timestamp=time.time())  # 闭合
-        ]
-        
-        return Stroke(
-            id=str(uuid.uuid4()),
-            pen_type=original.pen_type,
-            color=original.color,
-            width=original.width,
-            points=new_points
-        )
+        Args:
+            page_num: 页码
+            stroke: 被识别的手绘笔画
+            shape: 识别结果
+
+        Returns:
+            是否已替换
+        """
+        if self._strokes_by_id.get(stroke.id) is not stroke:
+            return False
+        if self._stroke_pages.get(stroke.id) != page_num:
+            return False
+        self.replace_stroke(page_num, stroke.id, shape)
+        return True
@@ -0,0 +1,337 @@
+"""
+华为平板PDF阅读器 - 注释导出
+
+把注释笔画写入导出的 PDF，两种方式：
+    paths  笔画网格化后以填充路径写入页面内容流（扁平化），宽度随压力和
+           笔类型变化、透明度与屏幕显示一致，任何阅读器中显示效果相同
+    ink    写为 PDF 墨迹注释（/Ink），可在其他阅读器中继续编辑，宽度恒定
+
+导出在独立的工作进程中逐页进行，不占用UI进程的解释器：源文件只读，
+结果先写入目标目录下的临时文件，完成后再原子替换为目标文件，
+取消或失败时不留下不完整的文件。进度通过队列回报给UI进程。
+
+笔画坐标为画布坐标（Kivy 坐标系，原点在左下角），与页面显示区域
+（page.rect，已考虑页面旋转）按 scale 对应。
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+from huawei_pdf_reader.models import Stroke
+from huawei_pdf_reader.stroke_tessellator import VERTEX_SIZE, pen_style, stroke_mesh
+
+
+# 导出方式
+EXPORT_PATHS = "paths"
+EXPORT_INK = "ink"
+
+# 进度回调：(已完成页数, 需写入注释的总页数)
+ProgressCallback = Callable[[int, int], None]
+
+
+class AnnotationExportError(Exception):
+    """注释导出错误"""
+    pass
+
+
+class ExportCancelledError(AnnotationExportError):
+    """导出被取消"""
+    pass
+
+
+@dataclass
+class ExportOptions:
+    """导出选项"""
+    # 导出方式：EXPORT_PATHS 或 EXPORT_INK
+    mode: str = EXPORT_PATHS
+    # 画布坐标与 PDF 点的比例（画布按页面尺寸 × 缩放倍数布局时为缩放倍数）
+    scale: float = 1.0
+    # 笔迹宽度是否随压力变化（与屏幕显示设置一致）
+    pressure_sensitive: bool = True
+
+
+# ============== 写入页面 ==============
+
+def _hex_to_rgb(color: str) -> Tuple[float, float, float]:
+    color = color.lstrip("#")
+    return tuple(int(color[i:i + 2], 16) / 255.0 for i in (0, 2, 4))
+
+
+def _canvas_matrix(page: "fitz.Page", scale: float) -> "fitz.Matrix":
+    """画布坐标到显示页面坐标（左上角为原点，已考虑页面旋转）的变换"""
+    return fitz.Matrix(1 / scale, 0, 0, -1 / scale, 0, page.rect.height)
+
+
+def _path_operators(vertices, m: "fitz.Matrix") -> str:
+    """
+    网格顶点生成的路径运算符
+
+    三角形带的左侧顶点顺序连接、右侧顶点逆序连接，组成笔画轮廓。
+    轮廓等于各相邻四边形之和（公共边相互抵消），而所有四边形方向一致，
+    按非零环绕规则填充时笔画自身重叠处不会镂空，覆盖范围与屏幕上的网格相同。
+    """
+    a, b, c, d, e, f = m.a, m.b, m.c, m.d, m.e, m.f
+    xs = vertices[0::VERTEX_SIZE]
+    ys = vertices[1::VERTEX_SIZE]
+    points = [
+        "%.2f %.2f" % (a * x + c * y + e, b * x + d * y + f) for x, y in zip(xs, ys)
+    ]
+    outline = points[0::2] + points[-1::-2]
+    return f"{outline[0]} m\n" + "".join(f"{point} l\n" for point in outline[1:]) + "h\n"
+
+
+def draw_stroke_paths(page: "fitz.Page", strokes: Sequence[Stroke],
+                      options: ExportOptions) -> None:
+    """
+    将笔画以填充路径写入页面内容流
+
+    Args:
+        page: PDF 页面
+        strokes: 页面笔画（按绘制顺序）
+        options: 导出选项
+    """
+    shape = page.new_shape()
+    # 画布坐标 → 显示页面 → 未旋转页面 → 内容流坐标
+    m = (_canvas_matrix(page, options.scale) * page.derotation_matrix
+         * ~page.transformation_matrix)
+    for stroke in strokes:
+        if not stroke.points:
+            continue
+        mesh = stroke_mesh(stroke, options.pressure_sensitive)
+        shape.draw_cont += _path_operators(mesh.vertices, m)
+        shape.finish(
+            fill=_hex_to_rgb(stroke.color), color=None, even_odd=False,
+            closePath=False, fill_opacity=mesh.opacity,
+        )
+    shape.commit(overlay=True)
+
+
+def add_ink_annotations(page: "fitz.Page", strokes: Sequence[Stroke],
+                        options: ExportOptions) -> None:
+    """
+    将笔画写为 PDF 墨迹注释（每条笔画一个注释）
+
+    Args:
+        page: PDF 页面
+        strokes: 页面笔画
+        options: 导出选项
+    """
+    m = _canvas_matrix(page, options.scale) * page.derotation_matrix
+    for stroke in strokes:
+        if not stroke.points:
+            continue
+        coords = [tuple(fitz.Point(x, y) * m) for x, y in zip(stroke.points.xs, stroke.points.ys)]
+        if len(coords) == 1:
+            coords.append(coords[0])
+        style = pen_style(stroke.pen_type)
+        annot = page.add_ink_annot([coords])
+        annot.set_border(width=stroke.width / options.scale)
+        annot.set_colors(stroke=_hex_to_rgb(stroke.color))
+        annot.set_opacity(style.opacity)
+        annot.update()
+
+
+# ============== 导出文档 ==============
+
+def export_annotated_pdf(
+    source: Path,
+    output: Path,
+    strokes_by_page: Dict[int, Sequence[Stroke]],
+    options: Optional[ExportOptions] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancelled: Optional[Callable[[], bool]] = None,
+) -> Path:
+    """
+    导出带注释的 PDF（在调用线程上执行）
+
+    Args:
+        source: 源 PDF（只读）
+        output: 目标文件
+        strokes_by_page: {页码(从1开始): [笔画, ...]}
+        options: 导出选项，为None时使用默认选项
+        progress: 每写完一页后调用的进度回调
+        cancelled: 返回是否已取消，每页开始前检查
+
+    Returns:
+        目标文件路径
+
+    Raises:
+        AnnotationExportError: 源文件无法打开或导出方式无效
+        ExportCancelledError: 导出被取消
+    """
+    options = options or ExportOptions()
+    if options.mode == EXPORT_PATHS:
+        write_page = draw_stroke_paths
+    elif options.mode == EXPORT_INK:
+        write_page = add_ink_annotations
+    else:
+        raise AnnotationExportError(f"无效的导出方式: {options.mode}")
+
+    source, output = Path(source), Path(output)
+    try:
+        doc = fitz.open(str(source))
+    except Exception as e:
+        raise AnnotationExportError(f"无法打开源文件: {e}")
+
+    temp = output.with_name(output.name + ".part")
+    try:
+        pages = sorted(
+            page_num for page_num, strokes in strokes_by_page.items()
+            if strokes and 1 <= page_num <= doc.page_count
+        )
+        for done, page_num in enumerate(pages, 1):
+            if cancelled is not None and cancelled():
+                raise ExportCancelledError("导出已取消")
+            write_page(doc[page_num - 1], strokes_by_page[page_num], options)
+            if progress is not None:
+                progress(done, len(pages))
+        output.parent.mkdir(parents=True, exist_ok=True)
+        doc.save(str(temp), garbage=1, deflate=True)
+    except BaseException:
+        doc.close()
+        temp.unlink(missing_ok=True)
+        raise
+    doc.close()
+    os.replace(temp, output)
+    return output
+
+
+def _export_worker(source: str, output: str, payload: Dict[int, List[bytes]],
+                   options: ExportOptions, messages, cancel_event) -> None:
+    """工作进程入口：笔画以二进制传入，进度和结果通过 messages 队列回报"""
+    try:
+        strokes_by_page = {
+            page_num: [Stroke.from_bytes(data) for data in strokes]
+            for page_num, strokes in payload.items()
+        }
+        export_annotated_pdf(
+            Path(source), Path(output), strokes_by_page, options,
+            progress=lambda done, total: messages.put(("progress", done, total)),
+            cancelled=cancel_event.is_set,
+        )
+    except ExportCancelledError:
+        messages.put(("cancelled",))
+    except BaseException as e:
+        messages.put(("error", str(e)))
+    else:
+        messages.put(("done", output))
+
+
+class AnnotationExportJob:
+    """
+    后台导出任务
+
+    future 在导出完成时得到目标文件路径，失败时为 AnnotationExportError，
+    取消时为 ExportCancelledError。进度回调在任务的监视线程上调用，
+    UI 中应转到主线程处理（如 Clock.schedule_once）。
+    """
+
+    # 监视线程检查工作进程是否意外退出的间隔（秒）
+    POLL_INTERVAL = 0.2
+
+    def __init__(
+        self,
+        source: Path,
+        output: Path,
+        strokes_by_page: Dict[int, Sequence[Stroke]],
+        options: Optional[ExportOptions] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        use_process: bool = True,
+    ):
+        """
+        创建并启动导出任务
+
+        Args:
+            source: 源 PDF
+            output: 目标文件
+            strokes_by_page: {页码(从1开始): [笔画, ...]}（启动时复制，之后的修改不影响导出）
+            options: 导出选项
+            on_progress: 进度回调
+            use_process: 在工作进程中导出；为False时使用后台线程（如测试或不支持多进程的平台）
+        """
+        self.future: Future = Future()
+        self.future.set_running_or_notify_cancel()
+        self.progress: Tuple[int, int] = (0, 0)
+        self._on_progress = on_progress
+        payload = {
+            page_num: [stroke.to_bytes() for stroke in strokes]
+            for page_num, strokes in strokes_by_page.items() if strokes
+        }
+        args = (str(source), str(output), payload, options or ExportOptions())
+        if use_process:
+            # 使用 spawn：UI 进程持有窗口和 GL 上下文，不能 fork
+            context = multiprocessing.get_context("spawn")
+            self._messages = context.Queue()
+            self._cancel_event = context.Event()
+            self._worker = context.Process(
+                target=_export_worker, name="annotation-export",
+                args=(*args, self._messages, self._cancel_event), daemon=True,
+            )
+        else:
+            self._messages = queue.Queue()
+            self._cancel_event = threading.Event()
+            self._worker = threading.Thread(
+                target=_export_worker, name="annotation-export",
+                args=(*args, self._messages, self._cancel_event), daemon=True,
+            )
+        self._worker.start()
+        self._monitor = threading.Thread(
+            target=self._monitor_loop, name="annotation-export-monitor", daemon=True
+        )
+        self._monitor.start()
+
+    def cancel(self) -> None:
+        """请求取消（当前页写完后停止，不生成目标文件）"""
+        self._cancel_event.set()
+
+    def wait(self, timeout: Optional[float] = None) -> Path:
+        """等待导出完成并返回目标文件路径"""
+        return self.future.result(timeout)
+
+    def _monitor_loop(self) -> None:
+        while True:
+            try:
+                message = self._messages.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                if self._worker.is_alive():
+                    continue
+                # 工作进程可能在超时之后、存活检查之前放入最终消息并退出
+                try:
+                    message = self._messages.get_nowait()
+                except queue.Empty:
+                    self._finish(error=AnnotationExportError("导出进程意外退出"))
+                    return
+            if self._handle_message(message):
+                return
+
+    def _handle_message(self, message: tuple) -> bool:
+        """处理工作进程的消息，返回任务是否已结束"""
+        kind = message[0]
+        if kind == "progress":
+            self.progress = (message[1], message[2])
+            if self._on_progress is not None:
+                self._on_progress(*self.progress)
+            return False
+        if kind == "done":
+            self._finish(result=Path(message[1]))
+        elif kind == "cancelled":
+            self._finish(error=ExportCancelledError("导出已取消"))
+        else:
+            self._finish(error=AnnotationExportError(message[1]))
+        return True
+
+    def _finish(self, result: Optional[Path] = None,
+                error: Optional[BaseException] = None) -> None:
+        self._worker.join()
+        if error is not None:
+            self.future.set_exception(error)
+        else:
+            self.future.set_result(result)
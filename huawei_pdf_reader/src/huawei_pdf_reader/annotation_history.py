@@ -0,0 +1,193 @@
+"""
+华为平板PDF阅读器 - 注释撤销/重做历史
+
+以命令日志记录笔画变更：每条记录只保存本次操作新增和删除的笔画
+（及其页码和绘制序号），撤销时删除新增的笔画、按原序号放回删除的笔画，
+重做时反向执行。不保存整页快照，撤销/重做的开销只与本次操作涉及的笔画数有关。
+
+历史记录按条数和占用内存双重限制，超出时丢弃最早的记录。
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, List, Optional, Set
+
+from huawei_pdf_reader.models import Stroke
+
+
+# 命令类型
+COMMAND_ADD = "add"          # 添加笔画
+COMMAND_ERASE = "erase"      # 橡皮擦擦除
+COMMAND_CLEAR = "clear"      # 清除页面注释
+COMMAND_REPLACE = "replace"  # 形状识别替换笔画
+
+# 每条笔画除点数据外的估算内存（对象、颜色字符串、ID等）
+_STROKE_OVERHEAD = 256
+
+
+@dataclass
+class StrokeRecord:
+    """历史记录中的一条笔画及其位置"""
+    page_num: int
+    seq: int
+    stroke: Stroke
+
+
+@dataclass
+class HistoryEntry:
+    """
+    一次可撤销的操作
+
+    added 为操作新增的笔画，removed 为操作删除的笔画。
+    撤销即删除 added 并恢复 removed，重做反之。
+    """
+    kind: str
+    added: List[StrokeRecord] = field(default_factory=list)
+    removed: List[StrokeRecord] = field(default_factory=list)
+    # 估算的内存占用（创建时计算）
+    nbytes: int = field(init=False, default=0)
+
+    def __post_init__(self):
+        self.nbytes = sum(
+            record.stroke.points.nbytes + _STROKE_OVERHEAD
+            for record in (*self.added, *self.removed)
+        )
+
+
+@dataclass
+class HistoryChange:
+    """
+    撤销/重做对页面造成的变化，供界面增量重绘
+
+    added 为重新出现的笔画，removed 为消失的笔画。
+    """
+    kind: str
+    undo: bool
+    added: List[StrokeRecord] = field(default_factory=list)
+    removed: List[StrokeRecord] = field(default_factory=list)
+
+    @property
+    def pages(self) -> Set[int]:
+        """受影响的页码"""
+        return {record.page_num for record in (*self.added, *self.removed)}
+
+
+class AnnotationHistory:
+    """撤销/重做命令日志"""
+
+    # 默认最多保留的记录条数和内存
+    DEFAULT_MAX_ENTRIES = 200
+    DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        初始化历史记录
+
+        Args:
+            max_entries: 最多保留的可撤销记录条数
+            max_bytes: 撤销和重做记录合计的内存上限（最近一次操作总是保留）
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if max_bytes < 0:
+            raise ValueError("max_bytes must not be negative")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._undo: Deque[HistoryEntry] = deque()
+        self._redo: List[HistoryEntry] = []
+        self._nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._undo)
+
+    @property
+    def nbytes(self) -> int:
+        """历史记录估算占用的内存"""
+        return self._nbytes
+
+    def can_undo(self) -> bool:
+        return bool(self._undo)
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def redo_count(self) -> int:
+        return len(self._redo)
+
+    def record(self, entry: HistoryEntry) -> None:
+        """
+        记录新操作（清空重做记录）
+
+        Args:
+            entry: 操作记录
+        """
+        if not entry.added and not entry.removed:
+            return
+        for old in self._redo:
+            self._nbytes -= old.nbytes
+        self._redo.clear()
+        self._undo.append(entry)
+        self._nbytes += entry.nbytes
+        self._evict()
+
+    def pop_undo(self) -> Optional[HistoryEntry]:
+        """
+        取出最近一条可撤销的操作，并移入重做记录
+
+        Returns:
+            操作记录，没有可撤销的操作时返回None
+        """
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        self._redo.append(entry)
+        return entry
+
+    def pop_redo(self) -> Optional[HistoryEntry]:
+        """
+        取出最近一条被撤销的操作，并移回撤销记录
+
+        Returns:
+            操作记录，没有可重做的操作时返回None
+        """
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        return entry
+
+    def entries(self) -> List[HistoryEntry]:
+        """全部记录（可撤销的按时间顺序在前，其后为可重做的）"""
+        return [*self._undo, *reversed(self._redo)]
+
+    def discard(self, entry: HistoryEntry) -> bool:
+        """
+        删除一条记录而不撤销它（操作本身已由调用方还原）
+
+        Args:
+            entry: 操作记录
+
+        Returns:
+            记录是否存在并已删除
+        """
+        for entries in (self._undo, self._redo):
+            for i, candidate in enumerate(entries):
+                if candidate is entry:
+                    del entries[i]
+                    self._nbytes -= entry.nbytes
+                    return True
+        return False
+
+    def clear(self) -> None:
+        """清空全部历史"""
+        self._undo.clear()
+        self._redo.clear()
+        self._nbytes = 0
+
+    def _evict(self) -> None:
+        """丢弃最早的记录直到满足条数和内存限制"""
+        while len(self._undo) > 1 and (
+            len(self._undo) > self.max_entries or self._nbytes > self.max_bytes
+        ):
+            self._nbytes -= self._undo.popleft().nbytes
@@ -0,0 +1,406 @@
+"""
+华为平板PDF阅读器 - 注释日志
+
+注释只在保存时写入数据库，进程崩溃会丢失整个会话的修改。
+注释日志以追加方式记录每次笔画新增/修改和删除（小型二进制记录），
+写入后立即交给操作系统，并按条数或时间间隔批量 fsync。
+打开文档时重放日志恢复未保存的修改；保存注释后清空日志。
+日志过大时轮换出一个封存段，在后台线程中合并到数据库笔画表。
+
+文件格式（小端序）：
+    文件头: b"AJN1"
+    记录:   crc32(I) 类型(B) 长度(I) 负载
+    新增/修改负载: 页码(i) 序号(q) Stroke.to_bytes()
+    删除负载:      笔画ID（UTF-8）
+crc32 覆盖类型、长度和负载。重放遇到不完整或校验失败的记录即停止，
+之后的内容视为崩溃时未写完的尾部并被截断。
+"""
+
+import hashlib
+import os
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from huawei_pdf_reader.models import Stroke
+
+
+JOURNAL_MAGIC = b"AJN1"
+
+# 记录类型
+RECORD_UPSERT = 1
+RECORD_DELETE = 2
+
+_RECORD_HEADER = struct.Struct("<IBI")
+_TYPE_LENGTH = struct.Struct("<BI")
+_UPSERT_HEADER = struct.Struct("<iq")
+
+
+@dataclass
+class JournalRecord:
+    """日志中的一条记录"""
+    kind: int
+    stroke_id: str
+    page_num: int = 0
+    seq: int = 0
+    stroke: Optional[Stroke] = None
+
+
+def _encode(record: JournalRecord) -> bytes:
+    if record.kind == RECORD_UPSERT:
+        payload = _UPSERT_HEADER.pack(record.page_num, record.seq) + record.stroke.to_bytes()
+    else:
+        payload = record.stroke_id.encode("utf-8")
+    body = _TYPE_LENGTH.pack(record.kind, len(payload)) + payload
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+def read_journal(path: Path) -> Tuple[List[JournalRecord], int]:
+    """
+    读取日志文件
+
+    Args:
+        path: 日志文件路径
+
+    Returns:
+        (完整的记录, 最后一条完整记录之后的偏移)，文件不存在或文件头无效时返回 ([], 0)
+    """
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return [], 0
+    if not data.startswith(JOURNAL_MAGIC):
+        return [], 0
+
+    records: List[JournalRecord] = []
+    offset = len(JOURNAL_MAGIC)
+    while offset + _RECORD_HEADER.size <= len(data):
+        crc, kind, length = _RECORD_HEADER.unpack_from(data, offset)
+        end = offset + _RECORD_HEADER.size + length
+        if end > len(data) or zlib.crc32(data[offset + 4:end]) != crc:
+            break
+        payload = data[offset + _RECORD_HEADER.size:end]
+        try:
+            if kind == RECORD_UPSERT:
+                page_num, seq = _UPSERT_HEADER.unpack_from(payload)
+                stroke = Stroke.from_bytes(payload[_UPSERT_HEADER.size:])
+                records.append(JournalRecord(kind, stroke.id, page_num, seq, stroke))
+            elif kind == RECORD_DELETE:
+                records.append(JournalRecord(kind, payload.decode("utf-8")))
+            else:
+                break
+        except (ValueError, struct.error):
+            break
+        offset = end
+    return records, offset
+
+
+def net_changes(records: List[JournalRecord]) -> Tuple[List[Tuple[int, int, Stroke]], List[str]]:
+    """
+    将记录序列合并为最终的笔画变更
+
+    Returns:
+        (新增或修改的笔画 [(page_num, seq, Stroke), ...], 删除的笔画ID)
+    """
+    latest: Dict[str, JournalRecord] = {}
+    for record in records:
+        latest.pop(record.stroke_id, None)
+        latest[record.stroke_id] = record
+    upserts = [
+        (r.page_num, r.seq, r.stroke) for r in latest.values() if r.kind == RECORD_UPSERT
+    ]
+    deleted = [r.stroke_id for r in latest.values() if r.kind == RECORD_DELETE]
+    return upserts, deleted
+
+
+class AnnotationJournal:
+    """
+    当前文档的追加式注释日志
+
+    每个文档对应 <目录>/<文档ID哈希>.jnl，正在后台合并的封存段为 .jnl.compacting。
+    追加操作在调用线程执行；fsync 和合并分别在定时器线程和后台线程执行。
+    """
+
+    # 默认批量 fsync 参数：累计条数或距首条未同步记录的时间
+    DEFAULT_SYNC_EVERY = 64
+    DEFAULT_SYNC_INTERVAL = 0.5
+    # 日志超过该大小时轮换并在后台合并到数据库
+    DEFAULT_COMPACT_BYTES = 1024 * 1024
+
+    def __init__(
+        self,
+        directory: Path,
+        database=None,
+        sync_every: int = DEFAULT_SYNC_EVERY,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        compact_bytes: int = DEFAULT_COMPACT_BYTES,
+    ):
+        """
+        初始化注释日志
+
+        Args:
+            directory: 日志目录
+            database: 数据库实例，用于后台合并；为None时只在保存后清空日志
+            sync_every: 累计多少条未同步记录时立即 fsync
+            sync_interval: 未同步记录最多等待多少秒后 fsync（0 表示每条都 fsync）
+            compact_bytes: 日志超过该大小时在后台合并到数据库
+        """
+        self._directory = Path(directory)
+        self._database = database
+        self._sync_every = max(1, sync_every)
+        self._sync_interval = sync_interval
+        self._compact_bytes = compact_bytes
+
+        self._lock = threading.Lock()
+        self._doc_id: Optional[str] = None
+        self._file: Optional[BinaryIO] = None
+        self._size = 0
+        self._unsynced = 0
+        self._sync_timer: Optional[threading.Timer] = None
+        self._compactor: Optional[threading.Thread] = None
+        self._compact_error: Optional[BaseException] = None
+        # 暂停后台合并的计数（异步保存进行中）
+        self._compaction_holds = 0
+        # 每个文档日志内容的版本，追加、轮换和清空时递增
+        self._versions: Dict[str, int] = {}
+
+    @property
+    def doc_id(self) -> Optional[str]:
+        """当前打开的文档ID"""
+        return self._doc_id
+
+    @property
+    def size(self) -> int:
+        """当前日志段的大小（字节）"""
+        return self._size
+
+    @property
+    def compact_error(self) -> Optional[BaseException]:
+        """最近一次后台合并失败的异常（封存段保留，下次重放）"""
+        return self._compact_error
+
+    def path_for(self, doc_id: str) -> Path:
+        """文档的日志文件路径"""
+        name = hashlib.sha1(doc_id.encode("utf-8")).hexdigest()
+        return self._directory / f"{name}.jnl"
+
+    def _sealed_path(self, doc_id: str) -> Path:
+        return self.path_for(doc_id).with_suffix(".jnl.compacting")
+
+    # ============== 打开与重放 ==============
+
+    def open(self, doc_id: str) -> List[JournalRecord]:
+        """
+        打开文档的日志并返回需要重放的记录
+
+        先返回未合并完的封存段，再返回当前段；当前段末尾不完整的记录被截断。
+
+        Args:
+            doc_id: 文档ID
+
+        Returns:
+            按写入顺序排列的记录
+        """
+        self.close()
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(doc_id)
+
+        with self._lock:
+            # 在锁内读取，避免与写线程上的 checkpoint_if_unchanged 交错
+            sealed, _ = read_journal(self._sealed_path(doc_id))
+            records, good_size = read_journal(path)
+            if good_size == 0:
+                self._file = open(path, "wb")
+                self._file.write(JOURNAL_MAGIC)
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                good_size = len(JOURNAL_MAGIC)
+            else:
+                self._file = open(path, "r+b")
+                self._file.truncate(good_size)
+                self._file.seek(good_size)
+            self._doc_id = doc_id
+            self._size = good_size
+        return sealed + records
+
+    # ============== 追加 ==============
+
+    def append_upsert(self, page_num: int, seq: int, stroke: Stroke) -> None:
+        """记录新增或修改的笔画"""
+        self._append(JournalRecord(RECORD_UPSERT, stroke.id, page_num, seq, stroke))
+
+    def append_delete(self, stroke_id: str) -> None:
+        """记录删除的笔画"""
+        self._append(JournalRecord(RECORD_DELETE, stroke_id))
+
+    def _append(self, record: JournalRecord) -> None:
+        frame = _encode(record)
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(frame)
+            # 交给操作系统：进程崩溃不会丢失，断电时最多丢失一个同步批次
+            self._file.flush()
+            self._size += len(frame)
+            self._bump_version_locked()
+            self._unsynced += 1
+            if self._unsynced >= self._sync_every or self._sync_interval <= 0:
+                self._sync_locked()
+            elif self._sync_timer is None:
+                self._sync_timer = threading.Timer(self._sync_interval, self.sync)
+                self._sync_timer.daemon = True
+                self._sync_timer.start()
+        if self._size >= self._compact_bytes:
+            self._start_compaction()
+
+    def sync(self) -> None:
+        """立即 fsync 未同步的记录"""
+        with self._lock:
+            self._sync_locked()
+
+    def _bump_version_locked(self) -> None:
+        if self._doc_id is not None:
+            self._versions[self._doc_id] = self._versions.get(self._doc_id, 0) + 1
+
+    def _sync_locked(self) -> None:
+        if self._sync_timer is not None:
+            self._sync_timer.cancel()
+            self._sync_timer = None
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    # ============== 合并 ==============
+
+    def _start_compaction(self) -> None:
+        """轮换当前段并在后台合并到数据库（已有合并在进行时跳过）"""
+        if self._database is None or self._doc_id is None or self._compaction_holds:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        doc_id = self._doc_id
+        sealed = self._sealed_path(doc_id)
+        if sealed.exists():
+            # 上次合并失败留下的封存段，先合并它
+            self._compactor = threading.Thread(
+                target=self._compact, args=(doc_id, sealed), daemon=True
+            )
+            self._compactor.start()
+            return
+        with self._lock:
+            self._sync_locked()
+            self._file.close()
+            os.replace(self.path_for(doc_id), sealed)
+            self._file = open(self.path_for(doc_id), "wb")
+            self._file.write(JOURNAL_MAGIC)
+            self._file.flush()
+            self._size = len(JOURNAL_MAGIC)
+            self._bump_version_locked()
+        self._compactor = threading.Thread(
+            target=self._compact, args=(doc_id, sealed), daemon=True
+        )
+        self._compactor.start()
+
+    def _compact(self, doc_id: str, sealed: Path) -> None:
+        """将封存段的最终变更写入数据库并删除封存段"""
+        try:
+            records, _ = read_journal(sealed)
+            upserts, deleted = net_changes(records)
+            self._database.save_stroke_changes(doc_id, upserts, deleted_ids=deleted)
+            sealed.unlink()
+            self._compact_error = None
+        except Exception as e:
+            self._compact_error = e
+
+    def wait_compaction(self, timeout: Optional[float] = None) -> None:
+        """等待进行中的后台合并完成"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join(timeout)
+            if not compactor.is_alive():
+                self._compactor = None
+
+    # ============== 检查点 ==============
+
+    def checkpoint(self) -> None:
+        """
+        注释已完整保存到数据库后清空日志
+
+        调用前应先 wait_compaction，避免封存段在保存之后才写入旧状态。
+        """
+        self.wait_compaction()
+        if self._doc_id is None:
+            return
+        self._sealed_path(self._doc_id).unlink(missing_ok=True)
+        with self._lock:
+            self._sync_locked()
+            self._truncate_locked()
+
+    def _truncate_locked(self) -> None:
+        self._file.seek(len(JOURNAL_MAGIC))
+        self._file.truncate()
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._size = len(JOURNAL_MAGIC)
+        self._bump_version_locked()
+
+    def hold_compaction(self) -> None:
+        """暂停后台合并（异步保存写入数据库前调用，与 release_compaction 配对）"""
+        with self._lock:
+            self._compaction_holds += 1
+
+    def release_compaction(self) -> None:
+        """恢复后台合并（下次追加时按需开始）"""
+        with self._lock:
+            self._compaction_holds -= 1
+
+    def mark(self) -> Tuple[Optional[str], int]:
+        """当前文档日志内容的标记，供 checkpoint_if_unchanged 使用"""
+        with self._lock:
+            return self._doc_id, self._versions.get(self._doc_id, 0)
+
+    def checkpoint_if_unchanged(self, mark: Tuple[Optional[str], int]) -> bool:
+        """
+        日志自 mark 以来没有变化时清空日志（可在其他线程调用）
+
+        用于异步保存：收集变更后又追加的记录尚未保存，此时保留日志。
+        文档已切换时清空磁盘上该文档的日志文件。
+
+        Args:
+            mark: 收集变更时 mark() 的返回值
+
+        Returns:
+            是否已清空
+        """
+        doc_id, version = mark
+        self.wait_compaction()
+        with self._lock:
+            if doc_id is None or self._versions.get(doc_id, 0) != version:
+                return False
+            self._sealed_path(doc_id).unlink(missing_ok=True)
+            if doc_id == self._doc_id:
+                self._sync_locked()
+                self._truncate_locked()
+            else:
+                path = self.path_for(doc_id)
+                if path.exists():
+                    with open(path, "wb") as f:
+                        f.write(JOURNAL_MAGIC)
+                        f.flush()
+                        os.fsync(f.fileno())
+                self._versions[doc_id] = version + 1
+            return True
+
+    def close(self) -> None:
+        """同步并关闭当前日志"""
+        self.wait_compaction()
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+            self._file = None
+            self._doc_id = None
+            self._size = 0
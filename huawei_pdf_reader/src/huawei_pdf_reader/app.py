@@ -57,7 +57,11 @@ class AppConfig:
     db_name: str = "app.db"
     plugin_dir: str = "plugins"
     backup_dir: str = "backups"
+    journal_dir: str = "journal"
     temp_dir: Optional[Path] = None
+    # 笔迹延迟统计（调试用）：启用时显示浮层，退出时写入 ink_latency_file
+    ink_latency: bool = False
+    ink_latency_file: str = "ink_latency.json"
     
     def __post_init__(self):
         if self.temp_dir is None:
@@ -75,11 +79,20 @@ class AppConfig:
     def backups_path(self) -> Path:
         return self.data_dir / self.backup_dir
     
+    @property
+    def journal_path(self) -> Path:
+        return self.data_dir / self.journal_dir
+    
+    @property
+    def ink_latency_path(self) -> Path:
+        return self.data_dir / self.ink_latency_file
+    
     def ensure_dirs(self) -> None:
         """确保所有必要目录存在"""
         self.data_dir.mkdir(parents=True, exist_ok=True)
         self.plugins_path.mkdir(parents=True, exist_ok=True)
         self.backups_path.mkdir(parents=True, exist_ok=True)
+        self.journal_path.mkdir(parents=True, exist_ok=True)
         self.temp_dir.mkdir(parents=True, exist_ok=True)
 
 
@@ -124,8 +137,13 @@ class Application:
         # 注册数据库
         self._container.register('database', self._create_database)
         
+        # 注册异步数据库门面
+        self._container.register('async_database', self._create_async_database)
+        
         # 注册设置
-        self._container.register('settings', self._create_settings)
+        self._container.register('settings_store', self._create_settings_store)
+        # 设置对象由设置存储持有（恢复备份后会被替换），每次从存储获取
+        self._container.register('settings', self._create_settings, singleton=False)
         
         # 注册文档处理器
         self._container.register('pdf_renderer', self._create_pdf_renderer, singleton=False)
@@ -137,6 +155,12 @@ class Application:
         # 注册防误触系统
         self._container.register('palm_rejection', self._create_palm_rejection)
         
+        # 注册笔迹延迟统计
+        self._container.register('ink_latency_monitor', self._create_ink_latency_monitor)
+        
+        # 注册文档库快照
+        self._container.register('library_snapshot', self._create_library_snapshot)
+        
         # 注册文件管理器
         self._container.register('file_manager', self._create_file_manager)
         
@@ -165,10 +189,19 @@ class Application:
         from huawei_pdf_reader.database import Database
         return Database(self.config.db_path)
     
+    def _create_async_database(self, container: ServiceContainer):
+        """创建异步数据库门面"""
+        from huawei_pdf_reader.async_database import AsyncDatabase
+        return AsyncDatabase(container.get('database'))
+    
+    def _create_settings_store(self, container: ServiceContainer):
+        """创建设置存储"""
+        from huawei_pdf_reader.settings_store import SettingsStore
+        return SettingsStore(container.get('database'))
+    
     def _create_settings(self, container: ServiceContainer):
         """创建设置实例"""
-        db = container.get('database')
-        return db.load_settings()
+        return container.get('settings_store').settings
     
     def _create_pdf_renderer(self, container: ServiceContainer):
         """创建PDF渲染器"""
@@ -183,21 +216,43 @@ class Application:
     def _create_annotation_engine(self, container: ServiceContainer):
         """创建注释引擎"""
         from huawei_pdf_reader.annotation_engine import AnnotationEngine
+        from huawei_pdf_reader.annotation_journal import AnnotationJournal
+        from huawei_pdf_reader.stroke_simplifier import StrokeSimplifier
         db = container.get('database')
-        return AnnotationEngine(database=db)
+        settings = container.get('settings')
+        engine = AnnotationEngine(
+            database=db,
+            simplifier=StrokeSimplifier.from_config(settings.tools),
+            journal=AnnotationJournal(self.config.journal_path, database=db),
+            lazy=True,
+        )
+        engine.set_latency_monitor(self.get_ink_latency_monitor())
+        return engine
     
     def _create_palm_rejection(self, container: ServiceContainer):
         """创建防误触系统"""
         from huawei_pdf_reader.palm_rejection import PalmRejectionSystem
         settings = container.get('settings')
         sensitivity = settings.stylus.palm_rejection_sensitivity
-        return PalmRejectionSystem(sensitivity=sensitivity)
+        palm_rejection = PalmRejectionSystem(sensitivity=sensitivity)
+        palm_rejection.set_latency_monitor(self.get_ink_latency_monitor())
+        return palm_rejection
+    
+    def _create_ink_latency_monitor(self, container: ServiceContainer):
+        """创建笔迹延迟统计器"""
+        from huawei_pdf_reader.ink_latency import InkLatencyMonitor
+        return InkLatencyMonitor()
+    
+    def _create_library_snapshot(self, container: ServiceContainer):
+        """创建文档库内存快照"""
+        from huawei_pdf_reader.library_snapshot import LibrarySnapshot
+        return LibrarySnapshot(container.get('database'))
     
     def _create_file_manager(self, container: ServiceContainer):
         """创建文件管理器"""
         from huawei_pdf_reader.file_manager import FileManager
         db = container.get('database')
-        return FileManager(db=db)
+        return FileManager(db=db, snapshot=container.get('library_snapshot'))
     
     def _create_chinese_converter(self, container: ServiceContainer):
         """创建繁简转换器"""
@@ -256,8 +311,15 @@ class Application:
             backup_dir=self.config.backups_path
         )
         service.set_config(settings.backup)
+        service.bind_restore(self._on_backup_restored)
         return service
     
+    def _on_backup_restored(self) -> None:
+        """恢复备份绕过设置存储和文件管理器直接写入数据库，丢弃它们的缓存"""
+        self.get_settings_store().reload()
+        if 'library_snapshot' in self._container._services:
+            self._container.get('library_snapshot').invalidate_all()
+    
     # ============== 公共接口 ==============
     
     def initialize(self) -> None:
@@ -280,8 +342,20 @@ class Application:
         plugin_manager = self.get_plugin_manager()
         plugin_manager.unload_all_plugins()
         
-        # 保存设置
-        self.save_settings()
+        # 写入未保存的设置
+        self.get_settings_store().close()
+        
+        # 等待后台数据库写入（包括异步保存的注释）完成
+        if 'async_database' in self._container._services:
+            self._container.get('async_database').close()
+        
+        # 停止注释预读，同步并关闭注释日志
+        if 'annotation_engine' in self._container._services:
+            self._container.get('annotation_engine').close()
+        
+        # 写出笔迹延迟统计
+        if 'ink_latency_monitor' in self._container._services:
+            self._container.get('ink_latency_monitor').dump_json(self.config.ink_latency_path)
         
         self._initialized = False
     
@@ -301,15 +375,25 @@ class Application:
         """获取数据库"""
         return self._container.get('database')
     
+    def get_async_database(self):
+        """获取异步数据库门面"""
+        return self._container.get('async_database')
+    
     def get_settings(self):
         """获取设置"""
         return self._container.get('settings')
     
+    def get_settings_store(self):
+        """获取设置存储"""
+        return self._container.get('settings_store')
+    
     def save_settings(self) -> None:
-        """保存设置"""
-        db = self.get_database()
-        settings = self.get_settings()
-        db.save_settings(settings)
+        """保存设置（延迟合并写入）"""
+        self.get_settings_store().update(self.get_settings())
+    
+    def flush_settings(self) -> None:
+        """立即写入未保存的设置"""
+        self.get_settings_store().flush()
     
     def get_pdf_renderer(self):
         """获取PDF渲染器（每次返回新实例）"""
@@ -327,6 +411,12 @@ class Application:
         """获取防误触系统"""
         return self._container.get('palm_rejection')
     
+    def get_ink_latency_monitor(self):
+        """获取笔迹延迟统计器（未启用时返回None）"""
+        if not self.config.ink_latency:
+            return None
+        return self._container.get('ink_latency_monitor')
+    
     def get_file_manager(self):
         """获取文件管理器"""
         return self._container.get('file_manager')
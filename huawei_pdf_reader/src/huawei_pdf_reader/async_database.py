@@ -0,0 +1,338 @@
+"""
+华为平板PDF阅读器 - 异步数据库门面
+
+将数据库操作移出UI线程：写操作在单一写线程上按提交顺序执行，
+读操作在读线程池中并发执行，结果以 Future 返回，
+可通过 run_on_main 在Kivy主线程上处理。
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+# 通过属性访问时视为只读、放入读线程池的方法前缀
+READ_PREFIXES: Tuple[str, ...] = ("get_", "search_", "load_")
+
+
+def _set_result(futures: List[Future], result: Any) -> None:
+    for future in futures:
+        if future.set_running_or_notify_cancel():
+            future.set_result(result)
+
+
+def _set_exception(futures: List[Future], error: BaseException) -> None:
+    for future in futures:
+        if future.set_running_or_notify_cancel():
+            future.set_exception(error)
+
+
+class _WriteTask:
+    """写队列中的任务"""
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, ready_at: float = 0.0):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.ready_at = ready_at
+        self.futures: List[Future] = []
+        # 尚可合并时所在的等待表及其键
+        self.pending: Optional[Dict[Hashable, "_WriteTask"]] = None
+        self.key: Optional[Hashable] = None
+
+    def run(self) -> None:
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            _set_exception(self.futures, e)
+        else:
+            _set_result(self.futures, result)
+
+
+class _BatchTask(_WriteTask):
+    """合并后的批量写任务，batch_fn 接收所有条目组成的列表"""
+
+    def __init__(self, batch_fn: Callable, ready_at: float):
+        super().__init__(batch_fn, (), {}, ready_at)
+        self.items: List[Any] = []
+
+    def run(self) -> None:
+        self.args = (self.items,)
+        super().run()
+
+
+class AsyncDatabase:
+    """
+    异步数据库门面
+
+    可包装 Database 或 FileManager 等同步服务：
+
+        adb = AsyncDatabase(db)
+        future = adb.get_documents(folder_id)   # 读线程池
+        adb.update_document(doc)                # 写线程
+        run_on_main(future, on_loaded)          # 在主线程处理结果
+
+    同一门面提交的写操作按顺序执行；读操作只保证看到已提交的数据，
+    需要读到自己的写入时，应在写操作的 Future 完成后再发起读取。
+
+    可合并写操作（coalesce_key、write_batched）在等待窗口内暂缓执行，
+    但不会越过或拖延其他写操作：普通写操作提交时，排在它之前的
+    可合并写操作立即结束等待并按原顺序先执行。
+    """
+
+    def __init__(
+        self,
+        target: Any,
+        read_workers: int = 2,
+        coalesce_window: float = 0.01,
+    ):
+        """
+        初始化异步门面
+
+        Args:
+            target: 被包装的同步服务（Database、FileManager等）
+            read_workers: 读线程数
+            coalesce_window: 可合并写操作的等待窗口（秒），窗口内的同类写入合并执行
+        """
+        self._target = target
+        self._coalesce_window = coalesce_window
+        self._readers = ThreadPoolExecutor(
+            max_workers=read_workers, thread_name_prefix="db-reader"
+        )
+        # 写队列，严格按提交顺序执行
+        self._tasks: "deque[_WriteTask]" = deque()
+        self._cond = threading.Condition()
+        self._pending_keys: Dict[Hashable, _WriteTask] = {}
+        self._pending_batches: Dict[Hashable, _BatchTask] = {}
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name="db-writer", daemon=True)
+        self._writer.start()
+
+    @property
+    def target(self) -> Any:
+        """被包装的同步服务"""
+        return self._target
+
+    def __getattr__(self, name: str) -> Callable[..., Future]:
+        """按方法名自动分派：get_/search_/load_ 开头走读线程池，其余走写线程"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        method = getattr(self._target, name)
+        if not callable(method):
+            raise AttributeError(name)
+        submit = self.read if name.startswith(READ_PREFIXES) else self.write
+
+        def call(*args: Any, **kwargs: Any) -> Future:
+            return submit(method, *args, **kwargs)
+
+        call.__name__ = name
+        call.__doc__ = method.__doc__
+        return call
+
+    # ============== 提交任务 ==============
+
+    def read(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:
+        """
+        在读线程池中执行只读操作
+
+        Args:
+            fn: 要执行的函数
+
+        Returns:
+            结果 Future
+        """
+        self._check_open()
+        return self._readers.submit(fn, *args, **kwargs)
+
+    def write(
+        self,
+        fn: Callable,
+        *args: Any,
+        coalesce_key: Optional[Hashable] = None,
+        **kwargs: Any,
+    ) -> Future:
+        """
+        在写线程上执行写操作
+
+        Args:
+            fn: 要执行的函数
+            coalesce_key: 合并键；尚未执行的同键写操作被本次调用取代且不再执行，
+                本次调用排到队尾，所有被合并调用的 Future 都以本次写入的结果完成。
+                仅用于后写覆盖前写的数据（如设置值），被取代的写入不应有其他依赖
+
+        Returns:
+            结果 Future
+        """
+        future: Future = Future()
+        with self._cond:
+            self._check_open()
+            if coalesce_key is None:
+                # 普通写操作不等待合并窗口，排在前面的可合并写操作随之立即执行
+                self._seal_pending()
+                task = _WriteTask(fn, args, kwargs)
+            else:
+                task = _WriteTask(
+                    fn, args, kwargs, time.monotonic() + self._coalesce_window
+                )
+                superseded = self._pending_keys.get(coalesce_key)
+                if superseded is not None:
+                    # 旧任务出队不再执行，其 Future 由新任务完成
+                    self._tasks.remove(superseded)
+                    task.ready_at = superseded.ready_at
+                    task.futures.extend(superseded.futures)
+                task.pending, task.key = self._pending_keys, coalesce_key
+                self._pending_keys[coalesce_key] = task
+            task.futures.append(future)
+            self._tasks.append(task)
+            self._cond.notify()
+        return future
+
+    def write_batched(self, key: Hashable, batch_fn: Callable[[List[Any]], Any], item: Any) -> Future:
+        """
+        提交可合并的批量写入
+
+        等待窗口内同一 key 的连续条目合并为一次 batch_fn(items) 调用，
+        适用于批量打标签等短时间内的大量小写入。
+        中间插入了其他写操作时开始新的批次，以保持执行顺序。
+
+        Args:
+            key: 合并键
+            batch_fn: 批量写函数，参数为条目列表
+            item: 本次写入的条目
+
+        Returns:
+            Future，以 batch_fn 的返回值完成
+        """
+        future: Future = Future()
+        with self._cond:
+            self._check_open()
+            task = self._pending_batches.get(key)
+            if task is None or self._tasks[-1] is not task:
+                if task is not None:
+                    self._seal(task)
+                task = _BatchTask(batch_fn, time.monotonic() + self._coalesce_window)
+                task.pending, task.key = self._pending_batches, key
+                self._pending_batches[key] = task
+                self._tasks.append(task)
+                self._cond.notify()
+            task.items.append(item)
+            task.futures.append(future)
+        return future
+
+    def add_document_tag(self, doc_id: str, tag_id: str) -> Future:
+        """为文档添加标签，连续的调用合并为一个事务"""
+        return self.write_batched(
+            "add_document_tag", self._target.add_document_tags, (doc_id, tag_id)
+        )
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """等待此前提交的所有写操作完成"""
+        self.write(lambda: None).result(timeout)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        关闭门面
+
+        Args:
+            wait: 是否等待已提交的操作执行完毕
+        """
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify()
+        if wait:
+            self._writer.join()
+        self._readers.shutdown(wait=wait)
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("AsyncDatabase is closed")
+
+    # ============== 写线程 ==============
+
+    @staticmethod
+    def _seal(task: _WriteTask) -> None:
+        """停止接受合并（调用方持有锁）"""
+        if task.pending is not None:
+            del task.pending[task.key]
+            task.pending = None
+
+    def _seal_pending(self) -> None:
+        """让队列中所有可合并写操作结束等待（调用方持有锁）"""
+        for task in self._tasks:
+            task.ready_at = 0.0
+            task.pending = None
+        self._pending_keys.clear()
+        self._pending_batches.clear()
+
+    def _next_task(self) -> Optional[_WriteTask]:
+        """取出队首任务，等待其合并窗口结束；已关闭且队列为空时返回None"""
+        with self._cond:
+            while True:
+                if not self._tasks:
+                    if self._closed:
+                        return None
+                    self._cond.wait()
+                    continue
+                task = self._tasks[0]
+                delay = task.ready_at - time.monotonic()
+                if delay <= 0 or self._closed:
+                    break
+                # 等待期间可能被取代或提前结束等待
+                self._cond.wait(delay)
+            self._tasks.popleft()
+            # 开始执行后不再接受合并
+            self._seal(task)
+            return task
+
+    def _write_loop(self) -> None:
+        while True:
+            task = self._next_task()
+            if task is None:
+                return
+            task.run()
+
+
+def run_on_main(
+    future: Future,
+    callback: Callable[[Any], None],
+    error_callback: Optional[Callable[[BaseException], None]] = None,
+) -> None:
+    """
+    在Kivy主线程上处理 Future 的结果
+
+    未安装Kivy时（如测试环境）直接在完成 Future 的线程上回调。
+    Future 被取消时不回调。
+
+    Args:
+        future: 数据库操作返回的 Future
+        callback: 成功回调，参数为结果
+        error_callback: 失败回调，参数为异常；为None时异常被忽略
+    """
+    try:
+        from kivy.clock import Clock
+    except ImportError:
+        Clock = None
+
+    def deliver(done: Future) -> None:
+        if done.cancelled():
+            return
+        error = done.exception()
+        if error is None:
+            callback(done.result())
+        elif error_callback is not None:
+            error_callback(error)
+
+    if Clock is None:
+        future.add_done_callback(deliver)
+    else:
+        future.add_done_callback(lambda done: Clock.schedule_once(lambda dt: deliver(done), 0))
+
+
+def as_awaitable(future: Future, loop: Optional[asyncio.AbstractEventLoop] = None) -> "asyncio.Future":
+    """将 Future 包装为可在 asyncio 事件循环（如 Kivy async_run）中 await 的对象"""
+    return asyncio.wrap_future(future, loop=loop)
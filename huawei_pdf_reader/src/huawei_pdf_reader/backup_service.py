@@ -12,7 +12,7 @@ import zipfile
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import uuid
 
 from huawei_pdf_reader.models import (
@@ -225,6 +225,8 @@ class BackupService:
         
         self._wifi_connected = True  # 模拟WiFi状态
         self._auto_backup_enabled = False
+        # 恢复成功后的回调（恢复直接写数据库，缓存数据的组件需重新加载）
+        self._restore_listeners: List[Callable[[], None]] = []
     
     def set_config(self, config: BackupConfig) -> None:
         """设置备份配置"""
@@ -269,9 +271,23 @@ class BackupService:
             是否成功
         """
         if provider == BackupProvider.LOCAL:
-            return self._restore_local(backup_id)
+            success = self._restore_local(backup_id)
         else:
-            return self._restore_cloud(provider, backup_id)
+            success = self._restore_cloud(provider, backup_id)
+        if success:
+            for listener in list(self._restore_listeners):
+                listener()
+        return success
+    
+    def bind_restore(self, listener: Callable[[], None]) -> None:
+        """注册恢复成功后的回调（如重新加载设置缓存）"""
+        if listener not in self._restore_listeners:
+            self._restore_listeners.append(listener)
+    
+    def unbind_restore(self, listener: Callable[[], None]) -> None:
+        """移除恢复回调"""
+        if listener in self._restore_listeners:
+            self._restore_listeners.remove(listener)
     
     def _backup_local(self) -> bool:
         """执行本地备份"""
@@ -6,19 +6,23 @@ SQLite数据库操作类，负责数据持久化。
 
 import json
 import sqlite3
+import threading
 from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Generator, List, Optional
+from typing import Dict, Generator, Iterable, List, Optional, Set, Tuple
 import uuid
 
+from huawei_pdf_reader.query_profiler import ProfilingConnection, QueryProfiler
 from huawei_pdf_reader.models import (
     Annotation,
     Bookmark,
     DocumentEntry,
     Folder,
+    FolderNode,
     PluginInfo,
     Settings,
+    Stroke,
     Tag,
 )
 
@@ -113,36 +117,233 @@ CREATE INDEX IF NOT EXISTS idx_bookmarks_document ON bookmarks(document_id);
 """
 
 
+# 数据库迁移步骤 [(版本号, SQL脚本), ...]，按版本号升序执行
+# 版本号记录在 PRAGMA user_version 中；每一步在独立事务中执行并更新版本号，
+# 中途失败时回滚该步骤，下次启动从失败的步骤继续。
+# 新增表或索引时只能追加新步骤，不要修改已发布的步骤。
+MIGRATIONS: List[Tuple[int, str]] = [
+    # 1: 初始Schema（对未记录版本的旧数据库同样适用）
+    (1, SCHEMA),
+    # 2: 笔画表（每个笔画单独一行，支持增量保存）
+    (2, """
+CREATE TABLE IF NOT EXISTS strokes (
+    id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    page_num INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    modified_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (document_id) REFERENCES documents(id)
+);
+CREATE INDEX IF NOT EXISTS idx_strokes_document_page ON strokes(document_id, page_num, seq);
+"""),
+    # 3: 按常用查询条件建立复合索引，替换被其前缀覆盖的单列索引
+    (3, """
+CREATE INDEX IF NOT EXISTS idx_annotations_document_page ON annotations(document_id, page_num);
+CREATE INDEX IF NOT EXISTS idx_bookmarks_document_page ON bookmarks(document_id, page_num);
+CREATE INDEX IF NOT EXISTS idx_documents_folder_deleted ON documents(folder_id, is_deleted);
+DROP INDEX IF EXISTS idx_annotations_document;
+DROP INDEX IF EXISTS idx_bookmarks_document;
+DROP INDEX IF EXISTS idx_documents_folder;
+"""),
+    # 4: 文件夹文档计数表（由触发器维护，只统计未删除的文档）和父文件夹索引
+    (4, """
+CREATE INDEX IF NOT EXISTS idx_folders_parent ON folders(parent_id);
+
+CREATE TABLE IF NOT EXISTS folder_counts (
+    folder_id TEXT PRIMARY KEY,
+    doc_count INTEGER NOT NULL DEFAULT 0
+);
+DELETE FROM folder_counts;
+INSERT INTO folder_counts (folder_id, doc_count)
+    SELECT folder_id, COUNT(*) FROM documents
+    WHERE folder_id IS NOT NULL AND is_deleted = 0
+    GROUP BY folder_id;
+
+CREATE TRIGGER IF NOT EXISTS trg_folder_counts_insert
+AFTER INSERT ON documents
+WHEN NEW.folder_id IS NOT NULL AND NEW.is_deleted = 0
+BEGIN
+    INSERT OR IGNORE INTO folder_counts (folder_id, doc_count) VALUES (NEW.folder_id, 0);
+    UPDATE folder_counts SET doc_count = doc_count + 1 WHERE folder_id = NEW.folder_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_folder_counts_delete
+AFTER DELETE ON documents
+WHEN OLD.folder_id IS NOT NULL AND OLD.is_deleted = 0
+BEGIN
+    UPDATE folder_counts SET doc_count = doc_count - 1 WHERE folder_id = OLD.folder_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_folder_counts_update
+AFTER UPDATE OF folder_id, is_deleted ON documents
+WHEN OLD.folder_id IS NOT NEW.folder_id OR OLD.is_deleted IS NOT NEW.is_deleted
+BEGIN
+    UPDATE folder_counts SET doc_count = doc_count - 1
+        WHERE folder_id = OLD.folder_id AND OLD.is_deleted = 0;
+    INSERT OR IGNORE INTO folder_counts (folder_id, doc_count)
+        SELECT NEW.folder_id, 0 WHERE NEW.folder_id IS NOT NULL AND NEW.is_deleted = 0;
+    UPDATE folder_counts SET doc_count = doc_count + 1
+        WHERE folder_id = NEW.folder_id AND NEW.is_deleted = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_folder_counts_folder_delete
+AFTER DELETE ON folders
+BEGIN
+    DELETE FROM folder_counts WHERE folder_id = OLD.id;
+END;
+"""),
+]
+
+# 当前Schema版本
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+class _UnitOfWorkConnection:
+    """
+    工作单元内共享的连接
+
+    各数据库方法照常调用 commit/rollback，这里忽略这些调用，
+    由 Database.transaction() 在块结束时统一提交或回滚。
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def commit(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __getattr__(self, name: str):
+        return getattr(self._conn, name)
+
+
 class Database:
     """数据库操作类"""
 
-    def __init__(self, db_path: Path):
+    def __init__(self, db_path: Path, profiler: Optional[QueryProfiler] = None):
         """
         初始化数据库
         
         Args:
             db_path: 数据库文件路径
+            profiler: 查询分析器，为None时不记录查询统计
         """
         self.db_path = db_path
+        self._profiler = profiler
+        # 停用分析后保留分析器及其统计，只有启用时新连接才记录查询
+        self._profiling_enabled = profiler is not None
+        self._local = threading.local()
         self._ensure_db_exists()
 
     def _ensure_db_exists(self) -> None:
-        """确保数据库和表存在"""
+        """确保数据库和表存在，并迁移到最新Schema版本"""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         with self._get_connection() as conn:
-            conn.executescript(SCHEMA)
-            conn.commit()
+            # 快速路径：版本已是最新时不再执行Schema脚本
+            if self._get_user_version(conn) >= SCHEMA_VERSION:
+                return
+            self._migrate(conn)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """按顺序执行尚未应用的迁移步骤"""
+        for version, script in MIGRATIONS:
+            if version <= self._get_user_version(conn):
+                continue
+            try:
+                # 步骤脚本与版本号更新在同一事务中提交
+                conn.executescript(
+                    f"BEGIN;\n{script}\nPRAGMA user_version = {int(version)};\nCOMMIT;"
+                )
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+
+    @staticmethod
+    def _get_user_version(conn: sqlite3.Connection) -> int:
+        """读取数据库Schema版本"""
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def get_schema_version(self) -> int:
+        """获取数据库Schema版本"""
+        with self._get_connection() as conn:
+            return self._get_user_version(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        """创建新的数据库连接"""
+        profiler = self._profiler if self._profiling_enabled else None
+        if profiler is None:
+            conn = sqlite3.connect(str(self.db_path))
+        else:
+            conn = sqlite3.connect(str(self.db_path), factory=ProfilingConnection)
+            conn.set_profiler(profiler)
+        conn.row_factory = sqlite3.Row
+        return conn
 
     @contextmanager
     def _get_connection(self) -> Generator[sqlite3.Connection, None, None]:
-        """获取数据库连接的上下文管理器"""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
+        """
+        获取数据库连接的上下文管理器
+
+        在 transaction() 内时返回当前事务共享的连接，
+        其 commit/rollback 由事务统一处理。
+        """
+        unit = getattr(self._local, "unit", None)
+        if unit is not None:
+            yield unit
+            return
+        conn = self._connect()
         try:
             yield conn
         finally:
             conn.close()
 
+    @contextmanager
+    def transaction(self) -> Generator[sqlite3.Connection, None, None]:
+        """
+        工作单元：块内的所有数据库操作共享一个连接，在块结束时一次提交
+
+        块内抛出异常时整体回滚。嵌套调用并入最外层事务。
+        事务按线程隔离，其他线程的操作不受影响。
+
+        用法:
+            with db.transaction():
+                db.add_tag(tag)
+                db.add_document_tag(doc_id, tag.id)
+        """
+        unit = getattr(self._local, "unit", None)
+        if unit is not None:
+            yield unit
+            return
+
+        conn = self._connect()
+        try:
+            # 立即获取写锁，避免读后写时与其他写入者冲突
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.unit = _UnitOfWorkConnection(conn)
+            try:
+                yield self._local.unit
+            finally:
+                self._local.unit = None
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+        finally:
+            conn.close()
+
+    @property
+    def in_transaction(self) -> bool:
+        """当前线程是否处于 transaction() 块内"""
+        return getattr(self._local, "unit", None) is not None
+
 
     # ============== 文档操作 ==============
 
@@ -248,12 +449,52 @@ class Database:
             )
             conn.commit()
 
+    def get_existing_document_ids(self, doc_ids: Iterable[str]) -> Set[str]:
+        """
+        筛选出数据库中存在的文档ID
+
+        Args:
+            doc_ids: 待检查的文档ID
+
+        Returns:
+            存在的文档ID集合
+        """
+        ids = list(dict.fromkeys(doc_ids))
+        found: Set[str] = set()
+        with self._get_connection() as conn:
+            # 分批查询，避免超过SQLite参数数量上限
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT id FROM documents WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update(row["id"] for row in rows)
+        return found
+
+    def move_documents(self, doc_ids: Iterable[str], folder_id: Optional[str]) -> None:
+        """
+        批量移动文档到文件夹（单个事务）
+
+        Args:
+            doc_ids: 文档ID序列
+            folder_id: 目标文件夹ID，为None时移到根目录
+        """
+        now = datetime.now().isoformat()
+        with self._get_connection() as conn:
+            conn.executemany(
+                "UPDATE documents SET folder_id = ?, modified_at = ? WHERE id = ?",
+                [(folder_id, now, doc_id) for doc_id in doc_ids],
+            )
+            conn.commit()
+
     def delete_document(self, doc_id: str, permanent: bool = False) -> None:
         """删除文档"""
         with self._get_connection() as conn:
             if permanent:
                 conn.execute("DELETE FROM document_tags WHERE document_id = ?", (doc_id,))
                 conn.execute("DELETE FROM annotations WHERE document_id = ?", (doc_id,))
+                conn.execute("DELETE FROM strokes WHERE document_id = ?", (doc_id,))
                 conn.execute("DELETE FROM bookmarks WHERE document_id = ?", (doc_id,))
                 conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
             else:
@@ -263,6 +504,61 @@ class Database:
                 )
             conn.commit()
 
+    def get_documents_by_ids(self, doc_ids: Optional[Iterable[str]] = None) -> List[DocumentEntry]:
+        """
+        按ID批量获取文档（含已删除文档，不加载标签）
+
+        Args:
+            doc_ids: 文档ID序列，为None时获取全部文档
+
+        Returns:
+            文档列表，按插入顺序排列
+        """
+        with self._get_connection() as conn:
+            if doc_ids is None:
+                rows = conn.execute("SELECT * FROM documents ORDER BY rowid").fetchall()
+                return [self._row_to_document(row) for row in rows]
+
+            ids = list(dict.fromkeys(doc_ids))
+            docs = []
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT * FROM documents WHERE id IN ({','.join('?' * len(chunk))}) ORDER BY rowid",
+                    chunk,
+                ).fetchall()
+                docs.extend(self._row_to_document(row) for row in rows)
+            return docs
+
+    def get_document_tag_pairs(
+        self, doc_ids: Optional[Iterable[str]] = None
+    ) -> List[Tuple[str, str]]:
+        """
+        获取文档与标签的关联
+
+        Args:
+            doc_ids: 文档ID序列，为None时获取全部关联
+
+        Returns:
+            (文档ID, 标签ID) 列表
+        """
+        with self._get_connection() as conn:
+            if doc_ids is None:
+                rows = conn.execute("SELECT document_id, tag_id FROM document_tags").fetchall()
+                return [(row[0], row[1]) for row in rows]
+
+            ids = list(dict.fromkeys(doc_ids))
+            pairs = []
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = conn.execute(
+                    "SELECT document_id, tag_id FROM document_tags "
+                    f"WHERE document_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                pairs.extend((row[0], row[1]) for row in rows)
+            return pairs
+
     def _row_to_document(self, row: sqlite3.Row) -> DocumentEntry:
         """将数据库行转换为DocumentEntry"""
         return DocumentEntry(
@@ -342,6 +638,20 @@ class Database:
                 for row in rows
             ]
 
+    def get_all_folders(self) -> List[Folder]:
+        """获取所有文件夹"""
+        with self._get_connection() as conn:
+            rows = conn.execute("SELECT * FROM folders").fetchall()
+            return [
+                Folder(
+                    id=row["id"],
+                    name=row["name"],
+                    parent_id=row["parent_id"],
+                    created_at=datetime.fromisoformat(row["created_at"]),
+                )
+                for row in rows
+            ]
+
     def delete_folder(self, folder_id: str) -> None:
         """删除文件夹"""
         with self._get_connection() as conn:
@@ -359,6 +669,115 @@ class Database:
             conn.execute("DELETE FROM folders WHERE id = ?", (folder_id,))
             conn.commit()
 
+    def get_folder_tree(self) -> List[FolderNode]:
+        """
+        一次查询获取完整的文件夹树及文档计数
+
+        Returns:
+            根文件夹节点列表，子节点按名称排序
+        """
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                """
+                WITH RECURSIVE subtree(root_id, id) AS (
+                    SELECT id, id FROM folders
+                    UNION
+                    SELECT s.root_id, f.id FROM folders f
+                    JOIN subtree s ON f.parent_id = s.id
+                )
+                SELECT f.id, f.name, f.parent_id, f.created_at,
+                       COALESCE(d.doc_count, 0) AS document_count,
+                       COALESCE(SUM(c.doc_count), 0) AS total_document_count
+                FROM folders f
+                JOIN subtree s ON s.root_id = f.id
+                LEFT JOIN folder_counts c ON c.folder_id = s.id
+                LEFT JOIN folder_counts d ON d.folder_id = f.id
+                GROUP BY f.id
+                ORDER BY f.name
+                """
+            ).fetchall()
+
+        nodes = {
+            row["id"]: FolderNode(
+                folder=Folder(
+                    id=row["id"],
+                    name=row["name"],
+                    parent_id=row["parent_id"],
+                    created_at=datetime.fromisoformat(row["created_at"]),
+                ),
+                document_count=row["document_count"],
+                total_document_count=row["total_document_count"],
+            )
+            for row in rows
+        }
+        roots = []
+        for node in nodes.values():
+            parent = nodes.get(node.folder.parent_id)
+            if parent is None:
+                roots.append(node)
+            else:
+                parent.children.append(node)
+
+        stack = [(node, 0) for node in roots]
+        while stack:
+            node, depth = stack.pop()
+            node.depth = depth
+            stack.extend((child, depth + 1) for child in node.children)
+        return roots
+
+    def get_folder_counts(self) -> Dict[str, int]:
+        """
+        获取每个文件夹（含子文件夹）的未删除文档总数
+
+        Returns:
+            文件夹ID到文档数的映射
+        """
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                """
+                WITH RECURSIVE subtree(root_id, id) AS (
+                    SELECT id, id FROM folders
+                    UNION
+                    SELECT s.root_id, f.id FROM folders f
+                    JOIN subtree s ON f.parent_id = s.id
+                )
+                SELECT s.root_id, COALESCE(SUM(c.doc_count), 0) AS total
+                FROM subtree s
+                LEFT JOIN folder_counts c ON c.folder_id = s.id
+                GROUP BY s.root_id
+                """
+            ).fetchall()
+            return {row["root_id"]: row["total"] for row in rows}
+
+    def get_subtree_document_ids(
+        self, folder_id: str, include_deleted: bool = False
+    ) -> List[str]:
+        """
+        获取文件夹及其所有子文件夹中的文档ID
+
+        Args:
+            folder_id: 文件夹ID
+            include_deleted: 是否包含已删除的文档
+
+        Returns:
+            文档ID列表
+        """
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                f"""
+                WITH RECURSIVE subtree(id) AS (
+                    SELECT ?
+                    UNION
+                    SELECT f.id FROM folders f JOIN subtree s ON f.parent_id = s.id
+                )
+                SELECT d.id FROM documents d
+                JOIN subtree s ON d.folder_id = s.id
+                {"" if include_deleted else "WHERE d.is_deleted = 0"}
+                """,
+                (folder_id,),
+            ).fetchall()
+            return [row["id"] for row in rows]
+
     # ============== 标签操作 ==============
 
     def add_tag(self, tag: Tag) -> str:
@@ -402,6 +821,20 @@ class Database:
             )
             conn.commit()
 
+    def add_document_tags(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """
+        批量为文档添加标签（单个事务）
+
+        Args:
+            pairs: (文档ID, 标签ID) 序列
+        """
+        with self._get_connection() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO document_tags (document_id, tag_id) VALUES (?, ?)",
+                list(pairs),
+            )
+            conn.commit()
+
     def remove_document_tag(self, doc_id: str, tag_id: str) -> None:
         """移除文档标签"""
         with self._get_connection() as conn:
@@ -466,8 +899,20 @@ class Database:
             conn.commit()
         return annotation.id
 
-    def get_annotations(self, doc_id: str, page_num: Optional[int] = None) -> List[Annotation]:
-        """获取注释"""
+    def get_annotations(
+        self,
+        doc_id: str,
+        page_num: Optional[int] = None,
+        include_strokes: bool = True,
+    ) -> List[Annotation]:
+        """
+        获取注释
+
+        Args:
+            doc_id: 文档ID
+            page_num: 页码，为None时获取所有页面
+            include_strokes: 是否包含笔画表中的笔画（按页合并为注释）
+        """
         with self._get_connection() as conn:
             if page_num is not None:
                 rows = conn.execute(
@@ -479,7 +924,19 @@ class Database:
                     "SELECT data FROM annotations WHERE document_id = ?",
                     (doc_id,),
                 ).fetchall()
-            return [Annotation.from_dict(json.loads(row["data"])) for row in rows]
+            annotations = [Annotation.from_dict(json.loads(row["data"])) for row in rows]
+
+            if include_strokes:
+                pages: dict = {}
+                for stroke_page, _, stroke in self._query_strokes(conn, doc_id, page_num):
+                    pages.setdefault(stroke_page, []).append(stroke)
+                for stroke_page, strokes in pages.items():
+                    annotations.append(Annotation(
+                        id=f"annotation_{stroke_page}",
+                        page_num=stroke_page,
+                        strokes=strokes,
+                    ))
+            return annotations
 
     def load_annotations(self, doc_id: str) -> List[Annotation]:
         """加载文档的所有注释（别名方法，用于注释引擎）"""
@@ -491,6 +948,140 @@ class Database:
             conn.execute("DELETE FROM annotations WHERE id = ?", (annotation_id,))
             conn.commit()
 
+    # ============== 笔画操作 ==============
+
+    def get_strokes(
+        self, doc_id: str, page_num: Optional[int] = None
+    ) -> List[Tuple[int, int, Stroke]]:
+        """
+        获取笔画表中的笔画
+
+        Args:
+            doc_id: 文档ID
+            page_num: 页码，为None时获取所有页面
+
+        Returns:
+            [(page_num, seq, Stroke), ...]，按页码和序号排序
+        """
+        with self._get_connection() as conn:
+            return self._query_strokes(conn, doc_id, page_num)
+
+    def get_stroke_page_summaries(self, doc_id: str) -> Dict[int, Tuple[int, int]]:
+        """
+        获取每页的笔画摘要（只读索引，不读取笔画数据）
+
+        Args:
+            doc_id: 文档ID
+
+        Returns:
+            {page_num: (笔画数, 最大序号)}
+        """
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                """
+                SELECT page_num, COUNT(*) AS stroke_count, MAX(seq) AS max_seq
+                FROM strokes WHERE document_id = ?
+                GROUP BY page_num
+                """,
+                (doc_id,),
+            ).fetchall()
+        return {row["page_num"]: (row["stroke_count"], row["max_seq"]) for row in rows}
+
+    def get_annotation_pages(self, doc_id: str) -> List[int]:
+        """获取有旧版整页注释的页码"""
+        with self._get_connection() as conn:
+            rows = conn.execute(
+                "SELECT DISTINCT page_num FROM annotations WHERE document_id = ? ORDER BY page_num",
+                (doc_id,),
+            ).fetchall()
+        return [row["page_num"] for row in rows]
+
+    def save_stroke_changes(
+        self,
+        doc_id: str,
+        upserts: Iterable[Tuple[int, int, Stroke]],
+        deleted_ids: Iterable[str] = (),
+        deleted_annotation_ids: Iterable[str] = (),
+    ) -> None:
+        """
+        在单个事务中保存笔画变更
+
+        Args:
+            doc_id: 文档ID
+            upserts: 新增或修改的笔画 [(page_num, seq, Stroke), ...]
+            deleted_ids: 被删除的笔画ID
+            deleted_annotation_ids: 需要一并删除的旧版整页注释ID（迁移到笔画表后）
+        """
+        now = datetime.now().isoformat()
+        stroke_rows = [
+            (stroke.id, doc_id, page_num, seq, stroke.to_bytes(), now)
+            for page_num, seq, stroke in upserts
+        ]
+        delete_rows = [(stroke_id, doc_id) for stroke_id in deleted_ids]
+        annotation_rows = [(ann_id, doc_id) for ann_id in deleted_annotation_ids]
+
+        with self._get_connection() as conn:
+            try:
+                if delete_rows:
+                    conn.executemany(
+                        "DELETE FROM strokes WHERE id = ? AND document_id = ?",
+                        delete_rows,
+                    )
+                if annotation_rows:
+                    conn.executemany(
+                        "DELETE FROM annotations WHERE id = ? AND document_id = ?",
+                        annotation_rows,
+                    )
+                if stroke_rows:
+                    conn.executemany(
+                        """
+                        INSERT OR REPLACE INTO strokes
+                            (id, document_id, page_num, seq, data, modified_at)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        stroke_rows,
+                    )
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
+    def _query_strokes(
+        self,
+        conn: sqlite3.Connection,
+        doc_id: str,
+        page_num: Optional[int] = None,
+    ) -> List[Tuple[int, int, Stroke]]:
+        """查询笔画行并反序列化"""
+        if page_num is not None:
+            rows = conn.execute(
+                """
+                SELECT page_num, seq, data FROM strokes
+                WHERE document_id = ? AND page_num = ?
+                ORDER BY seq
+                """,
+                (doc_id, page_num),
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                """
+                SELECT page_num, seq, data FROM strokes
+                WHERE document_id = ?
+                ORDER BY page_num, seq
+                """,
+                (doc_id,),
+            ).fetchall()
+        # 早期版本以JSON文本保存笔画，之后以二进制列式格式保存
+        return [
+            (
+                row["page_num"],
+                row["seq"],
+                Stroke.from_bytes(row["data"]) if Stroke.is_packed(row["data"])
+                else Stroke.from_dict(json.loads(row["data"])),
+            )
+            for row in rows
+        ]
+
     # ============== 书签操作 ==============
 
     def add_bookmark(self, bookmark: Bookmark) -> str:
@@ -648,6 +1239,24 @@ class Database:
             )
             conn.commit()
 
+    def save_setting_values(self, values: Dict[str, str]) -> None:
+        """
+        在单个事务中保存多个设置项
+
+        Args:
+            values: 设置键到值的映射
+        """
+        with self._get_connection() as conn:
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    list(values.items()),
+                )
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+
     def get_setting(self, key: str, default: Optional[str] = None) -> Optional[str]:
         """获取单个设置项"""
         with self._get_connection() as conn:
@@ -658,6 +1267,46 @@ class Database:
                 return row["value"]
         return default
 
+    # ============== 查询分析 ==============
+
+    def enable_profiling(self, profiler: Optional[QueryProfiler] = None) -> QueryProfiler:
+        """
+        启用查询分析
+        
+        Args:
+            profiler: 查询分析器，为None时创建默认分析器
+            
+        Returns:
+            正在使用的查询分析器
+        """
+        self._profiler = profiler or self._profiler or QueryProfiler()
+        self._profiling_enabled = True
+        return self._profiler
+
+    def disable_profiling(self) -> None:
+        """停用查询分析（保留已收集的统计，之后的连接不再记录）"""
+        self._profiling_enabled = False
+
+    @property
+    def profiling_enabled(self) -> bool:
+        """是否启用了查询分析"""
+        return self._profiling_enabled
+
+    def get_query_profile(self) -> dict:
+        """
+        获取查询分析结果
+        
+        Returns:
+            {"enabled": bool, "statements": [...], "slow_queries": [...]}，
+            statements 按总耗时降序，包含次数、耗时直方图、行数和调用位置；
+            停用后仍返回停用前收集的统计
+        """
+        if self._profiler is None:
+            return {"enabled": False, "statements": [], "slow_queries": []}
+        profile = self._profiler.get_profile()
+        profile["enabled"] = self._profiling_enabled
+        return profile
+
     # ============== 工具方法 ==============
 
     def generate_id(self) -> str:
@@ -678,6 +1327,7 @@ class Database:
             folder_count = conn.execute("SELECT COUNT(*) FROM folders").fetchone()[0]
             tag_count = conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
             annotation_count = conn.execute("SELECT COUNT(*) FROM annotations").fetchone()[0]
+            stroke_count = conn.execute("SELECT COUNT(*) FROM strokes").fetchone()[0]
             bookmark_count = conn.execute("SELECT COUNT(*) FROM bookmarks").fetchone()[0]
             plugin_count = conn.execute("SELECT COUNT(*) FROM plugins").fetchone()[0]
 
@@ -686,6 +1336,7 @@ class Database:
                 "folders": folder_count,
                 "tags": tag_count,
                 "annotations": annotation_count,
+                "strokes": stroke_count,
                 "bookmarks": bookmark_count,
                 "plugins": plugin_count,
             }
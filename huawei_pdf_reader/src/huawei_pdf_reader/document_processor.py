@@ -253,6 +253,11 @@ class PDFRenderer(IDocumentRenderer):
         """获取当前文档信息"""
         return self._document_info
     
+    @property
+    def pdf_path(self) -> Optional[Path]:
+        """当前文档的 PDF 文件路径（导出注释时作为源文件）"""
+        return self._path
+    
     @property
     def total_pages(self) -> int:
         """获取总页数"""
@@ -425,6 +430,11 @@ class WordRenderer(IDocumentRenderer):
     def document_info(self) -> Optional[DocumentInfo]:
         """获取当前文档信息"""
         return self._document_info
+    
+    @property
+    def pdf_path(self) -> Optional[Path]:
+        """转换后的临时 PDF 文件路径（导出注释时作为源文件）"""
+        return self._temp_pdf_path
 
 
 def create_renderer(path: Path) -> IDocumentRenderer:
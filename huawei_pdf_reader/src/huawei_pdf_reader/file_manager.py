@@ -7,17 +7,19 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
 import uuid
 import os
 
 import fitz  # PyMuPDF
 
 from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.library_snapshot import LibrarySnapshot
 from huawei_pdf_reader.models import (
     Bookmark,
     DocumentEntry,
     Folder,
+    FolderNode,
     Tag,
 )
 
@@ -107,14 +109,22 @@ class FileManager(IFileManager):
     THUMBNAIL_WIDTH = 150
     THUMBNAIL_HEIGHT = 200
     
-    def __init__(self, db: Database):
+    def __init__(self, db: Database, snapshot: Optional[LibrarySnapshot] = None):
         """
         初始化文件管理器
         
         Args:
             db: 数据库实例
+            snapshot: 文档库内存快照，提供时查询在内存中完成，
+                      修改后由文件管理器负责使其失效
         """
         self._db = db
+        self._snapshot = snapshot
+    
+    @property
+    def snapshot(self) -> Optional[LibrarySnapshot]:
+        """文档库内存快照"""
+        return self._snapshot
     
     def get_documents(
         self, 
@@ -131,6 +141,13 @@ class FileManager(IFileManager):
         Returns:
             文档条目列表
         """
+        if self._snapshot is not None:
+            return self._snapshot.get_documents(
+                folder_id=folder_id,
+                tags=[tag] if tag else None,
+                all_folders=bool(tag) and folder_id is None,
+            )
+        
         if tag:
             # 按标签筛选
             tag_obj = self._db.get_tag_by_name(tag)
@@ -158,8 +175,59 @@ class FileManager(IFileManager):
         """
         if not keyword or not keyword.strip():
             return []
+        if self._snapshot is not None:
+            return self._snapshot.get_documents(keyword=keyword, all_folders=True)
         return self._db.search_documents(keyword.strip())
     
+    def filter_documents(
+        self,
+        folder_id: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+        file_type: Optional[str] = None,
+        keyword: Optional[str] = None,
+        all_folders: bool = False,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> List[DocumentEntry]:
+        """
+        组合筛选文档（在内存快照中完成）
+        
+        Args:
+            folder_id: 文件夹ID，为None时为根目录
+            tags: 标签名称列表，文档需同时带有所有标签
+            file_type: 文件类型（如 "pdf"）
+            keyword: 标题或路径包含的关键词
+            all_folders: 为True时在所有文件夹中筛选
+            sort_by: 排序字段（title/created_at/modified_at/size）
+            descending: 是否降序
+            
+        Returns:
+            文档条目列表
+        """
+        snapshot = self._snapshot if self._snapshot is not None else LibrarySnapshot(self._db)
+        return snapshot.get_documents(
+            folder_id=folder_id,
+            tags=tags,
+            file_type=file_type,
+            keyword=keyword,
+            all_folders=all_folders,
+            sort_by=sort_by,
+            descending=descending,
+        )
+    
+    def _invalidate_documents(self, *doc_ids: str) -> None:
+        """文档修改后使快照中的对应条目失效"""
+        if self._snapshot is not None:
+            self._snapshot.invalidate_documents(doc_ids)
+    
+    def _invalidate_folders(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.invalidate_folders()
+    
+    def _invalidate_tags(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.invalidate_tags()
+    
     def create_folder(self, name: str, parent_id: Optional[str] = None) -> Folder:
         """
         创建文件夹
@@ -186,6 +254,7 @@ class FileManager(IFileManager):
             created_at=datetime.now()
         )
         self._db.add_folder(folder)
+        self._invalidate_folders()
         return folder
     
     def delete_document(self, doc_id: str) -> None:
@@ -204,6 +273,7 @@ class FileManager(IFileManager):
         
         # 软删除（移至回收站）
         self._db.delete_document(doc_id, permanent=False)
+        self._invalidate_documents(doc_id)
     
     def add_tag(self, doc_id: str, tag_name: str) -> None:
         """
@@ -218,22 +288,68 @@ class FileManager(IFileManager):
         Raises:
             DocumentNotFoundError: 文档不存在
         """
-        doc = self._db.get_document(doc_id)
-        if not doc:
-            raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        with self._db.transaction():
+            doc = self._db.get_document(doc_id)
+            if not doc:
+                raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        
+            # 查找或创建标签
+            tag = self._db.get_tag_by_name(tag_name)
+            if not tag:
+                tag = Tag(
+                    id=str(uuid.uuid4()),
+                    name=tag_name,
+                    color="#808080"
+                )
+                self._db.add_tag(tag)
         
-        # 查找或创建标签
-        tag = self._db.get_tag_by_name(tag_name)
-        if not tag:
-            tag = Tag(
-                id=str(uuid.uuid4()),
-                name=tag_name,
-                color="#808080"
+            # 添加文档标签关联
+            self._db.add_document_tag(doc_id, tag.id)
+        
+        self._invalidate_tags()
+        self._invalidate_documents(doc_id)
+    
+    def add_tags(self, doc_ids: List[str], tag_names: List[str]) -> None:
+        """
+        批量为多个文档添加多个标签（单个事务）
+        
+        不存在的标签会自动创建
+        
+        Args:
+            doc_ids: 文档ID列表
+            tag_names: 标签名称列表
+            
+        Raises:
+            DocumentNotFoundError: 任一文档不存在（此时不做任何修改）
+        """
+        with self._db.transaction():
+            self._check_documents_exist(doc_ids)
+            
+            tag_ids = []
+            for tag_name in dict.fromkeys(tag_names):
+                tag = self._db.get_tag_by_name(tag_name)
+                if not tag:
+                    tag = Tag(
+                        id=str(uuid.uuid4()),
+                        name=tag_name,
+                        color="#808080"
+                    )
+                    self._db.add_tag(tag)
+                tag_ids.append(tag.id)
+            
+            self._db.add_document_tags(
+                (doc_id, tag_id) for doc_id in doc_ids for tag_id in tag_ids
             )
-            self._db.add_tag(tag)
         
-        # 添加文档标签关联
-        self._db.add_document_tag(doc_id, tag.id)
+        self._invalidate_tags()
+        self._invalidate_documents(*doc_ids)
+    
+    def _check_documents_exist(self, doc_ids: List[str]) -> None:
+        """检查文档是否都存在"""
+        existing = self._db.get_existing_document_ids(doc_ids)
+        missing = [doc_id for doc_id in doc_ids if doc_id not in existing]
+        if missing:
+            raise DocumentNotFoundError(f"文档不存在: {', '.join(missing)}")
     
     def remove_tag(self, doc_id: str, tag_name: str) -> None:
         """
@@ -247,15 +363,18 @@ class FileManager(IFileManager):
             DocumentNotFoundError: 文档不存在
             TagNotFoundError: 标签不存在
         """
-        doc = self._db.get_document(doc_id)
-        if not doc:
-            raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        with self._db.transaction():
+            doc = self._db.get_document(doc_id)
+            if not doc:
+                raise DocumentNotFoundError(f"文档不存在: {doc_id}")
         
-        tag = self._db.get_tag_by_name(tag_name)
-        if not tag:
-            raise TagNotFoundError(f"标签不存在: {tag_name}")
+            tag = self._db.get_tag_by_name(tag_name)
+            if not tag:
+                raise TagNotFoundError(f"标签不存在: {tag_name}")
         
-        self._db.remove_document_tag(doc_id, tag.id)
+            self._db.remove_document_tag(doc_id, tag.id)
+        
+        self._invalidate_documents(doc_id)
     
     def generate_thumbnail(self, doc_path: Path) -> bytes:
         """
@@ -462,6 +581,7 @@ class FileManager(IFileManager):
         )
         
         self._db.add_document(doc)
+        self._invalidate_documents(doc.id)
         return doc
     
     def get_folders(self, parent_id: Optional[str] = None) -> List[Folder]:
@@ -474,8 +594,45 @@ class FileManager(IFileManager):
         Returns:
             文件夹列表
         """
+        if self._snapshot is not None:
+            return self._snapshot.get_folders(parent_id)
         return self._db.get_folders(parent_id)
     
+    def get_folder_tree(self) -> List[FolderNode]:
+        """
+        获取完整的文件夹树（含每个文件夹的文档计数）
+        
+        Returns:
+            根文件夹节点列表
+        """
+        return self._db.get_folder_tree()
+    
+    def get_folder_counts(self) -> Dict[str, int]:
+        """
+        获取每个文件夹（含子文件夹）的文档数
+        
+        Returns:
+            文件夹ID到文档数的映射
+        """
+        return self._db.get_folder_counts()
+    
+    def get_subtree_document_ids(self, folder_id: str) -> List[str]:
+        """
+        获取文件夹及其所有子文件夹中的文档ID
+        
+        Args:
+            folder_id: 文件夹ID
+            
+        Returns:
+            文档ID列表
+            
+        Raises:
+            FolderNotFoundError: 文件夹不存在
+        """
+        if not self._db.get_folder(folder_id):
+            raise FolderNotFoundError(f"文件夹不存在: {folder_id}")
+        return self._db.get_subtree_document_ids(folder_id)
+    
     def delete_folder(self, folder_id: str) -> None:
         """
         删除文件夹
@@ -492,7 +649,13 @@ class FileManager(IFileManager):
         if not folder:
             raise FolderNotFoundError(f"文件夹不存在: {folder_id}")
         
-        self._db.delete_folder(folder_id)
+        with self._db.transaction():
+            # 文件夹内的文档会被移到根目录
+            moved = self._db.get_documents(folder_id=folder_id, include_deleted=True)
+            self._db.delete_folder(folder_id)
+        
+        self._invalidate_folders()
+        self._invalidate_documents(*(doc.id for doc in moved))
     
     def move_document(self, doc_id: str, folder_id: Optional[str]) -> None:
         """
@@ -506,17 +669,44 @@ class FileManager(IFileManager):
             DocumentNotFoundError: 文档不存在
             FolderNotFoundError: 目标文件夹不存在
         """
-        doc = self._db.get_document(doc_id)
-        if not doc:
-            raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        with self._db.transaction():
+            doc = self._db.get_document(doc_id)
+            if not doc:
+                raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        
+            if folder_id:
+                folder = self._db.get_folder(folder_id)
+                if not folder:
+                    raise FolderNotFoundError(f"文件夹不存在: {folder_id}")
         
-        if folder_id:
-            folder = self._db.get_folder(folder_id)
-            if not folder:
-                raise FolderNotFoundError(f"文件夹不存在: {folder_id}")
+            doc.folder_id = folder_id
+            self._db.update_document(doc)
         
-        doc.folder_id = folder_id
-        self._db.update_document(doc)
+        self._invalidate_documents(doc_id)
+    
+    def move_documents(self, doc_ids: List[str], folder_id: Optional[str]) -> None:
+        """
+        批量移动文档到指定文件夹（单个事务）
+        
+        Args:
+            doc_ids: 文档ID列表
+            folder_id: 目标文件夹ID，为None时移到根目录
+            
+        Raises:
+            DocumentNotFoundError: 任一文档不存在（此时不做任何修改）
+            FolderNotFoundError: 目标文件夹不存在
+        """
+        with self._db.transaction():
+            self._check_documents_exist(doc_ids)
+            
+            if folder_id:
+                folder = self._db.get_folder(folder_id)
+                if not folder:
+                    raise FolderNotFoundError(f"文件夹不存在: {folder_id}")
+            
+            self._db.move_documents(doc_ids, folder_id)
+        
+        self._invalidate_documents(*doc_ids)
     
     def rename_document(self, doc_id: str, new_title: str) -> None:
         """
@@ -529,12 +719,15 @@ class FileManager(IFileManager):
         Raises:
             DocumentNotFoundError: 文档不存在
         """
-        doc = self._db.get_document(doc_id)
-        if not doc:
-            raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        with self._db.transaction():
+            doc = self._db.get_document(doc_id)
+            if not doc:
+                raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        
+            doc.title = new_title
+            self._db.update_document(doc)
         
-        doc.title = new_title
-        self._db.update_document(doc)
+        self._invalidate_documents(doc_id)
     
     def get_deleted_documents(self) -> List[DocumentEntry]:
         """
@@ -543,6 +736,9 @@ class FileManager(IFileManager):
         Returns:
             已删除的文档列表
         """
+        if self._snapshot is not None:
+            return self._snapshot.get_deleted_documents()
+        
         # 使用数据库的include_deleted参数获取所有文档，然后筛选已删除的
         all_docs = self._db.get_documents(folder_id=None, include_deleted=True)
         return [d for d in all_docs if d.is_deleted]
@@ -557,12 +753,15 @@ class FileManager(IFileManager):
         Raises:
             DocumentNotFoundError: 文档不存在
         """
-        doc = self._db.get_document(doc_id)
-        if not doc:
-            raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        with self._db.transaction():
+            doc = self._db.get_document(doc_id)
+            if not doc:
+                raise DocumentNotFoundError(f"文档不存在: {doc_id}")
+        
+            doc.is_deleted = False
+            self._db.update_document(doc)
         
-        doc.is_deleted = False
-        self._db.update_document(doc)
+        self._invalidate_documents(doc_id)
     
     def permanent_delete_document(self, doc_id: str) -> None:
         """
@@ -579,6 +778,7 @@ class FileManager(IFileManager):
             raise DocumentNotFoundError(f"文档不存在: {doc_id}")
         
         self._db.delete_document(doc_id, permanent=True)
+        self._invalidate_documents(doc_id)
     
     def get_all_tags(self) -> List[Tag]:
         """
@@ -587,4 +787,6 @@ class FileManager(IFileManager):
         Returns:
             标签列表
         """
+        if self._snapshot is not None:
+            return self._snapshot.get_all_tags()
         return self._db.get_all_tags()
@@ -0,0 +1,266 @@
+"""
+华为平板PDF阅读器 - 笔迹延迟统计
+
+记录手写笔从触摸事件到笔迹上屏的各阶段延迟：
+    palm         防误触判定完成
+    engine       采样写入注释引擎
+    instruction  实时线条的绘制指令已更新
+    present      包含该采样的帧已提交显示
+各阶段延迟以触摸事件的时间戳为起点（与 Kivy 触摸事件相同，使用 time.time()）。
+另外记录帧间隔、每帧更新的绘制指令数和各环节的调用耗时。
+
+所有统计保存在固定容量的环形缓冲区中，只反映最近一段时间的分布，
+可导出为 JSON 或以文本形式显示在调试浮层上。未设置统计器时各组件不产生额外开销。
+"""
+
+import bisect
+import json
+import math
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# 延迟阶段
+STAGE_PALM = "palm"
+STAGE_ENGINE = "engine"
+STAGE_INSTRUCTION = "instruction"
+STAGE_PRESENT = "present"
+STAGES: Tuple[str, ...] = (STAGE_PALM, STAGE_ENGINE, STAGE_INSTRUCTION, STAGE_PRESENT)
+
+# 延迟和帧间隔直方图的桶上限（毫秒），最后一个桶收集所有更大的值
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (1, 2, 4, 8, 12, 16, 20, 25, 33, 50, 67, 100, 150, 250)
+# 每帧绘制指令数直方图的桶上限
+INSTRUCTION_BUCKETS: Tuple[float, ...] = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class RingHistogram:
+    """
+    环形缓冲区直方图
+
+    只保留最近 capacity 个值；新值覆盖最旧的值时同步更新桶计数。
+    """
+
+    def __init__(self, buckets: Sequence[float], capacity: int):
+        """
+        初始化直方图
+
+        Args:
+            buckets: 递增的桶上限
+            capacity: 保留的最近值个数
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.buckets = tuple(buckets)
+        self.capacity = capacity
+        self._values = array("d")
+        self._next = 0
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._total = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @property
+    def total(self) -> int:
+        """累计记录的值个数（含已被覆盖的）"""
+        return self._total
+
+    def add(self, value: float) -> None:
+        if len(self._values) < self.capacity:
+            self._values.append(value)
+        else:
+            self._counts[self._bucket(self._values[self._next])] -= 1
+            self._values[self._next] = value
+            self._next = (self._next + 1) % self.capacity
+        self._counts[self._bucket(value)] += 1
+        self._total += 1
+
+    def values(self) -> List[float]:
+        """窗口内的值（按记录顺序）"""
+        return self._values[self._next:].tolist() + self._values[:self._next].tolist()
+
+    def percentile(self, q: float) -> float:
+        """窗口内的百分位数（q 为 0-100，最近秩法），没有值时返回0"""
+        if not self._values:
+            return 0.0
+        ordered = sorted(self._values)
+        rank = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+        return ordered[rank]
+
+    def clear(self) -> None:
+        self._values = array("d")
+        self._next = 0
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._total = 0
+
+    def to_dict(self, unit: str = "ms") -> dict:
+        labels = [f"<={b:g}{unit}" for b in self.buckets] + [f">{self.buckets[-1]:g}{unit}"]
+        count = len(self._values)
+        return {
+            "count": count,
+            "total": self._total,
+            "mean": sum(self._values) / count if count else 0.0,
+            "max": max(self._values) if count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "histogram": {label: n for label, n in zip(labels, self._counts) if n},
+        }
+
+    def _bucket(self, value: float) -> int:
+        return bisect.bisect_left(self.buckets, value)
+
+
+class InkLatencyMonitor:
+    """
+    笔迹延迟统计器
+
+    由注释引擎、防误触系统和文档画布在启用统计时调用。
+    """
+
+    # 每个直方图保留的最近值个数
+    DEFAULT_CAPACITY = 2048
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY,
+                 clock: Callable[[], float] = time.time):
+        """
+        初始化统计器
+
+        Args:
+            capacity: 每个直方图保留的最近值个数
+            clock: 当前时间（秒），需与触摸事件时间戳同源
+        """
+        self.capacity = capacity
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._latency: Dict[str, RingHistogram] = {
+            stage: RingHistogram(LATENCY_BUCKETS_MS, capacity) for stage in STAGES
+        }
+        self._durations: Dict[str, RingHistogram] = {}
+        self._frame_times = RingHistogram(LATENCY_BUCKETS_MS, capacity)
+        self._frame_instructions = RingHistogram(INSTRUCTION_BUCKETS, capacity)
+        # 指令已更新、等待帧提交的采样时间戳
+        self._awaiting_present: List[float] = []
+        self._frame_instruction_count = 0
+        self._last_frame: Optional[float] = None
+
+    # ============== 记录 ==============
+
+    def record_latency(self, stage: str, event_times: Iterable[float],
+                       now: Optional[float] = None) -> None:
+        """
+        记录一批采样到达某阶段的延迟
+
+        Args:
+            stage: 阶段（STAGES 之一）
+            event_times: 采样的触摸事件时间戳（秒）
+            now: 到达时间，为None时取当前时间
+        """
+        now = self._clock() if now is None else now
+        histogram = self._latency[stage]
+        with self._lock:
+            for event_time in event_times:
+                histogram.add(max(0.0, (now - event_time) * 1000))
+
+    def record_duration(self, name: str, elapsed_ms: float) -> None:
+        """记录一次调用的耗时（毫秒）"""
+        with self._lock:
+            histogram = self._durations.get(name)
+            if histogram is None:
+                histogram = self._durations[name] = RingHistogram(LATENCY_BUCKETS_MS, self.capacity)
+            histogram.add(elapsed_ms)
+
+    def mark_instructions(self, event_times: Sequence[float], count: int = 1,
+                          now: Optional[float] = None) -> None:
+        """
+        记录采样的绘制指令已更新，等待下一帧提交
+
+        Args:
+            event_times: 采样的触摸事件时间戳（秒）
+            count: 本次更新的绘制指令数
+            now: 更新时间，为None时取当前时间
+        """
+        self.record_latency(STAGE_INSTRUCTION, event_times, now)
+        with self._lock:
+            self._awaiting_present.extend(event_times)
+            self._frame_instruction_count += count
+
+    def count_instructions(self, count: int) -> None:
+        """累计本帧更新的绘制指令数（非实时笔迹，如完成笔画、擦除）"""
+        with self._lock:
+            self._frame_instruction_count += count
+
+    def frame_presented(self, now: Optional[float] = None) -> None:
+        """
+        一帧已提交显示：记录等待中采样的上屏延迟、帧间隔和本帧指令数
+
+        Args:
+            now: 提交时间，为None时取当前时间
+        """
+        now = self._clock() if now is None else now
+        with self._lock:
+            awaiting, self._awaiting_present = self._awaiting_present, []
+            if self._last_frame is not None:
+                self._frame_times.add((now - self._last_frame) * 1000)
+            self._last_frame = now
+            self._frame_instructions.add(self._frame_instruction_count)
+            self._frame_instruction_count = 0
+        self.record_latency(STAGE_PRESENT, awaiting, now)
+
+    # ============== 报告 ==============
+
+    def get_report(self) -> dict:
+        """
+        获取统计结果
+
+        Returns:
+            {"latency_ms": {阶段: 分布}, "frame_time_ms": 分布,
+             "frame_instructions": 分布, "durations_ms": {名称: 分布}}
+        """
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "latency_ms": {stage: h.to_dict() for stage, h in self._latency.items()},
+                "frame_time_ms": self._frame_times.to_dict(),
+                "frame_instructions": self._frame_instructions.to_dict(unit=""),
+                "durations_ms": {name: h.to_dict() for name, h in sorted(self._durations.items())},
+            }
+
+    def dump_json(self, path: Path) -> None:
+        """将统计结果写入 JSON 文件"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(self.get_report(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+    def summary_lines(self) -> List[str]:
+        """调试浮层显示的摘要（各阶段 p50/p95 延迟、帧间隔和指令数）"""
+        report = self.get_report()
+        lines = [
+            f"{stage:<11} p50 {stats['p50']:6.1f}ms  p95 {stats['p95']:6.1f}ms"
+            for stage, stats in report["latency_ms"].items()
+            if stats["count"]
+        ]
+        frame = report["frame_time_ms"]
+        if frame["count"]:
+            lines.append(f"frame       p50 {frame['p50']:6.1f}ms  p95 {frame['p95']:6.1f}ms")
+        instructions = report["frame_instructions"]
+        if instructions["count"]:
+            lines.append(
+                f"instr/frame p50 {instructions['p50']:6.0f}    max {instructions['max']:6.0f}"
+            )
+        return lines
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            for histogram in (*self._latency.values(), self._frame_times, self._frame_instructions):
+                histogram.clear()
+            self._durations.clear()
+            self._awaiting_present = []
+            self._frame_instruction_count = 0
+            self._last_frame = None
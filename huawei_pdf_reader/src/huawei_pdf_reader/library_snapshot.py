@@ -0,0 +1,265 @@
+"""
+华为平板PDF阅读器 - 文档库快照
+
+在内存中保存文档、文件夹和标签，并按文件夹和标签建立二级索引，
+使分类切换、标签筛选和搜索不再每次查询数据库。
+数据库仍是唯一的数据来源：快照在首次使用时整体加载，
+之后由 FileManager 在修改后按文档/文件夹/标签粒度失效重载。
+"""
+
+import threading
+from dataclasses import replace
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.models import DocumentEntry, Folder, Tag
+
+
+# 可用的排序字段
+SORT_KEYS: Dict[str, Callable[[DocumentEntry], object]] = {
+    "title": lambda doc: doc.title.lower(),
+    "created_at": lambda doc: doc.created_at,
+    "modified_at": lambda doc: doc.modified_at,
+    "size": lambda doc: doc.size,
+}
+
+
+class LibrarySnapshot:
+    """
+    文档库内存快照
+
+    返回的文档对象是副本（tags 为标签名称列表），调用方修改不会影响快照。
+    """
+
+    def __init__(self, db: Database):
+        """
+        初始化快照（延迟到首次查询时加载）
+
+        Args:
+            db: 数据库
+        """
+        self._db = db
+        self._lock = threading.RLock()
+        self._loaded = False
+
+        self._documents: Dict[str, DocumentEntry] = {}
+        self._folders: Dict[str, Folder] = {}
+        self._tags: Dict[str, Tag] = {}
+        self._tag_ids_by_name: Dict[str, str] = {}
+        # 二级索引
+        self._docs_by_folder: Dict[Optional[str], Set[str]] = {}
+        self._docs_by_tag: Dict[str, Set[str]] = {}
+        self._tags_by_doc: Dict[str, Set[str]] = {}
+        # 文档导入顺序（与数据库 rowid 顺序一致），用于保持结果顺序
+        self._order: Dict[str, int] = {}
+        self._next_order = 0
+
+    @property
+    def loaded(self) -> bool:
+        """快照是否已加载"""
+        return self._loaded
+
+    # ============== 加载与失效 ==============
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.reload()
+
+    def reload(self) -> None:
+        """从数据库完整重新加载"""
+        with self._lock:
+            self._documents.clear()
+            self._docs_by_folder.clear()
+            self._docs_by_tag.clear()
+            self._tags_by_doc.clear()
+            self._order.clear()
+            for doc in self._db.get_documents_by_ids():
+                self._put_document(doc)
+            for doc_id, tag_id in self._db.get_document_tag_pairs():
+                self._link_tag(doc_id, tag_id)
+            self._load_folders()
+            self._load_tags()
+            self._loaded = True
+
+    def invalidate_all(self) -> None:
+        """整体失效，下次查询时重新加载（如恢复备份后）"""
+        with self._lock:
+            self._loaded = False
+
+    def invalidate_documents(self, doc_ids: Iterable[str]) -> None:
+        """
+        从数据库重新加载指定文档及其标签关联
+
+        数据库中已不存在的文档会从快照中移除。
+
+        Args:
+            doc_ids: 已修改的文档ID
+        """
+        with self._lock:
+            if not self._loaded:
+                return
+            ids = set(doc_ids)
+            if not ids:
+                return
+            for doc_id in ids:
+                self._unindex_document(doc_id)
+            found = set()
+            for doc in self._db.get_documents_by_ids(ids):
+                self._put_document(doc)
+                found.add(doc.id)
+            for doc_id in ids - found:
+                self._documents.pop(doc_id, None)
+                self._order.pop(doc_id, None)
+            for doc_id, tag_id in self._db.get_document_tag_pairs(found):
+                self._link_tag(doc_id, tag_id)
+
+    def invalidate_folders(self) -> None:
+        """重新加载文件夹"""
+        with self._lock:
+            if self._loaded:
+                self._load_folders()
+
+    def invalidate_tags(self) -> None:
+        """重新加载标签"""
+        with self._lock:
+            if self._loaded:
+                self._load_tags()
+
+    def _load_folders(self) -> None:
+        self._folders = {folder.id: folder for folder in self._db.get_all_folders()}
+
+    def _load_tags(self) -> None:
+        self._tags = {tag.id: tag for tag in self._db.get_all_tags()}
+        self._tag_ids_by_name = {tag.name: tag.id for tag in self._tags.values()}
+
+    def _put_document(self, doc: DocumentEntry) -> None:
+        if doc.id not in self._order:
+            self._order[doc.id] = self._next_order
+            self._next_order += 1
+        self._documents[doc.id] = doc
+        # 与数据库一致，空字符串视为根目录
+        self._docs_by_folder.setdefault(doc.folder_id or None, set()).add(doc.id)
+
+    def _unindex_document(self, doc_id: str) -> None:
+        """从二级索引中移除文档（保留其顺序）"""
+        doc = self._documents.get(doc_id)
+        if doc is not None:
+            self._docs_by_folder.get(doc.folder_id or None, set()).discard(doc_id)
+        for tag_id in self._tags_by_doc.pop(doc_id, ()):
+            self._docs_by_tag.get(tag_id, set()).discard(doc_id)
+
+    def _link_tag(self, doc_id: str, tag_id: str) -> None:
+        if doc_id not in self._documents:
+            return
+        self._docs_by_tag.setdefault(tag_id, set()).add(doc_id)
+        self._tags_by_doc.setdefault(doc_id, set()).add(tag_id)
+
+    # ============== 查询 ==============
+
+    def get_documents(
+        self,
+        folder_id: Optional[str] = None,
+        tags: Optional[Iterable[str]] = None,
+        file_type: Optional[str] = None,
+        keyword: Optional[str] = None,
+        all_folders: bool = False,
+        include_deleted: bool = False,
+        sort_by: Optional[str] = None,
+        descending: bool = False,
+    ) -> List[DocumentEntry]:
+        """
+        在内存中筛选文档
+
+        Args:
+            folder_id: 文件夹ID，为None时为根目录
+            tags: 标签名称，文档需同时带有所有标签
+            file_type: 文件类型（如 "pdf"）
+            keyword: 标题或路径包含的关键词（不区分大小写）
+            all_folders: 为True时忽略 folder_id，在所有文件夹中筛选
+            include_deleted: 是否包含回收站中的文档
+            sort_by: 排序字段（title/created_at/modified_at/size），为None时按导入顺序
+            descending: 是否降序
+
+        Returns:
+            文档副本列表
+        """
+        with self._lock:
+            self._ensure_loaded()
+
+            # 先用最小的索引集合缩小候选范围
+            candidates: Optional[Set[str]] = None
+            if not all_folders:
+                candidates = set(self._docs_by_folder.get(folder_id or None, ()))
+            for name in tags or ():
+                tag_id = self._tag_ids_by_name.get(name)
+                tagged = self._docs_by_tag.get(tag_id, set()) if tag_id else set()
+                candidates = set(tagged) if candidates is None else candidates & tagged
+                if not candidates:
+                    return []
+
+            if candidates is None:
+                docs = list(self._documents.values())
+            else:
+                docs = [
+                    self._documents[doc_id]
+                    for doc_id in sorted(candidates, key=self._order.__getitem__)
+                ]
+
+            needle = keyword.strip().lower() if keyword else ""
+            result = [
+                self._copy(doc)
+                for doc in docs
+                if (include_deleted or not doc.is_deleted)
+                and (file_type is None or doc.file_type == file_type)
+                and (not needle or needle in doc.title.lower() or needle in str(doc.path).lower())
+            ]
+
+        if sort_by is not None:
+            result.sort(key=SORT_KEYS[sort_by], reverse=descending)
+        return result
+
+    def get_document(self, doc_id: str) -> Optional[DocumentEntry]:
+        """获取单个文档"""
+        with self._lock:
+            self._ensure_loaded()
+            doc = self._documents.get(doc_id)
+            return self._copy(doc) if doc is not None else None
+
+    def get_deleted_documents(self) -> List[DocumentEntry]:
+        """获取回收站中的文档"""
+        with self._lock:
+            self._ensure_loaded()
+            return [self._copy(doc) for doc in self._documents.values() if doc.is_deleted]
+
+    def get_folders(self, parent_id: Optional[str] = None) -> List[Folder]:
+        """获取子文件夹"""
+        with self._lock:
+            self._ensure_loaded()
+            parent_id = parent_id or None
+            return [f for f in self._folders.values() if (f.parent_id or None) == parent_id]
+
+    def get_all_tags(self) -> List[Tag]:
+        """获取所有标签"""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._tags.values())
+
+    def get_tag_counts(self) -> Dict[str, int]:
+        """获取每个标签下未删除的文档数（按标签名称）"""
+        with self._lock:
+            self._ensure_loaded()
+            return {
+                tag.name: sum(
+                    1 for doc_id in self._docs_by_tag.get(tag_id, ())
+                    if doc_id in self._documents and not self._documents[doc_id].is_deleted
+                )
+                for tag_id, tag in self._tags.items()
+            }
+
+    def _copy(self, doc: DocumentEntry) -> DocumentEntry:
+        tag_names = [
+            self._tags[tag_id].name
+            for tag_id in self._tags_by_doc.get(doc.id, ())
+            if tag_id in self._tags
+        ]
+        return replace(doc, tags=sorted(tag_names))
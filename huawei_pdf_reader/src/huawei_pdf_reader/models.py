@@ -4,12 +4,17 @@
 定义所有数据类和枚举类型。
 """
 
+from array import array
+from collections.abc import MutableSequence
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 import json
+import math
+import struct
+import sys
 
 
 # ============== 枚举类型 ==============
@@ -186,6 +191,35 @@ class Folder:
         )
 
 
+@dataclass
+class FolderNode:
+    """文件夹树节点"""
+    folder: Folder
+    document_count: int = 0  # 直接位于该文件夹的文档数
+    total_document_count: int = 0  # 包含所有子文件夹的文档数
+    depth: int = 0
+    children: List["FolderNode"] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "folder": self.folder.to_dict(),
+            "document_count": self.document_count,
+            "total_document_count": self.total_document_count,
+            "depth": self.depth,
+            "children": [child.to_dict() for child in self.children],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "FolderNode":
+        return cls(
+            folder=Folder.from_dict(data["folder"]),
+            document_count=data.get("document_count", 0),
+            total_document_count=data.get("total_document_count", 0),
+            depth=data.get("depth", 0),
+            children=[cls.from_dict(child) for child in data.get("children", [])],
+        )
+
+
 @dataclass
 class Tag:
     """标签"""
@@ -266,6 +300,328 @@ class StrokePoint:
         )
 
 
+class StrokePoints(MutableSequence):
+    """
+    笔画点的列式存储
+
+    x、y、压力各存为一列 float32，时间戳存为相对首个点的 uint32 毫秒数，
+    每个点占 16 字节（StrokePoint 对象列表约 250 字节）。
+    写入的值无法用紧凑格式精确表示时该列自动升级为 float64，数据不会失真；
+    append_sample() 则直接按紧凑精度写入，用于手写笔实时采样。
+
+    按下标访问时临时构造 StrokePoint 视图，修改视图不会写回，需通过下标赋值。
+    """
+
+    __slots__ = ("_x", "_y", "_pressure", "_time", "_time_base")
+
+    _MAGIC = b"SPT1"
+    _HEADER = struct.Struct("<4s4sId")
+    # 毫秒时间戳列可表示的最大偏移
+    _MAX_TIME_OFFSET = 0xFFFFFFFF
+
+    def __init__(self, points: Iterable[StrokePoint] = ()):
+        self._x = array("f")
+        self._y = array("f")
+        self._pressure = array("f")
+        self._time = array("I")
+        self._time_base: Optional[float] = None
+        self.extend(points)
+
+    # ---------- 列访问 ----------
+
+    @property
+    def xs(self) -> array:
+        """X坐标列（只读使用）"""
+        return self._x
+
+    @property
+    def ys(self) -> array:
+        """Y坐标列（只读使用）"""
+        return self._y
+
+    @property
+    def pressures(self) -> array:
+        """压力列（只读使用）"""
+        return self._pressure
+
+    def timestamps(self) -> List[float]:
+        """时间戳列表（秒）"""
+        if self._time.typecode == "d":
+            return self._time.tolist()
+        base = self._time_base
+        return [base + offset / 1000.0 for offset in self._time]
+
+    @property
+    def nbytes(self) -> int:
+        """各列数据占用的字节数"""
+        return sum(
+            len(column) * column.itemsize
+            for column in (self._x, self._y, self._pressure, self._time)
+        )
+
+    # ---------- 写入 ----------
+
+    def append_sample(self, x: float, y: float, pressure: float, timestamp: float) -> None:
+        """
+        按紧凑精度追加采样点（坐标和压力为 float32，时间戳精确到毫秒）
+
+        Args:
+            x: X坐标
+            y: Y坐标
+            pressure: 压力值
+            timestamp: 时间戳（秒）
+        """
+        self._x.append(x)
+        self._y.append(y)
+        self._pressure.append(pressure)
+        if self._time.typecode == "I":
+            offset = self._time_offset(timestamp)
+            if offset is not None:
+                self._time.append(offset)
+                return
+        self._insert_time(len(self._time), timestamp)
+
+    def extend_samples(
+        self,
+        xs: Sequence[float],
+        ys: Sequence[float],
+        pressures: Sequence[float],
+        timestamps: Sequence[float],
+    ) -> None:
+        """
+        按紧凑精度批量追加采样点，结果与逐点调用 append_sample() 相同
+
+        Args:
+            xs: X坐标
+            ys: Y坐标
+            pressures: 压力值
+            timestamps: 时间戳（秒）
+        """
+        self._x.extend(xs)
+        self._y.extend(ys)
+        self._pressure.extend(pressures)
+        if self._time.typecode == "I":
+            offsets = []
+            for timestamp in timestamps:
+                offset = self._time_offset(timestamp)
+                if offset is None:
+                    break
+                offsets.append(offset)
+            self._time.extend(offsets)
+            timestamps = timestamps[len(offsets):]
+        for timestamp in timestamps:
+            self._insert_time(len(self._time), timestamp)
+
+    def insert(self, index: int, point: StrokePoint) -> None:
+        """在指定位置插入点（精确保存）"""
+        index = self._normalize_insert_index(index)
+        self._x = self._insert_float(self._x, index, point.x)
+        self._y = self._insert_float(self._y, index, point.y)
+        self._pressure = self._insert_float(self._pressure, index, point.pressure)
+        self._insert_time(index, point.timestamp)
+
+    def append(self, point: StrokePoint) -> None:
+        """追加点（精确保存）"""
+        self.insert(len(self._x), point)
+
+    def extend(self, points: Iterable[StrokePoint]) -> None:
+        for point in points:
+            self.insert(len(self._x), point)
+
+    @staticmethod
+    def _insert_float(column: array, index: int, value: float) -> array:
+        """插入浮点列，float32 无法精确表示时升级为 float64"""
+        column.insert(index, value)
+        return StrokePoints._upgrade_if_inexact(column, index, value)
+
+    @staticmethod
+    def _set_float(column: array, index: int, value: float) -> array:
+        column[index] = value
+        return StrokePoints._upgrade_if_inexact(column, index, value)
+
+    @staticmethod
+    def _upgrade_if_inexact(column: array, index: int, value: float) -> array:
+        if column.typecode == "f" and column[index] != value:
+            column = array("d", column)
+            column[index] = value
+        return column
+
+    def _insert_time(self, index: int, timestamp: float) -> None:
+        if self._time.typecode == "I":
+            offset = self._time_offset(timestamp)
+            if offset is not None and self._time_base + offset / 1000.0 == timestamp:
+                self._time.insert(index, offset)
+                return
+            self._time = array("d", self.timestamps())
+        self._time.insert(index, timestamp)
+
+    def _time_offset(self, timestamp: float) -> Optional[int]:
+        """时间戳相对首个点的毫秒数，超出 uint32 范围时返回None"""
+        if self._time_base is None:
+            self._time_base = timestamp
+        delta = (timestamp - self._time_base) * 1000
+        if not 0 <= delta <= self._MAX_TIME_OFFSET:
+            return None
+        return round(delta)
+
+    def _normalize_insert_index(self, index: int) -> int:
+        length = len(self._x)
+        if index < 0:
+            index = max(0, length + index)
+        return min(index, length)
+
+    def _reset(self, points: List[StrokePoint]) -> None:
+        self._x = array("f")
+        self._y = array("f")
+        self._pressure = array("f")
+        self._time = array("I")
+        self._time_base = None
+        self.extend(points)
+
+    # ---------- 序列协议 ----------
+
+    def __len__(self) -> int:
+        return len(self._x)
+
+    def _point_at(self, index: int) -> StrokePoint:
+        if self._time.typecode == "d":
+            timestamp = self._time[index]
+        else:
+            timestamp = self._time_base + self._time[index] / 1000.0
+        return StrokePoint(
+            x=self._x[index],
+            y=self._y[index],
+            pressure=self._pressure[index],
+            timestamp=timestamp,
+        )
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._point_at(i) for i in range(*index.indices(len(self._x)))]
+        if index < 0:
+            index += len(self._x)
+        if not 0 <= index < len(self._x):
+            raise IndexError("point index out of range")
+        return self._point_at(index)
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            points = list(self)
+            points[index] = value
+            self._reset(points)
+            return
+        if index < 0:
+            index += len(self._x)
+        if not 0 <= index < len(self._x):
+            raise IndexError("point index out of range")
+        self._x = self._set_float(self._x, index, value.x)
+        self._y = self._set_float(self._y, index, value.y)
+        self._pressure = self._set_float(self._pressure, index, value.pressure)
+        del self._time[index]
+        self._insert_time(index, value.timestamp)
+
+    def __delitem__(self, index) -> None:
+        for column in (self._x, self._y, self._pressure, self._time):
+            del column[index]
+        if not self._x:
+            self._reset([])
+
+    def __iter__(self) -> Iterator[StrokePoint]:
+        for x, y, pressure, timestamp in zip(
+            self._x, self._y, self._pressure, self.timestamps()
+        ):
+            yield StrokePoint(x=x, y=y, pressure=pressure, timestamp=timestamp)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (StrokePoints, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"StrokePoints({list(self)!r})"
+
+    def copy(self) -> "StrokePoints":
+        """复制（保留各列的存储精度）"""
+        clone = StrokePoints()
+        clone._x = array(self._x.typecode, self._x)
+        clone._y = array(self._y.typecode, self._y)
+        clone._pressure = array(self._pressure.typecode, self._pressure)
+        clone._time = array(self._time.typecode, self._time)
+        clone._time_base = self._time_base
+        return clone
+
+    def select(self, indices: Iterable[int]) -> "StrokePoints":
+        """
+        按下标取出部分点（保留各列的存储精度）
+
+        Args:
+            indices: 点的下标
+
+        Returns:
+            新的点集合
+        """
+        indices = list(indices)
+        clone = StrokePoints()
+        clone._x = array(self._x.typecode, [self._x[i] for i in indices])
+        clone._y = array(self._y.typecode, [self._y[i] for i in indices])
+        clone._pressure = array(self._pressure.typecode, [self._pressure[i] for i in indices])
+        clone._time = array(self._time.typecode, [self._time[i] for i in indices])
+        clone._time_base = self._time_base if indices else None
+        return clone
+
+    # ---------- 序列化 ----------
+
+    def to_dicts(self) -> List[dict]:
+        """转换为 StrokePoint.to_dict() 格式的列表"""
+        return [
+            {"x": x, "y": y, "pressure": pressure, "timestamp": timestamp}
+            for x, y, pressure, timestamp in zip(
+                self._x, self._y, self._pressure, self.timestamps()
+            )
+        ]
+
+    def to_bytes(self) -> bytes:
+        """按列打包为二进制（小端序）"""
+        columns = (self._x, self._y, self._pressure, self._time)
+        typecodes = "".join(column.typecode for column in columns).encode("ascii")
+        base = math.nan if self._time_base is None else self._time_base
+        parts = [self._HEADER.pack(self._MAGIC, typecodes, len(self._x), base)]
+        for column in columns:
+            if sys.byteorder != "little":
+                column = array(column.typecode, column)
+                column.byteswap()
+            parts.append(column.tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, offset: int = 0) -> "StrokePoints":
+        """
+        从 to_bytes() 的结果恢复
+
+        Args:
+            data: 二进制数据
+            offset: 数据在 data 中的起始位置
+        """
+        magic, typecodes, count, base = cls._HEADER.unpack_from(data, offset)
+        if magic != cls._MAGIC:
+            raise ValueError("not a packed stroke point buffer")
+        offset += cls._HEADER.size
+        columns = []
+        for typecode in typecodes.decode("ascii"):
+            column = array(typecode)
+            size = count * column.itemsize
+            column.frombytes(data[offset:offset + size])
+            if sys.byteorder != "little":
+                column.byteswap()
+            columns.append(column)
+            offset += size
+
+        points = cls()
+        points._x, points._y, points._pressure, points._time = columns
+        points._time_base = None if math.isnan(base) else base
+        return points
+
+
 @dataclass
 class Stroke:
     """笔画"""
@@ -273,7 +629,16 @@ class Stroke:
     pen_type: PenType
     color: str  # hex color
     width: float
-    points: List[StrokePoint] = field(default_factory=list)
+    points: StrokePoints = field(default_factory=StrokePoints)
+    # 渲染缓存（stroke_tessellator 生成的网格），不参与比较和序列化
+    render_cache: Optional[tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    _MAGIC = b"STK1"
+    _HEADER = struct.Struct("<4sI")
+
+    def __post_init__(self):
+        if not isinstance(self.points, StrokePoints):
+            self.points = StrokePoints(self.points)
 
     def to_dict(self) -> dict:
         return {
@@ -281,9 +646,40 @@ class Stroke:
             "pen_type": self.pen_type.value,
             "color": self.color,
             "width": self.width,
-            "points": [p.to_dict() for p in self.points],
+            "points": self.points.to_dicts(),
         }
 
+    def to_bytes(self) -> bytes:
+        """序列化为二进制（属性为JSON，点为列式数据）"""
+        meta = json.dumps({
+            "id": self.id,
+            "pen_type": self.pen_type.value,
+            "color": self.color,
+            "width": self.width,
+        }, ensure_ascii=False).encode("utf-8")
+        return self._HEADER.pack(self._MAGIC, len(meta)) + meta + self.points.to_bytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Stroke":
+        """从 to_bytes() 的结果恢复"""
+        magic, meta_size = cls._HEADER.unpack_from(data)
+        if magic != cls._MAGIC:
+            raise ValueError("not a packed stroke")
+        offset = cls._HEADER.size
+        meta = json.loads(data[offset:offset + meta_size].decode("utf-8"))
+        return cls(
+            id=meta["id"],
+            pen_type=PenType(meta["pen_type"]),
+            color=meta["color"],
+            width=meta["width"],
+            points=StrokePoints.from_bytes(data, offset + meta_size),
+        )
+
+    @staticmethod
+    def is_packed(data) -> bool:
+        """数据是否为 to_bytes() 生成的二进制格式"""
+        return isinstance(data, bytes) and data[:4] == Stroke._MAGIC
+
     @classmethod
     def from_dict(cls, data: dict) -> "Stroke":
         return cls(
@@ -572,6 +968,10 @@ class ToolsConfig:
     shape_fill: bool = False
     long_press_select_text: bool = True
     long_press_create_menu: bool = True
+    stroke_simplification: bool = True
+    simplification_method: str = "rdp"  # rdp / visvalingam
+    simplification_tolerance: float = 0.5  # 像素
+    stroke_smoothing: float = 0.0  # 0 - 1，0 表示不平滑
 
     def to_dict(self) -> dict:
         return {
@@ -580,6 +980,10 @@ class ToolsConfig:
             "shape_fill": self.shape_fill,
             "long_press_select_text": self.long_press_select_text,
             "long_press_create_menu": self.long_press_create_menu,
+            "stroke_simplification": self.stroke_simplification,
+            "simplification_method": self.simplification_method,
+            "simplification_tolerance": self.simplification_tolerance,
+            "stroke_smoothing": self.stroke_smoothing,
         }
 
     @classmethod
@@ -590,6 +994,10 @@ class ToolsConfig:
             shape_fill=data.get("shape_fill", False),
             long_press_select_text=data.get("long_press_select_text", True),
             long_press_create_menu=data.get("long_press_create_menu", True),
+            stroke_simplification=data.get("stroke_simplification", True),
+            simplification_method=data.get("simplification_method", "rdp"),
+            simplification_tolerance=data.get("simplification_tolerance", 0.5),
+            stroke_smoothing=data.get("stroke_smoothing", 0.0),
         )
 
 
@@ -2,14 +2,93 @@
 华为平板PDF阅读器 - 防误触系统
 
 实现手掌拒绝功能，区分手写笔、手指和手掌触摸。
+
+多点触控的同一帧可以通过 classify_batch / should_reject_batch 一次判定：
+面积和压力按当前灵敏度的阈值划分档位，再查预先生成的分类表，
+结果与逐个调用 classify_touch / should_reject 相同。安装了 NumPy 时
+触摸数较多的批次向量化计算。
+
+PalmTracker 按触摸ID跟踪每个触点的整个过程：手掌落下时往往面积还小，
+单个事件会被判为手指，之后面积增大才能看出是手掌。跟踪器保留每个触点
+最近若干次判定，落下后的短暂判定窗口内任何一次拒绝都会拒绝该触点；
+窗口结束后已接受的触点需在最近的判定中多次被拒绝才改判为拒绝（滞回，
+避免单个噪声采样撤销正常笔迹），调用方据此撤销已绘制的笔画。
 """
 
+import time
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
+from .ink_latency import STAGE_PALM, InkLatencyMonitor
 from .models import TouchEvent, TouchType
 
 
+# 是否可以使用向量化实现
+HAS_NUMPY = np is not None
+
+# 触摸数少于此值时纯 Python 更快（省去构建数组的开销）
+VECTORIZE_MIN_TOUCHES = 32
+
+# 灵敏度范围
+MIN_SENSITIVITY = 1
+MAX_SENSITIVITY = 10
+
+
+def sensitivity_thresholds(level: int) -> Tuple[float, float, float]:
+    """
+    灵敏度对应的阈值
+
+    灵敏度越高，手掌检测阈值越低（更容易将触摸判定为手掌）：
+    灵敏度为1时手掌面积阈值为 0.7（不太敏感），为10时为 0.25（非常敏感）。
+
+    Args:
+        level: 灵敏度级别 (1-10)
+
+    Returns:
+        (手掌面积阈值, 手写笔面积阈值, 手写笔压力阈值)
+    """
+    sensitivity_factor = (level - 1) / 9.0  # 0.0 to 1.0
+    return (
+        0.7 - (sensitivity_factor * 0.45),
+        0.15 - (sensitivity_factor * 0.05),
+        0.4 - (sensitivity_factor * 0.15),
+    )
+
+
+# 各灵敏度级别的阈值（预先计算）
+SENSITIVITY_THRESHOLDS: Dict[int, Tuple[float, float, float]] = {
+    level: sensitivity_thresholds(level)
+    for level in range(MIN_SENSITIVITY, MAX_SENSITIVITY + 1)
+}
+
+# 批量分类查找表
+# 下标 = 面积档 * 4 + 压力低于手掌压力阈值 * 2 + 压力达到手写笔压力阈值，
+# 面积档 0: 不大于手写笔面积阈值, 1: 介于两者之间, 2: 不小于手掌面积阈值；
+# 最后一项为已明确标记为手写笔的触摸
+_STYLUS_INDEX = 12
+_CLASS_TABLE: Tuple[TouchType, ...] = (
+    TouchType.FINGER, TouchType.STYLUS, TouchType.FINGER, TouchType.STYLUS,
+    TouchType.FINGER, TouchType.FINGER, TouchType.FINGER, TouchType.FINGER,
+    TouchType.FINGER, TouchType.FINGER, TouchType.PALM, TouchType.PALM,
+    TouchType.STYLUS,
+)
+# 拒绝查找表 {手写笔是否悬停: 与分类表对应的拒绝结果}
+_REJECT_TABLES: Dict[bool, Tuple[bool, ...]] = {
+    hovering: tuple(
+        touch_type == TouchType.PALM or (hovering and touch_type != TouchType.STYLUS)
+        for touch_type in _CLASS_TABLE
+    )
+    for hovering in (False, True)
+}
+
+
 class IPalmRejectionSystem(ABC):
     """防误触系统接口"""
     
@@ -50,6 +129,7 @@ class PalmRejectionSystem(IPalmRejectionSystem):
     DEFAULT_PALM_SIZE_THRESHOLD = 0.5  # 大于此值视为手掌
     DEFAULT_STYLUS_SIZE_THRESHOLD = 0.1  # 小于此值视为手写笔
     DEFAULT_STYLUS_PRESSURE_THRESHOLD = 0.3  # 高于此值且面积小视为手写笔
+    PALM_PRESSURE_THRESHOLD = 0.3  # 面积大且低于此压力视为手掌
     
     def __init__(self, sensitivity: int = 7):
         """
@@ -61,23 +141,21 @@ class PalmRejectionSystem(IPalmRejectionSystem):
         self._sensitivity = self._clamp_sensitivity(sensitivity)
         self._stylus_hovering = False
         self._palm_rejection_enabled = True
+        # 笔迹延迟统计，为None时不统计
+        self._latency_monitor: Optional[InkLatencyMonitor] = None
         self._update_thresholds()
     
     def _clamp_sensitivity(self, level: int) -> int:
         """将灵敏度限制在1-10范围内"""
-        return max(1, min(10, level))
+        return max(MIN_SENSITIVITY, min(MAX_SENSITIVITY, level))
     
     def _update_thresholds(self) -> None:
-        """根据灵敏度更新阈值"""
-        # 灵敏度越高，手掌检测阈值越低（更容易将触摸判定为手掌）
-        # 灵敏度范围: 1-10
-        # 灵敏度为1时，palm_size_threshold = 0.7 (不太敏感)
-        # 灵敏度为10时，palm_size_threshold = 0.25 (非常敏感)
-        sensitivity_factor = (self._sensitivity - 1) / 9.0  # 0.0 to 1.0
-        
-        self._palm_size_threshold = 0.7 - (sensitivity_factor * 0.45)
-        self._stylus_size_threshold = 0.15 - (sensitivity_factor * 0.05)
-        self._stylus_pressure_threshold = 0.4 - (sensitivity_factor * 0.15)
+        """根据灵敏度更新阈值（见 sensitivity_thresholds）"""
+        (
+            self._palm_size_threshold,
+            self._stylus_size_threshold,
+            self._stylus_pressure_threshold,
+        ) = SENSITIVITY_THRESHOLDS[self._sensitivity]
     
     @property
     def sensitivity(self) -> int:
@@ -117,7 +195,7 @@ class PalmRejectionSystem(IPalmRejectionSystem):
         pressure = event.pressure
         
         # 大面积低压力 -> 手掌
-        if size >= self._palm_size_threshold and pressure < 0.3:
+        if size >= self._palm_size_threshold and pressure < self.PALM_PRESSURE_THRESHOLD:
             return TouchType.PALM
         
         # 小面积高压力 -> 手写笔
@@ -141,6 +219,17 @@ class PalmRejectionSystem(IPalmRejectionSystem):
         Returns:
             bool: True表示应该拒绝，False表示应该接受
         """
+        monitor = self._latency_monitor
+        if monitor is None:
+            return self._should_reject(event)
+        start = time.perf_counter()
+        rejected = self._should_reject(event)
+        monitor.record_duration("palm_rejection", (time.perf_counter() - start) * 1000)
+        if event.timestamp:
+            monitor.record_latency(STAGE_PALM, (event.timestamp,))
+        return rejected
+    
+    def _should_reject(self, event: TouchEvent) -> bool:
         if not self._palm_rejection_enabled:
             return False
         
@@ -156,6 +245,109 @@ class PalmRejectionSystem(IPalmRejectionSystem):
         
         return False
     
+    # ============== 批量判定 ==============
+    
+    def classify_batch(
+        self,
+        sizes: Sequence[float],
+        pressures: Sequence[float],
+        touch_types: Optional[Sequence[TouchType]] = None,
+        vectorize: Optional[bool] = None,
+    ) -> List[TouchType]:
+        """
+        批量分类触摸类型（结果与逐个调用 classify_touch 相同）
+        
+        Args:
+            sizes: 各触摸的面积
+            pressures: 各触摸的压力
+            touch_types: 各触摸已知的类型，为None时均视为未知
+            vectorize: 是否使用 NumPy，为None时按触摸数自动选择
+            
+        Returns:
+            与输入一一对应的触摸类型
+        """
+        indices = self._batch_indices(sizes, pressures, touch_types, vectorize)
+        return [_CLASS_TABLE[i] for i in indices]
+    
+    def should_reject_batch(
+        self,
+        sizes: Sequence[float],
+        pressures: Sequence[float],
+        touch_types: Optional[Sequence[TouchType]] = None,
+        timestamps: Optional[Sequence[float]] = None,
+        vectorize: Optional[bool] = None,
+    ) -> List[bool]:
+        """
+        批量判断是否拒绝触摸（结果与逐个调用 should_reject 相同）
+        
+        Args:
+            sizes: 各触摸的面积
+            pressures: 各触摸的压力
+            touch_types: 各触摸已知的类型，为None时均视为未知
+            timestamps: 各触摸的事件时间戳，设置了延迟统计器时用于记录延迟
+            vectorize: 是否使用 NumPy，为None时按触摸数自动选择
+            
+        Returns:
+            与输入一一对应的拒绝掩码，True表示应该拒绝
+        """
+        monitor = self._latency_monitor
+        start = time.perf_counter() if monitor is not None else 0.0
+        if not self._palm_rejection_enabled:
+            rejected = [False] * len(sizes)
+        else:
+            table = _REJECT_TABLES[self._stylus_hovering]
+            indices = self._batch_indices(sizes, pressures, touch_types, vectorize)
+            rejected = [table[i] for i in indices]
+        if monitor is not None:
+            # 与 should_reject 使用同一统计项（画布逐个触摸以单元素批次调用）
+            monitor.record_duration("palm_rejection", (time.perf_counter() - start) * 1000)
+            if timestamps:
+                monitor.record_latency(STAGE_PALM, [t for t in timestamps if t])
+        return rejected
+    
+    def _batch_indices(
+        self,
+        sizes: Sequence[float],
+        pressures: Sequence[float],
+        touch_types: Optional[Sequence[TouchType]],
+        vectorize: Optional[bool],
+    ) -> List[int]:
+        """各触摸在分类查找表中的下标"""
+        count = len(sizes)
+        if len(pressures) != count or (touch_types is not None and len(touch_types) != count):
+            raise ValueError("sizes, pressures and touch_types must have the same length")
+        if vectorize is None:
+            vectorize = HAS_NUMPY and count >= VECTORIZE_MIN_TOUCHES
+        elif vectorize and not HAS_NUMPY:
+            raise RuntimeError("NumPy is not installed")
+        
+        palm_size = self._palm_size_threshold
+        stylus_size = self._stylus_size_threshold
+        stylus_pressure = self._stylus_pressure_threshold
+        palm_pressure = self.PALM_PRESSURE_THRESHOLD
+        if vectorize:
+            size = np.asarray(sizes, dtype=np.float64)
+            pressure = np.asarray(pressures, dtype=np.float64)
+            indices = (
+                ((size > stylus_size).astype(np.int8) + (size >= palm_size)) * 4
+                + (pressure < palm_pressure) * 2
+                + (pressure >= stylus_pressure)
+            )
+            if touch_types is not None:
+                stylus = np.fromiter(
+                    (t == TouchType.STYLUS for t in touch_types), dtype=bool, count=count
+                )
+                indices[stylus] = _STYLUS_INDEX
+            return indices.tolist()
+        
+        types = touch_types if touch_types is not None else (None,) * count
+        return [
+            _STYLUS_INDEX if touch_type == TouchType.STYLUS else
+            ((size > stylus_size) + (size >= palm_size)) * 4
+            + (pressure < palm_pressure) * 2 + (pressure >= stylus_pressure)
+            for size, pressure, touch_type in zip(sizes, pressures, types)
+        ]
+    
     def set_sensitivity(self, level: int) -> None:
         """
         设置防误触灵敏度
@@ -183,6 +375,10 @@ class PalmRejectionSystem(IPalmRejectionSystem):
         if is_hovering:
             self._palm_rejection_enabled = True
     
+    def set_latency_monitor(self, monitor: Optional[InkLatencyMonitor]) -> None:
+        """设置笔迹延迟统计器（None表示不统计）"""
+        self._latency_monitor = monitor
+    
     def enable_palm_rejection(self, enabled: bool = True) -> None:
         """
         启用或禁用防误触功能
@@ -204,3 +400,144 @@ class PalmRejectionSystem(IPalmRejectionSystem):
             "stylus_size_threshold": self._stylus_size_threshold,
             "stylus_pressure_threshold": self._stylus_pressure_threshold,
         }
+
+
+# ============== 逐触点跟踪 ==============
+
+class ContactState(Enum):
+    """触点判定状态"""
+    PENDING = "pending"      # 判定窗口内，暂按接受处理
+    ACCEPTED = "accepted"    # 已接受
+    REJECTED = "rejected"    # 已拒绝（不再改变）
+
+
+@dataclass
+class ContactTrack:
+    """单个触点的跟踪状态"""
+    touch_id: int
+    # 第一次事件的时间戳（秒）
+    started: float
+    state: ContactState = ContactState.PENDING
+    # 已判定的事件数
+    samples: int = 0
+    # 最近 history 中被拒绝的次数（随环形缓冲区增量维护）
+    rejected_votes: int = 0
+    # 最近若干次事件是否被拒绝（环形缓冲区，下标为 samples % 长度）
+    history: List[bool] = field(default_factory=list)
+    # 是否在接受之后才改判为拒绝（调用方需撤销已绘制的内容）
+    retracted: bool = False
+
+
+class PalmTracker:
+    """
+    按触摸ID跟踪触点并结合最近的判定结果决定是否拒绝
+    
+    每个事件仍由 PalmRejectionSystem 判定，跟踪器只维护每个触点固定长度的
+    环形缓冲区和计数，每个事件的更新为 O(1)：
+    - 触点落下后 DECISION_DELAY 秒内（判定窗口），任一事件被拒绝即拒绝该触点
+    - 窗口结束时没有被拒绝的触点转为接受
+    - 已接受的触点在最近 HISTORY_SIZE 次判定中被拒绝 RETRACT_VOTES 次时
+      改判为拒绝，retracted 置为True
+    - 被拒绝的触点在抬起前保持拒绝
+    
+    明确标记为手写笔的触点和防误触关闭时的触点立即接受。
+    """
+    
+    # 判定窗口（秒）
+    DECISION_DELAY = 0.05
+    # 每个触点保留的最近判定次数
+    HISTORY_SIZE = 8
+    # 已接受的触点在最近判定中被拒绝多少次后改判为拒绝
+    RETRACT_VOTES = 3
+    
+    def __init__(self, palm_rejection: PalmRejectionSystem):
+        """
+        初始化触点跟踪器
+        
+        Args:
+            palm_rejection: 判定单个事件的防误触系统
+        """
+        self._palm_rejection = palm_rejection
+        self._tracks: Dict[int, ContactTrack] = {}
+    
+    @property
+    def active_count(self) -> int:
+        """正在跟踪的触点数"""
+        return len(self._tracks)
+    
+    def get_track(self, touch_id: int) -> Optional[ContactTrack]:
+        """获取触点的跟踪状态，未跟踪时返回None"""
+        return self._tracks.get(touch_id)
+    
+    def update(
+        self,
+        touch_id: int,
+        size: float,
+        pressure: float,
+        timestamp: float,
+        touch_type: TouchType = TouchType.UNKNOWN,
+    ) -> ContactState:
+        """
+        记录触点的一个事件（落下或移动）并返回更新后的状态
+        
+        Args:
+            touch_id: 触摸ID
+            size: 触摸面积
+            pressure: 压力
+            timestamp: 事件时间戳（秒）
+            touch_type: 已知的触摸类型
+            
+        Returns:
+            触点当前的判定状态
+        """
+        track = self._tracks.get(touch_id)
+        if track is None:
+            track = ContactTrack(touch_id, timestamp, history=[False] * self.HISTORY_SIZE)
+            self._tracks[touch_id] = track
+        palm_rejection = self._palm_rejection
+        rejected = palm_rejection.should_reject_batch(
+            [size], [pressure], [touch_type], timestamps=[timestamp]
+        )[0]
+        
+        slot = track.samples % self.HISTORY_SIZE
+        if track.samples >= self.HISTORY_SIZE:
+            track.rejected_votes -= track.history[slot]
+        track.history[slot] = rejected
+        track.rejected_votes += rejected
+        track.samples += 1
+        
+        if track.state is ContactState.PENDING:
+            if rejected:
+                track.state = ContactState.REJECTED
+            elif (touch_type == TouchType.STYLUS
+                  or not palm_rejection.palm_rejection_enabled
+                  or timestamp - track.started >= self.DECISION_DELAY):
+                track.state = ContactState.ACCEPTED
+        elif track.state is ContactState.ACCEPTED:
+            if track.rejected_votes >= self.RETRACT_VOTES:
+                track.state = ContactState.REJECTED
+                track.retracted = True
+        return track.state
+    
+    def end(self, touch_id: int) -> Optional[ContactState]:
+        """
+        触点抬起，停止跟踪
+        
+        判定窗口内抬起且没有被拒绝的触点（如快速点按）视为接受。
+        
+        Args:
+            touch_id: 触摸ID
+            
+        Returns:
+            触点最终的判定状态，未跟踪时返回None
+        """
+        track = self._tracks.pop(touch_id, None)
+        if track is None:
+            return None
+        if track.state is ContactState.PENDING:
+            track.state = ContactState.ACCEPTED
+        return track.state
+    
+    def reset(self) -> None:
+        """清除所有触点（如切换文档或丢失触摸事件时）"""
+        self._tracks.clear()
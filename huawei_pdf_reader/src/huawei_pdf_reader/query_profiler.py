@@ -0,0 +1,319 @@
+"""
+华为平板PDF阅读器 - SQL查询分析
+
+记录每条SQL语句的耗时分布、返回行数和调用位置，
+并记录超过阈值的慢查询及其查询计划。
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# 耗时直方图的桶上限（毫秒），最后一个桶收集所有更慢的查询
+HISTOGRAM_BUCKETS_MS: Tuple[float, ...] = (0.1, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+# 支持 EXPLAIN QUERY PLAN 的语句
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# 计算调用位置时跳过的模块
+_INTERNAL_FILES = {
+    os.path.normcase(os.path.abspath(__file__)),
+    os.path.normcase(os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.py")),
+}
+
+
+def normalize_sql(sql: str) -> str:
+    """合并空白字符，作为语句统计的键"""
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+@dataclass
+class StatementStats:
+    """单条SQL语句的统计"""
+    sql: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows: int = 0
+    histogram: List[int] = field(default_factory=lambda: [0] * (len(HISTOGRAM_BUCKETS_MS) + 1))
+    call_sites: Counter = field(default_factory=Counter)
+
+    def add(self, elapsed_ms: float, rows: int, call_site: str) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += max(0, rows)
+        self.histogram[_bucket_index(elapsed_ms)] += 1
+        self.call_sites[call_site] += 1
+
+    def to_dict(self, max_call_sites: int = 5) -> dict:
+        labels = [f"<={b}ms" for b in HISTOGRAM_BUCKETS_MS] + [f">{HISTOGRAM_BUCKETS_MS[-1]}ms"]
+        return {
+            "sql": self.sql,
+            "count": self.count,
+            "total_ms": self.total_ms,
+            "avg_ms": self.total_ms / self.count if self.count else 0.0,
+            "max_ms": self.max_ms,
+            "rows": self.rows,
+            "histogram": {label: n for label, n in zip(labels, self.histogram) if n},
+            "call_sites": dict(self.call_sites.most_common(max_call_sites)),
+        }
+
+
+@dataclass
+class SlowQuery:
+    """慢查询记录"""
+    sql: str
+    elapsed_ms: float
+    rows: int
+    call_site: str
+    plan: List[str] = field(default_factory=list)
+    timestamp: float = field(default_factory=time.time)
+
+    def to_dict(self) -> dict:
+        return {
+            "sql": self.sql,
+            "elapsed_ms": self.elapsed_ms,
+            "rows": self.rows,
+            "call_site": self.call_site,
+            "plan": self.plan,
+            "timestamp": self.timestamp,
+        }
+
+
+def _bucket_index(elapsed_ms: float) -> int:
+    for i, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+        if elapsed_ms <= bound:
+            return i
+    return len(HISTOGRAM_BUCKETS_MS)
+
+
+def _find_call_site() -> str:
+    """找到数据库层之外的第一个调用帧"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.normcase(os.path.abspath(frame.f_code.co_filename))
+        if filename not in _INTERNAL_FILES:
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "<unknown>"
+
+
+class QueryProfiler:
+    """
+    SQL查询分析器
+
+    由 Database 在启用分析时挂到连接上；未启用时数据库使用普通连接，
+    不产生任何额外开销。
+    """
+
+    def __init__(
+        self,
+        slow_query_ms: float = 50.0,
+        explain_slow_queries: bool = True,
+        max_slow_queries: int = 100,
+    ):
+        """
+        初始化查询分析器
+
+        Args:
+            slow_query_ms: 慢查询阈值（毫秒）
+            explain_slow_queries: 是否为慢查询记录 EXPLAIN QUERY PLAN
+            max_slow_queries: 保留的慢查询条数
+        """
+        self.slow_query_ms = slow_query_ms
+        self.explain_slow_queries = explain_slow_queries
+        self._statements: Dict[str, StatementStats] = {}
+        self._slow_queries: Deque[SlowQuery] = deque(maxlen=max_slow_queries)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: Any,
+        elapsed_ms: float,
+        rows: int,
+        call_site: str,
+    ) -> None:
+        """记录一次语句执行"""
+        key = normalize_sql(sql)
+        with self._lock:
+            stats = self._statements.get(key)
+            if stats is None:
+                stats = self._statements[key] = StatementStats(sql=key)
+            stats.add(elapsed_ms, rows, call_site)
+
+        if elapsed_ms < self.slow_query_ms:
+            return
+
+        plan = self._explain(conn, sql, params) if self.explain_slow_queries else []
+        slow = SlowQuery(sql=key, elapsed_ms=elapsed_ms, rows=rows, call_site=call_site, plan=plan)
+        with self._lock:
+            self._slow_queries.append(slow)
+        logger.warning(
+            "慢查询 %.1fms (%d行) %s: %s%s",
+            elapsed_ms, rows, call_site, key,
+            "".join(f"\n    {line}" for line in plan),
+        )
+
+    def _explain(self, conn: sqlite3.Connection, sql: str, params: Any) -> List[str]:
+        """获取语句的查询计划"""
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return []
+        try:
+            # 使用普通游标，避免 EXPLAIN 本身被记录
+            cursor = conn.cursor(sqlite3.Cursor)
+            rows = cursor.execute(
+                f"EXPLAIN QUERY PLAN {sql}", params if params is not None else ()
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+        return [str(row[-1]) for row in rows]
+
+    def get_profile(self) -> dict:
+        """
+        获取分析结果
+
+        Returns:
+            {"statements": [...按总耗时降序], "slow_queries": [...]}
+        """
+        with self._lock:
+            statements = sorted(self._statements.values(), key=lambda s: s.total_ms, reverse=True)
+            return {
+                "slow_query_ms": self.slow_query_ms,
+                "statements": [s.to_dict() for s in statements],
+                "slow_queries": [q.to_dict() for q in self._slow_queries],
+            }
+
+    def reset(self) -> None:
+        """清空统计"""
+        with self._lock:
+            self._statements.clear()
+            self._slow_queries.clear()
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """记录执行和读取耗时的游标"""
+
+    def __init__(self, conn: "ProfilingConnection"):
+        super().__init__(conn)
+        self._conn = conn
+        self._pending: Optional[list] = None  # [sql, params, elapsed_ms, rows, call_site]
+
+    def execute(self, sql: str, parameters: Any = ()) -> "ProfilingCursor":
+        self._finish()
+        call_site = _find_call_site()
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._pending = [sql, parameters, elapsed_ms, max(self.rowcount, 0), call_site]
+        self._conn._track(self)
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> "ProfilingCursor":
+        self._finish()
+        call_site = _find_call_site()
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._conn._profiler.record(
+            self._conn, sql, None, elapsed_ms, max(self.rowcount, 0), call_site
+        )
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add_fetch(start, 0 if row is None else 1)
+        if row is None:
+            self._finish()
+        return row
+
+    def fetchmany(self, size: int = 1):
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._add_fetch(start, len(rows))
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add_fetch(start, len(rows))
+        self._finish()
+        return rows
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def _add_fetch(self, start: float, rows: int) -> None:
+        if self._pending is not None:
+            self._pending[2] += (time.perf_counter() - start) * 1000
+            self._pending[3] += rows
+
+    def _finish(self) -> None:
+        """提交待记录的执行统计"""
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, params, elapsed_ms, rows, call_site = pending
+            self._conn._profiler.record(self._conn, sql, params, elapsed_ms, rows, call_site)
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """
+    带查询分析的连接
+
+    通过 sqlite3.connect(..., factory=ProfilingConnection) 创建，
+    创建后需设置 profiler 属性。
+    """
+
+    _profiler: QueryProfiler
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._open_cursors: Set[ProfilingCursor] = set()
+
+    def set_profiler(self, profiler: QueryProfiler) -> None:
+        self._profiler = profiler
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> ProfilingCursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> ProfilingCursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script: str):
+        call_site = _find_call_site()
+        start = time.perf_counter()
+        cursor = super().executescript(sql_script)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self._profiler.record(self, sql_script, None, elapsed_ms, 0, call_site)
+        return cursor
+
+    def close(self) -> None:
+        # 关闭前提交未读完游标的统计（此时仍可执行 EXPLAIN）
+        for cursor in self._open_cursors:
+            cursor._finish()
+        self._open_cursors.clear()
+        super().close()
+
+    def _track(self, cursor: ProfilingCursor) -> None:
+        self._open_cursors.add(cursor)
@@ -0,0 +1,193 @@
+"""
+华为平板PDF阅读器 - 设置存储
+
+缓存 Settings 对象并延迟写回数据库：滑块等频繁修改只更新内存并通知监听者，
+写入在静默一段时间后或关闭时合并为一个事务提交。
+"""
+
+import atexit
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.models import Settings
+
+
+# Settings 对象在 settings 表中的键
+APP_SETTINGS_KEY = "app_settings"
+
+SettingsListener = Callable[[Settings], None]
+
+
+class SettingsStore:
+    """
+    带写回缓存的设置存储
+
+    设置只在创建时从数据库解析一次；update() / set_value() 标记变更并
+    推迟写入截止时间，flush_delay 秒内没有新变更时在后台线程写入数据库。
+    拖动滑块等连续修改只移动截止时间，始终只有一个写回线程。
+    写入失败时保留变更，下次刷新重试；进程退出时自动刷新未写入的变更。
+    """
+
+    def __init__(self, db: Database, flush_delay: float = 1.0):
+        """
+        初始化设置存储
+
+        Args:
+            db: 数据库
+            flush_delay: 最后一次修改后延迟写入的时间（秒）
+        """
+        self._db = db
+        self._flush_delay = flush_delay
+        self._settings = db.load_settings()
+        self._values: Dict[str, Optional[str]] = {}
+        self._dirty_values: Dict[str, str] = {}
+        self._listeners: List[SettingsListener] = []
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        # 延迟写入的截止时间（time.monotonic），None表示没有待写入的计时
+        self._deadline: Optional[float] = None
+        self._wakeup = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+        # 修改计数，用于判断刷新期间是否又有新的修改
+        self._version = 0
+        self._flushed_version = 0
+        self._closed = False
+        atexit.register(self.flush)
+
+    @property
+    def settings(self) -> Settings:
+        """缓存的设置对象（修改后需调用 update）"""
+        return self._settings
+
+    @property
+    def has_pending_changes(self) -> bool:
+        """是否有尚未写入数据库的变更"""
+        with self._lock:
+            return self._version != self._flushed_version or bool(self._dirty_values)
+
+    # ============== 修改与通知 ==============
+
+    def update(self, settings: Optional[Settings] = None) -> None:
+        """
+        标记设置已修改
+
+        Args:
+            settings: 新的设置对象，为None表示缓存对象已被原地修改
+        """
+        with self._lock:
+            if settings is not None:
+                self._settings = settings
+            self._version += 1
+            self._schedule_flush()
+        self._notify()
+
+    def set_value(self, key: str, value: str) -> None:
+        """延迟保存单个设置项"""
+        with self._lock:
+            self._values[key] = value
+            self._dirty_values[key] = value
+            self._schedule_flush()
+
+    def get_value(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """获取单个设置项（首次读取后缓存）"""
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = self._db.get_setting(key)
+            value = self._values[key]
+        return default if value is None else value
+
+    def bind(self, listener: SettingsListener) -> None:
+        """注册设置变更监听者"""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def unbind(self, listener: SettingsListener) -> None:
+        """移除设置变更监听者"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self) -> None:
+        for listener in list(self._listeners):
+            listener(self._settings)
+
+    # ============== 写回 ==============
+
+    def _schedule_flush(self) -> None:
+        """推迟延迟写入的截止时间，需要时启动写回线程（调用方持有锁）"""
+        if self._closed:
+            return
+        self._deadline = time.monotonic() + self._flush_delay
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._flush_loop, name="settings-flush", daemon=True
+            )
+            self._worker.start()
+
+    def _flush_loop(self) -> None:
+        """写回线程：等到截止时间后写入，没有新的计时后退出"""
+        while True:
+            with self._lock:
+                while True:
+                    if self._deadline is None or self._closed:
+                        self._worker = None
+                        return
+                    remaining = self._deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    # 截止时间只会推后，醒来后按最新的截止时间继续等待
+                    self._wakeup.wait(remaining)
+            try:
+                self.flush()
+            except Exception:
+                # 写入失败时变更保持为未写入，等待下一次修改或关闭时重试
+                with self._lock:
+                    self._deadline = None
+
+    def flush(self) -> bool:
+        """
+        立即在单个事务中写入所有未保存的变更
+
+        Returns:
+            是否有变更被写入
+        """
+        # 写入期间不持有 _lock，UI线程的修改不会被数据库IO阻塞
+        with self._flush_lock:
+            with self._lock:
+                self._deadline = None
+                version = self._version
+                values = dict(self._dirty_values)
+                if version != self._flushed_version:
+                    values[APP_SETTINGS_KEY] = self._settings.to_json()
+            if not values:
+                return False
+
+            # 事务失败时变更保持为未写入状态，下次刷新重试
+            self._db.save_setting_values(values)
+
+            with self._lock:
+                self._flushed_version = version
+                for key, value in values.items():
+                    if self._dirty_values.get(key) == value:
+                        del self._dirty_values[key]
+        return True
+
+    def reload(self) -> Settings:
+        """丢弃缓存并从数据库重新加载（如恢复备份后）"""
+        with self._lock:
+            self._deadline = None
+            self._settings = self._db.load_settings()
+            self._values.clear()
+            self._dirty_values.clear()
+            self._flushed_version = self._version
+        self._notify()
+        return self._settings
+
+    def close(self) -> None:
+        """写入未保存的变更并停止延迟写入"""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify_all()
+        self.flush()
+        atexit.unregister(self.flush)
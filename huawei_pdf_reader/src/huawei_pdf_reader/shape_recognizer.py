@@ -0,0 +1,681 @@
+"""
+华为平板PDF阅读器 - 一笔成型形状识别
+
+识别器按优先级组成流水线：每条笔画只提取一次特征（边界框、闭合度、
+到弦的偏差、径向偏差、转角等），特征按需计算并缓存，便宜的判断
+（点数、闭合、边界框）先执行，不满足条件的识别器不会触发昂贵的特征计算。
+
+默认流水线与原有规则一致：直线 → （闭合时）圆 → 矩形 → 三角形。
+椭圆、箭头等识别器可以通过 register() 加入流水线。
+可选择先把笔画按弧长重采样为固定点数，使识别耗时与原始采样率无关。
+安装了 NumPy 时长笔画的特征向量化计算，否则使用纯 Python 实现。
+
+SpeculativeShapeRecognizer 在后台线程上运行流水线：书写停顿时先对
+已绘制部分做推测识别，抬笔时笔画未再变化就直接复用结果。
+"""
+
+import heapq
+import math
+import time
+import uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
+from functools import cached_property
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from huawei_pdf_reader.models import Stroke, StrokePoint
+
+
+Point = Tuple[float, float]
+
+# 是否可以使用向量化实现
+HAS_NUMPY = np is not None
+
+# 点数少于此值时纯 Python 更快（省去构建数组的开销）
+VECTORIZE_MIN_POINTS = 64
+
+# 起点和终点距离小于边界框对角线的该比例时视为闭合图形
+CLOSURE_RATIO = 0.15
+
+
+# ============== 特征 ==============
+
+class ShapeFeatures:
+    """
+    一条笔画的形状特征
+
+    边界框和闭合度在创建时计算，其余特征在首次访问时计算并缓存。
+    """
+
+    def __init__(self, xs: Sequence[float], ys: Sequence[float],
+                 pressures: Sequence[float], vectorize: bool = False):
+        """
+        Args:
+            xs: X坐标（重采样后或原始）
+            ys: Y坐标
+            pressures: 原始笔画的压力值
+            vectorize: 是否使用 NumPy 计算
+        """
+        self._np = vectorize
+        if vectorize:
+            self.xs = np.asarray(xs, dtype=np.float64)
+            self.ys = np.asarray(ys, dtype=np.float64)
+            self.min_x, self.max_x = float(self.xs.min()), float(self.xs.max())
+            self.min_y, self.max_y = float(self.ys.min()), float(self.ys.max())
+        else:
+            self.xs = xs
+            self.ys = ys
+            self.min_x, self.max_x = min(xs), max(xs)
+            self.min_y, self.max_y = min(ys), max(ys)
+        self.count = len(xs)
+        self.width = self.max_x - self.min_x
+        self.height = self.max_y - self.min_y
+        self.diagonal = math.hypot(self.width, self.height)
+        self.start: Point = (float(xs[0]), float(ys[0]))
+        self.end: Point = (float(xs[-1]), float(ys[-1]))
+        self.chord_length = math.dist(self.start, self.end)
+        self.closed = self.diagonal > 0 and self.chord_length / self.diagonal < CLOSURE_RATIO
+
+        self.start_pressure = float(pressures[0])
+        self.end_pressure = float(pressures[-1])
+        self.mean_pressure = sum(pressures) / len(pressures)
+        self._corners: Dict[int, List[Point]] = {}
+
+    @classmethod
+    def from_stroke(cls, stroke: Stroke, resample: Optional[int] = None,
+                    vectorize: Optional[bool] = None) -> "ShapeFeatures":
+        """
+        提取笔画特征
+
+        Args:
+            stroke: 笔画（至少一个点）
+            resample: 按弧长重采样的点数，为None时使用原始点
+            vectorize: 是否使用 NumPy，为None时按点数自动选择
+        """
+        points = stroke.points
+        if vectorize is None:
+            vectorize = HAS_NUMPY and len(points) >= VECTORIZE_MIN_POINTS
+        elif vectorize and not HAS_NUMPY:
+            raise RuntimeError("NumPy is not installed")
+
+        xs, ys = points.xs, points.ys
+        if resample is not None and len(points) > 1:
+            if vectorize:
+                xs, ys = _resample_vectorized(xs, ys, resample)
+            else:
+                xs, ys = _resample(xs, ys, resample)
+        return cls(xs, ys, points.pressures, vectorize)
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def center(self) -> Point:
+        """边界框中心"""
+        return (self.min_x + self.width / 2, self.min_y + self.height / 2)
+
+    def point(self, index: int) -> Point:
+        return (float(self.xs[index]), float(self.ys[index]))
+
+    # ---------- 按需计算的特征 ----------
+
+    @cached_property
+    def line_deviation(self) -> float:
+        """中间各点到首尾弦的最大距离与弦长之比（弦长为0时为无穷大）"""
+        return self.chord_deviation(0, self.count - 1)
+
+    @cached_property
+    def radial_deviation(self) -> float:
+        """各点到边界框中心的距离与平均半径之差的平均值，相对平均半径"""
+        radius = (self.width + self.height) / 4
+        if radius <= 0:
+            return math.inf
+        cx, cy = self.center
+        if self._np:
+            dist = np.hypot(self.xs - cx, self.ys - cy)
+            return float(np.abs(dist - radius).mean()) / radius
+        total = 0.0
+        for x, y in zip(self.xs, self.ys):
+            total += abs(math.hypot(x - cx, y - cy) - radius)
+        return total / self.count / radius
+
+    @cached_property
+    def ellipse_deviation(self) -> float:
+        """各点的归一化椭圆半径（边界框内切椭圆）与 1 之差的平均值"""
+        a, b = self.width / 2, self.height / 2
+        if a <= 0 or b <= 0:
+            return math.inf
+        cx, cy = self.center
+        if self._np:
+            r = np.hypot((self.xs - cx) / a, (self.ys - cy) / b)
+            return float(np.abs(r - 1).mean())
+        total = 0.0
+        for x, y in zip(self.xs, self.ys):
+            total += abs(math.hypot((x - cx) / a, (y - cy) / b) - 1)
+        return total / self.count
+
+    def edge_fraction(self, threshold: float) -> float:
+        """到边界框任一边的距离小于 threshold 的点所占比例"""
+        min_x, max_x, min_y, max_y = self.min_x, self.max_x, self.min_y, self.max_y
+        if self._np:
+            xs, ys = self.xs, self.ys
+            near = (
+                (np.abs(xs - min_x) < threshold) | (np.abs(xs - max_x) < threshold)
+                | (np.abs(ys - min_y) < threshold) | (np.abs(ys - max_y) < threshold)
+            )
+            return float(near.mean())
+        near = 0
+        for x, y in zip(self.xs, self.ys):
+            if (abs(x - min_x) < threshold or abs(x - max_x) < threshold
+                    or abs(y - min_y) < threshold or abs(y - max_y) < threshold):
+                near += 1
+        return near / self.count
+
+    def chord_deviation(self, i: int, j: int) -> float:
+        """第 i 到第 j 个点之间各点到 i-j 弦的最大距离与弦长之比"""
+        x0, y0 = self.point(i)
+        x1, y1 = self.point(j)
+        dx, dy = x1 - x0, y1 - y0
+        length = math.hypot(dx, dy)
+        if length == 0:
+            return math.inf
+        if j - i < 2:
+            return 0.0
+        if self._np:
+            cross = np.abs((self.xs[i + 1:j] - x0) * dy - (self.ys[i + 1:j] - y0) * dx)
+            return float(cross.max()) / length / length
+        worst = 0.0
+        for k in range(i + 1, j):
+            cross = abs((self.xs[k] - x0) * dy - (self.ys[k] - y0) * dx)
+            if cross > worst:
+                worst = cross
+        return worst / length / length
+
+    def signed_offsets(self, origin: Point, direction: Point, start: int) -> List[float]:
+        """第 start 个点之后各点到直线（origin, 单位方向 direction）的有符号距离"""
+        ox, oy = origin
+        dx, dy = direction
+        if self._np:
+            return ((self.ys[start:] - oy) * dx - (self.xs[start:] - ox) * dy).tolist()
+        return [
+            (self.ys[k] - oy) * dx - (self.xs[k] - ox) * dy
+            for k in range(start, self.count)
+        ]
+
+    def farthest_from(self, x: float, y: float) -> Tuple[int, float]:
+        """距离给定点最远的点的下标和距离"""
+        if self._np:
+            dist = np.hypot(self.xs - x, self.ys - y)
+            index = int(dist.argmax())
+            return index, float(dist[index])
+        best, best_dist = 0, -1.0
+        for k in range(self.count):
+            d = math.hypot(self.xs[k] - x, self.ys[k] - y)
+            if d > best_dist:
+                best, best_dist = k, d
+        return best, best_dist
+
+    @cached_property
+    def turning_angles(self):
+        """各中间点的转角（弧度，零长度线段为0），第 i 项对应第 i+1 个点"""
+        if self._np:
+            vx = np.diff(self.xs)
+            vy = np.diff(self.ys)
+            len1 = np.hypot(vx[:-1], vy[:-1])
+            len2 = np.hypot(vx[1:], vy[1:])
+            denom = len1 * len2
+            dot = vx[:-1] * vx[1:] + vy[:-1] * vy[1:]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cos = np.where(denom > 0, dot / denom, 1.0)
+            return np.arccos(np.clip(cos, -1.0, 1.0))
+        angles = []
+        xs, ys = self.xs, self.ys
+        for i in range(1, self.count - 1):
+            v1x, v1y = xs[i] - xs[i - 1], ys[i] - ys[i - 1]
+            v2x, v2y = xs[i + 1] - xs[i], ys[i + 1] - ys[i]
+            denom = math.hypot(v1x, v1y) * math.hypot(v2x, v2y)
+            if denom == 0:
+                angles.append(0.0)
+                continue
+            cos = (v1x * v2x + v1y * v2y) / denom
+            angles.append(math.acos(max(-1.0, min(1.0, cos))))
+        return angles
+
+    def corners(self, k: int) -> List[Point]:
+        """
+        转角最大的 k 个点（按笔画顺序）
+
+        只做部分选择而不对全部转角排序；转角相同时取较早的点。
+        """
+        cached = self._corners.get(k)
+        if cached is not None:
+            return cached
+        angles = self.turning_angles
+        if len(angles) < k:
+            result: List[Point] = []
+        elif self._np:
+            kth = np.partition(angles, len(angles) - k)[len(angles) - k]
+            greater = np.flatnonzero(angles > kth)
+            equal = np.flatnonzero(angles == kth)[:k - len(greater)]
+            indices = np.sort(np.concatenate((greater, equal)))
+            result = [self.point(int(i) + 1) for i in indices]
+        else:
+            top = heapq.nlargest(k, range(len(angles)), key=angles.__getitem__)
+            result = [self.point(i + 1) for i in sorted(top)]
+        self._corners[k] = result
+        return result
+
+
+def _resample(xs: Sequence[float], ys: Sequence[float], count: int) -> Tuple[List[float], List[float]]:
+    """按弧长等距重采样（首尾点保留）"""
+    count = max(2, count)
+    arc = [0.0]
+    for i in range(1, len(xs)):
+        arc.append(arc[-1] + math.hypot(xs[i] - xs[i - 1], ys[i] - ys[i - 1]))
+    total = arc[-1]
+    if total == 0:
+        return [float(xs[0])] * count, [float(ys[0])] * count
+    out_x, out_y = [], []
+    segment = 1
+    for k in range(count):
+        target = total * k / (count - 1)
+        while segment < len(arc) - 1 and arc[segment] < target:
+            segment += 1
+        span = arc[segment] - arc[segment - 1]
+        t = (target - arc[segment - 1]) / span if span > 0 else 0.0
+        out_x.append(xs[segment - 1] + (xs[segment] - xs[segment - 1]) * t)
+        out_y.append(ys[segment - 1] + (ys[segment] - ys[segment - 1]) * t)
+    return out_x, out_y
+
+
+def _resample_vectorized(xs: Sequence[float], ys: Sequence[float], count: int):
+    count = max(2, count)
+    x = np.asarray(xs, dtype=np.float64)
+    y = np.asarray(ys, dtype=np.float64)
+    arc = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(x), np.diff(y)))))
+    if arc[-1] == 0:
+        return np.full(count, x[0]), np.full(count, y[0])
+    # 去掉零长度线段，保证插值的横坐标严格递增
+    keep = np.concatenate(([True], np.diff(arc) > 0))
+    targets = np.linspace(0.0, arc[-1], count)
+    return np.interp(targets, arc[keep], x[keep]), np.interp(targets, arc[keep], y[keep])
+
+
+# ============== 识别器 ==============
+
+def make_shape_stroke(original: Stroke, coords: Iterable[Point], pressure: float) -> Stroke:
+    """用原笔画的笔类型、颜色和宽度创建标准图形笔画"""
+    now = time.time()
+    return Stroke(
+        id=str(uuid.uuid4()),
+        pen_type=original.pen_type,
+        color=original.color,
+        width=original.width,
+        points=[StrokePoint(x=x, y=y, pressure=pressure, timestamp=now) for x, y in coords],
+    )
+
+
+class ShapeRecognizer(ABC):
+    """
+    形状识别器
+
+    子类设置 name、priority（越小越先执行）、closed（True/False 只处理
+    闭合/非闭合笔画，None 不限）和 min_points，并实现 recognize()；
+    accepts() 可用边界框等已计算的特征提前拒绝。
+    """
+
+    name = ""
+    priority = 100
+    closed: Optional[bool] = None
+    min_points = 3
+
+    def accepts(self, features: ShapeFeatures) -> bool:
+        """便宜的预判断，返回False时不调用 recognize()"""
+        return True
+
+    @abstractmethod
+    def recognize(self, features: ShapeFeatures, stroke: Stroke) -> Optional[Stroke]:
+        """识别成功时返回标准图形笔画"""
+
+
+class LineRecognizer(ShapeRecognizer):
+    """直线：中间各点到首尾连线的最大偏差小于线长的10%"""
+
+    name = "line"
+    priority = 10
+    min_points = 2
+    MIN_LENGTH = 10
+    MAX_DEVIATION = 0.1
+
+    def accepts(self, features: ShapeFeatures) -> bool:
+        return features.chord_length >= self.MIN_LENGTH
+
+    def recognize(self, features: ShapeFeatures, stroke: Stroke) -> Optional[Stroke]:
+        if features.line_deviation >= self.MAX_DEVIATION:
+            return None
+        pressure = (features.start_pressure + features.end_pressure) / 2
+        return make_shape_stroke(stroke, (features.start, features.end), pressure)
+
+
+class CircleRecognizer(ShapeRecognizer):
+    """圆：宽高比接近1，各点到中心的距离接近平均半径"""
+
+    name = "circle"
+    priority = 20
+    closed = True
+    min_points = 8
+    MIN_RADIUS = 5
+    MAX_DEVIATION = 0.2
+    SEGMENTS = 36
+
+    def accepts(self, features: ShapeFeatures) -> bool:
+        if features.width <= 0 or features.height <= 0:
+            return False
+        return (0.7 < features.width / features.height < 1.4
+                and (features.width + features.height) / 4 >= self.MIN_RADIUS)
+
+    def recognize(self, features: ShapeFeatures, stroke: Stroke) -> Optional[Stroke]:
+        if features.radial_deviation >= self.MAX_DEVIATION:
+            return None
+        cx, cy = features.center
+        radius = (features.width + features.height) / 4
+        coords = [
+            (cx + radius * math.cos(2 * math.pi * i / self.SEGMENTS),
+             cy + radius * math.sin(2 * math.pi * i / self.SEGMENTS))
+            for i in range(self.SEGMENTS + 1)
+        ]
+        return make_shape_stroke(stroke, coords, features.mean_pressure)
+
+
+class RectangleRecognizer(ShapeRecognizer):
+    """矩形：七成以上的点靠近边界框的边"""
+
+    name = "rectangle"
+    priority = 30
+    closed = True
+    MIN_SIDE = 10
+    MIN_EDGE_FRACTION = 0.7
+
+    def accepts(self, features: ShapeFeatures) -> bool:
+        return features.width >= self.MIN_SIDE and features.height >= self.MIN_SIDE
+
+    def recognize(self, features: ShapeFeatures, stroke: Stroke) -> Optional[Stroke]:
+        threshold = min(features.width, features.height) * 0.15
+        if features.edge_fraction(threshold) <= self.MIN_EDGE_FRACTION:
+            return None
+        x0, y0, x1, y1 = features.min_x, features.min_y, features.max_x, features.max_y
+        coords = [(x0, y0), (x1, y0), (x1, y1), (x0, y1), (x0, y0)]
+        return make_shape_stroke(stroke, coords, features.mean_pressure)
+
+
+class TriangleRecognizer(ShapeRecognizer):
+    """三角形：转角最大的三个点围成的面积约为边界框面积的一半"""
+
+    name = "triangle"
+    priority = 40
+    closed = True
+    min_points = 10
+
+    def accepts(self, features: ShapeFeatures) -> bool:
+        return features.width > 0 and features.height > 0
+
+    def recognize(self, features: ShapeFeatures, stroke: Stroke) -> Optional[Stroke]:
+        corners = features.corners(3)
+        if len(corners) != 3:
+            return None
+        (ax, ay), (bx, by), (cx, cy) = corners
+        area = abs((bx - ax) * (cy - ay) - (cx - ax) * (by - ay)) / 2
+        if not 0.3 < area / (features.width * features.height) < 0.7:
+            return None
+        return make_shape_stroke(stroke, [*corners, corners[0]], features.mean_pressure)
+
+
+class EllipseRecognizer(ShapeRecognizer):
+    """椭圆：各点接近边界框的内切椭圆（宽高比接近1的由圆识别器处理）"""
+
+    name = "ellipse"
+    priority = 25
+    closed = True
+    min_points = 8
+    MIN_AXIS = 10
+    MAX_DEVIATION = 0.12
+    SEGMENTS = 48
+
+    def accepts(self, features: ShapeFeatures) -> bool:
+        return min(features.width, features.height) >= self.MIN_AXIS
+
+    def recognize(self, features: ShapeFeatures, stroke: Stroke) -> Optional[Stroke]:
+        if features.ellipse_deviation >= self.MAX_DEVIATION:
+            return None
+        cx, cy = features.center
+        a, b = features.width / 2, features.height / 2
+        coords = [
+            (cx + a * math.cos(2 * math.pi * i / self.SEGMENTS),
+             cy + b * math.sin(2 * math.pi * i / self.SEGMENTS))
+            for i in range(self.SEGMENTS + 1)
+        ]
+        return make_shape_stroke(stroke, coords, features.mean_pressure)
+
+
+class ArrowRecognizer(ShapeRecognizer):
+    """
+    箭头（一笔画出）：从起点画直线到箭尖，再在箭尖附近画出两侧的箭翼
+
+    生成的笔画为 箭尾 → 箭尖 → 箭翼1 → 箭尖 → 箭翼2。
+    """
+
+    name = "arrow"
+    priority = 15
+    closed = False
+    min_points = 5
+    MIN_LENGTH = 30
+    MAX_SHAFT_DEVIATION = 0.1
+    # 箭头部分相对箭杆长度的范围
+    MAX_HEAD = 0.5
+    MIN_BARB = 0.08
+    BARB_ANGLE = math.radians(30)
+
+    def accepts(self, features: ShapeFeatures) -> bool:
+        return features.diagonal >= self.MIN_LENGTH
+
+    def recognize(self, features: ShapeFeatures, stroke: Stroke) -> Optional[Stroke]:
+        tip_index, length = features.farthest_from(*features.start)
+        if length < self.MIN_LENGTH or tip_index < 2 or features.count - tip_index < 3:
+            return None
+        if features.chord_deviation(0, tip_index) >= self.MAX_SHAFT_DEVIATION:
+            return None
+        tip = features.point(tip_index)
+        direction = ((tip[0] - features.start[0]) / length, (tip[1] - features.start[1]) / length)
+        _, head_extent = _farthest_after(features, tip, tip_index)
+        if head_extent > self.MAX_HEAD * length:
+            return None
+        offsets = features.signed_offsets(tip, direction, tip_index + 1)
+        if max(offsets) < self.MIN_BARB * length or min(offsets) > -self.MIN_BARB * length:
+            return None
+
+        barb = min(max(head_extent, 0.1 * length), 0.4 * length)
+        back = math.atan2(-direction[1], -direction[0])
+        wings = [
+            (tip[0] + barb * math.cos(back + sign * self.BARB_ANGLE),
+             tip[1] + barb * math.sin(back + sign * self.BARB_ANGLE))
+            for sign in (1, -1)
+        ]
+        coords = [features.start, tip, wings[0], tip, wings[1]]
+        return make_shape_stroke(stroke, coords, features.mean_pressure)
+
+
+def _farthest_after(features: ShapeFeatures, origin: Point, start: int) -> Tuple[int, float]:
+    """第 start 个点之后距离 origin 最远的点"""
+    best, best_dist = start, 0.0
+    for k in range(start + 1, features.count):
+        d = math.dist(origin, features.point(k))
+        if d > best_dist:
+            best, best_dist = k, d
+    return best, best_dist
+
+
+def default_recognizers() -> List[ShapeRecognizer]:
+    """默认识别器：直线、圆、矩形、三角形"""
+    return [LineRecognizer(), CircleRecognizer(), RectangleRecognizer(), TriangleRecognizer()]
+
+
+class ShapeRecognizerPipeline:
+    """按优先级依次尝试的形状识别流水线"""
+
+    def __init__(self, recognizers: Optional[Iterable[ShapeRecognizer]] = None,
+                 resample: Optional[int] = None, vectorize: Optional[bool] = None):
+        """
+        初始化识别流水线
+
+        Args:
+            recognizers: 识别器，为None时使用 default_recognizers()
+            resample: 识别前按弧长重采样的点数，为None时使用原始点
+            vectorize: 是否使用 NumPy，为None时按点数自动选择
+        """
+        self.resample = resample
+        self.vectorize = vectorize
+        self._recognizers: List[ShapeRecognizer] = []
+        for recognizer in (default_recognizers() if recognizers is None else recognizers):
+            self.register(recognizer)
+
+    @property
+    def recognizers(self) -> List[ShapeRecognizer]:
+        """按执行顺序排列的识别器"""
+        return list(self._recognizers)
+
+    def register(self, recognizer: ShapeRecognizer) -> None:
+        """加入识别器（同名识别器被替换；同优先级按加入顺序执行）"""
+        self.unregister(recognizer.name)
+        # 整体替换列表而不是原地排序，后台线程上正在进行的识别不受影响
+        self._recognizers = sorted(
+            [*self._recognizers, recognizer], key=lambda r: r.priority
+        )
+
+    def unregister(self, name: str) -> bool:
+        """移除识别器，返回是否存在"""
+        before = len(self._recognizers)
+        self._recognizers = [r for r in self._recognizers if r.name != name]
+        return len(self._recognizers) != before
+
+    def recognize(self, stroke: Stroke) -> Optional[Stroke]:
+        """
+        识别笔画
+
+        Args:
+            stroke: 原始笔画
+
+        Returns:
+            第一个识别成功的标准图形笔画，都不匹配时返回None
+        """
+        if len(stroke.points) < 3:
+            return None
+        features = ShapeFeatures.from_stroke(stroke, self.resample, self.vectorize)
+        recognizers = self._recognizers
+        for recognizer in recognizers:
+            if recognizer.closed is not None and recognizer.closed != features.closed:
+                continue
+            if len(features) < recognizer.min_points or not recognizer.accepts(features):
+                continue
+            shape = recognizer.recognize(features, stroke)
+            if shape is not None:
+                return shape
+        return None
+
+
+# ============== 后台识别 ==============
+
+class SpeculativeShapeRecognizer:
+    """
+    在后台线程上进行形状识别
+
+    书写过程中停顿时调用 speculate() 对已绘制部分做推测识别；
+    抬笔时调用 recognize()，若笔画在推测之后没有新增点则直接复用推测结果，
+    否则重新识别。两者都返回 Future，不阻塞调用线程。
+
+    speculate() / recognize() / cancel() 应在同一线程（UI线程）调用；
+    识别使用笔画的快照，之后继续追加点不影响正在进行的识别。
+    """
+
+    def __init__(self, recognize: Callable[[Stroke], Optional[Stroke]]):
+        """
+        初始化后台识别器
+
+        Args:
+            recognize: 识别函数（如 ShapeRecognizerPipeline.recognize），在工作线程上调用
+        """
+        self._recognize = recognize
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # 每条笔画最近一次推测 {stroke_id: (快照点数, Future)}
+        self._speculations: Dict[str, Tuple[int, Future]] = {}
+        # 抬笔时复用 / 未能复用推测结果的次数
+        self.speculative_hits = 0
+        self.speculative_misses = 0
+
+    def speculate(self, stroke: Stroke) -> Future:
+        """
+        对正在绘制的笔画做推测识别（替换该笔画之前的推测）
+
+        Args:
+            stroke: 正在绘制的笔画
+
+        Returns:
+            识别结果的 Future
+        """
+        count = len(stroke.points)
+        previous = self._speculations.get(stroke.id)
+        if previous is not None:
+            if previous[0] == count:
+                return previous[1]
+            previous[1].cancel()
+        future = self._submit(stroke)
+        self._speculations[stroke.id] = (count, future)
+        return future
+
+    def recognize(self, stroke: Stroke) -> Future:
+        """
+        识别完成的笔画，优先复用点数相同的推测结果
+
+        Args:
+            stroke: 完成的笔画（原始点）
+
+        Returns:
+            识别结果的 Future
+        """
+        speculation = self._speculations.pop(stroke.id, None)
+        if speculation is not None:
+            count, future = speculation
+            if count == len(stroke.points) and not future.cancelled():
+                self.speculative_hits += 1
+                return future
+            future.cancel()
+            self.speculative_misses += 1
+        return self._submit(stroke)
+
+    def cancel(self, stroke_id: str) -> None:
+        """丢弃笔画的推测结果"""
+        speculation = self._speculations.pop(stroke_id, None)
+        if speculation is not None:
+            speculation[1].cancel()
+
+    def shutdown(self) -> None:
+        """取消未开始的识别并停止工作线程"""
+        for _, future in self._speculations.values():
+            future.cancel()
+        self._speculations.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _submit(self, stroke: Stroke) -> Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="shape-recognition"
+            )
+        snapshot = replace(stroke, points=stroke.points.copy())
+        return self._executor.submit(self._recognize, snapshot)
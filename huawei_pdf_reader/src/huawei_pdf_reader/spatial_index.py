@@ -0,0 +1,184 @@
+"""
+华为平板PDF阅读器 - 笔画空间索引
+
+按均匀网格对笔画建立索引：每个笔画登记到其线段（含笔画宽度）经过的网格单元中，
+擦除和点击检测只需检查查询区域附近单元内的笔画。
+"""
+
+import math
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+from huawei_pdf_reader.models import Stroke
+
+
+Cell = Tuple[int, int]
+Bounds = Tuple[float, float, float, float]  # (min_x, min_y, max_x, max_y)
+
+# 圆形查询的包围矩形余量
+QUERY_EPSILON = 1e-6
+
+
+class StrokeGridIndex:
+    """
+    单页笔画的均匀网格索引
+
+    线段跨越多个单元时登记到线段包围盒（按笔画宽度的一半外扩）覆盖的所有单元，
+    查询结果是候选集合（可能多于实际相交的笔画），调用方需再做精确判断。
+    """
+
+    def __init__(self, cell_size: float = 64.0):
+        """
+        初始化网格索引
+
+        Args:
+            cell_size: 网格单元边长（与笔画坐标单位相同）
+        """
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self._cell_size = cell_size
+        self._cells: Dict[Cell, Set[str]] = {}
+        self._stroke_cells: Dict[str, Set[Cell]] = {}
+        self._bounds: Dict[str, Bounds] = {}
+
+    @property
+    def cell_size(self) -> float:
+        return self._cell_size
+
+    def __len__(self) -> int:
+        return len(self._stroke_cells)
+
+    def __contains__(self, stroke_id: str) -> bool:
+        return stroke_id in self._stroke_cells
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._cells.clear()
+        self._stroke_cells.clear()
+        self._bounds.clear()
+
+    def insert(self, stroke: Stroke) -> None:
+        """
+        登记笔画（已存在时按新坐标重新登记）
+
+        Args:
+            stroke: 笔画
+        """
+        self.remove(stroke.id)
+        xs = stroke.points.xs
+        ys = stroke.points.ys
+        if not xs:
+            return
+
+        size = self._cell_size
+        pad = stroke.width / 2
+        cells: Set[Cell] = set()
+        min_x = min_y = math.inf
+        max_x = max_y = -math.inf
+        prev_x, prev_y = xs[0], ys[0]
+        for x, y in zip(xs, ys):
+            if x < min_x:
+                min_x = x
+            if x > max_x:
+                max_x = x
+            if y < min_y:
+                min_y = y
+            if y > max_y:
+                max_y = y
+
+            # 登记线段（外扩笔画半宽）包围盒覆盖的单元
+            x0, x1 = (prev_x, x) if prev_x <= x else (x, prev_x)
+            y0, y1 = (prev_y, y) if prev_y <= y else (y, prev_y)
+            for cx in range(math.floor((x0 - pad) / size), math.floor((x1 + pad) / size) + 1):
+                for cy in range(math.floor((y0 - pad) / size), math.floor((y1 + pad) / size) + 1):
+                    cells.add((cx, cy))
+            prev_x, prev_y = x, y
+
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is None:
+                bucket = self._cells[cell] = set()
+            bucket.add(stroke.id)
+        self._stroke_cells[stroke.id] = cells
+        self._bounds[stroke.id] = (min_x - pad, min_y - pad, max_x + pad, max_y + pad)
+
+    def remove(self, stroke_id: str) -> None:
+        """移除笔画"""
+        cells = self._stroke_cells.pop(stroke_id, None)
+        if cells is None:
+            return
+        self._bounds.pop(stroke_id, None)
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket is not None:
+                bucket.discard(stroke_id)
+                if not bucket:
+                    del self._cells[cell]
+
+    def get_bounds(self, stroke_id: str) -> Optional[Bounds]:
+        """获取笔画包围盒（含笔画宽度）"""
+        return self._bounds.get(stroke_id)
+
+    def query_rect(self, min_x: float, min_y: float, max_x: float, max_y: float) -> Set[str]:
+        """
+        查询包围盒与矩形相交的候选笔画
+
+        Returns:
+            候选笔画ID集合
+        """
+        size = self._cell_size
+        x0, x1 = math.floor(min_x / size), math.floor(max_x / size)
+        y0, y1 = math.floor(min_y / size), math.floor(max_y / size)
+
+        found: Set[str] = set()
+        if (x1 - x0 + 1) * (y1 - y0 + 1) > len(self._cells):
+            # 查询范围大于已占用的单元数时直接遍历已占用单元
+            for (cx, cy), bucket in self._cells.items():
+                if x0 <= cx <= x1 and y0 <= cy <= y1:
+                    found.update(bucket)
+        else:
+            for cx in range(x0, x1 + 1):
+                for cy in range(y0, y1 + 1):
+                    bucket = self._cells.get((cx, cy))
+                    if bucket:
+                        found.update(bucket)
+
+        bounds = self._bounds
+        return {
+            stroke_id for stroke_id in found
+            if bounds[stroke_id][0] <= max_x and bounds[stroke_id][2] >= min_x
+            and bounds[stroke_id][1] <= max_y and bounds[stroke_id][3] >= min_y
+        }
+
+    def query_circle(self, x: float, y: float, radius: float) -> Set[str]:
+        """
+        查询可能与圆形区域相交的候选笔画
+
+        Returns:
+            候选笔画ID集合
+        """
+        # 留出微小余量：精确判断按距离平方比较，极小的坐标差会下溢为0
+        reach = radius + QUERY_EPSILON
+        return self.query_rect(x - reach, y - reach, x + reach, y + reach)
+
+    def query_path(self, points: Sequence[Tuple[float, float]], radius: float) -> Set[str]:
+        """
+        查询可能被沿路径移动的圆扫到的候选笔画
+
+        Args:
+            points: 圆心经过的点
+            radius: 半径
+
+        Returns:
+            候选笔画ID集合
+        """
+        if len(points) <= 1:
+            return self.query_circle(points[0][0], points[0][1], radius) if points else set()
+
+        reach = radius + QUERY_EPSILON
+        found: Set[str] = set()
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            found |= self.query_rect(
+                min(x0, x1) - reach, min(y0, y1) - reach,
+                max(x0, x1) + reach, max(y0, y1) + reach,
+            )
+        return found
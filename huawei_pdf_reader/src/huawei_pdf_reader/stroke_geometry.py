@@ -0,0 +1,247 @@
+"""
+华为平板PDF阅读器 - 笔画几何计算
+
+橡皮擦命中判断：把笔画视为带宽度的折线，橡皮擦视为沿拖动路径扫过的圆，
+两者的线段间距离不超过 橡皮擦半径 + 笔画宽度/2 即为命中。
+安装了 NumPy 时对所有候选线段一次性向量化计算，否则使用纯 Python 实现。
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from huawei_pdf_reader.models import Stroke
+
+
+Point = Tuple[float, float]
+Segment = Tuple[float, float, float, float]  # (x0, y0, x1, y1)
+
+# 是否可以使用向量化实现
+HAS_NUMPY = np is not None
+
+# 候选线段数少于此值时纯 Python 更快（省去构建数组的开销）
+VECTORIZE_MIN_SEGMENTS = 256
+
+# 向量化计算时每块的 线段数 × 路径段数 上限，限制临时数组的内存
+_BLOCK_PAIRS = 1 << 18
+
+
+def path_segments(points: Sequence[Point]) -> List[Segment]:
+    """
+    将橡皮擦路径转换为线段列表（单个点视为长度为0的线段）
+
+    Args:
+        points: 橡皮擦中心经过的点
+
+    Returns:
+        线段列表
+    """
+    if not points:
+        return []
+    if len(points) == 1:
+        x, y = points[0]
+        return [(x, y, x, y)]
+    return [
+        (points[i][0], points[i][1], points[i + 1][0], points[i + 1][1])
+        for i in range(len(points) - 1)
+    ]
+
+
+def strokes_hit_path(
+    strokes: Sequence[Stroke],
+    points: Sequence[Point],
+    radius: float,
+    vectorize: Optional[bool] = None,
+) -> List[bool]:
+    """
+    判断每个笔画是否被沿路径移动的橡皮擦扫到
+
+    Args:
+        strokes: 候选笔画
+        points: 橡皮擦中心经过的点（按时间顺序）
+        radius: 橡皮擦半径
+        vectorize: 是否使用 NumPy，为None时按候选线段数自动选择
+
+    Returns:
+        与 strokes 一一对应的命中结果
+    """
+    path = path_segments(points)
+    if not strokes or not path:
+        return [False] * len(strokes)
+
+    if vectorize is None:
+        vectorize = HAS_NUMPY and sum(len(s.points) for s in strokes) >= VECTORIZE_MIN_SEGMENTS
+    elif vectorize and not HAS_NUMPY:
+        raise RuntimeError("NumPy is not installed")
+
+    if vectorize:
+        return _hit_vectorized(strokes, path, radius)
+    return [_stroke_hits_path(stroke, path, radius) for stroke in strokes]
+
+
+def strokes_hit_circle(
+    strokes: Sequence[Stroke], cx: float, cy: float, radius: float
+) -> List[bool]:
+    """判断每个笔画是否与圆形区域相交"""
+    return strokes_hit_path(strokes, [(cx, cy)], radius)
+
+
+# ============== 纯 Python 实现 ==============
+
+def _point_segment_dist_sq(
+    px: float, py: float, x0: float, y0: float, x1: float, y1: float
+) -> float:
+    """点到线段距离的平方"""
+    dx = x1 - x0
+    dy = y1 - y0
+    length_sq = dx * dx + dy * dy
+    if length_sq > 0:
+        t = ((px - x0) * dx + (py - y0) * dy) / length_sq
+        if t < 0:
+            t = 0.0
+        elif t > 1:
+            t = 1.0
+        x0 += t * dx
+        y0 += t * dy
+    ex = px - x0
+    ey = py - y0
+    return ex * ex + ey * ey
+
+
+def _segments_cross(a: Segment, b: Segment) -> bool:
+    """两条线段是否在内部相交（端点接触由端点距离处理）"""
+    ax0, ay0, ax1, ay1 = a
+    bx0, by0, bx1, by1 = b
+    d1 = (ax1 - ax0) * (by0 - ay0) - (ay1 - ay0) * (bx0 - ax0)
+    d2 = (ax1 - ax0) * (by1 - ay0) - (ay1 - ay0) * (bx1 - ax0)
+    d3 = (bx1 - bx0) * (ay0 - by0) - (by1 - by0) * (ax0 - bx0)
+    d4 = (bx1 - bx0) * (ay1 - by0) - (by1 - by0) * (ax1 - bx0)
+    return d1 * d2 < 0 and d3 * d4 < 0
+
+
+def _segment_dist_sq(a: Segment, b: Segment) -> float:
+    """两条线段间最短距离的平方"""
+    if b[0] == b[2] and b[1] == b[3]:
+        # 橡皮擦静止（单点查询）时退化为点到线段距离
+        return _point_segment_dist_sq(b[0], b[1], *a)
+    if _segments_cross(a, b):
+        return 0.0
+    return min(
+        _point_segment_dist_sq(a[0], a[1], *b),
+        _point_segment_dist_sq(a[2], a[3], *b),
+        _point_segment_dist_sq(b[0], b[1], *a),
+        _point_segment_dist_sq(b[2], b[3], *a),
+    )
+
+
+def _stroke_hits_path(stroke: Stroke, path: List[Segment], radius: float) -> bool:
+    xs = stroke.points.xs
+    ys = stroke.points.ys
+    if not xs:
+        return False
+    reach = radius + stroke.width / 2
+    reach_sq = reach * reach
+    if len(xs) == 1:
+        segments = [(xs[0], ys[0], xs[0], ys[0])]
+    else:
+        segments = [
+            (xs[i], ys[i], xs[i + 1], ys[i + 1])
+            for i in range(len(xs) - 1)
+        ]
+    for segment in segments:
+        for eraser in path:
+            if _segment_dist_sq(segment, eraser) <= reach_sq:
+                return True
+    return False
+
+
+# ============== NumPy 实现 ==============
+
+def _stroke_arrays(strokes: Sequence[Stroke]):
+    """
+    将候选笔画展开为线段数组
+
+    Returns:
+        (segments[N, 4], owner[N], reach[N])：线段端点、所属笔画下标、命中距离
+    """
+    counts = np.fromiter((len(s.points) for s in strokes), dtype=np.intp, count=len(strokes))
+    widths = [stroke.width for stroke in strokes]
+    # 列式存储的坐标直接通过缓冲区协议转换，不逐点构造对象
+    xy = np.empty((int(counts.sum()), 2), dtype=np.float64)
+    offset = 0
+    for stroke, count in zip(strokes, counts):
+        xy[offset:offset + count, 0] = stroke.points.xs
+        xy[offset:offset + count, 1] = stroke.points.ys
+        offset += count
+    ends = np.cumsum(counts)
+    starts = ends - counts
+
+    # 每个点与下一个点组成线段；单点笔画与自身组成长度为0的线段
+    index = np.arange(len(xy))
+    next_index = np.minimum(index + 1, len(xy) - 1)
+    owner_of_point = np.repeat(np.arange(len(strokes)), counts)
+    is_last = np.zeros(len(xy), dtype=bool)
+    is_last[ends[counts > 0] - 1] = True
+    single = np.zeros(len(xy), dtype=bool)
+    single[starts[counts == 1]] = True
+    keep = ~is_last | single
+    next_index = np.where(single, index, next_index)
+
+    segments = np.concatenate((xy[index[keep]], xy[next_index[keep]]), axis=1)
+    owner = owner_of_point[keep]
+    reach = np.asarray(widths, dtype=np.float64)[owner] / 2
+    return segments, owner, reach
+
+
+def _point_segment_dist_sq_np(px, py, x0, y0, x1, y1):
+    dx = x1 - x0
+    dy = y1 - y0
+    length_sq = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = ((px - x0) * dx + (py - y0) * dy) / length_sq
+    t = np.clip(np.nan_to_num(t, nan=0.0, posinf=0.0, neginf=0.0), 0.0, 1.0)
+    ex = px - (x0 + t * dx)
+    ey = py - (y0 + t * dy)
+    return ex * ex + ey * ey
+
+
+def _hit_vectorized(strokes: Sequence[Stroke], path: List[Segment], radius: float) -> List[bool]:
+    segments, owner, reach = _stroke_arrays(strokes)
+    hits = np.zeros(len(strokes), dtype=bool)
+    if len(segments) == 0:
+        return hits.tolist()
+
+    reach_sq = (reach + radius) ** 2
+    eraser = np.asarray(path, dtype=np.float64)
+    bx0, by0, bx1, by1 = (eraser[:, i][None, :] for i in range(4))
+    block = max(1, _BLOCK_PAIRS // len(eraser))
+
+    for begin in range(0, len(segments), block):
+        seg = segments[begin:begin + block]
+        ax0, ay0, ax1, ay1 = (seg[:, i][:, None] for i in range(4))
+
+        d1 = (ax1 - ax0) * (by0 - ay0) - (ay1 - ay0) * (bx0 - ax0)
+        d2 = (ax1 - ax0) * (by1 - ay0) - (ay1 - ay0) * (bx1 - ax0)
+        d3 = (bx1 - bx0) * (ay0 - by0) - (by1 - by0) * (ax0 - bx0)
+        d4 = (bx1 - bx0) * (ay1 - by0) - (by1 - by0) * (ax1 - bx0)
+        crossing = (d1 * d2 < 0) & (d3 * d4 < 0)
+
+        dist_sq = np.minimum(
+            np.minimum(
+                _point_segment_dist_sq_np(ax0, ay0, bx0, by0, bx1, by1),
+                _point_segment_dist_sq_np(ax1, ay1, bx0, by0, bx1, by1),
+            ),
+            np.minimum(
+                _point_segment_dist_sq_np(bx0, by0, ax0, ay0, ax1, ay1),
+                _point_segment_dist_sq_np(bx1, by1, ax0, ay0, ax1, ay1),
+            ),
+        )
+        dist_sq[crossing] = 0.0
+
+        segment_hit = (dist_sq <= reach_sq[begin:begin + block, None]).any(axis=1)
+        hits[owner[begin:begin + block][segment_hit]] = True
+
+    return hits.tolist()
@@ -0,0 +1,248 @@
+"""
+华为平板PDF阅读器 - 笔画简化
+
+高采样率手写笔每条笔画会产生大量几乎共线的点。笔画结束时按容差删除冗余点：
+被删除的点到简化后对应线段的距离不超过 tolerance，且其压力与该线段上
+线性插值的压力相差不超过 pressure_tolerance（保留笔迹粗细变化）。
+支持 Ramer–Douglas–Peucker 和 Visvalingam–Whyatt 两种算法，
+另可在绘制过程中对输入点做指数平滑以减少抖动。
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from huawei_pdf_reader.models import StrokePoints, ToolsConfig
+
+
+# 简化算法
+METHOD_RDP = "rdp"
+METHOD_VISVALINGAM = "visvalingam"
+SIMPLIFY_METHODS = (METHOD_RDP, METHOD_VISVALINGAM)
+
+# 容差为0时用于避免除零的下限
+_EPSILON = 1e-12
+
+
+@dataclass
+class SimplificationStats:
+    """笔画简化统计"""
+    strokes: int = 0
+    input_points: int = 0
+    output_points: int = 0
+
+    @property
+    def removed_points(self) -> int:
+        """删除的点数"""
+        return self.input_points - self.output_points
+
+    @property
+    def reduction(self) -> float:
+        """删除的点占输入点的比例"""
+        return self.removed_points / self.input_points if self.input_points else 0.0
+
+    def record(self, input_points: int, output_points: int) -> None:
+        """记录一条笔画的简化结果"""
+        self.strokes += 1
+        self.input_points += input_points
+        self.output_points += output_points
+
+    def to_dict(self) -> dict:
+        return {
+            "strokes": self.strokes,
+            "input_points": self.input_points,
+            "output_points": self.output_points,
+            "removed_points": self.removed_points,
+            "reduction": self.reduction,
+        }
+
+
+class StrokeSimplifier:
+    """笔画简化器"""
+
+    def __init__(
+        self,
+        method: str = METHOD_RDP,
+        tolerance: float = 0.5,
+        pressure_tolerance: float = 0.05,
+        smoothing: float = 0.0,
+    ):
+        """
+        初始化笔画简化器
+
+        Args:
+            method: 简化算法（rdp / visvalingam）
+            tolerance: 允许的最大位置偏差（与笔画坐标单位相同）
+            pressure_tolerance: 允许的最大压力偏差
+            smoothing: 绘制时的平滑系数，0 表示不平滑，越接近1越平滑
+        """
+        if method not in SIMPLIFY_METHODS:
+            raise ValueError(f"Unknown simplification method: {method}")
+        if tolerance < 0 or pressure_tolerance < 0:
+            raise ValueError("tolerance must not be negative")
+        if not 0.0 <= smoothing < 1.0:
+            raise ValueError("smoothing must be in [0, 1)")
+        self.method = method
+        self.tolerance = tolerance
+        self.pressure_tolerance = pressure_tolerance
+        self.smoothing = smoothing
+
+    @classmethod
+    def from_config(cls, tools: ToolsConfig) -> Optional["StrokeSimplifier"]:
+        """
+        根据工具设置创建简化器
+
+        Returns:
+            简化器，设置中未启用简化且未启用平滑时返回None
+        """
+        if not tools.stroke_simplification and tools.stroke_smoothing <= 0:
+            return None
+        if not tools.stroke_simplification:
+            # 只平滑不简化
+            return cls(tolerance=0.0, pressure_tolerance=0.0, smoothing=tools.stroke_smoothing)
+        return cls(
+            method=tools.simplification_method,
+            tolerance=tools.simplification_tolerance,
+            smoothing=tools.stroke_smoothing,
+        )
+
+    # ============== 绘制时平滑 ==============
+
+    def smooth(self, previous: Optional[Tuple[float, float]], x: float, y: float) -> Tuple[float, float]:
+        """
+        对新输入点做指数平滑
+
+        Args:
+            previous: 上一个（已平滑的）点，第一个点为None
+            x: 输入X坐标
+            y: 输入Y坐标
+
+        Returns:
+            平滑后的坐标
+        """
+        if previous is None or self.smoothing <= 0:
+            return x, y
+        keep = self.smoothing
+        return previous[0] * keep + x * (1 - keep), previous[1] * keep + y * (1 - keep)
+
+    # ============== 简化 ==============
+
+    def simplify(self, points: StrokePoints) -> StrokePoints:
+        """
+        简化笔画点（首尾点始终保留）
+
+        Args:
+            points: 原始笔画点
+
+        Returns:
+            简化后的笔画点
+        """
+        if len(points) <= 2 or (self.tolerance <= 0 and self.pressure_tolerance <= 0):
+            return points
+        indices = self.simplify_indices(points.xs, points.ys, points.pressures)
+        if len(indices) == len(points):
+            return points
+        return points.select(indices)
+
+    def simplify_indices(
+        self, xs: Sequence[float], ys: Sequence[float], pressures: Sequence[float]
+    ) -> List[int]:
+        """
+        计算简化后保留的点下标
+
+        Returns:
+            保留的点下标（升序）
+        """
+        if len(xs) <= 2:
+            return list(range(len(xs)))
+        if self.method == METHOD_VISVALINGAM:
+            return self._visvalingam(xs, ys, pressures)
+        return self._rdp(xs, ys, pressures)
+
+    def _span_error(self, xs, ys, pressures, start: int, end: int) -> Tuple[float, int]:
+        """
+        计算 start 与 end 之间的点相对线段 start-end 的最大归一化误差
+
+        Returns:
+            (最大误差, 对应下标)，误差不大于1表示在容差内
+        """
+        x0, y0, p0 = xs[start], ys[start], pressures[start]
+        dx = xs[end] - x0
+        dy = ys[end] - y0
+        dp = pressures[end] - p0
+        length_sq = dx * dx + dy * dy
+        tol_sq = max(self.tolerance * self.tolerance, _EPSILON)
+        ptol_sq = max(self.pressure_tolerance * self.pressure_tolerance, _EPSILON)
+
+        worst = 0.0
+        worst_index = start
+        for i in range(start + 1, end):
+            px = xs[i] - x0
+            py = ys[i] - y0
+            t = 0.0
+            if length_sq > 0:
+                t = (px * dx + py * dy) / length_sq
+                t = 0.0 if t < 0 else 1.0 if t > 1 else t
+            ex = px - t * dx
+            ey = py - t * dy
+            ep = pressures[i] - (p0 + t * dp)
+            error = max((ex * ex + ey * ey) / tol_sq, ep * ep / ptol_sq)
+            if error > worst:
+                worst = error
+                worst_index = i
+        return worst, worst_index
+
+    def _rdp(self, xs, ys, pressures) -> List[int]:
+        """Ramer–Douglas–Peucker（迭代实现，避免长笔画递归过深）"""
+        last = len(xs) - 1
+        keep = [False] * len(xs)
+        keep[0] = keep[last] = True
+        stack = [(0, last)]
+        while stack:
+            start, end = stack.pop()
+            if end - start < 2:
+                continue
+            error, index = self._span_error(xs, ys, pressures, start, end)
+            if error > 1.0:
+                keep[index] = True
+                stack.append((start, index))
+                stack.append((index, end))
+        return [i for i, kept in enumerate(keep) if kept]
+
+    def _visvalingam(self, xs, ys, pressures) -> List[int]:
+        """
+        Visvalingam–Whyatt：按三角形面积从小到大删除点
+
+        删除前检查原始点到新线段的误差，超出容差的点暂时保留，
+        相邻点被删除后重新计算面积再尝试。
+        """
+        count = len(xs)
+        prev = list(range(-1, count - 1))
+        nxt = list(range(1, count + 1))
+        removed = [False] * count
+        version = [0] * count
+
+        def area(i: int) -> float:
+            a, c = prev[i], nxt[i]
+            return abs(
+                (xs[a] - xs[i]) * (ys[c] - ys[i]) - (xs[c] - xs[i]) * (ys[a] - ys[i])
+            ) / 2
+
+        heap = [(area(i), i, 0) for i in range(1, count - 1)]
+        heapq.heapify(heap)
+        while heap:
+            _, i, seen = heapq.heappop(heap)
+            if removed[i] or seen != version[i]:
+                continue
+            error, _ = self._span_error(xs, ys, pressures, prev[i], nxt[i])
+            if error > 1.0:
+                continue
+            removed[i] = True
+            a, c = prev[i], nxt[i]
+            nxt[a] = c
+            prev[c] = a
+            for j in (a, c):
+                if 0 < j < count - 1:
+                    version[j] += 1
+                    heapq.heappush(heap, (area(j), j, version[j]))
+        return [i for i in range(count) if not removed[i]]
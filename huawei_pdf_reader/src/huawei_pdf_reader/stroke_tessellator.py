@@ -0,0 +1,299 @@
+"""
+华为平板PDF阅读器 - 笔画网格化
+
+把笔画的点、压力和笔类型转换为变宽的三角形带（triangle strip）网格：
+每个点沿法线向两侧各偏移半个笔迹宽度，宽度随压力和笔类型变化，
+拐角处按斜接长度修正（限制最大倍数），首尾按笔类型延伸端帽。
+
+网格使用页面逻辑坐标，与显示缩放无关；每条完成的笔画只计算一次，
+缓存在笔画对象上，重绘和缩放时直接复用。
+安装了 NumPy 时长笔画一次性向量化计算，否则使用纯 Python 实现。
+"""
+
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from huawei_pdf_reader.models import PenType, Stroke
+
+
+# 是否可以使用向量化实现
+HAS_NUMPY = np is not None
+
+# 点数少于此值时纯 Python 更快（省去构建数组的开销）
+VECTORIZE_MIN_POINTS = 64
+
+# 每个顶点的浮点数：x, y, u（沿笔画的弧长比例）, v（0 为左侧, 1 为右侧）
+VERTEX_SIZE = 4
+
+# 单个 Kivy Mesh 的顶点数上限（索引为 uint16），取偶数以保持三角形带的朝向
+MAX_MESH_VERTICES = 65534
+
+# 斜接长度最多为半宽的倍数，避免急转弯处出现尖刺
+MITER_LIMIT = 2.0
+
+
+@dataclass(frozen=True)
+class PenStyle:
+    """笔类型的渲染参数"""
+    # 压力为 0 和 1 时的宽度倍数（相对笔画基础宽度）
+    min_width: float
+    max_width: float
+    # 压力响应曲线指数（<1 轻压即变粗，>1 需重压）
+    pressure_gamma: float = 1.0
+    # 不透明度
+    opacity: float = 1.0
+    # 首尾端帽延伸长度（相对半宽），0 为平头
+    cap: float = 0.5
+
+    def width_multiplier(self, pressure: float) -> float:
+        """压力对应的宽度倍数"""
+        pressure = max(0.0, min(1.0, pressure))
+        return self.min_width + (self.max_width - self.min_width) * pressure ** self.pressure_gamma
+
+
+# 各笔类型的渲染参数
+PEN_STYLES: Dict[PenType, PenStyle] = {
+    PenType.BALLPOINT: PenStyle(min_width=0.85, max_width=1.15, cap=1.0),
+    # 与 AnnotationEngine.calculate_stroke_width 的压感范围一致
+    PenType.FOUNTAIN: PenStyle(min_width=0.5, max_width=1.5),
+    PenType.PENCIL: PenStyle(min_width=0.6, max_width=1.2, pressure_gamma=0.8, opacity=0.75),
+    PenType.HIGHLIGHTER: PenStyle(min_width=1.0, max_width=1.0, opacity=0.35, cap=0.0),
+    PenType.MARKER: PenStyle(min_width=0.9, max_width=1.3, opacity=0.9, cap=0.0),
+}
+
+
+def pen_style(pen_type: PenType) -> PenStyle:
+    """获取笔类型的渲染参数"""
+    return PEN_STYLES.get(pen_type, PEN_STYLES[PenType.BALLPOINT])
+
+
+@dataclass
+class StrokeMesh:
+    """笔画的三角形带网格"""
+    # 顶点数据，每个顶点 VERTEX_SIZE 个 float32
+    vertices: array
+    # 不透明度（由笔类型决定）
+    opacity: float = 1.0
+
+    @property
+    def vertex_count(self) -> int:
+        return len(self.vertices) // VERTEX_SIZE
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.vertices) * self.vertices.itemsize
+
+    def chunks(self, max_vertices: int = MAX_MESH_VERTICES) -> Iterator[Tuple[array, List[int]]]:
+        """
+        按单个 Mesh 的顶点上限分段
+
+        相邻分段重叠两个顶点，拼接后的三角形带与完整网格相同。
+
+        Yields:
+            (顶点数据, 索引)
+        """
+        max_vertices = max(4, max_vertices - max_vertices % 2)
+        count = self.vertex_count
+        start = 0
+        while True:
+            end = min(count, start + max_vertices)
+            yield (
+                self.vertices[start * VERTEX_SIZE:end * VERTEX_SIZE],
+                list(range(end - start)),
+            )
+            if end >= count:
+                return
+            start = end - 2
+
+
+def stroke_mesh(stroke: Stroke, pressure_sensitive: bool = True) -> StrokeMesh:
+    """
+    获取笔画的网格（缓存在笔画对象上）
+
+    笔类型、宽度、点数或压感设置变化时重新计算；原地修改笔画点后
+    应清除 stroke.render_cache（AnnotationEngine.mark_stroke_dirty 会清除）。
+
+    Args:
+        stroke: 笔画
+        pressure_sensitive: 是否按压力改变宽度
+
+    Returns:
+        笔画网格
+    """
+    key = (pressure_sensitive, stroke.pen_type, stroke.width, len(stroke.points))
+    cached = stroke.render_cache
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    mesh = tessellate_stroke(stroke, pressure_sensitive)
+    stroke.render_cache = (key, mesh)
+    return mesh
+
+
+def tessellate_stroke(
+    stroke: Stroke,
+    pressure_sensitive: bool = True,
+    vectorize: Optional[bool] = None,
+) -> StrokeMesh:
+    """
+    将笔画转换为变宽的三角形带网格
+
+    Args:
+        stroke: 笔画
+        pressure_sensitive: 是否按压力改变宽度（关闭时使用基础宽度）
+        vectorize: 是否使用 NumPy，为None时按点数自动选择
+
+    Returns:
+        笔画网格（没有点时顶点为空）
+    """
+    style = pen_style(stroke.pen_type)
+    count = len(stroke.points)
+    if vectorize is None:
+        vectorize = HAS_NUMPY and count >= VECTORIZE_MIN_POINTS
+    elif vectorize and not HAS_NUMPY:
+        raise RuntimeError("NumPy is not installed")
+
+    if count == 0:
+        vertices = array("f")
+    elif vectorize:
+        vertices = _tessellate_vectorized(stroke, style, pressure_sensitive)
+    else:
+        vertices = _tessellate(stroke, style, pressure_sensitive)
+    return StrokeMesh(vertices=vertices, opacity=style.opacity)
+
+
+def _dot_quad(x: float, y: float, half: float) -> array:
+    """单点笔画：以该点为中心的正方形"""
+    return array("f", (
+        x - half, y - half, 0.0, 0.0,
+        x + half, y - half, 0.0, 1.0,
+        x - half, y + half, 1.0, 0.0,
+        x + half, y + half, 1.0, 1.0,
+    ))
+
+
+# ============== 纯 Python 实现 ==============
+
+def _tessellate(stroke: Stroke, style: PenStyle, pressure_sensitive: bool) -> array:
+    points = stroke.points
+    xs, ys, pressures = points.xs, points.ys, points.pressures
+
+    # 去掉与前一点重合的点（零长度线段没有方向）
+    px, py, half = [xs[0]], [ys[0]], [pressures[0]]
+    for i in range(1, len(xs)):
+        if xs[i] != xs[i - 1] or ys[i] != ys[i - 1]:
+            px.append(xs[i])
+            py.append(ys[i])
+            half.append(pressures[i])
+    for i, pressure in enumerate(half):
+        multiplier = style.width_multiplier(pressure) if pressure_sensitive else 1.0
+        half[i] = stroke.width * multiplier / 2
+
+    n = len(px)
+    if n == 1:
+        return _dot_quad(px[0], py[0], half[0])
+
+    # 线段单位方向和累计弧长
+    ux, uy, arc = [], [], [0.0]
+    for j in range(n - 1):
+        dx = px[j + 1] - px[j]
+        dy = py[j + 1] - py[j]
+        length = math.hypot(dx, dy)
+        ux.append(dx / length)
+        uy.append(dy / length)
+        arc.append(arc[-1] + length)
+    total = arc[-1]
+
+    vertices = array("f")
+    for i in range(n):
+        # 顶点法线为相邻线段法线的平分线，按斜接长度放大
+        seg = min(i, n - 2)
+        mx, my = -uy[seg], ux[seg]
+        nx, ny, scale = mx, my, 1.0
+        if 0 < i < n - 1:
+            sx, sy = mx - uy[i - 1], my + ux[i - 1]
+            norm = math.hypot(sx, sy)
+            if norm > 1e-9:
+                nx, ny = sx / norm, sy / norm
+                scale = 1.0 / max(nx * mx + ny * my, 1.0 / MITER_LIMIT)
+        offset = half[i] * scale
+        x, y = px[i], py[i]
+        # 首尾端帽沿线段方向延伸
+        if i == 0:
+            x -= ux[0] * half[0] * style.cap
+            y -= uy[0] * half[0] * style.cap
+        elif i == n - 1:
+            x += ux[-1] * half[i] * style.cap
+            y += uy[-1] * half[i] * style.cap
+        u = arc[i] / total
+        vertices.extend((
+            x + nx * offset, y + ny * offset, u, 0.0,
+            x - nx * offset, y - ny * offset, u, 1.0,
+        ))
+    return vertices
+
+
+# ============== NumPy 实现 ==============
+
+def _tessellate_vectorized(stroke: Stroke, style: PenStyle, pressure_sensitive: bool) -> array:
+    points = stroke.points
+    # 列式存储的坐标直接通过缓冲区协议转换，不逐点构造对象
+    xy = np.empty((len(points), 2), dtype=np.float64)
+    xy[:, 0] = np.frombuffer(points.xs, dtype=points.xs.typecode)
+    xy[:, 1] = np.frombuffer(points.ys, dtype=points.ys.typecode)
+    pressure = np.frombuffer(points.pressures, dtype=points.pressures.typecode).astype(np.float64)
+
+    keep = np.ones(len(xy), dtype=bool)
+    keep[1:] = (xy[1:] != xy[:-1]).any(axis=1)
+    xy = xy[keep]
+    pressure = pressure[keep]
+    if pressure_sensitive:
+        p = np.clip(pressure, 0.0, 1.0) ** style.pressure_gamma
+        half = stroke.width * (style.min_width + (style.max_width - style.min_width) * p) / 2
+    else:
+        half = np.full(len(xy), stroke.width / 2)
+
+    n = len(xy)
+    if n == 1:
+        return _dot_quad(xy[0, 0], xy[0, 1], half[0])
+
+    delta = xy[1:] - xy[:-1]
+    length = np.hypot(delta[:, 0], delta[:, 1])
+    unit = delta / length[:, None]
+    seg_normal = np.column_stack((-unit[:, 1], unit[:, 0]))
+    arc = np.concatenate(([0.0], np.cumsum(length)))
+
+    # 每个顶点取其后一条线段的法线（最后一点取最后一条线段）
+    seg = np.minimum(np.arange(n), n - 2)
+    normal = seg_normal[seg].copy()
+    scale = np.ones(n)
+    if n > 2:
+        bisector = seg_normal[1:] + seg_normal[:-1]
+        norm = np.hypot(bisector[:, 0], bisector[:, 1])
+        valid = norm > 1e-9
+        inner = np.flatnonzero(valid) + 1
+        bisector = bisector[valid] / norm[valid, None]
+        normal[inner] = bisector
+        cos = (bisector * seg_normal[inner]).sum(axis=1)
+        scale[inner] = 1.0 / np.maximum(cos, 1.0 / MITER_LIMIT)
+
+    offset = normal * (half * scale)[:, None]
+    center = xy.copy()
+    center[0] -= unit[0] * half[0] * style.cap
+    center[-1] += unit[-1] * half[-1] * style.cap
+
+    out = np.empty((n, 2, VERTEX_SIZE), dtype=np.float32)
+    out[:, 0, :2] = center + offset
+    out[:, 1, :2] = center - offset
+    out[:, :, 2] = (arc / arc[-1])[:, None]
+    out[:, 0, 3] = 0.0
+    out[:, 1, 3] = 1.0
+    vertices = array("f")
+    vertices.frombytes(out.tobytes())
+    return vertices
@@ -23,6 +23,7 @@ from kivy.core.window import Window
 from pathlib import Path
 from typing import Optional, Callable, List, TYPE_CHECKING
 
+from huawei_pdf_reader.async_database import run_on_main
 from huawei_pdf_reader.ui.theme import Theme, DARK_GREEN_THEME, get_theme
 from huawei_pdf_reader.ui.reader_view import ReaderView
 from huawei_pdf_reader.ui.file_manager_view import FileManagerView
@@ -307,6 +308,9 @@ class MainWindow(BoxLayout):
             file_manager=file_manager,
             on_back=self._on_reader_back
         )
+        if self.application:
+            self._reader_view.set_latency_monitor(self.application.get_ink_latency_monitor())
+            self._reader_view.set_async_database(self.application.get_async_database())
         self.content.add_widget(self._reader_view)
         
         # 设置视图
@@ -338,18 +342,50 @@ class MainWindow(BoxLayout):
         self._load_documents()
     
     def _load_documents(self):
-        """加载文档列表"""
+        """在读线程池加载文档列表和标签，完成后在主线程更新视图"""
         if self.application and self._file_manager_view:
-            try:
-                file_manager = self.application.get_file_manager()
-                documents = file_manager.get_documents()
-                self._file_manager_view.documents = documents
-                
-                # 加载标签
-                tags = file_manager.get_all_tags()
-                self._file_manager_view.tags = tags
-            except Exception as e:
-                print(f"加载文档列表失败: {e}")
+            file_manager = self.application.get_file_manager()
+            async_db = self.application.get_async_database()
+            run_on_main(
+                async_db.read(file_manager.get_documents),
+                lambda documents: setattr(self._file_manager_view, 'documents', documents),
+                lambda e: print(f"加载文档列表失败: {e}"),
+            )
+            
+            # 加载标签
+            run_on_main(
+                async_db.read(file_manager.get_all_tags),
+                lambda tags: setattr(self._file_manager_view, 'tags', tags),
+                lambda e: print(f"加载标签失败: {e}"),
+            )
+    
+    def import_document(self, file_path, folder_id: Optional[str] = None,
+                        on_imported: Optional[Callable[[DocumentEntry], None]] = None):
+        """
+        在写线程导入文档（生成缩略图并写入文档库），完成后刷新文档列表
+        
+        Args:
+            file_path: 文档路径
+            folder_id: 目标文件夹ID
+            on_imported: 导入成功后在主线程调用，参数为文档条目
+            
+        Returns:
+            导入结果的 Future；未关联 Application 时返回None
+        """
+        if not self.application:
+            return None
+        file_manager = self.application.get_file_manager()
+        future = self.application.get_async_database().write(
+            file_manager.import_document, Path(file_path), folder_id
+        )
+        
+        def on_done(document: DocumentEntry):
+            self._load_documents()
+            if on_imported:
+                on_imported(document)
+        
+        run_on_main(future, on_done, lambda e: print(f"导入文档失败: {e}"))
+        return future
     
     def _on_document_open(self, document: DocumentEntry):
         """处理文档打开事件"""
@@ -423,6 +459,13 @@ class MainWindow(BoxLayout):
             palm_rejection = self.application.get_palm_rejection()
             if palm_rejection:
                 palm_rejection.set_sensitivity(settings.stylus.palm_rejection_sensitivity)
+        
+        # 更新笔画简化设置
+        if self.application:
+            from huawei_pdf_reader.stroke_simplifier import StrokeSimplifier
+            annotation_engine = self.application.get_annotation_engine()
+            if annotation_engine:
+                annotation_engine.set_simplifier(StrokeSimplifier.from_config(settings.tools))
 
 
 class PDFReaderApp(App):
@@ -491,6 +534,7 @@ class PDFReaderApp(App):
         # 保存设置
         if self.application:
             self.application.save_settings()
+            self.application.flush_settings()
     
     # ============== 服务访问器 ==============
     
@@ -19,7 +19,7 @@ from kivy.uix.slider import Slider
 from kivy.uix.popup import Popup
 from kivy.uix.screenmanager import Screen
 from kivy.uix.widget import Widget
-from kivy.graphics import Color, Rectangle, Line, RoundedRectangle
+from kivy.graphics import Color, Rectangle, Line, RoundedRectangle, InstructionGroup
 from kivy.graphics.texture import Texture
 from kivy.properties import (
     ObjectProperty, StringProperty, BooleanProperty,
@@ -27,11 +27,18 @@ from kivy.properties import (
 )
 from kivy.clock import Clock
 from kivy.core.window import Window
+import time
 from typing import Optional, Callable, List, Tuple, TYPE_CHECKING
 from io import BytesIO
 from pathlib import Path
 
+from huawei_pdf_reader.annotation_exporter import (
+    AnnotationExportJob, ExportCancelledError, ExportOptions,
+)
+from huawei_pdf_reader.async_database import run_on_main
+from huawei_pdf_reader.palm_rejection import ContactState, PalmTracker
 from huawei_pdf_reader.ui.theme import Theme, DARK_GREEN_THEME
+from huawei_pdf_reader.ui.stroke_layer import StrokeLayer
 from huawei_pdf_reader.models import (
     DocumentInfo, PageInfo, PenType, Stroke, StrokePoint, Annotation
 )
@@ -241,6 +248,8 @@ class MoreActionsMenu(Popup):
             ("导出文档", "export_doc", "📤"),
             ("导出为图片", "export_image", "🖼️"),
             ("放大镜", "magnifier", "🔎"),
+            ("撤销", "undo", "↩️"),
+            ("重做", "redo", "↪️"),
         ]
         
         for text, action, icon in actions:
@@ -366,15 +375,42 @@ class DocumentCanvas(RelativeLayout):
     eraser_active = BooleanProperty(False)
     eraser_size = NumericProperty(20.0)
     
+    # 落笔状态下停顿多久（秒）开始推测识别形状
+    SHAPE_SPECULATION_PAUSE = 0.25
+    
     def __init__(self, theme: Theme = DARK_GREEN_THEME, 
                  annotation_engine=None, palm_rejection=None, **kwargs):
         super().__init__(**kwargs)
         self._theme = theme
         self._annotation_engine = annotation_engine
         self._palm_rejection = palm_rejection
+        # 按触摸ID跟踪触点，后来判定为手掌的触点撤销已绘制的笔画
+        self._palm_tracker = PalmTracker(palm_rejection) if palm_rejection else None
         self._strokes: List[Stroke] = []
-        self._current_points: List[Tuple[float, float]] = []
         self._current_stroke_id: Optional[str] = None
+        # 本帧尚未提交的笔迹采样（x, y, 压力, 时间戳 各一列），每帧合并提交一次
+        self._pending_xs: List[float] = []
+        self._pending_ys: List[float] = []
+        self._pending_pressures: List[float] = []
+        self._pending_times: List[float] = []
+        self._flush_trigger = Clock.create_trigger(self._flush_samples)
+        # 书写停顿后在后台推测识别形状（每次新采样重新计时）
+        self._speculate_trigger = Clock.create_trigger(
+            self._speculate_shape, self.SHAPE_SPECULATION_PAUSE
+        )
+        # 进行中笔画的实时线条（整条笔画一个 Line，逐帧追加点）
+        self._live_line: Optional[Line] = None
+        # 进行中笔画最近一次推测识别（有新采样后作废）
+        self._speculation = None
+        # 笔迹延迟统计和调试浮层
+        self._latency_monitor = None
+        self._counted_instructions = 0
+        self._latency_overlay: Optional[Label] = None
+        self._latency_overlay_event = None
+        # 橡皮擦上一次的位置，拖动时擦除两次事件之间扫过的路径
+        self._last_erase_pos: Optional[Tuple[float, float]] = None
+        # 注释栅格化使用的显示缩放倍数
+        self._ink_scale = 1.0
         self._setup_ui()
     
     def set_annotation_engine(self, engine):
@@ -384,6 +420,62 @@ class DocumentCanvas(RelativeLayout):
     def set_palm_rejection(self, palm_rejection):
         """设置防误触系统"""
         self._palm_rejection = palm_rejection
+        self._palm_tracker = PalmTracker(palm_rejection) if palm_rejection else None
+    
+    def set_latency_monitor(self, monitor):
+        """
+        设置笔迹延迟统计器（None表示不统计）
+        
+        启用时记录实时线条指令更新和帧提交的时间，以及每帧更新的指令数。
+        """
+        if self._latency_monitor is not None:
+            Window.unbind(on_flip=self._on_frame_presented)
+        self._latency_monitor = monitor
+        self._counted_instructions = self._stroke_layer.instructions_built
+        if monitor is not None:
+            Window.bind(on_flip=self._on_frame_presented)
+        elif self._latency_overlay is not None:
+            self.show_latency_overlay(False)
+    
+    def show_latency_overlay(self, visible: bool = True):
+        """显示或隐藏延迟统计调试浮层（需先设置统计器）"""
+        if visible and self._latency_monitor is not None:
+            if self._latency_overlay is None:
+                self._latency_overlay = Label(
+                    font_size='11sp',
+                    color=(1, 0, 0, 1),
+                    halign='left',
+                    valign='top',
+                    size_hint=(None, None),
+                )
+                self._latency_overlay.bind(texture_size=self._latency_overlay.setter('size'))
+                self.add_widget(self._latency_overlay)
+                self._latency_overlay_event = Clock.schedule_interval(
+                    self._update_latency_overlay, 0.5
+                )
+        elif self._latency_overlay is not None:
+            self._latency_overlay_event.cancel()
+            self.remove_widget(self._latency_overlay)
+            self._latency_overlay = None
+            self._latency_overlay_event = None
+    
+    def _update_latency_overlay(self, *args):
+        overlay = self._latency_overlay
+        if overlay is None or self._latency_monitor is None:
+            return
+        overlay.text = "\n".join(self._latency_monitor.summary_lines()) or "no ink samples"
+        overlay.pos = (4, self.height - overlay.height - 4)
+    
+    def _on_frame_presented(self, *args):
+        """窗口提交一帧后记录上屏延迟和本帧的指令数"""
+        monitor = self._latency_monitor
+        if monitor is None:
+            return
+        built = self._stroke_layer.instructions_built
+        if built != self._counted_instructions:
+            monitor.count_instructions(built - self._counted_instructions)
+            self._counted_instructions = built
+        monitor.frame_presented()
     
     def _setup_ui(self):
         # 背景
@@ -398,11 +490,38 @@ class DocumentCanvas(RelativeLayout):
             keep_ratio=True
         )
         self.add_widget(self._page_widget)
+        
+        # 注释图层（已完成的笔画按页栅格化），以及以矢量绘制的进行中笔画
+        self._stroke_layer = StrokeLayer(self.canvas)
+        self._stroke_layer.set_viewport(self.size, self._ink_scale)
+        self._live_group = InstructionGroup()
+        self.canvas.add(self._live_group)
+        # 落笔停顿时推测识别出的形状预览（半透明，叠加在实时线条上）
+        self._preview_group = InstructionGroup()
+        self.canvas.add(self._preview_group)
+        self.bind(size=self._update_ink_viewport)
     
     def _update_bg(self, *args):
         self._bg.pos = self.pos
         self._bg.size = self.size
     
+    def _update_ink_viewport(self, *args):
+        self._stroke_layer.set_viewport(self.size, self._ink_scale)
+    
+    def set_pressure_sensitivity(self, enabled: bool):
+        """设置已完成笔画的宽度是否随压力变化"""
+        self._stroke_layer.set_pressure_sensitivity(enabled)
+    
+    @property
+    def pressure_sensitive(self) -> bool:
+        """已完成笔画的宽度是否随压力变化"""
+        return self._stroke_layer.pressure_sensitive
+    
+    def set_ink_scale(self, scale: float):
+        """设置显示缩放倍数，注释按对应清晰度栅格化"""
+        self._ink_scale = scale
+        self._update_ink_viewport()
+    
     def set_page_texture(self, texture):
         """设置页面纹理"""
         self._page_widget.texture = texture
@@ -427,61 +546,82 @@ class DocumentCanvas(RelativeLayout):
         return pen_map.get(self.pen_type, PenType.FOUNTAIN)
     
     def draw_stroke(self, stroke: Stroke):
-        """绘制笔画"""
+        """在当前页面最上层绘制笔画"""
         if not stroke.points:
             return
-        
-        from huawei_pdf_reader.ui.theme import hex_to_rgba
-        color = hex_to_rgba(stroke.color)
-        
-        points = []
-        for p in stroke.points:
-            points.extend([p.x, p.y])
-        
-        with self.canvas:
-            Color(*color)
-            Line(points=points, width=stroke.width)
+        if self._stroke_layer.current_page != self.current_page:
+            self.load_page_annotations()
+        self._stroke_layer.add_stroke(self.current_page, stroke)
     
     def clear_annotations(self):
-        """清除所有注释"""
-        self.canvas.clear()
-        self._setup_ui()
+        """清除所有注释（包括缓存的页面指令）"""
+        self._stroke_layer.clear()
+        self._live_group.clear()
     
     def redraw_annotations(self, annotations: List[Annotation]):
-        """重绘所有注释"""
-        self.clear_annotations()
-        for annotation in annotations:
-            for stroke in annotation.strokes:
-                self.draw_stroke(stroke)
+        """
+        显示当前页面的注释
+        
+        已缓存的页面只增删与注释不一致的笔画指令。
+        """
+        strokes = [stroke for annotation in annotations for stroke in annotation.strokes]
+        self._stroke_layer.show_page(self.current_page, strokes)
     
     def load_page_annotations(self):
         """加载当前页面的注释"""
+        annotations = []
         if self._annotation_engine:
             annotations = self._annotation_engine.get_annotations(self.current_page)
-            self.redraw_annotations(annotations)
+        self.redraw_annotations(annotations)
     
     def _should_reject_touch(self, touch) -> bool:
-        """检查是否应该拒绝触摸"""
-        if not self._palm_rejection:
-            return False
+        """
+        记录触点的一个事件，检查是否应该拒绝该触点
         
-        from huawei_pdf_reader.models import TouchEvent, TouchType
+        被拒绝的触点停止跟踪（之后的事件不再由画布处理）。
+        """
+        if not self._palm_tracker:
+            return False
         
-        # 创建TouchEvent
         size = getattr(touch, 'size', (0.1, 0.1))
         if isinstance(size, tuple):
             size = max(size)
         pressure = getattr(touch, 'pressure', 0.5)
         
-        event = TouchEvent(
-            x=touch.x,
-            y=touch.y,
-            size=size,
-            pressure=pressure,
-            touch_type=TouchType.UNKNOWN
-        )
+        state = self._palm_tracker.update(touch.uid, size, pressure, self._touch_time(touch))
+        if state is ContactState.REJECTED:
+            self._palm_tracker.end(touch.uid)
+            return True
+        return False
+    
+    def _retract_touch(self, touch):
+        """
+        接受后又判定为手掌的触点：撤销它的输入并释放触摸
         
-        return self._palm_rejection.should_reject(event)
+        正在绘制的笔画尚未写入页面和撤销历史，直接丢弃；橡皮擦擦掉的笔画
+        恢复到原来的绘制位置，相应的擦除从撤销历史中删除。
+        """
+        touch.ungrab(self)
+        erased = touch.ud.pop('erased', None)
+        if erased is not None:
+            self._last_erase_pos = None
+            page_num, stroke_ids = erased
+            if self._annotation_engine and stroke_ids:
+                restored = self._annotation_engine.revert_erase(page_num, stroke_ids)
+                if restored and page_num == self.current_page:
+                    self.load_page_annotations()
+            return
+        stroke_id = touch.ud.pop('stroke_id', None)
+        if self._annotation_engine and stroke_id:
+            self._annotation_engine.cancel_stroke(stroke_id)
+        if stroke_id == self._current_stroke_id:
+            self._pending_xs, self._pending_ys = [], []
+            self._pending_pressures, self._pending_times = [], []
+            self._speculate_trigger.cancel()
+            self._clear_shape_preview()
+            self._current_stroke_id = None
+            self._live_group.clear()
+            self._live_line = None
     
     def on_touch_down(self, touch):
         if not self.drawing_enabled:
@@ -496,10 +636,17 @@ class DocumentCanvas(RelativeLayout):
             
             if self.eraser_active:
                 # 橡皮擦模式
-                self._erase_at(touch.x, touch.y)
+                self._last_erase_pos = None
+                # 记录该触点擦除的笔画，事后判定为手掌时恢复
+                touch.ud['erased'] = (self.current_page, [])
+                self._erase_at(touch.x, touch.y, touch)
             else:
                 # 绘制模式
-                self._current_points = [(touch.x, touch.y)]
+                from huawei_pdf_reader.ui.theme import hex_to_rgba
+                self._live_group.clear()
+                self._live_group.add(Color(*hex_to_rgba(self.pen_color)))
+                self._live_line = Line(points=[], width=self.pen_width)
+                self._live_group.add(self._live_line)
                 
                 # 使用注释引擎开始笔画
                 if self._annotation_engine:
@@ -507,79 +654,184 @@ class DocumentCanvas(RelativeLayout):
                     self._current_stroke_id = self._annotation_engine.start_stroke(
                         pen_type, self.pen_color, self.pen_width
                     )
-                    # 获取压力值（如果有）
-                    pressure = getattr(touch, 'pressure', 0.5)
-                    self._annotation_engine.add_point(
-                        self._current_stroke_id, touch.x, touch.y, pressure
-                    )
+                    touch.ud['stroke_id'] = self._current_stroke_id
+                self._queue_sample(touch)
             return True
         return super().on_touch_down(touch)
     
     def on_touch_move(self, touch):
         if touch.grab_current is self:
+            if self._should_reject_touch(touch):
+                # 落下时面积较小、之后才判定为手掌的触点
+                self._retract_touch(touch)
+                return True
             if self.eraser_active:
                 # 橡皮擦模式
-                self._erase_at(touch.x, touch.y)
+                self._erase_at(touch.x, touch.y, touch)
             else:
-                # 绘制模式
-                self._current_points.append((touch.x, touch.y))
-                
-                # 添加点到注释引擎
-                if self._annotation_engine and self._current_stroke_id:
-                    pressure = getattr(touch, 'pressure', 0.5)
-                    self._annotation_engine.add_point(
-                        self._current_stroke_id, touch.x, touch.y, pressure
-                    )
-                
-                # 实时绘制
-                if len(self._current_points) >= 2:
-                    from huawei_pdf_reader.ui.theme import hex_to_rgba
-                    color = hex_to_rgba(self.pen_color)
-                    with self.canvas:
-                        Color(*color)
-                        Line(
-                            points=[
-                                self._current_points[-2][0], self._current_points[-2][1],
-                                self._current_points[-1][0], self._current_points[-1][1]
-                            ],
-                            width=self.pen_width
-                        )
+                # 绘制模式：采样先缓存，下一帧前合并提交
+                self._queue_sample(touch)
             return True
         return super().on_touch_move(touch)
     
     def on_touch_up(self, touch):
         if touch.grab_current is self:
             touch.ungrab(self)
+            if self._palm_tracker:
+                self._palm_tracker.end(touch.uid)
+            # 提交本帧剩余的采样
+            self._flush_samples()
+            self._speculate_trigger.cancel()
+            self._clear_shape_preview()
             
             if not self.eraser_active and self._annotation_engine and self._current_stroke_id:
-                # 结束笔画
-                stroke = self._annotation_engine.end_stroke(self._current_stroke_id)
+                engine = self._annotation_engine
+                # 结束笔画；形状识别使用原始点的快照在后台进行（停顿时已推测识别且之后
+                # 没有新增点时直接复用结果），不阻塞抬笔
+                stroke = engine.end_stroke(self._current_stroke_id, simplify=False)
+                recognition = engine.recognize_shape_async(stroke)
+                engine.simplify_stroke(stroke)
                 
-                # 尝试形状识别
-                recognized = self._annotation_engine.shape_recognition(stroke)
-                if recognized:
-                    stroke = recognized
-                    # 重绘识别后的形状
-                    self.draw_stroke(stroke)
-                
-                # 添加到页面注释
-                self._annotation_engine.add_stroke_to_page(self.current_page, stroke)
+                # 先以手绘笔画添加到页面注释，替换实时绘制的线条
+                page_num = self.current_page
+                engine.add_stroke_to_page(page_num, stroke)
+                self.draw_stroke(stroke)
+                run_on_main(
+                    recognition,
+                    lambda shape: self._apply_recognized_shape(page_num, stroke, shape),
+                )
                 
                 self._current_stroke_id = None
             
-            self._current_points = []
+            self._live_group.clear()
+            self._live_line = None
+            self._last_erase_pos = None
             return True
         return super().on_touch_up(touch)
     
-    def _erase_at(self, x: float, y: float):
-        """在指定位置擦除"""
+    def _queue_sample(self, touch):
+        """缓存一个笔迹采样，并安排在下一帧前提交"""
+        self._pending_xs.append(touch.x)
+        self._pending_ys.append(touch.y)
+        self._pending_pressures.append(getattr(touch, 'pressure', 0.5))
+        self._pending_times.append(self._touch_time(touch))
+        self._flush_trigger()
+    
+    @staticmethod
+    def _touch_time(touch) -> float:
+        """触摸事件的时间戳（秒，与 time.time() 同源）"""
+        return getattr(touch, 'time_update', None) or time.time()
+    
+    def _flush_samples(self, *args):
+        """
+        将缓存的采样整批写入注释引擎并追加到实时线条
+        
+        高采样率手写笔每帧会产生多个移动事件，逐帧合并后每帧只调用一次
+        add_points，并原地延长同一条 Line，而不是每段新建一条线。
+        """
+        if not self._pending_xs:
+            return
+        xs, ys = self._pending_xs, self._pending_ys
+        pressures, times = self._pending_pressures, self._pending_times
+        self._pending_xs, self._pending_ys = [], []
+        self._pending_pressures, self._pending_times = [], []
+        
+        if self._annotation_engine and self._current_stroke_id:
+            self._annotation_engine.add_points(
+                self._current_stroke_id, xs, ys, pressures, times
+            )
+            self._speculate_trigger.cancel()
+            self._speculate_trigger()
+            self._clear_shape_preview()
+        if self._live_line is not None:
+            points = [0.0] * (len(xs) * 2)
+            points[0::2] = xs
+            points[1::2] = ys
+            self._live_line.points += points
+            if self._latency_monitor is not None:
+                self._latency_monitor.mark_instructions(times)
+    
+    def _speculate_shape(self, *args):
+        """落笔停顿时在后台推测识别正在绘制的笔画，识别出形状时显示预览"""
+        if self._annotation_engine and self._current_stroke_id:
+            speculation = self._annotation_engine.speculate_shape(self._current_stroke_id)
+            self._speculation = speculation
+            if speculation is not None:
+                run_on_main(
+                    speculation,
+                    lambda shape: self._show_shape_preview(speculation, shape),
+                )
+    
+    def _show_shape_preview(self, speculation, shape: Optional[Stroke]):
+        """
+        笔仍未抬起时显示推测识别的形状
+        
+        推测之后又有新采样或笔画已结束时忽略（预览已过期）。
+        """
+        if shape is None or speculation is not self._speculation:
+            return
+        from huawei_pdf_reader.ui.theme import hex_to_rgba
+        r, g, b, a = hex_to_rgba(shape.color)
+        points = [0.0] * (len(shape.points) * 2)
+        points[0::2] = shape.points.xs
+        points[1::2] = shape.points.ys
+        self._preview_group.clear()
+        self._preview_group.add(Color(r, g, b, a * 0.5))
+        self._preview_group.add(Line(points=points, width=shape.width))
+    
+    def _clear_shape_preview(self):
+        """作废推测识别并移除形状预览"""
+        self._speculation = None
+        self._preview_group.clear()
+    
+    def _apply_recognized_shape(self, page_num: int, stroke: Stroke, shape: Optional[Stroke]):
+        """
+        后台识别完成后在UI线程上用形状替换手绘笔画
+        
+        替换记录进撤销历史（撤销时恢复手绘笔画）；识别期间笔画已被擦除或撤销时忽略。
+        """
+        if shape is None or not self._annotation_engine:
+            return
+        if self._annotation_engine.apply_recognized_shape(page_num, stroke, shape):
+            if page_num == self.current_page:
+                self.load_page_annotations()
+    
+    def _erase_at(self, x: float, y: float, touch=None):
+        """擦除从上一位置到指定位置扫过的笔画（记录到触点的擦除列表）"""
         if self._annotation_engine:
-            erased = self._annotation_engine.erase_at(
-                self.current_page, x, y, self.eraser_size
+            path = [(x, y)] if self._last_erase_pos is None else [self._last_erase_pos, (x, y)]
+            self._last_erase_pos = (x, y)
+            erased = self._annotation_engine.erase_along(
+                self.current_page, path, self.eraser_size
             )
             if erased:
-                # 重绘页面注释
-                self.load_page_annotations()
+                if touch is not None and 'erased' in touch.ud:
+                    touch.ud['erased'][1].extend(erased)
+                # 只删除被擦除笔画的绘制指令
+                self._stroke_layer.remove_strokes(self.current_page, erased)
+    
+    def undo(self) -> bool:
+        """撤销最近一次笔画操作"""
+        if not self._annotation_engine:
+            return False
+        change = self._annotation_engine.undo()
+        if change:
+            self._apply_history_change(change)
+        return change is not None
+    
+    def redo(self) -> bool:
+        """重做最近一次被撤销的笔画操作"""
+        if not self._annotation_engine:
+            return False
+        change = self._annotation_engine.redo()
+        if change:
+            self._apply_history_change(change)
+        return change is not None
+    
+    def _apply_history_change(self, change):
+        """按撤销/重做的变化更新画布（其他已缓存页面在显示时同步）"""
+        if self.current_page in change.pages:
+            self.load_page_annotations()
 
 
 class ReaderView(Screen):
@@ -613,8 +865,15 @@ class ReaderView(Screen):
         self._palm_rejection = palm_rejection
         self._magnifier_service = magnifier_service
         self._file_manager = file_manager
+        # 异步数据库门面，设置后注释在写线程保存
+        self._async_database = None
         self._loading = False
         self._doc_id: Optional[str] = None
+        # 进行中的导出任务
+        self._export_job: Optional[AnnotationExportJob] = None
+        # 画布布局时的缩放倍数（画布大小 = 页面大小 × 该倍数，笔画坐标以此为准；
+        # 捏合缩放只缩放 Scatter，不改变画布坐标）
+        self._layout_zoom = 1.0
         self._setup_ui()
     
     def set_annotation_engine(self, engine):
@@ -629,6 +888,12 @@ class ReaderView(Screen):
         if self._canvas:
             self._canvas.set_palm_rejection(palm_rejection)
     
+    def set_latency_monitor(self, monitor, show_overlay: bool = True):
+        """设置笔迹延迟统计器，并按需显示调试浮层"""
+        if self._canvas:
+            self._canvas.set_latency_monitor(monitor)
+            self._canvas.show_latency_overlay(show_overlay and monitor is not None)
+    
     def set_magnifier_service(self, magnifier):
         """设置放大镜服务"""
         self._magnifier_service = magnifier
@@ -637,6 +902,10 @@ class ReaderView(Screen):
         """设置文件管理器（用于书签等功能）"""
         self._file_manager = file_manager
     
+    def set_async_database(self, async_database):
+        """设置异步数据库门面（用于在后台保存注释）"""
+        self._async_database = async_database
+    
     def _setup_ui(self):
         """设置UI"""
         main_layout = FloatLayout()
@@ -795,11 +1064,25 @@ class ReaderView(Screen):
         """加载文档注释"""
         if self._annotation_engine and self._doc_id:
             self._annotation_engine.load_annotations(self._doc_id)
+            # 丢弃上一文档缓存的笔画指令
+            self._canvas.clear_annotations()
     
     def _save_annotations(self):
-        """保存文档注释"""
-        if self._annotation_engine and self._doc_id:
+        """保存文档注释（设置了异步数据库门面时在写线程写入）"""
+        if not (self._annotation_engine and self._doc_id):
+            return
+        if self._async_database is None:
             self._annotation_engine.save_annotations(self._doc_id)
+            return
+        future = self._annotation_engine.save_annotations_async(
+            self._doc_id, self._async_database
+        )
+        if future is not None:
+            run_on_main(
+                future,
+                lambda result: None,
+                lambda error: self._show_error(f"保存注释失败: {error}"),
+            )
     
     def close_document(self):
         """关闭当前文档"""
@@ -831,6 +1114,7 @@ class ReaderView(Screen):
             canvas_width = page_info.width * self.zoom_level
             canvas_height = page_info.height * self.zoom_level
             self._canvas.size = (canvas_width, canvas_height)
+            self._layout_zoom = self.zoom_level
             
             # 更新画布当前页码并加载注释
             self._canvas.current_page = self.current_page
@@ -885,6 +1169,7 @@ class ReaderView(Screen):
     def _on_scale_change(self, instance, value):
         """缩放变化时更新zoom_level"""
         self.zoom_level = value
+        self._canvas.set_ink_scale(value)
     
     def _on_current_page_change(self, instance, value):
         """当前页码变化时重新渲染"""
@@ -972,6 +1257,10 @@ class ReaderView(Screen):
             self._add_bookmark()
         elif action == "export_doc":
             self._export_document()
+        elif action == "undo":
+            self._canvas.undo()
+        elif action == "redo":
+            self._canvas.redo()
     
     def _rotate_current_page(self):
         """
@@ -1276,29 +1565,86 @@ class ReaderView(Screen):
     
     def _export_document(self):
         """
-        导出文档
+        导出文档，注释以路径写入导出的 PDF（与屏幕显示一致）
+        
+        导出在后台工作进程中逐页进行，界面显示进度并可取消。
         
         Requirements: 9.1 - 将文档导出为PDF格式
         """
         if not self._renderer or not self._renderer.is_open:
             return
+        if self._export_job is not None:
+            self._show_info("正在导出，请稍候")
+            return
+        
+        # Word文档使用转换后的PDF作为源文件
+        source = getattr(self._renderer, 'pdf_path', None)
+        if source is None:
+            self._show_error("导出失败: 无法获取文档的PDF文件")
+            return
         
         import tempfile
         output_path = Path(tempfile.gettempdir()) / f"exported_{Path(self.document_path).stem}.pdf"
         
+        strokes_by_page = {}
+        if self._annotation_engine:
+            for page_num, annotations in self._annotation_engine.get_all_annotations().items():
+                strokes_by_page[page_num] = [
+                    stroke for annotation in annotations for stroke in annotation.strokes
+                ]
+        
+        # 进度弹窗
+        from kivy.uix.progressbar import ProgressBar
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        label = Label(text="正在导出...", color=self._theme.text_primary)
+        bar = ProgressBar(max=1, value=0)
+        cancel_btn = Button(text="取消", size_hint_y=None, height=40,
+                            background_color=self._theme.surface)
+        content.add_widget(label)
+        content.add_widget(bar)
+        content.add_widget(cancel_btn)
+        popup = Popup(
+            title="导出",
+            content=content,
+            size_hint=(None, None),
+            size=(400, 200),
+            auto_dismiss=False
+        )
+        
+        def on_progress(done: int, total: int):
+            def update(dt):
+                bar.max = total
+                bar.value = done
+                label.text = f"正在写入注释: {done}/{total} 页"
+            Clock.schedule_once(update, 0)
+        
+        def on_done(path: Path):
+            self._export_job = None
+            popup.dismiss()
+            self._show_info(f"文档已导出到: {path}")
+        
+        def on_error(error: BaseException):
+            self._export_job = None
+            popup.dismiss()
+            if not isinstance(error, ExportCancelledError):
+                self._show_error(f"导出失败: {str(error)}")
+        
         try:
-            # 对于PDF文档，直接复制
-            # 对于Word文档，已经转换为PDF
-            import shutil
-            if self.document_path.lower().endswith('.pdf'):
-                shutil.copy(self.document_path, output_path)
-            else:
-                # Word文档需要导出
-                self._renderer.export_as_pdf(output_path)
-            
-            self._show_info(f"文档已导出到: {output_path}")
+            self._export_job = AnnotationExportJob(
+                source, output_path, strokes_by_page,
+                ExportOptions(
+                    scale=self._layout_zoom,
+                    pressure_sensitive=self._canvas.pressure_sensitive,
+                ),
+                on_progress=on_progress,
+            )
         except Exception as e:
             self._show_error(f"导出失败: {str(e)}")
+            return
+        
+        cancel_btn.bind(on_press=lambda x: self._export_job and self._export_job.cancel())
+        popup.open()
+        run_on_main(self._export_job.future, on_done, on_error)
     
     def _on_back(self):
         """返回"""
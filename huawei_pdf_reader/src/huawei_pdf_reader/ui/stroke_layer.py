@@ -0,0 +1,311 @@
+"""
+华为平板PDF阅读器 - 注释笔画图层
+
+每条笔画的绘制指令保存在独立的 InstructionGroup 中（按笔画ID索引），
+每页的笔画组再放在该页的 InstructionGroup 中。擦除、撤销/重做只增删
+变化的笔画组，翻页时替换整页的指令组，重绘开销与变化的笔画数成正比。
+
+已完成的笔画不直接提交到窗口画布，而是按页栅格化到离屏 Fbo 纹理，
+画布上只绘制该 Fbo 和一个纹理矩形。Fbo 在画布的指令树中，笔画组变化时
+Kivy 在下一帧先重绘 Fbo 再绘制矩形；纹理按页码和缩放档位缓存，
+总大小受内存预算限制。
+
+笔画以变宽三角形带 Mesh 绘制（宽度随压力和笔类型变化），网格由
+stroke_tessellator 计算一次后缓存在笔画上，重建指令和缩放时复用。
+"""
+
+import math
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from kivy.graphics import (
+    ClearBuffers, ClearColor, Color, Fbo, InstructionGroup, Mesh,
+    PopMatrix, PushMatrix, Rectangle, Scale,
+)
+
+from huawei_pdf_reader.models import Stroke
+from huawei_pdf_reader.stroke_tessellator import stroke_mesh
+from huawei_pdf_reader.ui.theme import hex_to_rgba
+
+
+class _PageGroup:
+    """一页的笔画指令"""
+
+    def __init__(self):
+        self.group = InstructionGroup()
+        # 绘制顺序的笔画ID，与 group.children 一一对应
+        self.order: List[str] = []
+        # {stroke_id: (笔画对象, 指令组)}
+        self.strokes: Dict[str, tuple] = {}
+        # 栅格缓存及其 (宽, 高, 缩放档位)
+        self.fbo: Optional[Fbo] = None
+        self.fbo_key: Optional[Tuple[float, float, float]] = None
+        self.fbo_bytes = 0
+
+
+class StrokeLayer:
+    """按笔画缓存绘制指令的注释图层"""
+
+    # 最多缓存指令的页数（含当前页）
+    MAX_CACHED_PAGES = 8
+    # 栅格纹理的内存预算（当前页总是保留）
+    MAX_TEXTURE_BYTES = 64 * 1024 * 1024
+    # 缩放档位：纹理按向上取整到该步长的缩放倍数渲染，避免捏合缩放时反复重建
+    SCALE_STEP = 0.5
+
+    def __init__(self, canvas, max_cached_pages: int = MAX_CACHED_PAGES,
+                 max_texture_bytes: int = MAX_TEXTURE_BYTES,
+                 pressure_sensitive: bool = True):
+        """
+        初始化图层（画布需为局部坐标，如 RelativeLayout 的画布）
+
+        Args:
+            canvas: 承载图层的 Kivy 画布
+            max_cached_pages: 最多缓存指令的页数
+            max_texture_bytes: 栅格纹理的内存预算
+            pressure_sensitive: 笔迹宽度是否随压力变化
+        """
+        self._pressure_sensitive = pressure_sensitive
+        self._root = InstructionGroup()
+        canvas.add(self._root)
+        self._max_cached_pages = max(1, max_cached_pages)
+        self._max_texture_bytes = max_texture_bytes
+        self._texture_bytes = 0
+        self._size: Tuple[float, float] = (0.0, 0.0)
+        self._scale = 1.0
+        self._pages: "OrderedDict[int, _PageGroup]" = OrderedDict()
+        self._current: Optional[int] = None
+        # 累计生成的绘制指令数（用于统计每帧指令数）
+        self.instructions_built = 0
+
+    @property
+    def current_page(self) -> Optional[int]:
+        return self._current
+
+    @property
+    def pressure_sensitive(self) -> bool:
+        """笔迹宽度是否随压力变化"""
+        return self._pressure_sensitive
+
+    @property
+    def texture_bytes(self) -> int:
+        """栅格纹理占用的显存（估算）"""
+        return self._texture_bytes
+
+    def set_viewport(self, size: Tuple[float, float], scale: float = 1.0) -> None:
+        """
+        设置图层大小和显示缩放倍数
+
+        缩放档位或大小变化时丢弃已有纹理，当前页按新档位重新栅格化。
+
+        Args:
+            size: 图层大小（局部坐标）
+            scale: 显示缩放倍数
+        """
+        size = (float(size[0]), float(size[1]))
+        scale = max(self.SCALE_STEP, math.ceil(scale / self.SCALE_STEP) * self.SCALE_STEP)
+        if size == self._size and scale == self._scale:
+            return
+        self._size = size
+        self._scale = scale
+        for page in self._pages.values():
+            self._release(page)
+        if self._current is not None:
+            self._attach(self._pages[self._current])
+
+    def set_pressure_sensitivity(self, enabled: bool) -> None:
+        """设置笔迹宽度是否随压力变化（丢弃已缓存的指令，显示时重建）"""
+        if enabled == self._pressure_sensitive:
+            return
+        self._pressure_sensitive = enabled
+        page_num = self._current
+        if page_num is None:
+            self.clear()
+            return
+        page = self._pages[page_num]
+        strokes = [page.strokes[stroke_id][0] for stroke_id in page.order]
+        self.clear()
+        self.show_page(page_num, strokes)
+
+    def show_page(self, page_num: int, strokes: Sequence[Stroke]) -> None:
+        """
+        显示指定页面的笔画
+
+        页面指令已缓存时只同步与 strokes 不同的笔画。
+
+        Args:
+            page_num: 页码
+            strokes: 页面笔画（按绘制顺序）
+        """
+        page = self._pages.get(page_num)
+        if page is None:
+            page = self._pages[page_num] = _PageGroup()
+        self._pages.move_to_end(page_num)
+        self._sync(page, strokes)
+
+        if self._current != page_num:
+            self._current = page_num
+            self._attach(page)
+        self._evict()
+
+    def add_stroke(self, page_num: int, stroke: Stroke) -> None:
+        """在页面最上层追加一条笔画"""
+        page = self._pages.get(page_num)
+        if page is None:
+            return
+        self._discard(page, stroke.id)
+        group = self._build(stroke, self._pressure_sensitive)
+        self.instructions_built += len(group.children)
+        page.group.add(group)
+        page.order.append(stroke.id)
+        page.strokes[stroke.id] = (stroke, group)
+
+    def remove_strokes(self, page_num: int, stroke_ids: Iterable[str]) -> None:
+        """删除页面上的笔画"""
+        page = self._pages.get(page_num)
+        if page is not None:
+            self._remove(page, stroke_ids)
+
+    def clear(self) -> None:
+        """清空图层"""
+        for page in self._pages.values():
+            self._release(page)
+        self._root.clear()
+        self._pages.clear()
+        self._current = None
+
+    # ============== 栅格缓存 ==============
+
+    def _attach(self, page: _PageGroup) -> None:
+        """在画布上显示页面（图层大小未知时直接提交矢量指令）"""
+        self._root.clear()
+        width, height = self._size
+        if width <= 0 or height <= 0:
+            self._root.add(page.group)
+            return
+        fbo = self._ensure_fbo(page)
+        # Fbo 必须在指令树中，Kivy 才会在笔画组变化后重新渲染纹理
+        self._root.add(fbo)
+        self._root.add(Color(1, 1, 1, 1))
+        self._root.add(Rectangle(texture=fbo.texture, pos=(0, 0), size=self._size))
+
+    def _ensure_fbo(self, page: _PageGroup) -> Fbo:
+        """获取页面纹理，不存在或档位不符时重新栅格化"""
+        key = (*self._size, self._scale)
+        if page.fbo is not None and page.fbo_key == key:
+            return page.fbo
+        self._release(page)
+        # 页面组可能还直接挂在图层上
+        if page.group in self._root.children:
+            self._root.remove(page.group)
+
+        pixel_size = (
+            max(1, int(self._size[0] * self._scale)),
+            max(1, int(self._size[1] * self._scale)),
+        )
+        fbo = Fbo(size=pixel_size)
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            PushMatrix()
+            Scale(self._scale, self._scale, 1)
+        fbo.add(page.group)
+        fbo.add(PopMatrix())
+
+        page.fbo = fbo
+        page.fbo_key = key
+        page.fbo_bytes = pixel_size[0] * pixel_size[1] * 4
+        self._texture_bytes += page.fbo_bytes
+        self._enforce_budget()
+        return fbo
+
+    def _release(self, page: _PageGroup) -> None:
+        """释放页面纹理（保留矢量指令）"""
+        if page.fbo is None:
+            return
+        if page.fbo in self._root.children:
+            self._root.clear()
+        page.fbo.remove(page.group)
+        page.fbo = None
+        page.fbo_key = None
+        self._texture_bytes -= page.fbo_bytes
+        page.fbo_bytes = 0
+
+    def _enforce_budget(self) -> None:
+        """按最久未显示的顺序释放纹理直到满足内存预算"""
+        for page_num, page in self._pages.items():
+            if self._texture_bytes <= self._max_texture_bytes:
+                break
+            if page_num != self._current:
+                self._release(page)
+
+    def _sync(self, page: _PageGroup, strokes: Sequence[Stroke]) -> None:
+        """增删笔画组，使页面指令与 strokes 一致"""
+        wanted = {stroke.id: stroke for stroke in strokes}
+        # 删除已不存在或对象已替换的笔画
+        stale = [
+            stroke_id for stroke_id, (cached, _) in page.strokes.items()
+            if wanted.get(stroke_id) is not cached
+        ]
+        if stale:
+            self._remove(page, stale)
+
+        new_order = [stroke.id for stroke in strokes]
+        if new_order == page.order:
+            return
+        kept = [stroke_id for stroke_id in new_order if stroke_id in page.strokes]
+        if kept != page.order:
+            # 已缓存笔画的相对顺序变化，整页重建
+            page.group.clear()
+            page.order = []
+            page.strokes.clear()
+
+        # 按新顺序插入缺少的笔画
+        for position, stroke in enumerate(strokes):
+            if position < len(page.order) and page.order[position] == stroke.id:
+                continue
+            group = self._build(stroke, self._pressure_sensitive)
+            self.instructions_built += len(group.children)
+            if position == len(page.order):
+                page.group.add(group)
+            else:
+                page.group.insert(position, group)
+            page.order.insert(position, stroke.id)
+            page.strokes[stroke.id] = (stroke, group)
+
+    def _remove(self, page: _PageGroup, stroke_ids: Iterable[str]) -> None:
+        """删除一组笔画的指令组"""
+        removed = {
+            stroke_id for stroke_id in stroke_ids
+            if self._discard(page, stroke_id, reorder=False)
+        }
+        if removed:
+            page.order = [stroke_id for stroke_id in page.order if stroke_id not in removed]
+
+    def _discard(self, page: _PageGroup, stroke_id: str, reorder: bool = True) -> bool:
+        """删除一条笔画的指令组（reorder 为False时由调用方更新顺序）"""
+        cached = page.strokes.pop(stroke_id, None)
+        if cached is None:
+            return False
+        page.group.remove(cached[1])
+        if reorder:
+            page.order.remove(stroke_id)
+        return True
+
+    def _evict(self) -> None:
+        """丢弃最久未显示的页面指令"""
+        # 当前页总在最后，不会被丢弃
+        while len(self._pages) > self._max_cached_pages:
+            _, page = self._pages.popitem(last=False)
+            self._release(page)
+
+    @staticmethod
+    def _build(stroke: Stroke, pressure_sensitive: bool = True) -> InstructionGroup:
+        """生成一条笔画的绘制指令（三角形带网格，超长笔画分为多个 Mesh）"""
+        group = InstructionGroup()
+        mesh = stroke_mesh(stroke, pressure_sensitive)
+        r, g, b, a = hex_to_rgba(stroke.color)
+        group.add(Color(r, g, b, a * mesh.opacity))
+        for vertices, indices in mesh.chunks():
+            group.add(Mesh(vertices=vertices.tolist(), indices=indices, mode="triangle_strip"))
+        return group
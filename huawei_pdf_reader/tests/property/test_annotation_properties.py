@@ -31,6 +31,7 @@ from huawei_pdf_reader.models import (
 )
 from huawei_pdf_reader.annotation_engine import AnnotationEngine
 from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.stroke_geometry import strokes_hit_path
 
 
 # ============== 策略定义 ==============
@@ -205,6 +206,33 @@ class TestEraserFunctionality:
         strokes_after = sum(len(a.strokes) for a in annotations_after)
         assert strokes_after == 0
 
+    @given(
+        strokes=st.lists(stroke_strategy(), min_size=1, max_size=15, unique_by=lambda s: s.id),
+        erase_points=st.lists(
+            st.tuples(coordinate_strategy, coordinate_strategy,
+                      st.floats(min_value=0.0, max_value=200.0)),
+            min_size=1, max_size=5,
+        ),
+    )
+    @settings(max_examples=100)
+    def test_indexed_erase_matches_full_scan(self, strokes, erase_points):
+        """
+        空间索引擦除结果与逐笔画全量扫描一致
+        """
+        engine = AnnotationEngine()
+        for stroke in strokes:
+            engine.add_stroke_to_page(1, stroke)
+
+        remaining = list(strokes)
+        for x, y, radius in erase_points:
+            hits = strokes_hit_path(remaining, [(x, y)], radius, vectorize=False)
+            expected = [s.id for s, hit in zip(remaining, hits) if hit]
+            assert engine.hit_test(1, x, y, radius) == expected
+            assert engine.erase_at(1, x, y, radius) == expected
+            remaining = [s for s in remaining if s.id not in expected]
+
+        assert [s.id for a in engine.get_annotations(1) for s in a.strokes] == [s.id for s in remaining]
+
 
 class TestAnnotationRoundTrip:
     """
@@ -332,3 +360,124 @@ class TestPressureSensitivity:
         
         # 验证宽度等于基础宽度
         assert calculated_width == base_width
+
+
+class TestIncrementalAnnotationSave:
+    """
+    笔画级增量保存
+
+    For any 笔画新增/擦除序列，增量保存后重新加载应得到与内存中相同的笔画；
+    没有变更时保存不应产生任何写入。
+
+    Feature: huawei-pdf-reader, Property 7: 注释保存往返一致性
+    Validates: Requirements 3.5
+    """
+
+    @given(
+        strokes=st.lists(
+            st.tuples(st.integers(min_value=1, max_value=5), stroke_strategy()),
+            min_size=1,
+            max_size=15,
+            unique_by=lambda item: item[1].id,
+        ),
+        erase_points=st.lists(
+            st.tuples(st.integers(min_value=1, max_value=5), coordinate_strategy, coordinate_strategy),
+            max_size=5,
+        ),
+    )
+    @settings(max_examples=50, deadline=None)
+    def test_incremental_save_round_trip(self, strokes, erase_points):
+        """增量保存后重新加载与内存状态一致"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = Database(Path(tmpdir) / "test.db")
+            doc_id = "test_doc_123"
+
+            engine = AnnotationEngine(database=db)
+            engine.load_annotations(doc_id)
+
+            half = len(strokes) // 2
+            for page_num, stroke in strokes[:half]:
+                engine.add_stroke_to_page(page_num, stroke)
+            engine.save_annotations(doc_id)
+            assert not engine.has_unsaved_changes()
+
+            for page_num, stroke in strokes[half:]:
+                engine.add_stroke_to_page(page_num, stroke)
+            for page_num, x, y in erase_points:
+                engine.erase_at(page_num, x, y, radius=50.0)
+            engine.save_annotations(doc_id)
+
+            expected = {
+                page: [s.id for a in anns for s in a.strokes]
+                for page, anns in engine.get_all_annotations().items()
+            }
+
+            reloaded = AnnotationEngine(database=db)
+            reloaded.load_annotations(doc_id)
+            actual = {
+                page: [s.id for a in anns for s in a.strokes]
+                for page, anns in reloaded.get_all_annotations().items()
+            }
+            assert {p: ids for p, ids in actual.items() if ids} == \
+                {p: ids for p, ids in expected.items() if ids}
+            assert not reloaded.has_unsaved_changes()
+
+    def test_save_only_writes_changed_strokes(self):
+        """保存只提交变更的笔画"""
+
+        class RecordingDatabase:
+            def __init__(self):
+                self.calls = []
+
+            def get_strokes(self, doc_id, page_num=None):
+                return []
+
+            def get_annotations(self, doc_id, page_num=None, include_strokes=True):
+                return []
+
+            def save_stroke_changes(self, doc_id, upserts, deleted_ids=(),
+                                    deleted_annotation_ids=()):
+                self.calls.append((list(upserts), list(deleted_ids)))
+
+        db = RecordingDatabase()
+        engine = AnnotationEngine(database=db)
+        engine.load_annotations("doc")
+
+        for i in range(10):
+            stroke_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+            engine.add_point(stroke_id, i * 100.0, 0.0, 0.5)
+            engine.add_stroke_to_page(1, engine.end_stroke(stroke_id))
+        engine.save_annotations("doc")
+        assert len(db.calls[-1][0]) == 10
+
+        # 无变更时不写入
+        engine.save_annotations("doc")
+        assert len(db.calls) == 1
+
+        erased = engine.erase_at(1, 300.0, 0.0, radius=5.0)
+        engine.save_annotations("doc")
+        upserts, deleted = db.calls[-1]
+        assert upserts == []
+        assert deleted == erased
+
+    def test_legacy_annotations_migrated_to_strokes(self):
+        """旧版整页注释在下次保存时迁移到笔画表"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db = Database(Path(tmpdir) / "test.db")
+            stroke = Stroke(
+                id="legacy-stroke",
+                pen_type=PenType.PENCIL,
+                color="#123456",
+                width=3.0,
+                points=[StrokePoint(x=1.0, y=2.0, pressure=0.5, timestamp=0.0)],
+            )
+            db.save_annotation("doc", Annotation(id="annotation_3", page_num=3, strokes=[stroke]))
+
+            engine = AnnotationEngine(database=db)
+            engine.load_annotations("doc")
+            assert engine.has_unsaved_changes()
+            engine.save_annotations("doc")
+
+            assert db.get_annotations("doc", include_strokes=False) == []
+            rows = db.get_strokes("doc")
+            assert [(page, s.id) for page, _, s in rows] == [(3, "legacy-stroke")]
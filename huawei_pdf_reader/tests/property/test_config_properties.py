@@ -98,6 +98,10 @@ def tools_config_strategy(draw):
         shape_fill=draw(st.booleans()),
         long_press_select_text=draw(st.booleans()),
         long_press_create_menu=draw(st.booleans()),
+        stroke_simplification=draw(st.booleans()),
+        simplification_method=draw(st.sampled_from(["rdp", "visvalingam"])),
+        simplification_tolerance=draw(st.floats(min_value=0.0, max_value=5.0, allow_nan=False)),
+        stroke_smoothing=draw(st.floats(min_value=0.0, max_value=0.9, allow_nan=False)),
     )
 
 
@@ -192,6 +196,10 @@ class TestConfigRoundTrip:
         assert restored.shape_fill == config.shape_fill
         assert restored.long_press_select_text == config.long_press_select_text
         assert restored.long_press_create_menu == config.long_press_create_menu
+        assert restored.stroke_simplification == config.stroke_simplification
+        assert restored.simplification_method == config.simplification_method
+        assert restored.simplification_tolerance == config.simplification_tolerance
+        assert restored.stroke_smoothing == config.stroke_smoothing
 
     @given(config=backup_config_strategy())
     @settings(max_examples=100)
@@ -8,6 +8,8 @@ Properties:
 - Property 9: 触摸类型分类
 - Property 10: 防误触灵敏度
 - Property 11: 手写笔悬停状态
+- Property 12: 批量判定一致性
+- Property 13: 触点跟踪状态
 
 Validates: Requirements 4.1, 4.2, 4.3, 4.4, 4.5
 """
@@ -22,7 +24,9 @@ sys.path.insert(0, str(src_path))
 from hypothesis import given, settings, strategies as st, assume
 
 from huawei_pdf_reader.models import TouchEvent, TouchType
-from huawei_pdf_reader.palm_rejection import PalmRejectionSystem
+from huawei_pdf_reader.palm_rejection import (
+    HAS_NUMPY, SENSITIVITY_THRESHOLDS, ContactState, PalmRejectionSystem, PalmTracker,
+)
 
 
 # ============== 策略定义 ==============
@@ -328,3 +332,108 @@ class TestStylusHoverState:
         # 悬停时防误触应启用
         if is_hovering:
             assert system.palm_rejection_enabled is True
+
+
+# 阈值本身及其附近的值（检验边界处批量判定与逐个判定一致）
+threshold_value_strategy = st.sampled_from(sorted(
+    {value for thresholds in SENSITIVITY_THRESHOLDS.values() for value in thresholds}
+    | {PalmRejectionSystem.PALM_PRESSURE_THRESHOLD}
+))
+batch_value_strategy = st.one_of(size_strategy, threshold_value_strategy)
+
+
+class TestBatchClassification:
+    """
+    Property 12: 批量判定一致性
+    
+    For any 一组触摸、灵敏度和悬停状态，classify_batch / should_reject_batch
+    的结果应与逐个调用 classify_touch / should_reject 相同。
+    
+    Feature: huawei-pdf-reader, Property 12: 批量判定一致性
+    Validates: Requirements 4.1, 4.2, 4.5
+    """
+
+    @given(
+        touches=st.lists(
+            st.tuples(batch_value_strategy, batch_value_strategy,
+                      st.sampled_from(list(TouchType))),
+            max_size=40,
+        ),
+        sensitivity=sensitivity_strategy,
+        is_hovering=st.booleans(),
+        enabled=st.booleans(),
+    )
+    @settings(max_examples=100)
+    def test_batch_matches_single(self, touches, sensitivity: int,
+                                  is_hovering: bool, enabled: bool):
+        """
+        Property 12: 批量判定一致性
+        
+        Feature: huawei-pdf-reader, Property 12: 批量判定一致性
+        Validates: Requirements 4.1, 4.2, 4.5
+        """
+        system = PalmRejectionSystem(sensitivity)
+        system.enable_palm_rejection(enabled)
+        system.on_stylus_hover(is_hovering)
+        events = [
+            TouchEvent(id=i, x=0.0, y=0.0, pressure=pressure, size=size,
+                       touch_type=touch_type, timestamp=0.0)
+            for i, (size, pressure, touch_type) in enumerate(touches)
+        ]
+        sizes = [event.size for event in events]
+        pressures = [event.pressure for event in events]
+        types = [event.touch_type for event in events]
+
+        expected_types = [system.classify_touch(event) for event in events]
+        expected_reject = [system.should_reject(event) for event in events]
+        for vectorize in ([False, True] if HAS_NUMPY else [False]):
+            assert system.classify_batch(sizes, pressures, types, vectorize=vectorize) == expected_types
+            assert system.should_reject_batch(
+                sizes, pressures, types, vectorize=vectorize
+            ) == expected_reject
+
+
+class TestContactTracking:
+    """
+    Property 13: 触点跟踪状态
+    
+    For any 触点事件序列，跟踪器记录的拒绝次数应等于最近 HISTORY_SIZE 次
+    逐个判定中被拒绝的次数；触点一旦被拒绝，在抬起前保持拒绝。
+    
+    Feature: huawei-pdf-reader, Property 13: 触点跟踪状态
+    Validates: Requirements 4.1, 4.2
+    """
+
+    @given(
+        samples=st.lists(st.tuples(size_strategy, pressure_strategy), min_size=1, max_size=40),
+        sensitivity=sensitivity_strategy,
+    )
+    @settings(max_examples=100)
+    def test_history_matches_single_decisions(self, samples, sensitivity: int):
+        """
+        Property 13: 触点跟踪状态
+        
+        Feature: huawei-pdf-reader, Property 13: 触点跟踪状态
+        Validates: Requirements 4.1, 4.2
+        """
+        system = PalmRejectionSystem(sensitivity)
+        tracker = PalmTracker(system)
+        decisions = []
+        rejected_seen = False
+        for i, (size, pressure) in enumerate(samples):
+            state = tracker.update(7, size, pressure, i * 0.01)
+            decisions.append(system.should_reject(TouchEvent(
+                id=7, x=0.0, y=0.0, pressure=pressure, size=size,
+                touch_type=TouchType.UNKNOWN, timestamp=0.0,
+            )))
+            if rejected_seen:
+                assert state == ContactState.REJECTED
+            rejected_seen = state == ContactState.REJECTED
+            # 判定窗口内的任何拒绝都立即生效
+            if decisions[-1] and i * 0.01 < PalmTracker.DECISION_DELAY:
+                assert state == ContactState.REJECTED
+
+        track = tracker.get_track(7)
+        assert track.samples == len(samples)
+        assert track.rejected_votes == sum(decisions[-PalmTracker.HISTORY_SIZE:])
+        assert tracker.end(7) != ContactState.PENDING
@@ -0,0 +1,153 @@
+"""
+笔画简化属性测试
+
+Feature: huawei-pdf-reader
+测试笔画简化的视觉保真度。
+
+Properties:
+- 简化后保留首尾点，且保留的点是原始点的有序子集
+- 每个原始点到简化后对应线段的距离不超过位置容差
+- 每个原始点的压力与对应线段上插值压力的偏差不超过压力容差
+
+Validates: Requirements 3.2, 3.6
+"""
+
+import math
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from hypothesis import given, settings, strategies as st
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.models import PenType, StrokePoint, StrokePoints
+from huawei_pdf_reader.stroke_simplifier import SIMPLIFY_METHODS, StrokeSimplifier
+
+
+# ============== 策略定义 ==============
+
+method_strategy = st.sampled_from(SIMPLIFY_METHODS)
+
+tolerance_strategy = st.floats(min_value=0.05, max_value=5.0, allow_nan=False)
+
+pressure_tolerance_strategy = st.floats(min_value=0.01, max_value=0.5, allow_nan=False)
+
+
+# 随机游走笔画（模拟手写轨迹）
+@st.composite
+def stroke_points_strategy(draw):
+    x = draw(st.floats(min_value=0.0, max_value=1000.0))
+    y = draw(st.floats(min_value=0.0, max_value=1000.0))
+    steps = draw(st.lists(
+        st.tuples(
+            st.floats(min_value=-5.0, max_value=5.0),
+            st.floats(min_value=-5.0, max_value=5.0),
+            st.floats(min_value=0.0, max_value=1.0),
+        ),
+        min_size=1,
+        max_size=120,
+    ))
+    points = StrokePoints()
+    for i, (dx, dy, pressure) in enumerate(steps):
+        x += dx
+        y += dy
+        points.append(StrokePoint(x=x, y=y, pressure=pressure, timestamp=i * 0.004))
+    return points
+
+
+def span_errors(points: StrokePoints, start: int, end: int):
+    """原始点相对简化线段 start-end 的位置和压力偏差"""
+    a, b = points[start], points[end]
+    dx, dy = b.x - a.x, b.y - a.y
+    length_sq = dx * dx + dy * dy
+    for i in range(start + 1, end):
+        p = points[i]
+        t = 0.0
+        if length_sq > 0:
+            t = min(1.0, max(0.0, ((p.x - a.x) * dx + (p.y - a.y) * dy) / length_sq))
+        distance = math.hypot(p.x - (a.x + t * dx), p.y - (a.y + t * dy))
+        pressure_error = abs(p.pressure - (a.pressure + t * (b.pressure - a.pressure)))
+        yield distance, pressure_error
+
+
+# ============== 属性测试 ==============
+
+class TestSimplificationFidelity:
+    """
+    简化视觉保真度
+
+    For any 笔画和容差，简化后的折线与原始点的偏差不超过容差。
+    """
+
+    @given(
+        points=stroke_points_strategy(),
+        method=method_strategy,
+        tolerance=tolerance_strategy,
+        pressure_tolerance=pressure_tolerance_strategy,
+    )
+    @settings(max_examples=200)
+    def test_simplified_stroke_within_tolerance(
+        self, points, method, tolerance, pressure_tolerance
+    ):
+        """简化后的笔画在容差范围内逼近原始笔画"""
+        simplifier = StrokeSimplifier(
+            method=method, tolerance=tolerance, pressure_tolerance=pressure_tolerance
+        )
+        kept = simplifier.simplify_indices(points.xs, points.ys, points.pressures)
+
+        assert kept[0] == 0 and kept[-1] == len(points) - 1
+        assert kept == sorted(set(kept))
+
+        slack = 1e-9
+        for start, end in zip(kept, kept[1:]):
+            for distance, pressure_error in span_errors(points, start, end):
+                assert distance <= tolerance + slack
+                assert pressure_error <= pressure_tolerance + slack
+
+        simplified = simplifier.simplify(points)
+        assert list(simplified) == [points[i] for i in kept]
+
+    @given(
+        length=st.integers(min_value=3, max_value=500),
+        method=method_strategy,
+    )
+    @settings(max_examples=50)
+    def test_collinear_points_collapse(self, length, method):
+        """压力不变的直线简化为首尾两点"""
+        points = StrokePoints(
+            StrokePoint(x=i * 0.5, y=i * 0.25, pressure=0.5, timestamp=0.0)
+            for i in range(length)
+        )
+        simplified = StrokeSimplifier(method=method).simplify(points)
+        assert list(simplified) == [points[0], points[-1]]
+
+
+class TestEngineSimplification:
+    """注释引擎在结束笔画时简化并统计"""
+
+    def test_end_stroke_reports_reduction(self):
+        engine = AnnotationEngine(simplifier=StrokeSimplifier(tolerance=0.5))
+
+        stroke_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+        for i in range(200):
+            engine.add_point(stroke_id, 10.0 + i, 20.0 + (i % 2) * 0.1, 0.5)
+        stroke = engine.end_stroke(stroke_id)
+
+        raw_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+        for i in range(50):
+            engine.add_point(raw_id, 10.0 + i, 20.0, 0.5)
+        raw = engine.end_stroke(raw_id, simplify=False)
+
+        assert len(stroke.points) == 2
+        assert len(raw.points) == 50
+        stats = engine.get_simplification_stats()
+        assert stats.to_dict() == {
+            "strokes": 1,
+            "input_points": 200,
+            "output_points": 2,
+            "removed_points": 198,
+            "reduction": 0.99,
+        }
@@ -0,0 +1,186 @@
+"""
+注释导出单元测试
+"""
+
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import fitz
+import pytest
+
+from huawei_pdf_reader import annotation_exporter
+from huawei_pdf_reader.annotation_exporter import (
+    EXPORT_INK, AnnotationExportError, AnnotationExportJob, ExportCancelledError,
+    ExportOptions, export_annotated_pdf,
+)
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+
+
+def make_pdf(path: Path, pages: int = 2, rotation: int = 0) -> Path:
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width=200, height=100)
+        page.set_rotation(rotation)
+    doc.save(str(path))
+    doc.close()
+    return path
+
+
+def make_stroke(coords, pressures=None, pen_type=PenType.FOUNTAIN, width=10.0,
+                color="#FF0000") -> Stroke:
+    pressures = pressures or [0.5] * len(coords)
+    return Stroke(
+        id="s",
+        pen_type=pen_type,
+        color=color,
+        width=width,
+        points=[
+            StrokePoint(x=x, y=y, pressure=p, timestamp=0.0)
+            for (x, y), p in zip(coords, pressures)
+        ],
+    )
+
+
+def column_coverage(page, x: int):
+    """页面某一列被着色的像素行（显示坐标）"""
+    pix = page.get_pixmap()
+    return [y for y in range(pix.height) if pix.pixel(x, y) != (255, 255, 255)]
+
+
+class TestExportPaths:
+    """以路径写入内容流"""
+
+    def test_matches_screen_geometry(self, temp_dir: Path):
+        source = make_pdf(temp_dir / "source.pdf")
+        # 画布坐标原点在左下角：y=70 对应显示坐标 y=30；压力从 0 增加到 1
+        stroke = make_stroke([(20.0, 70.0), (100.0, 70.0), (180.0, 70.0)], [0.0, 0.5, 1.0])
+        output = export_annotated_pdf(source, temp_dir / "out.pdf", {1: [stroke]})
+
+        doc = fitz.open(str(output))
+        thin = column_coverage(doc[0], 25)
+        thick = column_coverage(doc[0], 175)
+        assert min(thin) <= 30 <= max(thin) and min(thick) <= 30 <= max(thick)
+        # 钢笔宽度倍数 0.5 → 1.5
+        assert len(thin) == pytest.approx(5.5, abs=2)
+        assert len(thick) == pytest.approx(14.5, abs=2)
+        assert doc[0].get_pixmap().pixel(100, 30) == (255, 0, 0)
+        # 没有注释的页面不变
+        assert column_coverage(doc[1], 100) == []
+        assert not (temp_dir / "out.pdf.part").exists()
+
+    def test_rotated_page_and_opacity(self, temp_dir: Path):
+        source = make_pdf(temp_dir / "source.pdf", pages=1, rotation=90)
+        # 旋转后显示区域为 100 x 200
+        marker = make_stroke([(10.0, 180.0), (40.0, 180.0)], pen_type=PenType.HIGHLIGHTER)
+        output = export_annotated_pdf(source, temp_dir / "out.pdf", {1: [marker]})
+
+        page = fitz.open(str(output))[0]
+        pixel = page.get_pixmap().pixel(25, 20)
+        # 荧光笔半透明
+        assert pixel[0] == 255 and 100 < pixel[1] < 255
+        assert column_coverage(page, 80) == []
+
+    def test_zoomed_canvas_scale(self, temp_dir: Path):
+        """画布按 2 倍缩放布局时，坐标除以缩放倍数后落在页面的相同位置"""
+        source = make_pdf(temp_dir / "source.pdf")
+        stroke = make_stroke([(40.0, 140.0), (360.0, 140.0)], width=20.0)
+        output = export_annotated_pdf(
+            source, temp_dir / "out.pdf", {1: [stroke]}, ExportOptions(scale=2.0)
+        )
+
+        page = fitz.open(str(output))[0]
+        coverage = column_coverage(page, 100)
+        assert min(coverage) <= 30 <= max(coverage)
+        assert len(coverage) == pytest.approx(10, abs=2)
+        assert column_coverage(page, 190) == []
+
+
+def test_export_ink_annotations(temp_dir: Path):
+    source = make_pdf(temp_dir / "source.pdf")
+    strokes = {
+        1: [make_stroke([(20.0, 50.0), (180.0, 50.0)]), make_stroke([(50.0, 10.0)])],
+        2: [make_stroke([(20.0, 20.0), (60.0, 80.0)], color="#0000FF")],
+    }
+    output = export_annotated_pdf(
+        source, temp_dir / "out.pdf", strokes, ExportOptions(mode=EXPORT_INK)
+    )
+
+    pages = list(fitz.open(str(output)))
+    annots = [list(page.annots()) for page in pages]
+    assert [len(page) for page in annots] == [2, 1]
+    assert annots[0][0].type[1] == "Ink"
+    assert annots[0][0].border["width"] == 10.0
+    assert annots[1][0].colors["stroke"] == pytest.approx((0.0, 0.0, 1.0))
+
+
+def test_cancel_and_errors(temp_dir: Path):
+    source = make_pdf(temp_dir / "source.pdf")
+    strokes = {1: [make_stroke([(20.0, 50.0), (180.0, 50.0)])]}
+
+    with pytest.raises(ExportCancelledError):
+        export_annotated_pdf(source, temp_dir / "out.pdf", strokes, cancelled=lambda: True)
+    assert list(temp_dir.iterdir()) == [source]
+
+    with pytest.raises(AnnotationExportError):
+        export_annotated_pdf(source, temp_dir / "out.pdf", strokes, ExportOptions(mode="svg"))
+    with pytest.raises(AnnotationExportError):
+        export_annotated_pdf(temp_dir / "missing.pdf", temp_dir / "out.pdf", strokes)
+
+
+@pytest.mark.parametrize("use_process", [False, True])
+def test_background_job(temp_dir: Path, use_process: bool):
+    source = make_pdf(temp_dir / "source.pdf")
+    strokes = {
+        1: [make_stroke([(20.0, 50.0), (180.0, 50.0)])],
+        2: [make_stroke([(20.0, 20.0), (60.0, 80.0)])],
+    }
+    progress = []
+    job = AnnotationExportJob(
+        source, temp_dir / "out.pdf", strokes,
+        on_progress=lambda done, total: progress.append((done, total)),
+        use_process=use_process,
+    )
+    assert job.wait(timeout=60) == temp_dir / "out.pdf"
+    assert progress == [(1, 2), (2, 2)] and job.progress == (2, 2)
+    assert column_coverage(fitz.open(str(temp_dir / "out.pdf"))[1], 40)
+
+    failed = AnnotationExportJob(temp_dir / "missing.pdf", temp_dir / "x.pdf", strokes,
+                                 use_process=use_process)
+    with pytest.raises(AnnotationExportError):
+        failed.wait(timeout=60)
+
+
+class LateQueue(queue.Queue):
+    """第一次带超时的 get 等到工作线程放入全部消息并退出后才超时"""
+
+    timed_out = False
+
+    def get(self, block=True, timeout=None):
+        if timeout is not None and not self.timed_out:
+            self.timed_out = True
+            while self.empty() or any(
+                t.name == "annotation-export" for t in threading.enumerate()
+            ):
+                time.sleep(0.01)
+            raise queue.Empty
+        return super().get(block, timeout)
+
+
+def test_final_message_after_poll_timeout(temp_dir: Path, monkeypatch):
+    """工作线程在轮询超时后放入结果并退出，任务仍然成功"""
+    monkeypatch.setattr(
+        annotation_exporter, "queue", SimpleNamespace(Queue=LateQueue, Empty=queue.Empty)
+    )
+    source = make_pdf(temp_dir / "source.pdf")
+    stroke = make_stroke([(20.0, 20.0), (100.0, 20.0)])
+    job = AnnotationExportJob(source, temp_dir / "out.pdf", {1: [stroke]}, use_process=False)
+    assert job.wait(10) == temp_dir / "out.pdf"
+    assert job.progress == (1, 1)
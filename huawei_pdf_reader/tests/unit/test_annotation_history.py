@@ -0,0 +1,165 @@
+"""
+注释撤销/重做历史单元测试
+"""
+
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from hypothesis import given, settings, strategies as st
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.annotation_history import AnnotationHistory
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+
+
+def make_stroke(stroke_id: str, x: float, points: int = 2) -> Stroke:
+    return Stroke(
+        id=stroke_id,
+        pen_type=PenType.BALLPOINT,
+        color="#000000",
+        width=2.0,
+        points=[StrokePoint(x=x, y=i * 10.0, pressure=0.5, timestamp=0.0) for i in range(points)],
+    )
+
+
+def page_state(engine: AnnotationEngine):
+    """各页面的笔画ID（按绘制顺序）"""
+    return {
+        page: [s.id for a in annotations for s in a.strokes]
+        for page, annotations in engine.get_all_annotations().items()
+        if any(a.strokes for a in annotations)
+    }
+
+
+# 随机操作序列：(操作, 页码, X坐标)
+operation_strategy = st.lists(
+    st.tuples(
+        st.sampled_from(["add", "erase", "clear", "replace"]),
+        st.integers(min_value=1, max_value=3),
+        st.integers(min_value=0, max_value=10),
+    ),
+    min_size=1,
+    max_size=30,
+)
+
+
+class TestUndoRedo:
+    """撤销/重做"""
+
+    @given(operations=operation_strategy)
+    @settings(max_examples=100)
+    def test_undo_all_then_redo_all(self, operations):
+        """逐步撤销恢复每一步之前的状态，全部重做回到最终状态"""
+        engine = AnnotationEngine()
+        states = [page_state(engine)]
+        counter = 0
+        for op, page, x in operations:
+            counter += 1
+            if op == "add":
+                engine.add_stroke_to_page(page, make_stroke(f"s{counter}", x * 20.0))
+            elif op == "erase":
+                engine.erase_at(page, x * 20.0, 5.0, 3.0)
+            elif op == "clear":
+                engine.clear_annotations(page if x % 2 else None)
+            else:
+                ids = page_state(engine).get(page)
+                if not ids:
+                    continue
+                engine.replace_stroke(page, ids[x % len(ids)], make_stroke(f"r{counter}", x * 20.0 + 1))
+            # 未改变页面的操作（未擦到、清除空页面）不产生历史记录
+            if page_state(engine) != states[-1]:
+                states.append(page_state(engine))
+
+        final = states[-1]
+        for expected in reversed(states[:-1]):
+            assert engine.undo() is not None
+            assert page_state(engine) == expected
+        assert not engine.can_undo()
+
+        while engine.redo():
+            pass
+        assert page_state(engine) == final
+        # 恢复后的笔画仍在空间索引中
+        for page, ids in final.items():
+            assert set(engine.hit_test_path(page, [(-10.0, 5.0), (300.0, 5.0)], 3.0)) == set(ids)
+
+    def test_new_operation_discards_redo(self):
+        engine = AnnotationEngine()
+        engine.add_stroke_to_page(1, make_stroke("a", 0.0))
+        engine.add_stroke_to_page(1, make_stroke("b", 50.0))
+        change = engine.undo()
+
+        assert change.undo and [r.stroke.id for r in change.removed] == ["b"]
+        engine.add_stroke_to_page(1, make_stroke("c", 100.0))
+        assert not engine.can_redo()
+        assert engine.redo() is None
+
+    def test_undo_erase_restores_draw_order(self):
+        engine = AnnotationEngine()
+        for i, stroke_id in enumerate("abc"):
+            engine.add_stroke_to_page(1, make_stroke(stroke_id, i * 50.0))
+        engine.erase_at(1, 50.0, 5.0, 3.0)
+        engine.undo()
+
+        assert page_state(engine) == {1: ["a", "b", "c"]}
+
+    def test_undo_shape_replace_restores_freehand(self):
+        engine = AnnotationEngine()
+        engine.add_stroke_to_page(1, make_stroke("freehand", 0.0, points=20))
+        engine.replace_stroke(1, "freehand", make_stroke("line", 0.0))
+        assert page_state(engine) == {1: ["line"]}
+
+        change = engine.undo()
+        assert change.kind == "replace"
+        assert page_state(engine) == {1: ["freehand"]}
+
+
+class TestHistoryLimits:
+    """历史记录的条数和内存限制"""
+
+    def test_entry_limit(self):
+        engine = AnnotationEngine(history=AnnotationHistory(max_entries=3))
+        for i in range(10):
+            engine.add_stroke_to_page(1, make_stroke(str(i), i * 50.0))
+
+        undone = 0
+        while engine.undo():
+            undone += 1
+        assert undone == 3
+        assert len(page_state(engine)[1]) == 7
+
+    def test_memory_limit_keeps_latest(self):
+        history = AnnotationHistory(max_bytes=2000)
+        engine = AnnotationEngine(history=history)
+        for i in range(10):
+            engine.add_stroke_to_page(1, make_stroke(str(i), i * 50.0, points=40))
+            assert history.nbytes <= 2000 or len(history) == 1
+
+        engine.clear_annotations()
+        assert len(history) == 1
+        engine.undo()
+        assert len(page_state(engine)[1]) == 10
+
+
+def test_undo_persists_through_save(temp_db_path: Path):
+    """撤销擦除后保存，笔画重新写回数据库"""
+    engine = AnnotationEngine(Database(temp_db_path))
+    engine.load_annotations("doc")
+    engine.add_stroke_to_page(1, make_stroke("a", 0.0))
+    engine.add_stroke_to_page(1, make_stroke("b", 50.0))
+    engine.save_annotations("doc")
+
+    engine.erase_at(1, 0.0, 5.0, 3.0)
+    engine.save_annotations("doc")
+    engine.undo()
+    engine.save_annotations("doc")
+
+    reloaded = AnnotationEngine(Database(temp_db_path))
+    reloaded.load_annotations("doc")
+    assert page_state(reloaded) == {1: ["a", "b"]}
+    assert not reloaded.can_undo()
@@ -0,0 +1,177 @@
+"""
+注释日志单元测试
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.async_database import AsyncDatabase
+from huawei_pdf_reader.annotation_journal import JOURNAL_MAGIC, AnnotationJournal, read_journal
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+
+
+def make_stroke(stroke_id: str, x: float) -> Stroke:
+    return Stroke(
+        id=stroke_id,
+        pen_type=PenType.BALLPOINT,
+        color="#000000",
+        width=2.0,
+        points=[StrokePoint(x=x, y=i * 10.0, pressure=0.5, timestamp=0.0) for i in range(3)],
+    )
+
+
+def page_state(engine: AnnotationEngine):
+    return {
+        page: [s.id for a in annotations for s in a.strokes]
+        for page, annotations in engine.get_all_annotations().items()
+        if any(a.strokes for a in annotations)
+    }
+
+
+def open_engine(temp_dir: Path, **journal_options) -> AnnotationEngine:
+    db = Database(temp_dir / "app.db")
+    journal = AnnotationJournal(temp_dir / "journal", database=db, **journal_options)
+    engine = AnnotationEngine(db, journal=journal)
+    engine.load_annotations("doc")
+    return engine
+
+
+def db_stroke_ids(temp_dir: Path):
+    return [s.id for _, _, s in Database(temp_dir / "app.db").get_strokes("doc")]
+
+
+class TestJournalRecovery:
+    """崩溃后重放"""
+
+    def test_unsaved_changes_survive_crash(self, temp_dir: Path):
+        engine = open_engine(temp_dir)
+        engine.add_stroke_to_page(1, make_stroke("a", 0.0))
+        engine.add_stroke_to_page(1, make_stroke("b", 50.0))
+        engine.save_annotations("doc")
+        engine.add_stroke_to_page(2, make_stroke("c", 0.0))
+        engine.erase_at(1, 0.0, 10.0, 3.0)
+        engine.undo()
+        engine.erase_at(1, 50.0, 10.0, 3.0)
+        expected = page_state(engine)
+        # 未保存即"崩溃"
+
+        recovered = open_engine(temp_dir)
+        assert page_state(recovered) == expected == {1: ["a"], 2: ["c"]}
+        assert recovered.has_unsaved_changes()
+
+        recovered.save_annotations("doc")
+        assert db_stroke_ids(temp_dir) == ["a", "c"]
+        journal_path = AnnotationJournal(temp_dir / "journal").path_for("doc")
+        assert journal_path.read_bytes() == JOURNAL_MAGIC
+
+    def test_torn_tail_is_discarded(self, temp_dir: Path):
+        engine = open_engine(temp_dir)
+        engine.add_stroke_to_page(1, make_stroke("a", 0.0))
+        engine.add_stroke_to_page(1, make_stroke("b", 50.0))
+        engine.sync_journal()
+
+        journal_path = AnnotationJournal(temp_dir / "journal").path_for("doc")
+        records, size = read_journal(journal_path)
+        assert [r.stroke_id for r in records] == ["a", "b"]
+        # 两条记录等长，第二条只写了一部分
+        first_end = len(JOURNAL_MAGIC) + (size - len(JOURNAL_MAGIC)) // 2
+        journal_path.write_bytes(journal_path.read_bytes()[:first_end + 5])
+
+        recovered = open_engine(temp_dir)
+        assert page_state(recovered) == {1: ["a"]}
+        recovered.add_stroke_to_page(1, make_stroke("c", 100.0))
+        assert page_state(open_engine(temp_dir)) == {1: ["a", "c"]}
+
+
+class TestJournalCompaction:
+    """后台合并到数据库"""
+
+    def test_compaction_writes_strokes_to_database(self, temp_dir: Path):
+        engine = open_engine(temp_dir, compact_bytes=512)
+        for i in range(20):
+            engine.add_stroke_to_page(1, make_stroke(str(i), i * 20.0))
+        engine._journal.wait_compaction()
+
+        compacted = db_stroke_ids(temp_dir)
+        assert compacted and compacted == [str(i) for i in range(len(compacted))]
+        assert engine._journal.compact_error is None
+
+        # 已被合并写入数据库的新笔画，擦除后保存也要从数据库删除
+        engine.erase_at(1, 0.0, 10.0, 3.0)
+        engine.save_annotations("doc")
+        assert db_stroke_ids(temp_dir) == [str(i) for i in range(1, 20)]
+
+        assert page_state(open_engine(temp_dir)) == {1: [str(i) for i in range(1, 20)]}
+
+
+class TestAsyncSave:
+    """在异步数据库门面的写线程上保存"""
+
+    def test_async_save_checkpoints_journal(self, temp_dir: Path):
+        engine = open_engine(temp_dir)
+        adb = AsyncDatabase(engine._database)
+        engine.add_stroke_to_page(1, make_stroke("a", 0.0))
+        engine.add_stroke_to_page(1, make_stroke("b", 50.0))
+
+        engine.save_annotations_async("doc", adb).result(5)
+        assert not engine.has_unsaved_changes()
+        assert db_stroke_ids(temp_dir) == ["a", "b"]
+        assert engine._journal.path_for("doc").read_bytes() == JOURNAL_MAGIC
+        assert engine.save_annotations_async("doc", adb) is None
+        adb.close()
+
+    def test_later_appends_stay_in_journal(self, temp_dir: Path):
+        """收集变更后追加的记录不会被写线程上的检查点清掉"""
+        engine = open_engine(temp_dir)
+        adb = AsyncDatabase(engine._database)
+        gate = threading.Event()
+        adb.write(gate.wait, 5)
+        engine.add_stroke_to_page(1, make_stroke("a", 0.0))
+        future = engine.save_annotations_async("doc", adb)
+        engine.add_stroke_to_page(1, make_stroke("b", 50.0))
+        gate.set()
+        future.result(5)
+
+        assert db_stroke_ids(temp_dir) == ["a"]
+        # "崩溃"后从日志恢复未保存的笔画
+        assert page_state(open_engine(temp_dir)) == {1: ["a", "b"]}
+        adb.close()
+
+    def test_switching_document_checkpoints_closed_journal(self, temp_dir: Path):
+        engine = open_engine(temp_dir)
+        adb = AsyncDatabase(engine._database)
+        gate = threading.Event()
+        adb.write(gate.wait, 5)
+        engine.add_stroke_to_page(1, make_stroke("a", 0.0))
+        future = engine.save_annotations_async("doc", adb)
+        engine.load_annotations("other")
+        gate.set()
+        future.result(5)
+
+        assert db_stroke_ids(temp_dir) == ["a"]
+        assert engine._journal.path_for("doc").read_bytes() == JOURNAL_MAGIC
+        adb.close()
+
+    def test_failed_async_save_is_retried(self, temp_dir: Path, monkeypatch):
+        engine = open_engine(temp_dir)
+        adb = AsyncDatabase(engine._database)
+        engine.add_stroke_to_page(1, make_stroke("a", 0.0))
+
+        def fail(*args, **kwargs):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(engine._database, "save_stroke_changes", fail)
+        assert isinstance(engine.save_annotations_async("doc", adb).exception(5), OSError)
+        monkeypatch.undo()
+
+        engine.save_annotations("doc")
+        assert db_stroke_ids(temp_dir) == ["a"]
+        assert engine._journal.path_for("doc").read_bytes() == JOURNAL_MAGIC
+        adb.close()
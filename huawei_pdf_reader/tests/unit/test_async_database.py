@@ -0,0 +1,189 @@
+"""
+异步数据库门面单元测试
+"""
+
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+try:
+    from kivy.clock import Clock
+except ImportError:
+    Clock = None
+
+from huawei_pdf_reader.async_database import AsyncDatabase, run_on_main
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.models import DocumentEntry, Tag
+
+
+@pytest.fixture
+def adb(temp_db_path: Path):
+    facade = AsyncDatabase(Database(temp_db_path), coalesce_window=0.05)
+    yield facade
+    facade.close()
+
+
+def _document(doc_id: str) -> DocumentEntry:
+    return DocumentEntry(
+        id=doc_id, path=Path(f"/tmp/{doc_id}.pdf"), title=doc_id, file_type="pdf", size=0
+    )
+
+
+class TestAsyncDatabase:
+    """异步数据库门面"""
+
+    def test_reads_and_writes_run_off_caller_thread(self, adb: AsyncDatabase):
+        """读写都在后台线程执行，写入完成后可读到结果"""
+        caller = threading.get_ident()
+        threads = []
+
+        def add(tag):
+            threads.append(threading.get_ident())
+            return adb.target.add_tag(tag)
+
+        assert adb.write(add, Tag(id="t1", name="work")).result(5) == "t1"
+        assert adb.get_tag("t1").result(5).name == "work"
+        assert threads and threads[0] != caller
+
+    def test_writes_keep_submission_order(self, adb: AsyncDatabase):
+        """写操作按提交顺序执行"""
+        order = []
+        futures = [adb.write(order.append, i) for i in range(20)]
+        for future in futures:
+            future.result(5)
+        assert order == list(range(20))
+
+    def test_tagging_burst_is_coalesced(self, adb: AsyncDatabase, monkeypatch):
+        """窗口内的批量打标签合并为一次数据库调用"""
+        db = adb.target
+        db.add_tag(Tag(id="t1", name="work"))
+        for i in range(10):
+            db.add_document(_document(f"d{i}"))
+
+        calls = []
+        original = db.add_document_tags
+
+        def recording(pairs):
+            calls.append(list(pairs))
+            return original(pairs)
+
+        monkeypatch.setattr(db, "add_document_tags", recording)
+
+        futures = [adb.add_document_tag(f"d{i}", "t1") for i in range(10)]
+        for future in futures:
+            future.result(5)
+
+        assert len(calls) == 1
+        assert len(calls[0]) == 10
+        assert len(db.get_documents_by_tag("t1")) == 10
+
+    def test_keyed_write_supersedes_pending(self, adb: AsyncDatabase):
+        """同键写操作只执行最后一次"""
+        gate = threading.Event()
+        adb.write(gate.wait, 5)
+        values = []
+        futures = [adb.write(values.append, i, coalesce_key="setting") for i in range(5)]
+        gate.set()
+        for future in futures:
+            future.result(5)
+        assert values == [4]
+
+    def test_coalesced_write_keeps_order(self, adb: AsyncDatabase):
+        """同键写操作不会越过在它之前提交的其他写操作"""
+        gate = threading.Event()
+        adb.write(gate.wait, 5)
+        order = []
+        adb.write(order.append, "A", coalesce_key="k")
+        adb.write(order.append, "B")
+        last = adb.write(order.append, "C", coalesce_key="k")
+        gate.set()
+        last.result(5)
+        assert order == ["A", "B", "C"]
+
+        # 只有可合并写操作时，被取代的写入不执行，新写入排到队尾
+        gate.clear()
+        adb.write(gate.wait, 5)
+        order.clear()
+        adb.write(order.append, "A", coalesce_key="k")
+        adb.write(order.append, "D", coalesce_key="j")
+        last = adb.write(order.append, "C", coalesce_key="k")
+        gate.set()
+        last.result(5)
+        assert order == ["D", "C"]
+
+    def test_plain_writes_not_delayed_by_window(self, temp_db_path: Path):
+        """普通写操作和 flush 不等待排在前面的合并窗口"""
+        facade = AsyncDatabase(Database(temp_db_path), coalesce_window=5.0)
+        try:
+            order = []
+            keyed = facade.write(order.append, "keyed", coalesce_key="k")
+            batched = facade.write_batched("b", order.extend, "batched")
+            start = time.monotonic()
+            facade.write(order.append, "plain").result(2)
+            facade.flush(2)
+            assert time.monotonic() - start < 1.0
+            assert keyed.done() and batched.done()
+            assert order == ["keyed", "batched", "plain"]
+        finally:
+            facade.close()
+
+    def test_batch_split_by_interleaved_write(self, adb: AsyncDatabase):
+        """批量写入中间插入其他写操作时分成两批，保持提交顺序"""
+        gate = threading.Event()
+        adb.write(gate.wait, 5)
+        order = []
+        adb.write_batched("b", order.append, 1)
+        adb.write_batched("b", order.append, 2)
+        adb.write(order.append, "plain")
+        last = adb.write_batched("b", order.append, 3)
+        gate.set()
+        last.result(5)
+        assert order == [[1, 2], "plain", [3]]
+
+    def test_errors_propagate_to_future(self, adb: AsyncDatabase):
+        """异常通过 Future 传递，且不影响后续写入"""
+        def fail():
+            raise ValueError("boom")
+
+        with pytest.raises(ValueError):
+            adb.write(fail).result(5)
+        assert adb.write(lambda: "ok").result(5) == "ok"
+
+    def test_close_drains_queue(self, temp_db_path: Path):
+        """关闭时等待已提交的写入完成，之后拒绝新任务"""
+        facade = AsyncDatabase(Database(temp_db_path))
+        for i in range(5):
+            facade.add_tag(Tag(id=f"t{i}", name=f"tag{i}"))
+        facade.close()
+
+        assert len(Database(temp_db_path).get_all_tags()) == 5
+        with pytest.raises(RuntimeError):
+            facade.write(lambda: None)
+
+    def test_run_on_main_delivers_result(self, adb: AsyncDatabase):
+        """run_on_main 回调结果或异常"""
+        results, errors = [], []
+        run_on_main(adb.write(lambda: 42), results.append, errors.append)
+        run_on_main(adb.write(lambda: 1 / 0), results.append, errors.append)
+        adb.flush(5)
+        if Clock is not None:
+            # 安装了Kivy时回调安排在主线程的下一帧
+            Clock.tick()
+        assert results == [42]
+        assert isinstance(errors[0], ZeroDivisionError)
+
+        # 被取消的 Future 不回调
+        cancelled = Future()
+        run_on_main(cancelled, results.append, errors.append)
+        assert cancelled.cancel()
+        if Clock is not None:
+            Clock.tick()
+        assert results == [42] and len(errors) == 1
@@ -0,0 +1,284 @@
+"""
+数据库单元测试
+
+测试Schema版本迁移、查询分析等数据库基础设施。
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+from huawei_pdf_reader import database as database_module
+from huawei_pdf_reader.database import MIGRATIONS, SCHEMA, SCHEMA_VERSION, Database
+from huawei_pdf_reader.models import DocumentEntry, Folder, Tag
+from huawei_pdf_reader.query_profiler import QueryProfiler
+
+
+def _index_names(db_path: Path) -> set:
+    conn = sqlite3.connect(str(db_path))
+    try:
+        rows = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'"
+        ).fetchall()
+        return {row[0] for row in rows}
+    finally:
+        conn.close()
+
+
+class TestSchemaMigrations:
+    """Schema版本迁移"""
+
+    def test_new_database_at_current_version(self, temp_db_path: Path):
+        """新建数据库直接迁移到最新版本"""
+        db = Database(temp_db_path)
+
+        assert db.get_schema_version() == SCHEMA_VERSION
+        indexes = _index_names(temp_db_path)
+        assert "idx_annotations_document_page" in indexes
+        assert "idx_bookmarks_document_page" in indexes
+        assert "idx_documents_folder_deleted" in indexes
+        assert "idx_strokes_document_page" in indexes
+        # 被复合索引前缀覆盖的单列索引已删除
+        assert "idx_documents_folder" not in indexes
+
+    def test_unversioned_database_is_migrated(self, temp_db_path: Path):
+        """未记录版本的旧数据库保留数据并迁移"""
+        conn = sqlite3.connect(str(temp_db_path))
+        conn.executescript(SCHEMA)
+        conn.execute(
+            "INSERT INTO tags (id, name, color) VALUES ('t1', 'old', '#808080')"
+        )
+        conn.commit()
+        conn.close()
+
+        db = Database(temp_db_path)
+
+        assert db.get_schema_version() == SCHEMA_VERSION
+        assert db.get_tag("t1").name == "old"
+        assert db.get_strokes("doc") == []
+
+    def test_current_version_skips_schema_script(self, temp_db_path: Path, monkeypatch):
+        """版本已是最新时跳过迁移"""
+        Database(temp_db_path)
+
+        def fail_migrate(self, conn):
+            raise AssertionError("migration should not run")
+
+        monkeypatch.setattr(Database, "_migrate", fail_migrate)
+        Database(temp_db_path)
+
+    def test_failed_step_rolls_back_and_resumes(self, temp_db_path: Path, monkeypatch):
+        """失败的迁移步骤回滚，修复后从该步骤继续"""
+        broken = MIGRATIONS + [(SCHEMA_VERSION + 1, "CREATE TABLE extra (id TEXT); SELECT * FROM missing;")]
+        monkeypatch.setattr(database_module, "MIGRATIONS", broken)
+        monkeypatch.setattr(database_module, "SCHEMA_VERSION", SCHEMA_VERSION + 1)
+
+        with pytest.raises(sqlite3.Error):
+            Database(temp_db_path)
+
+        conn = sqlite3.connect(str(temp_db_path))
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE name = 'extra'"
+        ).fetchone()[0] == 0
+        conn.close()
+
+        fixed = MIGRATIONS + [(SCHEMA_VERSION + 1, "CREATE TABLE extra (id TEXT);")]
+        monkeypatch.setattr(database_module, "MIGRATIONS", fixed)
+        assert Database(temp_db_path).get_schema_version() == SCHEMA_VERSION + 1
+
+
+class TestQueryProfiling:
+    """查询分析"""
+
+    def test_disabled_by_default(self, temp_db_path: Path):
+        """默认不启用分析，连接为普通 sqlite3.Connection"""
+        db = Database(temp_db_path)
+        assert not db.profiling_enabled
+        assert db.get_query_profile() == {"enabled": False, "statements": [], "slow_queries": []}
+        with db._get_connection() as conn:
+            assert type(conn) is sqlite3.Connection
+
+    def test_records_counts_rows_and_call_sites(self, temp_db_path: Path):
+        """记录执行次数、行数和调用位置"""
+        db = Database(temp_db_path)
+        db.enable_profiling(QueryProfiler(slow_query_ms=1e9))
+        for i in range(3):
+            db.add_tag(Tag(id=f"t{i}", name=f"tag{i}"))
+        db.get_all_tags()
+        db.get_all_tags()
+
+        profile = db.get_query_profile()
+        assert profile["enabled"]
+        stats = {s["sql"]: s for s in profile["statements"]}
+
+        select = stats["SELECT * FROM tags"]
+        assert select["count"] == 2
+        assert select["rows"] == 6
+        assert sum(select["histogram"].values()) == 2
+        assert all(site.startswith("test_database.py:") for site in select["call_sites"])
+
+        insert = next(s for sql, s in stats.items() if sql.startswith("INSERT OR IGNORE INTO tags"))
+        assert insert["count"] == 3
+        assert insert["rows"] == 3
+        assert profile["slow_queries"] == []
+
+    def test_slow_queries_include_query_plan(self, temp_db_path: Path):
+        """慢查询记录查询计划"""
+        db = Database(temp_db_path)
+        db.enable_profiling(QueryProfiler(slow_query_ms=0))
+        db.get_bookmarks("doc")
+
+        slow = [q for q in db.get_query_profile()["slow_queries"] if "FROM bookmarks" in q["sql"]]
+        assert slow
+        assert any("idx_bookmarks_document_page" in line for line in slow[0]["plan"])
+
+    def test_disable_keeps_plain_connections(self, temp_db_path: Path):
+        """停用后恢复普通连接，保留已收集的统计"""
+        db = Database(temp_db_path)
+        profiler = db.enable_profiling()
+        db.get_all_tags()
+        db.disable_profiling()
+        db.get_all_tags()
+        assert not db.profiling_enabled
+        with db._get_connection() as conn:
+            assert type(conn) is sqlite3.Connection
+
+        profile = db.get_query_profile()
+        assert not profile["enabled"]
+        stats = {s["sql"]: s for s in profile["statements"]}
+        assert stats["SELECT * FROM tags"]["count"] == 1
+
+        # 再次启用时继续使用同一分析器
+        assert db.enable_profiling() is profiler
+        db.get_all_tags()
+        assert {s["sql"]: s for s in db.get_query_profile()["statements"]}[
+            "SELECT * FROM tags"]["count"] == 2
+
+
+def _add_folder(db: Database, folder_id: str, parent_id=None) -> None:
+    db.add_folder(Folder(id=folder_id, name=folder_id, parent_id=parent_id))
+
+
+def _add_document(db: Database, doc_id: str, folder_id=None) -> DocumentEntry:
+    doc = DocumentEntry(
+        id=doc_id, path=Path(f"/tmp/{doc_id}.pdf"), title=doc_id,
+        file_type="pdf", size=0, folder_id=folder_id,
+    )
+    db.add_document(doc)
+    return doc
+
+
+class TestFolderTree:
+    """递归文件夹查询"""
+
+    @pytest.fixture
+    def db(self, temp_db_path: Path) -> Database:
+        # root ─┬─ a ── a1
+        #       └─ b
+        db = Database(temp_db_path)
+        _add_folder(db, "root")
+        _add_folder(db, "a", "root")
+        _add_folder(db, "a1", "a")
+        _add_folder(db, "b", "root")
+        _add_document(db, "d1", "root")
+        _add_document(db, "d2", "a")
+        _add_document(db, "d3", "a1")
+        _add_document(db, "d4", "a1")
+        _add_document(db, "d5")
+        return db
+
+    def test_folder_tree_with_counts(self, db: Database):
+        """文件夹树包含直接和子树文档计数"""
+        roots = db.get_folder_tree()
+
+        assert [r.folder.id for r in roots] == ["root"]
+        root = roots[0]
+        assert (root.document_count, root.total_document_count, root.depth) == (1, 4, 0)
+        a, b = root.children
+        assert (a.folder.id, a.total_document_count) == ("a", 3)
+        assert (b.folder.id, b.total_document_count) == ("b", 0)
+        assert a.children[0].depth == 2
+        assert a.children[0].document_count == 2
+
+    def test_subtree_document_ids(self, db: Database):
+        """子树文档包含所有后代文件夹中的文档"""
+        assert sorted(db.get_subtree_document_ids("a")) == ["d2", "d3", "d4"]
+        assert sorted(db.get_subtree_document_ids("root")) == ["d1", "d2", "d3", "d4"]
+        assert db.get_subtree_document_ids("b") == []
+
+    def test_counts_follow_document_changes(self, db: Database):
+        """触发器随文档移动、删除、恢复更新计数"""
+        doc = db.get_document("d3")
+        doc.folder_id = "b"
+        db.update_document(doc)
+        db.delete_document("d2")
+        assert db.get_folder_counts() == {"root": 3, "a": 1, "a1": 1, "b": 1}
+        assert db.get_subtree_document_ids("a", include_deleted=True) == ["d2", "d4"]
+
+        doc = db.get_document("d2")
+        doc.is_deleted = False
+        db.update_document(doc)
+        db.delete_document("d4", permanent=True)
+        _add_document(db, "d6", "a1")
+        assert db.get_folder_counts() == {"root": 4, "a": 2, "a1": 1, "b": 1}
+
+    def test_counts_backfilled_on_migration(self, temp_db_path: Path):
+        """迁移时根据已有文档生成计数"""
+        conn = sqlite3.connect(str(temp_db_path))
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO folders (id, name) VALUES ('f', 'f')")
+        conn.execute(
+            "INSERT INTO documents (id, path, title, file_type, size, folder_id, created_at, modified_at) "
+            "VALUES ('d', '/tmp/d.pdf', 'd', 'pdf', 0, 'f', '2024-01-01T00:00:00', '2024-01-01T00:00:00')"
+        )
+        conn.execute("UPDATE folders SET created_at = '2024-01-01T00:00:00'")
+        conn.commit()
+        conn.close()
+
+        db = Database(temp_db_path)
+        assert db.get_folder_counts() == {"f": 1}
+        assert db.get_folder_tree()[0].total_document_count == 1
+
+
+class TestTransaction:
+    """工作单元事务"""
+
+    def test_commits_once_on_single_connection(self, temp_db_path: Path, monkeypatch):
+        """事务内的操作共享一个连接，块结束时提交"""
+        db = Database(temp_db_path)
+        connects = []
+        original = db._connect
+        monkeypatch.setattr(db, "_connect", lambda: connects.append(1) or original())
+
+        with db.transaction():
+            assert db.in_transaction
+            db.add_tag(Tag(id="t1", name="work"))
+            db.add_document_tag("d1", "t1")
+            assert db.get_tag("t1") is not None
+            # 其他连接看不到未提交的数据
+            other = sqlite3.connect(str(temp_db_path))
+            assert other.execute("SELECT COUNT(*) FROM tags").fetchone()[0] == 0
+            other.close()
+
+        assert len(connects) == 1
+        assert not db.in_transaction
+        assert db.get_tag("t1").name == "work"
+
+    def test_rolls_back_on_error(self, temp_db_path: Path):
+        """块内异常时整体回滚"""
+        db = Database(temp_db_path)
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.add_tag(Tag(id="t1", name="work"))
+                with db.transaction():
+                    db.add_tag(Tag(id="t2", name="home"))
+                raise RuntimeError("abort")
+
+        assert db.get_all_tags() == []
@@ -0,0 +1,72 @@
+"""
+文件管理器单元测试
+"""
+
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.file_manager import (
+    DocumentNotFoundError,
+    FileManager,
+    FolderNotFoundError,
+)
+from huawei_pdf_reader.models import DocumentEntry, Folder
+
+
+@pytest.fixture
+def file_manager(temp_db_path: Path) -> FileManager:
+    db = Database(temp_db_path)
+    for i in range(3):
+        db.add_document(DocumentEntry(
+            id=f"d{i}", path=Path(f"/tmp/d{i}.pdf"), title=f"d{i}", file_type="pdf", size=0
+        ))
+    db.add_folder(Folder(id="f1", name="f1"))
+    return FileManager(db=db)
+
+
+class TestBulkOperations:
+    """批量操作"""
+
+    def test_add_tags_to_many_documents(self, file_manager: FileManager):
+        """批量打标签，自动创建标签"""
+        file_manager.add_tags(["d0", "d1", "d2"], ["work", "todo", "work"])
+
+        db = file_manager._db
+        tags = {t.name: t.id for t in db.get_all_tags()}
+        assert sorted(tags) == ["todo", "work"]
+        for tag_id in tags.values():
+            assert sorted(d.id for d in db.get_documents_by_tag(tag_id)) == ["d0", "d1", "d2"]
+
+    def test_add_tags_is_atomic(self, file_manager: FileManager):
+        """任一文档不存在时不做任何修改"""
+        with pytest.raises(DocumentNotFoundError, match="missing"):
+            file_manager.add_tags(["d0", "missing"], ["work"])
+
+        assert file_manager._db.get_all_tags() == []
+
+    def test_move_documents(self, file_manager: FileManager):
+        """批量移动文档"""
+        file_manager.move_documents(["d0", "d2"], "f1")
+
+        db = file_manager._db
+        assert sorted(d.id for d in db.get_documents(folder_id="f1")) == ["d0", "d2"]
+        assert db.get_folder_counts() == {"f1": 2}
+
+        file_manager.move_documents(["d0"], None)
+        assert db.get_document("d0").folder_id is None
+
+    def test_move_documents_validates_targets(self, file_manager: FileManager):
+        """目标文件夹或文档不存在时抛出异常且不移动"""
+        with pytest.raises(FolderNotFoundError):
+            file_manager.move_documents(["d0"], "missing")
+        with pytest.raises(DocumentNotFoundError):
+            file_manager.move_documents(["d0", "missing"], "f1")
+
+        assert file_manager._db.get_document("d0").folder_id is None
@@ -0,0 +1,102 @@
+"""
+笔迹延迟统计单元测试
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.ink_latency import (
+    LATENCY_BUCKETS_MS, STAGE_ENGINE, STAGE_PALM, InkLatencyMonitor, RingHistogram,
+)
+from huawei_pdf_reader.models import PenType, TouchEvent, TouchType
+from huawei_pdf_reader.palm_rejection import PalmRejectionSystem
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestRingHistogram:
+    """环形缓冲区直方图"""
+
+    def test_keeps_latest_values(self):
+        histogram = RingHistogram(LATENCY_BUCKETS_MS, capacity=4)
+        for value in [1, 100, 3, 5, 7, 9]:
+            histogram.add(value)
+
+        assert histogram.values() == [3, 5, 7, 9]
+        assert histogram.total == 6
+        stats = histogram.to_dict()
+        # 被覆盖的值不再计入桶
+        assert sum(stats["histogram"].values()) == 4
+        assert stats["histogram"] == {"<=4ms": 1, "<=8ms": 2, "<=12ms": 1}
+        assert (stats["p50"], stats["max"]) == (5, 9)
+
+
+class TestInkLatencyMonitor:
+    """延迟统计"""
+
+    def test_pipeline_stages(self):
+        clock = FakeClock()
+        monitor = InkLatencyMonitor(clock=clock)
+        events = [clock.now - 0.012, clock.now - 0.004]
+
+        clock.now += 0.001
+        monitor.mark_instructions(events, count=1)
+        monitor.count_instructions(3)
+        clock.now += 0.010
+        monitor.frame_presented()
+        clock.now += 0.016
+        monitor.frame_presented()
+
+        report = monitor.get_report()
+        assert round(report["latency_ms"]["instruction"]["max"], 6) == 13.0
+        present = report["latency_ms"]["present"]
+        assert present["count"] == 2 and round(present["max"], 6) == 23.0
+        assert round(report["frame_time_ms"]["max"], 6) == 16.0
+        # 第一帧更新了 4 条指令，第二帧没有更新
+        assert monitor._frame_instructions.values() == [4, 0]
+
+    def test_components_report_and_dump(self, temp_dir: Path):
+        clock = FakeClock()
+        monitor = InkLatencyMonitor(clock=clock)
+
+        engine = AnnotationEngine()
+        engine.set_latency_monitor(monitor)
+        stroke_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+        engine.add_points(stroke_id, [0.0, 1.0], [0.0, 1.0], [0.5, 0.5],
+                          [clock.now - 0.005, clock.now - 0.002])
+        engine.add_point(stroke_id, 2.0, 2.0, 0.5)
+
+        palm = PalmRejectionSystem()
+        palm.set_latency_monitor(monitor)
+        palm.should_reject(TouchEvent(id=1, x=0, y=0, pressure=0.1, size=0.9,
+                                      touch_type=TouchType.UNKNOWN, timestamp=clock.now - 0.003))
+        # 画布使用的批量接口记录到同一统计项
+        assert palm.should_reject_batch([0.9], [0.1], timestamps=[clock.now - 0.001]) == [True]
+
+        report = monitor.get_report()
+        assert report["latency_ms"][STAGE_ENGINE]["count"] == 2
+        assert round(report["latency_ms"][STAGE_ENGINE]["max"], 6) == 5.0
+        assert round(report["latency_ms"][STAGE_PALM]["max"], 6) == 3.0
+        assert report["latency_ms"][STAGE_PALM]["count"] == 2
+        assert set(report["durations_ms"]) == {"add_point", "add_points", "palm_rejection"}
+        assert report["durations_ms"]["palm_rejection"]["count"] == 2
+        assert monitor.summary_lines()
+
+        path = temp_dir / "latency.json"
+        monitor.dump_json(path)
+        assert json.loads(path.read_text(encoding="utf-8")) == report
+
+        monitor.reset()
+        assert monitor.get_report()["latency_ms"][STAGE_ENGINE]["count"] == 0
@@ -0,0 +1,137 @@
+"""
+注释延迟加载单元测试
+"""
+
+import random
+import shutil
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+
+
+PAGES = 30
+STROKES_PER_PAGE = 5
+
+
+def make_stroke(stroke_id: str, x: float) -> Stroke:
+    return Stroke(
+        id=stroke_id,
+        pen_type=PenType.BALLPOINT,
+        color="#000000",
+        width=2.0,
+        points=[StrokePoint(x=x, y=i * 10.0, pressure=0.5, timestamp=0.0) for i in range(3)],
+    )
+
+
+def page_ids(engine: AnnotationEngine, page_num: int):
+    return [s.id for a in engine.get_annotations(page_num) for s in a.strokes]
+
+
+@pytest.fixture
+def annotated_db(temp_dir: Path) -> Path:
+    """每页若干笔画的文档"""
+    db_path = temp_dir / "base.db"
+    engine = AnnotationEngine(Database(db_path))
+    engine.load_annotations("doc")
+    for page in range(1, PAGES + 1):
+        for i in range(STROKES_PER_PAGE):
+            engine.add_stroke_to_page(page, make_stroke(f"p{page}-{i}", i * 40.0))
+    engine.save_annotations("doc")
+    return db_path
+
+
+class TestLazyLoading:
+    """按页延迟加载"""
+
+    def test_open_loads_no_strokes(self, annotated_db: Path):
+        engine = AnnotationEngine(Database(annotated_db), lazy=True, prefetch_pages=0)
+        engine.load_annotations("doc")
+
+        assert engine.get_loaded_pages() == []
+        assert not engine.is_page_loaded(3)
+        assert page_ids(engine, 3) == [f"p3-{i}" for i in range(STROKES_PER_PAGE)]
+        assert engine.is_page_loaded(3)
+
+    def test_neighbours_are_prefetched(self, annotated_db: Path):
+        engine = AnnotationEngine(Database(annotated_db), lazy=True, prefetch_pages=2)
+        engine.load_annotations("doc")
+        engine.get_annotations(10)
+
+        assert sorted(engine._prefetch_futures) == [8, 9, 11, 12]
+        for future in engine._prefetch_futures.values():
+            future.result()
+        assert page_ids(engine, 11) == [f"p11-{i}" for i in range(STROKES_PER_PAGE)]
+        assert 11 not in engine._prefetch_futures
+        engine.close()
+
+    def test_lru_unloads_only_clean_pages(self, annotated_db: Path):
+        engine = AnnotationEngine(
+            Database(annotated_db), lazy=True, prefetch_pages=0, max_loaded_pages=3
+        )
+        engine.load_annotations("doc")
+        engine.add_stroke_to_page(1, make_stroke("new", 500.0))
+        for page in range(2, 12):
+            engine.get_annotations(page)
+
+        assert engine.is_page_loaded(1)
+        assert len(engine.get_loaded_pages()) <= 3 + 1
+        assert not engine.is_page_loaded(2)
+
+        # 新笔画排在原有笔画之后，卸载的页面重新加载后内容不变
+        engine.save_annotations("doc")
+        assert page_ids(engine, 1)[-1] == "new"
+        assert page_ids(engine, 2) == [f"p2-{i}" for i in range(STROKES_PER_PAGE)]
+        seqs = [seq for _, seq, _ in Database(annotated_db).get_strokes("doc", 1)]
+        assert seqs == sorted(seqs)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lazy_matches_eager(annotated_db: Path, temp_dir: Path, seed: int):
+    """延迟加载与全部加载在相同操作下保存出相同的数据"""
+    engines = []
+    for name, options in (("eager", {}), ("lazy", {"lazy": True, "max_loaded_pages": 2})):
+        db_path = temp_dir / f"{name}-{seed}.db"
+        shutil.copy(annotated_db, db_path)
+        engine = AnnotationEngine(Database(db_path), **options)
+        engine.load_annotations("doc")
+        engines.append((engine, db_path))
+
+    rng = random.Random(seed)
+    operations = []
+    for n in range(60):
+        page = rng.randint(1, 8)
+        op = rng.choice(["add", "erase", "clear", "undo", "redo", "view", "save"])
+        operations.append((op, page, rng.uniform(0, 200), n))
+
+    for engine, _ in engines:
+        for op, page, x, n in operations:
+            if op == "add":
+                engine.add_stroke_to_page(page, make_stroke(f"n{n}", x))
+            elif op == "erase":
+                engine.erase_at(page, x, 10.0, 15.0)
+            elif op == "clear":
+                engine.clear_annotations(page)
+            elif op == "undo":
+                engine.undo()
+            elif op == "redo":
+                engine.redo()
+            elif op == "view":
+                engine.get_annotations(page)
+            else:
+                engine.save_annotations("doc")
+        engine.save_annotations("doc")
+        engine.close()
+
+    (eager, eager_path), (lazy, lazy_path) = engines
+    eager_rows = [(p, seq, s.id) for p, seq, s in Database(eager_path).get_strokes("doc")]
+    lazy_rows = [(p, seq, s.id) for p, seq, s in Database(lazy_path).get_strokes("doc")]
+    assert lazy_rows == eager_rows
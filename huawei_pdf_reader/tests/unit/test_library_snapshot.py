@@ -0,0 +1,125 @@
+"""
+文档库快照单元测试
+"""
+
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+from huawei_pdf_reader.app import AppConfig, Application
+from huawei_pdf_reader.backup_service import BackupProvider, BackupService
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.file_manager import FileManager
+from huawei_pdf_reader.library_snapshot import LibrarySnapshot
+from huawei_pdf_reader.models import DocumentEntry, Folder
+
+
+def _ids(docs):
+    return [doc.id for doc in docs]
+
+
+@pytest.fixture
+def db(temp_db_path: Path) -> Database:
+    db = Database(temp_db_path)
+    db.add_folder(Folder(id="f1", name="f1"))
+    for i, (title, file_type, folder_id) in enumerate([
+        ("Beta notes", "docx", None),
+        ("alpha paper", "pdf", None),
+        ("Gamma paper", "pdf", "f1"),
+    ]):
+        db.add_document(DocumentEntry(
+            id=f"d{i}", path=Path(f"/library/d{i}.{file_type}"), title=title,
+            file_type=file_type, size=10 - i, folder_id=folder_id,
+        ))
+    return db
+
+
+@pytest.fixture
+def file_manager(db: Database) -> FileManager:
+    return FileManager(db=db, snapshot=LibrarySnapshot(db))
+
+
+class TestLibrarySnapshot:
+    """文档库快照"""
+
+    def test_queries_match_database(self, db: Database, file_manager: FileManager):
+        """快照查询结果与数据库一致"""
+        file_manager.add_tags(["d1", "d2"], ["paper"])
+        plain = FileManager(db=db)
+
+        for kwargs in ({}, {"folder_id": ""}, {"folder_id": "f1"}, {"tag": "paper"},
+                       {"tag": "paper", "folder_id": "f1"}):
+            assert _ids(file_manager.get_documents(**kwargs)) == _ids(plain.get_documents(**kwargs))
+        # 空字符串与None一样表示根目录
+        assert _ids(file_manager.get_documents(folder_id="")) == ["d0", "d1"]
+        assert [f.id for f in file_manager.get_folders("")] == ["f1"]
+        assert sorted(_ids(file_manager.search_documents("PAPER"))) == ["d1", "d2"]
+        assert file_manager.get_documents(tag="paper")[0].tags == ["paper"]
+
+    def test_reads_do_not_hit_database(self, file_manager: FileManager, monkeypatch):
+        """加载后的查询不再访问数据库"""
+        file_manager.get_documents()
+        monkeypatch.setattr(
+            Database, "_get_connection", lambda self: pytest.fail("database queried")
+        )
+
+        file_manager.get_documents(folder_id="f1")
+        file_manager.search_documents("paper")
+        file_manager.filter_documents(tags=["missing"])
+        file_manager.get_all_tags()
+
+    def test_filter_sort_and_tag_intersection(self, file_manager: FileManager):
+        """组合筛选、标签交集和排序"""
+        file_manager.add_tags(["d0", "d1", "d2"], ["a"])
+        file_manager.add_tags(["d1", "d2"], ["b"])
+
+        assert _ids(file_manager.filter_documents(tags=["a", "b"], all_folders=True)) == ["d1", "d2"]
+        assert _ids(file_manager.filter_documents(tags=["a", "b"])) == ["d1"]
+        assert _ids(file_manager.filter_documents(file_type="pdf", all_folders=True,
+                                                  sort_by="title")) == ["d1", "d2"]
+        assert _ids(file_manager.filter_documents(all_folders=True, sort_by="size")) == ["d2", "d1", "d0"]
+
+    def test_mutations_invalidate_snapshot(self, file_manager: FileManager, db: Database):
+        """文件管理器的修改实时反映到快照"""
+        assert _ids(file_manager.get_documents()) == ["d0", "d1"]
+
+        file_manager.move_document("d0", "f1")
+        file_manager.rename_document("d1", "Renamed")
+        assert _ids(file_manager.get_documents(folder_id="f1")) == ["d0", "d2"]
+        assert file_manager.get_documents()[0].title == "Renamed"
+
+        file_manager.delete_document("d1")
+        assert file_manager.get_documents() == []
+        assert _ids(file_manager.get_deleted_documents()) == ["d1"]
+        file_manager.restore_document("d1")
+        file_manager.permanent_delete_document("d2")
+        assert _ids(file_manager.filter_documents(all_folders=True)) == ["d0", "d1"]
+
+        file_manager.add_tag("d0", "work")
+        file_manager.remove_tag("d0", "work")
+        assert file_manager.get_documents(tag="work") == []
+        assert [t.name for t in file_manager.get_all_tags()] == ["work"]
+
+        folder = file_manager.create_folder("new")
+        assert [f.id for f in file_manager.get_folders()] == ["f1", folder.id]
+        file_manager.delete_folder("f1")
+        assert _ids(file_manager.get_documents()) == ["d0", "d1"]
+        assert [f.id for f in file_manager.get_folders()] == [folder.id]
+
+
+def test_restore_invalidates_snapshot(db: Database, temp_dir: Path):
+    """恢复备份绕过文件管理器写入数据库，恢复后快照重新加载"""
+    app = Application(AppConfig(data_dir=temp_dir / "app", temp_dir=temp_dir / "tmp"))
+    source = BackupService(database=db, data_dir=temp_dir, backup_dir=app.config.backups_path)
+    assert source.backup(BackupProvider.LOCAL)
+
+    file_manager = app.get_file_manager()
+    assert file_manager.get_documents() == []
+    assert app.get_backup_service().restore(BackupProvider.LOCAL)
+    assert sorted(_ids(file_manager.get_documents())) == ["d0", "d1"]
+    app.get_settings_store().close()
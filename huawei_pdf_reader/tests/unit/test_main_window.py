@@ -0,0 +1,125 @@
+"""
+主窗口单元测试（需要 Kivy 和 OpenGL 窗口）
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+pytest.importorskip("kivy")
+
+import fitz
+from kivy.base import EventLoop
+from kivy.clock import Clock
+from kivy.uix.widget import Widget
+
+from huawei_pdf_reader.app import AppConfig, Application
+from huawei_pdf_reader.models import PenType
+from huawei_pdf_reader.ui.main_window import MainWindow
+from huawei_pdf_reader.ui.reader_view import ReaderView
+
+
+def tick_until(condition, timeout: float = 5.0) -> None:
+    """推进Kivy时钟直到条件成立"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        Clock.tick()
+        time.sleep(0.01)
+
+
+class StubMagnifier(Widget):
+    """替代放大镜组件（其 ActionBar 与 Kivy 内置的 <ActionBar> 规则同名，无法在测试中创建）"""
+
+    def __init__(self, theme=None, on_region_selected=None, on_action_requested=None, **kwargs):
+        super().__init__(**kwargs)
+
+
+@pytest.fixture
+def application(temp_dir: Path):
+    EventLoop.ensure_window()
+    app = Application(AppConfig(data_dir=temp_dir / "app", temp_dir=temp_dir / "tmp"))
+    app.initialize()
+    yield app
+    app.shutdown()
+
+
+@pytest.fixture
+def window(application: Application, monkeypatch):
+    # 设置页的 SettingItem 同样与 Kivy 内置规则同名，不创建子视图，只检查交付给文件管理视图的数据
+    monkeypatch.setattr(MainWindow, "_setup_ui", lambda self: None)
+    main_window = MainWindow(application=application)
+    main_window._file_manager_view = SimpleNamespace(documents=None, tags=None)
+    return main_window
+
+
+def test_library_io_runs_off_main_thread(application: Application, window: MainWindow,
+                                         temp_dir: Path, monkeypatch):
+    """文档列表加载和文档导入在后台线程执行，结果在主线程交付"""
+    main = threading.get_ident()
+    file_manager = application.get_file_manager()
+    threads = []
+    for name in ("get_documents", "import_document"):
+        original = getattr(file_manager, name)
+
+        def recording(*args, _original=original, **kwargs):
+            threads.append(threading.get_ident())
+            return _original(*args, **kwargs)
+
+        monkeypatch.setattr(file_manager, name, recording)
+
+    window.refresh_documents()
+    view = window._file_manager_view
+    tick_until(lambda: view.documents is not None and view.tags is not None)
+    assert window._file_manager_view.documents == []
+    assert window._file_manager_view.tags == []
+
+    source = temp_dir / "paper.pdf"
+    doc = fitz.open()
+    doc.new_page()
+    doc.save(str(source))
+    doc.close()
+
+    imported = []
+    future = window.import_document(source, on_imported=imported.append)
+    entry = future.result(5)
+    tick_until(lambda: imported and window._file_manager_view.documents)
+    assert imported == [entry]
+    assert [d.id for d in window._file_manager_view.documents] == [entry.id]
+    assert len(threads) == 3 and main not in threads
+
+
+def test_annotations_saved_on_writer_thread(application: Application, monkeypatch):
+    """关闭文档时注释在写线程保存"""
+    monkeypatch.setattr("huawei_pdf_reader.ui.magnifier_widget.MagnifierWidget", StubMagnifier)
+    engine = application.get_annotation_engine()
+    reader = ReaderView(annotation_engine=engine)
+    reader.set_async_database(application.get_async_database())
+    database = application.get_database()
+    threads = []
+    original = database.save_stroke_changes
+
+    def recording(*args, **kwargs):
+        threads.append(threading.get_ident())
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(database, "save_stroke_changes", recording)
+
+    engine.load_annotations("doc")
+    stroke_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+    engine.add_points(stroke_id, [0.0, 10.0], [0.0, 10.0], [0.5, 0.5])
+    engine.add_stroke_to_page(1, engine.end_stroke(stroke_id))
+    reader._doc_id = "doc"
+    reader.close_document()
+
+    application.get_async_database().flush(5)
+    assert threads and threading.get_ident() not in threads
+    assert [s.id for _, _, s in database.get_strokes("doc")] == [stroke_id]
@@ -0,0 +1,124 @@
+"""
+逐触点防误触跟踪单元测试
+"""
+
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.models import PenType, TouchType
+from huawei_pdf_reader.palm_rejection import ContactState, PalmRejectionSystem, PalmTracker
+
+
+FINGER = (0.2, 0.5)
+PALM = (0.9, 0.1)
+
+
+def feed(tracker: PalmTracker, touch_id: int, samples, start: float = 0.0,
+         interval: float = 0.01):
+    """依次送入 (面积, 压力) 采样，返回每次更新后的状态"""
+    return [
+        tracker.update(touch_id, size, pressure, start + i * interval)
+        for i, (size, pressure) in enumerate(samples)
+    ]
+
+
+def test_finger_accepted_after_decision_window():
+    tracker = PalmTracker(PalmRejectionSystem())
+    states = feed(tracker, 1, [FINGER] * 8)
+    assert states[:5] == [ContactState.PENDING] * 5
+    assert states[5:] == [ContactState.ACCEPTED] * 3
+    assert tracker.end(1) is ContactState.ACCEPTED
+    assert tracker.active_count == 0 and tracker.end(1) is None
+
+
+def test_growing_palm_rejected_inside_window():
+    """落下时像手指、判定窗口内面积增大的手掌直接拒绝，无需撤销"""
+    tracker = PalmTracker(PalmRejectionSystem())
+    states = feed(tracker, 1, [FINGER, FINGER, PALM, FINGER])
+    assert states == [ContactState.PENDING, ContactState.PENDING,
+                      ContactState.REJECTED, ContactState.REJECTED]
+    assert not tracker.get_track(1).retracted
+
+
+def test_accepted_contact_retracted_with_hysteresis():
+    tracker = PalmTracker(PalmRejectionSystem())
+    feed(tracker, 1, [FINGER] * 10)
+    # 单个噪声采样不改判
+    states = feed(tracker, 1, [PALM, FINGER, FINGER, PALM], start=0.1)
+    assert states == [ContactState.ACCEPTED] * 4
+    # 最近判定中第三次被拒绝时改判，并保持拒绝
+    states = feed(tracker, 1, [PALM, FINGER, FINGER], start=0.14)
+    assert states == [ContactState.REJECTED] * 3
+    assert tracker.get_track(1).retracted
+    assert tracker.end(1) is ContactState.REJECTED
+
+
+def test_old_rejections_leave_history():
+    tracker = PalmTracker(PalmRejectionSystem())
+    feed(tracker, 1, [FINGER] * 10)
+    feed(tracker, 1, [PALM, PALM] + [FINGER] * PalmTracker.HISTORY_SIZE, start=0.1)
+    assert tracker.update(1, *PALM, 1.0) is ContactState.ACCEPTED
+    assert tracker.get_track(1).rejected_votes == 1
+
+
+def test_contacts_tracked_independently():
+    tracker = PalmTracker(PalmRejectionSystem())
+    tracker.update(1, *FINGER, 0.0)
+    tracker.update(2, *PALM, 0.0)
+    assert tracker.get_track(1).state is ContactState.PENDING
+    assert tracker.get_track(2).state is ContactState.REJECTED
+    # 窗口内抬起的点按视为接受
+    assert tracker.end(1) is ContactState.ACCEPTED
+    tracker.reset()
+    assert tracker.active_count == 0
+
+
+def test_stylus_and_disabled_accept_immediately():
+    palm_rejection = PalmRejectionSystem()
+    tracker = PalmTracker(palm_rejection)
+    assert tracker.update(1, *PALM, 0.0, TouchType.STYLUS) is ContactState.ACCEPTED
+
+    palm_rejection.enable_palm_rejection(False)
+    assert tracker.update(2, *PALM, 0.0) is ContactState.ACCEPTED
+
+
+def test_cancel_stroke():
+    engine = AnnotationEngine()
+    stroke_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+    engine.add_points(stroke_id, [0.0, 10.0, 20.0], [0.0, 0.0, 5.0], [0.5] * 3)
+    assert engine.speculate_shape(stroke_id) is not None
+
+    assert engine.cancel_stroke(stroke_id)
+    assert not engine.cancel_stroke(stroke_id)
+    assert engine.speculate_shape(stroke_id) is None
+    assert engine.get_annotations(1) == [] and not engine.can_undo()
+    engine.close()
+
+
+def test_revert_erase():
+    """事后判定为手掌的橡皮擦触点：恢复擦掉的笔画并删除擦除记录"""
+    engine = AnnotationEngine()
+    strokes = []
+    for i in range(3):
+        stroke_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+        engine.add_points(stroke_id, [0.0, 100.0], [i * 20.0, i * 20.0], [0.5] * 2)
+        strokes.append(engine.end_stroke(stroke_id))
+        engine.add_stroke_to_page(1, strokes[-1])
+
+    first = engine.erase_at(1, 50.0, 0.0, 5.0)
+    second = engine.erase_at(1, 50.0, 40.0, 5.0)
+    assert first == [strokes[0].id] and second == [strokes[2].id]
+
+    restored = engine.revert_erase(1, first + second)
+    assert restored == [strokes[0].id, strokes[2].id]
+    assert engine.get_annotations(1)[0].strokes == strokes
+    # 撤销的是最后一次添加，而不是已还原的擦除
+    engine.undo()
+    assert engine.get_annotations(1)[0].strokes == strokes[:2]
+    assert engine.revert_erase(1, first) == []
+    engine.close()
@@ -0,0 +1,154 @@
+"""
+设置存储单元测试
+"""
+
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+from huawei_pdf_reader.backup_service import BackupProvider, BackupService
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.models import Settings
+from huawei_pdf_reader.settings_store import SettingsStore
+
+
+class CountingDatabase(Database):
+    """记录写入次数的数据库"""
+
+    def __init__(self, db_path: Path):
+        super().__init__(db_path)
+        self.writes = []
+        self.fail_writes = False
+
+    def save_setting_values(self, values):
+        if self.fail_writes:
+            raise sqlite3.OperationalError("disk I/O error")
+        self.writes.append(dict(values))
+        super().save_setting_values(values)
+
+
+@pytest.fixture
+def db(temp_db_path: Path) -> CountingDatabase:
+    return CountingDatabase(temp_db_path)
+
+
+class TestSettingsStore:
+    """设置存储"""
+
+    def test_burst_of_updates_is_written_once(self, db: CountingDatabase, temp_db_path: Path):
+        """连续修改在静默后合并为一次写入"""
+        store = SettingsStore(db, flush_delay=0.05)
+        for sensitivity in range(1, 11):
+            store.settings.stylus.palm_rejection_sensitivity = sensitivity
+            store.update()
+        store.set_value("last_folder", "f1")
+        assert db.writes == []
+
+        deadline = time.monotonic() + 5
+        while store.has_pending_changes and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert len(db.writes) == 1
+        assert set(db.writes[0]) == {"app_settings", "last_folder"}
+        reloaded = Database(temp_db_path)
+        assert reloaded.load_settings().stylus.palm_rejection_sensitivity == 10
+        assert reloaded.get_setting("last_folder") == "f1"
+        store.close()
+
+    def test_single_flush_thread(self, db: CountingDatabase):
+        """连续修改只推后截止时间，不会为每次修改创建线程"""
+        store = SettingsStore(db, flush_delay=60)
+        store.update()
+        worker = store._worker
+        for _ in range(50):
+            store.update()
+        assert store._worker is worker
+        assert [t.name for t in threading.enumerate()].count("settings-flush") == 1
+
+        store.close()
+        worker.join(5)
+        assert not worker.is_alive() and len(db.writes) == 1
+
+    def test_listeners_notified_on_update(self, db: CountingDatabase):
+        """修改时通知监听者"""
+        store = SettingsStore(db, flush_delay=60)
+        seen = []
+        store.bind(seen.append)
+        new_settings = Settings(theme="light")
+        store.update(new_settings)
+        store.unbind(seen.append)
+        store.update()
+
+        assert seen == [new_settings]
+        assert store.settings is new_settings
+        store.close()
+
+    def test_close_flushes_pending_changes(self, db: CountingDatabase, temp_db_path: Path):
+        """关闭时立即写入未保存的变更"""
+        store = SettingsStore(db, flush_delay=60)
+        store.settings.theme = "light"
+        store.update()
+        store.close()
+
+        assert not store.has_pending_changes
+        assert Database(temp_db_path).load_settings().theme == "light"
+
+    def test_failed_flush_keeps_changes(self, db: CountingDatabase, temp_db_path: Path):
+        """写入失败时保留变更，之后重试成功"""
+        store = SettingsStore(db, flush_delay=60)
+        store.settings.theme = "light"
+        store.update()
+        store.set_value("last_folder", "f1")
+
+        db.fail_writes = True
+        with pytest.raises(sqlite3.Error):
+            store.flush()
+        assert store.has_pending_changes
+        assert Database(temp_db_path).load_settings().theme == "dark_green"
+
+        db.fail_writes = False
+        assert store.flush()
+        assert not store.has_pending_changes
+        assert not store.flush()
+        assert Database(temp_db_path).get_setting("last_folder") == "f1"
+        store.close()
+
+    def test_values_are_cached(self, db: CountingDatabase, monkeypatch):
+        """单个设置项读取后缓存，未写入的值可立即读到"""
+        db.save_setting("lang", "zh_CN")
+        store = SettingsStore(db, flush_delay=60)
+        assert store.get_value("lang") == "zh_CN"
+
+        monkeypatch.setattr(db, "get_setting", lambda *a, **k: pytest.fail("not cached"))
+        assert store.get_value("lang") == "zh_CN"
+        store.set_value("lang", "en_US")
+        assert store.get_value("lang") == "en_US"
+        store.close()
+
+    def test_reload_after_restore(self, db: CountingDatabase, temp_dir: Path):
+        """恢复备份后重新加载，之后的写入不会覆盖恢复的设置"""
+        store = SettingsStore(db, flush_delay=60)
+        service = BackupService(database=db, data_dir=temp_dir, backup_dir=temp_dir / "backups")
+        service.bind_restore(store.reload)
+        store.settings.theme = "light"
+        store.update()
+        store.flush()
+        assert service.backup(BackupProvider.LOCAL)
+
+        # 备份之后未写入的修改
+        store.settings.theme = "dark_green"
+        store.update()
+        assert service.restore(BackupProvider.LOCAL)
+        assert store.settings.theme == "light" and not store.has_pending_changes
+
+        store.set_value("last_folder", "f1")
+        store.close()
+        assert Database(db.db_path).load_settings().theme == "light"
@@ -0,0 +1,227 @@
+"""
+一笔成型形状识别单元测试
+"""
+
+import math
+import random
+import sys
+import threading
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+from huawei_pdf_reader.shape_recognizer import (
+    HAS_NUMPY, ArrowRecognizer, EllipseRecognizer, ShapeFeatures, ShapeRecognizer,
+    ShapeRecognizerPipeline, SpeculativeShapeRecognizer,
+)
+
+
+def make_stroke(coords) -> Stroke:
+    return Stroke(
+        id="s",
+        pen_type=PenType.BALLPOINT,
+        color="#000000",
+        width=2.0,
+        points=[StrokePoint(x=x, y=y, pressure=0.5, timestamp=0.0) for x, y in coords],
+    )
+
+
+def polyline(corners, step: float = 6.0):
+    """按近似等间距采样折线"""
+    coords = []
+    for (x0, y0), (x1, y1) in zip(corners, corners[1:]):
+        per_side = max(1, round(math.hypot(x1 - x0, y1 - y0) / step))
+        coords.extend(
+            (x0 + (x1 - x0) * i / per_side, y0 + (y1 - y0) * i / per_side)
+            for i in range(per_side)
+        )
+    coords.append(corners[-1])
+    return coords
+
+
+def ellipse(a: float, b: float, count: int = 60):
+    return [
+        (200 + a * math.cos(2 * math.pi * i / count), 200 + b * math.sin(2 * math.pi * i / count))
+        for i in range(count + 1)
+    ]
+
+
+SHAPES = {
+    "line": [(10.0 + i * 5, 20.0 + i * 2 + (i % 2) * 0.5) for i in range(30)],
+    "circle": ellipse(80, 80),
+    "rectangle": polyline([(0, 0), (120, 0), (120, 80), (0, 80), (0, 0)]),
+    # 端点不参与拐角检测，三角形从边的中点起笔
+    "triangle": polyline([(50, 0), (100, 0), (50, 90), (0, 0), (50, 0)]),
+}
+
+VECTORIZE_MODES = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy is not installed"))]
+
+
+@pytest.mark.parametrize("vectorize", VECTORIZE_MODES)
+class TestDefaultPipeline:
+    """默认识别器"""
+
+    def test_recognizes_basic_shapes(self, vectorize):
+        pipeline = ShapeRecognizerPipeline(vectorize=vectorize)
+        expected_points = {"line": 2, "circle": 37, "rectangle": 5, "triangle": 4}
+        for name, coords in SHAPES.items():
+            shape = pipeline.recognize(make_stroke(coords))
+            assert shape is not None and len(shape.points) == expected_points[name], name
+
+        scribble = random.Random(1)
+        coords = [(scribble.uniform(0, 100), scribble.uniform(0, 100)) for _ in range(80)]
+        assert pipeline.recognize(make_stroke(coords)) is None
+
+    def test_resampled_recognition(self, vectorize):
+        pipeline = ShapeRecognizerPipeline(resample=32, vectorize=vectorize)
+        # 采样密度不均匀的圆：一半点集中在四分之一圆周上
+        coords = ellipse(80, 80, 40)[:11] + ellipse(80, 80, 400)[101:]
+        features = ShapeFeatures.from_stroke(make_stroke(coords), 32, vectorize)
+        assert len(features) == 32
+        assert features.end == pytest.approx(coords[-1])
+        assert len(pipeline.recognize(make_stroke(coords)).points) == 37
+
+    def test_extra_recognizers(self, vectorize):
+        pipeline = ShapeRecognizerPipeline(vectorize=vectorize)
+        # 未注册椭圆识别器时，扁椭圆会被当作矩形
+        flat = make_stroke(ellipse(120, 50))
+        assert len(pipeline.recognize(flat).points) == 5
+
+        pipeline.register(EllipseRecognizer())
+        pipeline.register(ArrowRecognizer())
+        assert [r.name for r in pipeline.recognizers] == [
+            "line", "arrow", "circle", "ellipse", "rectangle", "triangle",
+        ]
+        assert len(pipeline.recognize(flat).points) == 49
+
+        arrow = polyline([(0, 0), (200, 0), (170, 20), (200, 0), (170, -20)])
+        shape = pipeline.recognize(make_stroke(arrow))
+        assert shape is not None and len(shape.points) == 5
+        assert (shape.points[1].x, shape.points[1].y) == (200.0, 0.0)
+
+        assert pipeline.unregister("arrow") and not pipeline.unregister("arrow")
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")
+def test_vectorized_matches_python():
+    rng = random.Random(5)
+    python, vectorized = ShapeRecognizerPipeline(vectorize=False), ShapeRecognizerPipeline(vectorize=True)
+    for coords in SHAPES.values():
+        for _ in range(20):
+            noisy = [(x + rng.uniform(-4, 4), y + rng.uniform(-4, 4)) for x, y in coords]
+            a = python.recognize(make_stroke(noisy))
+            b = vectorized.recognize(make_stroke(noisy))
+            assert (a is None) == (b is None)
+            if a is not None:
+                assert [(p.x, p.y) for p in a.points] == pytest.approx([(p.x, p.y) for p in b.points])
+
+
+def test_early_rejection_skips_expensive_features():
+    """开放笔画不执行闭合图形识别器，也不计算它们需要的特征"""
+    calls = []
+
+    class Spy(ShapeRecognizer):
+        name = "spy"
+        priority = 50
+        closed = True
+
+        def recognize(self, features, stroke):
+            calls.append(stroke.id)
+            return None
+
+    pipeline = ShapeRecognizerPipeline()
+    pipeline.register(Spy())
+    stroke = make_stroke([(i * 10.0, (i % 3) * 40.0) for i in range(20)])
+    features = ShapeFeatures.from_stroke(stroke)
+
+    assert pipeline.recognize(stroke) is None
+    assert calls == []
+    assert not features.closed
+    assert "radial_deviation" not in vars(features)
+
+
+def test_engine_uses_pipeline():
+    engine = AnnotationEngine()
+    assert len(engine.shape_recognition(make_stroke(ellipse(120, 50))).points) == 5
+    engine.get_shape_recognizer().register(EllipseRecognizer())
+    assert len(engine.shape_recognition(make_stroke(ellipse(120, 50))).points) == 49
+
+
+def draw(engine: AnnotationEngine, stroke_id: str, coords) -> None:
+    engine.add_points(stroke_id, [x for x, _ in coords], [y for _, y in coords],
+                      [0.5] * len(coords))
+
+
+class TestSpeculativeRecognition:
+    """后台推测识别"""
+
+    def test_reuses_speculation_when_stroke_unchanged(self):
+        engine = AnnotationEngine()
+        stroke_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+        draw(engine, stroke_id, SHAPES["circle"])
+
+        speculation = engine.speculate_shape(stroke_id)
+        assert engine.speculate_shape(stroke_id) is speculation
+        stroke = engine.end_stroke(stroke_id, simplify=False)
+        assert engine.recognize_shape_async(stroke) is speculation
+        assert len(speculation.result(timeout=5).points) == 37
+        engine.close()
+
+    def test_new_points_invalidate_speculation(self):
+        engine = AnnotationEngine()
+        stroke_id = engine.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+        line = SHAPES["line"]
+        draw(engine, stroke_id, line)
+        speculation = engine.speculate_shape(stroke_id)
+        # 停顿后原路折返，整条笔画不再是直线
+        draw(engine, stroke_id, [(x, y + 30) for x, y in reversed(line)])
+
+        stroke = engine.end_stroke(stroke_id, simplify=False)
+        final = engine.recognize_shape_async(stroke)
+        assert final is not speculation
+        assert final.result(timeout=5) is None
+        assert engine._shape_speculator.speculative_misses == 1
+        engine.close()
+
+    def test_recognizes_snapshot(self):
+        """识别使用提交时的点快照，之后追加的点不影响进行中的识别"""
+        release = threading.Event()
+
+        def recognize(stroke):
+            release.wait(5)
+            return len(stroke.points)
+
+        speculator = SpeculativeShapeRecognizer(recognize)
+        stroke = make_stroke(SHAPES["line"][:10])
+        future = speculator.speculate(stroke)
+        stroke.points.append(StrokePoint(x=0.0, y=0.0, pressure=0.5, timestamp=0.0))
+        release.set()
+        assert future.result(timeout=5) == 10
+        speculator.shutdown()
+
+    def test_apply_recognized_shape(self):
+        engine = AnnotationEngine()
+        stroke = make_stroke(SHAPES["rectangle"])
+        shape = engine.recognize_shape_async(stroke).result(timeout=5)
+        engine.add_stroke_to_page(1, stroke)
+
+        assert engine.apply_recognized_shape(1, stroke, shape)
+        assert engine.get_annotations(1)[0].strokes == [shape]
+        # 撤销替换恢复手绘笔画
+        engine.undo()
+        assert engine.get_annotations(1)[0].strokes == [stroke]
+
+        # 识别完成前笔画已被擦除时不替换
+        erased = make_stroke(SHAPES["circle"])
+        erased.id = "erased"
+        engine.add_stroke_to_page(1, erased)
+        engine.erase_along(1, [SHAPES["circle"][0]], 5.0)
+        assert not engine.apply_recognized_shape(1, erased, shape)
+        engine.close()
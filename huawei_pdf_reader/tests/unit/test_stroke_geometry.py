@@ -0,0 +1,87 @@
+"""
+笔画几何计算单元测试
+"""
+
+import random
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+from huawei_pdf_reader.stroke_geometry import HAS_NUMPY, strokes_hit_path
+
+
+def make_stroke(stroke_id: str, coords, width: float = 2.0) -> Stroke:
+    return Stroke(
+        id=stroke_id,
+        pen_type=PenType.BALLPOINT,
+        color="#000000",
+        width=width,
+        points=[StrokePoint(x=x, y=y, pressure=0.5, timestamp=0.0) for x, y in coords],
+    )
+
+
+VECTORIZE_MODES = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy is not installed"))]
+
+
+@pytest.mark.parametrize("vectorize", VECTORIZE_MODES)
+class TestStrokesHitPath:
+    """橡皮擦命中判断"""
+
+    def test_sparse_stroke_hit_between_samples(self, vectorize):
+        """快速绘制的稀疏笔画在两个采样点之间也能被擦到"""
+        stroke = make_stroke("s", [(0, 0), (200, 0)])
+        assert strokes_hit_path([stroke], [(100, 3)], 4.0, vectorize=vectorize) == [True]
+        assert strokes_hit_path([stroke], [(100, 6)], 4.0, vectorize=vectorize) == [False]
+
+    def test_stroke_width_counts(self, vectorize):
+        """粗笔画的边缘在橡皮擦范围内即命中"""
+        thin = make_stroke("thin", [(0, 0), (100, 0)], width=2.0)
+        thick = make_stroke("thick", [(0, 0), (100, 0)], width=20.0)
+        assert strokes_hit_path([thin, thick], [(50, 12)], 5.0, vectorize=vectorize) == [False, True]
+
+    def test_drag_path_sweeps_between_events(self, vectorize):
+        """橡皮擦两次事件之间扫过的笔画也被命中"""
+        vertical = make_stroke("v", [(50, -100), (50, 100)])
+        single = make_stroke("p", [(80, 1)])
+        far = make_stroke("far", [(0, 500), (100, 500)])
+        hits = strokes_hit_path(
+            [vertical, single, far], [(0, 0), (100, 0)], 2.0, vectorize=vectorize
+        )
+        assert hits == [True, True, False]
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")
+def test_vectorized_matches_python():
+    """NumPy 实现与纯 Python 实现结果一致"""
+    rng = random.Random(7)
+    strokes = [
+        make_stroke(str(i), [(rng.uniform(0, 500), rng.uniform(0, 500))
+                             for _ in range(rng.randint(1, 12))],
+                    width=rng.uniform(0.5, 10))
+        for i in range(300)
+    ]
+    for _ in range(20):
+        path = [(rng.uniform(0, 500), rng.uniform(0, 500)) for _ in range(rng.randint(1, 4))]
+        radius = rng.uniform(1, 30)
+        assert (strokes_hit_path(strokes, path, radius, vectorize=True)
+                == strokes_hit_path(strokes, path, radius, vectorize=False))
+
+
+def test_engine_erase_along_path():
+    """注释引擎按拖动路径擦除"""
+    engine = AnnotationEngine()
+    engine.add_stroke_to_page(1, make_stroke("a", [(50, -100), (50, 100)]))
+    engine.add_stroke_to_page(1, make_stroke("b", [(500, -100), (500, 100)]))
+    engine.add_stroke_to_page(1, make_stroke("c", [(150, -100), (150, 100)]))
+
+    assert engine.erase_at(1, 0, 0, 5.0) == []
+    assert engine.erase_along(1, [(0, 0), (100, 0), (200, 0)], 5.0) == ["a", "c"]
+    assert [s.id for a in engine.get_annotations(1) for s in a.strokes] == ["b"]
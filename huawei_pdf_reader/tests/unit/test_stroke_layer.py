@@ -0,0 +1,115 @@
+"""
+注释笔画图层单元测试（需要 Kivy 和 OpenGL 窗口）
+"""
+
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+pytest.importorskip("kivy")
+
+from kivy.base import EventLoop
+from kivy.graphics import Fbo, InstructionGroup
+
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+from huawei_pdf_reader.ui.stroke_layer import StrokeLayer
+
+
+def make_stroke(stroke_id: str, y: float) -> Stroke:
+    return Stroke(
+        id=stroke_id,
+        pen_type=PenType.BALLPOINT,
+        color="#FF0000",
+        width=6.0,
+        points=[StrokePoint(x=x, y=y, pressure=0.5, timestamp=0.0) for x in (10.0, 50.0, 90.0)],
+    )
+
+
+def painted_pixels(fbo: Fbo) -> int:
+    """纹理中不透明的像素数"""
+    fbo.draw()
+    return sum(1 for alpha in fbo.pixels[3::4] if alpha)
+
+
+@pytest.fixture
+def window():
+    EventLoop.ensure_window()
+    return EventLoop.window
+
+
+def test_rasterized_page_is_drawn(window):
+    target = Fbo(size=(100, 100))
+    layer = StrokeLayer(target)
+    layer.set_viewport((100, 100))
+    layer.show_page(1, [make_stroke("a", 30.0)])
+
+    # 只绘制承载图层的画布，页面纹理也随之渲染
+    assert painted_pixels(target) > 0
+    page_fbo = layer._pages[1].fbo
+    assert painted_pixels(page_fbo) > 0
+
+    # 增删笔画后纹理随之更新
+    before = painted_pixels(page_fbo)
+    layer.add_stroke(1, make_stroke("b", 70.0))
+    assert painted_pixels(page_fbo) > before
+    layer.remove_strokes(1, ["a", "b"])
+    assert painted_pixels(page_fbo) == 0
+
+
+def built_for(*strokes: Stroke) -> int:
+    """为这些笔画生成的指令数"""
+    return sum(len(StrokeLayer._build(stroke).children) for stroke in strokes)
+
+
+def stroke_groups(layer: StrokeLayer, page_num: int):
+    page = layer._pages[page_num]
+    return [page.strokes[stroke_id][1] for stroke_id in page.order]
+
+
+def test_show_page_rebuilds_only_changed_strokes(window):
+    layer = StrokeLayer(InstructionGroup())
+    a, b, c, d = (make_stroke(stroke_id, 10.0 * i) for i, stroke_id in enumerate("abcd"))
+    layer.show_page(1, [a, b, c])
+    assert layer.instructions_built == built_for(a, b, c)
+    groups = stroke_groups(layer, 1)
+
+    # 新增一条笔画只生成该笔画的指令
+    built = layer.instructions_built
+    layer.show_page(1, [a, b, c, d])
+    assert layer.instructions_built - built == built_for(d)
+    assert stroke_groups(layer, 1)[:3] == groups
+
+    # 删除一条笔画不生成指令，其余指令组保持不变
+    built = layer.instructions_built
+    layer.show_page(1, [a, c, d])
+    assert layer.instructions_built == built
+    assert layer._pages[1].order == ["a", "c", "d"]
+    assert stroke_groups(layer, 1)[:2] == [groups[0], groups[2]]
+    assert layer._pages[1].group.children == stroke_groups(layer, 1)
+
+    # 同一ID替换为新对象时只重建该笔画
+    replaced = make_stroke("c", 55.0)
+    layer.show_page(1, [a, replaced, d])
+    assert layer.instructions_built - built == built_for(replaced)
+    assert stroke_groups(layer, 1)[0] is groups[0]
+
+
+def test_page_switch_reuses_cached_groups(window):
+    layer = StrokeLayer(InstructionGroup())
+    first = [make_stroke("a", 10.0), make_stroke("b", 20.0)]
+    second = [make_stroke("c", 30.0)]
+    layer.show_page(1, first)
+    groups = stroke_groups(layer, 1)
+    layer.show_page(2, second)
+
+    built = layer.instructions_built
+    layer.show_page(1, first)
+    layer.show_page(2, second)
+    assert layer.instructions_built == built
+    assert stroke_groups(layer, 1) == groups
+    assert layer.current_page == 2
@@ -0,0 +1,169 @@
+"""
+笔画点列式存储单元测试
+"""
+
+import json
+import sqlite3
+import sys
+import tracemalloc
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+from hypothesis import given, settings, strategies as st
+
+from huawei_pdf_reader.database import Database
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint, StrokePoints
+
+
+finite_floats = st.floats(allow_nan=False, allow_infinity=False)
+
+
+def sample_points(count: int) -> StrokePoints:
+    points = StrokePoints()
+    for i in range(count):
+        points.append_sample(100.0 + i * 0.37, 200.0 - i * 0.21, 0.5, 1700000000.0 + i * 0.008)
+    return points
+
+
+class TestStrokePoints:
+    """笔画点列式存储"""
+
+    def test_samples_are_compact(self):
+        """实时采样每个点占16字节，内存至少比对象列表少5倍"""
+        count = 10000
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        columns = sample_points(count)
+        columnar = tracemalloc.get_traced_memory()[0] - before
+        before = tracemalloc.get_traced_memory()[0]
+        objects = list(columns)
+        listed = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+
+        assert columns.nbytes == count * 16
+        assert listed >= 5 * columnar
+        assert len(objects) == count
+
+    def test_sample_precision(self):
+        """采样点坐标为 float32 精度，时间戳精确到毫秒"""
+        points = StrokePoints()
+        points.append_sample(10.123456789, 20.5, 0.3, 1000.0)
+        points.append_sample(11.0, 21.0, 0.4, 1000.0123)
+
+        assert abs(points[0].x - 10.123456789) < 1e-5
+        assert points[1].timestamp == 1000.012
+        assert points.xs.typecode == "f"
+
+    @given(st.lists(st.tuples(finite_floats, finite_floats, finite_floats, finite_floats), max_size=20))
+    @settings(max_examples=100)
+    def test_exact_values_round_trip(self, values):
+        """通过 StrokePoint 写入的值精确保存，二进制往返不变"""
+        originals = [StrokePoint(x=x, y=y, pressure=p, timestamp=t) for x, y, p, t in values]
+        points = StrokePoints(originals)
+
+        assert list(points) == originals
+        assert StrokePoints.from_bytes(points.to_bytes()) == originals
+        assert points.to_dicts() == [p.to_dict() for p in originals]
+
+    def test_sequence_operations(self):
+        """列表操作与 StrokePoint 列表行为一致"""
+        originals = [StrokePoint(x=float(i), y=i * 0.1, pressure=0.5, timestamp=i / 3) for i in range(6)]
+        points = StrokePoints(originals)
+        expected = list(originals)
+
+        new_point = StrokePoint(x=-1.5, y=2.25, pressure=1.0, timestamp=99.0)
+        for target in (points, expected):
+            target[1] = new_point
+            del target[2]
+            target.insert(0, new_point)
+            target.append(new_point)
+            del target[-3:-1]
+
+        assert points == expected
+        assert points[-1] == expected[-1]
+        assert points[1:3] == expected[1:3]
+        assert points.copy() == expected
+        assert new_point in points
+
+    def test_stroke_converts_point_lists(self):
+        """Stroke 构造时将点列表转换为列式存储"""
+        stroke = Stroke(id="s", pen_type=PenType.PENCIL, color="#000000", width=2.0,
+                        points=[StrokePoint(x=1.0, y=2.0, pressure=0.5, timestamp=3.0)])
+
+        assert isinstance(stroke.points, StrokePoints)
+        assert Stroke.from_bytes(stroke.to_bytes()) == stroke
+        assert Stroke.from_dict(stroke.to_dict()) == stroke
+
+    @given(
+        samples=st.lists(
+            st.tuples(
+                st.floats(min_value=-1e4, max_value=1e4),
+                st.floats(min_value=-1e4, max_value=1e4),
+                st.floats(min_value=0.0, max_value=1.0),
+                # 包含早于首个点、需要升级时间戳列的采样
+                st.floats(min_value=-5.0, max_value=60.0),
+            ),
+            max_size=40,
+        ),
+        split=st.integers(min_value=0, max_value=40),
+    )
+    @settings(max_examples=100)
+    def test_extend_samples_matches_append_sample(self, samples, split):
+        """批量追加与逐点 append_sample 结果相同"""
+        expected = StrokePoints()
+        for x, y, pressure, t in samples:
+            expected.append_sample(x, y, pressure, 1700000000.0 + t)
+
+        points = StrokePoints()
+        for batch in (samples[:split], samples[split:]):
+            xs, ys, pressures, times = zip(*batch) if batch else ((), (), (), ())
+            points.extend_samples(xs, ys, pressures, [1700000000.0 + t for t in times])
+
+        assert points == expected
+        assert points.timestamps() == expected.timestamps()
+
+
+def test_engine_add_points_matches_add_point(monkeypatch):
+    """引擎批量添加采样与逐点添加结果相同（含绘制时平滑和压力截断）"""
+    from huawei_pdf_reader import annotation_engine
+    from huawei_pdf_reader.annotation_engine import AnnotationEngine
+    from huawei_pdf_reader.stroke_simplifier import StrokeSimplifier
+
+    monkeypatch.setattr(annotation_engine.time, "time", lambda: 1700000000.25)
+    xs = [i * 3.7 for i in range(30)]
+    ys = [(i % 7) * 11.3 for i in range(30)]
+    pressures = [-0.2 + i * 0.05 for i in range(30)]
+
+    single = AnnotationEngine(simplifier=StrokeSimplifier(smoothing=0.4))
+    single_id = single.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+    for x, y, pressure in zip(xs, ys, pressures):
+        single.add_point(single_id, x, y, pressure)
+
+    batched = AnnotationEngine(simplifier=StrokeSimplifier(smoothing=0.4))
+    batched_id = batched.start_stroke(PenType.BALLPOINT, "#000000", 2.0)
+    batched.add_points(batched_id, xs[:12], ys[:12], pressures[:12])
+    batched.add_points(batched_id, xs[12:], ys[12:], pressures[12:])
+
+    expected = single.end_stroke(single_id, simplify=False).points
+    assert batched.end_stroke(batched_id, simplify=False).points == expected
+    assert max(expected.pressures) == 1.0 and min(expected.pressures) == 0.0
+
+
+def test_database_reads_legacy_json_strokes(temp_db_path: Path):
+    """笔画表中以JSON保存的旧数据仍可读取"""
+    db = Database(temp_db_path)
+    stroke = Stroke(id="legacy", pen_type=PenType.MARKER, color="#ff0000", width=3.0,
+                    points=[StrokePoint(x=1.0, y=2.0, pressure=0.5, timestamp=3.0)])
+    packed = Stroke(id="packed", pen_type=PenType.MARKER, color="#ff0000", width=3.0,
+                    points=sample_points(3))
+    db.save_stroke_changes("doc", [(1, 1, packed)], [])
+    with sqlite3.connect(temp_db_path) as conn:
+        conn.execute(
+            "INSERT INTO strokes (id, document_id, page_num, seq, data) VALUES (?, ?, ?, ?, ?)",
+            ("legacy", "doc", 1, 0, json.dumps(stroke.to_dict())),
+        )
+
+    assert [s for _, _, s in db.get_strokes("doc")] == [stroke, packed]
@@ -0,0 +1,133 @@
+"""
+笔画网格化单元测试
+"""
+
+import math
+import random
+import sys
+from pathlib import Path
+
+# 添加 src 目录到 Python 路径
+src_path = Path(__file__).parent.parent.parent / "src"
+sys.path.insert(0, str(src_path))
+
+import pytest
+
+from huawei_pdf_reader.annotation_engine import AnnotationEngine
+from huawei_pdf_reader.models import PenType, Stroke, StrokePoint
+from huawei_pdf_reader.stroke_tessellator import (
+    HAS_NUMPY, VERTEX_SIZE, pen_style, stroke_mesh, tessellate_stroke,
+)
+
+
+def make_stroke(coords, pressures=None, pen_type=PenType.FOUNTAIN, width=4.0) -> Stroke:
+    pressures = pressures or [0.5] * len(coords)
+    return Stroke(
+        id="s",
+        pen_type=pen_type,
+        color="#000000",
+        width=width,
+        points=[
+            StrokePoint(x=x, y=y, pressure=p, timestamp=0.0)
+            for (x, y), p in zip(coords, pressures)
+        ],
+    )
+
+
+def vertex_pairs(mesh):
+    """每个笔画点对应的 (左侧顶点, 右侧顶点)"""
+    v = mesh.vertices
+    return [
+        ((v[i], v[i + 1]), (v[i + VERTEX_SIZE], v[i + VERTEX_SIZE + 1]))
+        for i in range(0, len(v), 2 * VERTEX_SIZE)
+    ]
+
+
+VECTORIZE_MODES = [False, pytest.param(True, marks=pytest.mark.skipif(
+    not HAS_NUMPY, reason="NumPy is not installed"))]
+
+
+@pytest.mark.parametrize("vectorize", VECTORIZE_MODES)
+class TestTessellateStroke:
+    """网格生成"""
+
+    def test_width_follows_pressure(self, vectorize):
+        pressures = [0.0, 0.25, 0.5, 0.75, 1.0]
+        stroke = make_stroke([(i * 10.0, 0.0) for i in range(5)], pressures)
+        mesh = tessellate_stroke(stroke, vectorize=vectorize)
+
+        style = pen_style(PenType.FOUNTAIN)
+        widths = [math.dist(left, right) for left, right in vertex_pairs(mesh)]
+        assert widths == pytest.approx([4.0 * style.width_multiplier(p) for p in pressures])
+        assert mesh.vertex_count == 10
+
+    def test_constant_width_styles(self, vectorize):
+        """荧光笔和关闭压感时宽度恒定"""
+        coords = [(i * 10.0, (i % 2) * 3.0) for i in range(6)]
+        pressures = [0.1, 0.9, 0.3, 1.0, 0.0, 0.6]
+        highlighter = tessellate_stroke(
+            make_stroke(coords, pressures, PenType.HIGHLIGHTER), vectorize=vectorize
+        )
+        plain = tessellate_stroke(make_stroke(coords, pressures), False, vectorize=vectorize)
+
+        for mesh in (highlighter, plain):
+            left, right = vertex_pairs(mesh)[0]
+            assert math.dist(left, right) == pytest.approx(4.0)
+        assert highlighter.opacity < 1.0
+
+    def test_duplicate_and_single_points(self, vectorize):
+        stroke = make_stroke([(5.0, 5.0), (5.0, 5.0), (15.0, 5.0), (15.0, 5.0)])
+        assert tessellate_stroke(stroke, vectorize=vectorize).vertex_count == 4
+
+        dot = tessellate_stroke(make_stroke([(5.0, 5.0)] * 3), vectorize=vectorize)
+        assert dot.vertex_count == 4
+        xs = dot.vertices[0::VERTEX_SIZE]
+        assert min(xs) < 5.0 < max(xs)
+
+
+@pytest.mark.skipif(not HAS_NUMPY, reason="NumPy is not installed")
+def test_vectorized_matches_python():
+    rng = random.Random(7)
+    for pen_type in PenType:
+        coords = [(rng.uniform(0, 500), rng.uniform(0, 500)) for _ in range(200)]
+        # 加入重合点和原路返回的急转弯
+        coords[50] = coords[49]
+        coords[100] = coords[98]
+        pressures = [rng.random() for _ in coords]
+        stroke = make_stroke(coords, pressures, pen_type)
+        for pressure_sensitive in (True, False):
+            expected = tessellate_stroke(stroke, pressure_sensitive, vectorize=False)
+            actual = tessellate_stroke(stroke, pressure_sensitive, vectorize=True)
+            assert list(actual.vertices) == pytest.approx(list(expected.vertices), abs=1e-3)
+
+
+def test_mesh_cached_on_stroke():
+    engine = AnnotationEngine()
+    stroke = make_stroke([(i * 10.0, 0.0) for i in range(5)])
+    engine.add_stroke_to_page(1, stroke)
+
+    mesh = stroke_mesh(stroke)
+    assert stroke_mesh(stroke) is mesh
+    assert stroke_mesh(stroke, pressure_sensitive=False) is not mesh
+    # 缓存不影响笔画比较
+    assert stroke == make_stroke([(i * 10.0, 0.0) for i in range(5)])
+
+    stroke.points[2] = StrokePoint(x=20.0, y=30.0, pressure=0.5, timestamp=0.0)
+    engine.mark_stroke_dirty(stroke.id)
+    assert stroke.render_cache is None
+    assert stroke_mesh(stroke).vertices != mesh.vertices
+
+
+def test_chunks_rebuild_strip():
+    """分段后的三角形带与完整网格包含相同的三角形"""
+    mesh = tessellate_stroke(make_stroke([(i * 3.0, (i % 5) * 2.0) for i in range(40)]))
+
+    def triangles(vertices):
+        points = [tuple(vertices[i:i + 2]) for i in range(0, len(vertices), VERTEX_SIZE)]
+        return [frozenset(points[i:i + 3]) for i in range(len(points) - 2)]
+
+    rebuilt = []
+    for vertices, indices in mesh.chunks(max_vertices=10):
+        assert len(indices) <= 10
+        rebuilt.extend(triangles(vertices))
+    assert rebuilt == triangles(mesh.vertices)